@@ -1,3 +1,4 @@
+import os
 import sys
 import uuid
 import signal
@@ -10,6 +11,21 @@ from core.http_server import SimpleHttpServer
 from core.websocket_server import WebSocketServer
 from core.utils.util import check_ffmpeg_installed
 from core.utils.gc_manager import get_gc_manager
+from core.providers.tools.server_mcp.mcp_pool import get_mcp_pool
+from core.utils.synthesis_loop import init_synthesis_loops, shutdown_synthesis_loops
+from core.providers.llm.async_client import close_async_llm_clients
+from core.providers.asr.session_pool import close_session_pools
+from core.utils.opus_asset_cache import get_opus_asset_cache
+from core.handle.reportHandle import get_chat_history_reporter
+from config.manage_api_client import manage_api_http_safe_close
+from core.utils.cache.manager import cache_manager
+from core.utils.shared_store import get_shared_store
+from core.supervisor import (
+    WorkerSupervisor,
+    get_worker_count,
+    get_configured_worker_count,
+    supports_reuse_port,
+)
 
 TAG = __name__
 logger = setup_logging()
@@ -43,7 +59,8 @@ async def monitor_stdin():
         await ainput()  # 异步等待输入，消费回车
 
 
-async def main():
+async def prepare_config() -> dict:
+    """加载配置并补全运行时参数，多进程模式下在 fork 之前执行一次，所有工作进程共用"""
     check_ffmpeg_installed()
     config = await load_config()
 
@@ -61,20 +78,6 @@ async def main():
     
     config["server"]["auth_key"] = auth_key
 
-    # 添加 stdin 监控任务
-    stdin_task = asyncio.create_task(monitor_stdin())
-
-    # 启动全局GC管理器（5分钟清理一次）
-    gc_manager = get_gc_manager(interval_seconds=300)
-    await gc_manager.start()
-
-    # 启动 WebSocket 服务器
-    ws_server = WebSocketServer(config)
-    ws_task = asyncio.create_task(ws_server.start())
-    # 启动 Simple http 服务器
-    ota_server = SimpleHttpServer(config)
-    ota_task = asyncio.create_task(ota_server.start())
-
     read_config_from_api = config.get("read_config_from_api", False)
     port = int(config["server"].get("http_port", 8003))
     if not read_config_from_api:
@@ -122,31 +125,124 @@ async def main():
         "=============================================================\n"
     )
 
+    if get_configured_worker_count(config) > 1 and not supports_reuse_port():
+        logger.bind(tag=TAG).warning("当前平台不支持SO_REUSEPORT，忽略workers.count，以单进程运行")
+    return config
+
+
+async def main(config: dict, worker_index: int = None, ready_event=None):
+    """
+    启动各项服务并阻塞到收到退出信号
+    worker_index 非空时作为多进程模式下的工作进程运行：与其他工作进程共享监听端口，
+    不监听标准输入，收到 SIGTERM 后先平滑下线再退出
+    """
+    # 共享存储：多进程时接管配额计数和热点缓存
+    shared_store = get_shared_store(config)
+    if shared_store.cross_process:
+        cache_manager.attach_shared_store(shared_store)
+
+    # 添加 stdin 监控任务
+    stdin_task = asyncio.create_task(monitor_stdin()) if worker_index is None else None
+
+    # 启动全局GC管理器（5分钟清理一次）
+    gc_manager = get_gc_manager(interval_seconds=300)
+    await gc_manager.start()
+
+    # 启动TTS合成事件循环
+    init_synthesis_loops(config.get("tts_synthesis_loops", 2))
+
+    # 后台预编码提示音等固定音频，播放时直接使用缓存的Opus帧
+    asyncio.create_task(asyncio.to_thread(get_opus_asset_cache().build))
+
+    # 启动 WebSocket 服务器
+    ws_server = WebSocketServer(config, worker_index=worker_index)
+    ws_task = asyncio.create_task(ws_server.start())
+    # 启动 Simple http 服务器
+    ota_server = SimpleHttpServer(config, worker_index=worker_index)
+    ota_task = asyncio.create_task(ota_server.start())
+
+    # 预热进程级服务端MCP连接池，避免首个设备连接时承担初始化耗时
+    mcp_pool = get_mcp_pool()
+    asyncio.create_task(mcp_pool.ensure_initialized())
+
+    read_config_from_api = config.get("read_config_from_api", False)
+
+    if ready_event is not None:
+        # 两个服务都开始监听后才通知主进程，滚动重启时旧进程在此之后才下线
+        while not (ws_server.started.is_set() and ota_server.started.is_set()):
+            if ws_task.done() or ota_task.done():
+                raise RuntimeError(f"工作进程 {worker_index} 启动服务失败")
+            await asyncio.sleep(0.1)
+        ready_event.set()
+        logger.bind(tag=TAG).info(f"工作进程 {worker_index} 已就绪 (pid={os.getpid()})")
+
     try:
         await wait_for_exit()  # 阻塞直到收到退出信号
+        if worker_index is not None:
+            drain_timeout = float(
+                (config.get("workers", {}) or {}).get("drain_timeout", 30) or 0
+            )
+            await ws_server.drain(drain_timeout)
     except asyncio.CancelledError:
         print("任务被取消，清理资源中...")
     finally:
         # 停止全局GC管理器
         await gc_manager.stop()
 
+        # 关闭服务端MCP连接池
+        try:
+            await asyncio.wait_for(mcp_pool.shutdown(), timeout=5)
+        except Exception:
+            pass
+
+        # 关闭TTS合成事件循环
+        await asyncio.to_thread(shutdown_synthesis_loops)
+
+        # 关闭LLM异步客户端的连接池
+        try:
+            await asyncio.wait_for(close_async_llm_clients(), timeout=5)
+        except Exception:
+            pass
+
+        # 关闭流式ASR预热会话
+        try:
+            await asyncio.wait_for(close_session_pools(), timeout=5)
+        except Exception:
+            pass
+
         # 取消所有任务（关键修复点）
-        stdin_task.cancel()
-        ws_task.cancel()
-        if ota_task:
-            ota_task.cancel()
+        tasks = [task for task in (stdin_task, ws_task, ota_task) if task]
+        for task in tasks:
+            task.cancel()
 
         # 等待任务终止（必须加超时）
         await asyncio.wait(
-            [stdin_task, ws_task, ota_task] if ota_task else [stdin_task, ws_task],
+            tasks,
             timeout=3.0,
             return_when=asyncio.ALL_COMPLETED,
         )
+
+        # 上报剩余的聊天记录并关闭manager-api连接池
+        if read_config_from_api:
+            await asyncio.to_thread(get_chat_history_reporter().drain)
+            manage_api_http_safe_close()
         print("服务器已关闭，程序退出。")
 
 
+def run_worker(config: dict, worker_index: int, ready_event):
+    """多进程模式下工作进程的入口（在 fork 出的子进程中执行）"""
+    # 终端的 Ctrl-C 会发给整个进程组，启动阶段忽略，由主进程统一通知各工作进程平滑下线
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    asyncio.run(main(config, worker_index, ready_event))
+
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        config = asyncio.run(prepare_config())
+        if get_worker_count(config) > 1:
+            WorkerSupervisor(config, run_worker).run()
+        else:
+            asyncio.run(main(config))
     except KeyboardInterrupt:
         print("手动中断，程序终止。")
@@ -81,6 +81,10 @@ async def get_config_from_api_async(config):
     # 如果服务器没有prompt_template，则从本地配置读取
     if not config_data.get("prompt_template"):
         config_data["prompt_template"] = config.get("prompt_template")
+    # 多进程部署与共享存储的配置以本地为准
+    for key in ("workers", "shared_store"):
+        if config.get(key):
+            config_data[key] = config[key]
     return config_data
 
 
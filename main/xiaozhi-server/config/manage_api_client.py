@@ -1,6 +1,9 @@
 import os
+import json
 import base64
-from typing import Optional, Dict
+import asyncio
+import threading
+from typing import AsyncIterator, Dict, Iterable, Optional
 
 import httpx
 
@@ -17,9 +20,15 @@ class DeviceBindException(Exception):
         super().__init__(f"设备绑定异常，绑定码: {bind_code}")
 
 
+# 音频base64编码时每次处理的原始字节数（必须是3的倍数，保证分段编码可直接拼接）
+REPORT_AUDIO_ENCODE_CHUNK = 48 * 1024
+
+
 class ManageApiClient:
     _instance = None
-    _async_clients = {}  # 为每个事件循环存储独立的客户端
+    _async_client = None  # 进程内唯一的客户端，只在专用事件循环上使用
+    _loop = None
+    _loop_lock = threading.Lock()
     _secret = None
 
     def __new__(cls, config):
@@ -46,39 +55,54 @@ class ManageApiClient:
         cls._secret = cls.config.get("secret")
         cls.max_retries = cls.config.get("max_retries", 6)  # 最大重试次数
         cls.retry_delay = cls.config.get("retry_delay", 10)  # 初始重试延迟(秒)
+        # 空闲连接保留时间(秒)，需小于manager-api端的空闲超时，避免复用已被服务端关闭的连接
+        cls.keepalive_expiry = float(cls.config.get("keepalive_expiry", 5))
+        cls.max_keepalive_connections = int(
+            cls.config.get("max_keepalive_connections", 20)
+        )
         # 不在这里创建 AsyncClient，延迟到实际使用时创建
-        cls._async_clients = {}
+        cls._async_client = None
 
     @classmethod
-    async def _ensure_async_client(cls):
-        """确保异步客户端已创建（为每个事件循环创建独立的客户端）"""
-        import asyncio
+    def get_loop(cls) -> asyncio.AbstractEventLoop:
+        """获取请求专用的常驻事件循环（首次调用时在守护线程中启动）"""
+        if cls._loop is None or cls._loop.is_closed():
+            with cls._loop_lock:
+                if cls._loop is None or cls._loop.is_closed():
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(
+                        target=cls._run_loop, args=(loop,), name="manage-api", daemon=True
+                    ).start()
+                    cls._loop = loop
+        return cls._loop
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
 
-        try:
-            loop = asyncio.get_running_loop()
-            loop_id = id(loop)
-
-            # 为每个事件循环创建独立的客户端
-            if loop_id not in cls._async_clients:
-                # 服务端可能主动关闭连接，httpx 连接池无法正确检测和清理
-                limits = httpx.Limits(
-                    max_keepalive_connections=0,  # 禁用 keep-alive，每次都新建连接
-                )
-                cls._async_clients[loop_id] = httpx.AsyncClient(
-                    base_url=cls.config.get("url"),
-                    headers={
-                        "User-Agent": f"PythonClient/2.0 (PID:{os.getpid()})",
-                        "Accept": "application/json",
-                        "Authorization": "Bearer " + cls._secret,
-                    },
-                    timeout=cls.config.get("timeout", 30),
-                    limits=limits,  # 使用限制
-                    trust_env=False,
-                )
-            return cls._async_clients[loop_id]
-        except RuntimeError:
-            # 如果没有运行中的事件循环，创建一个临时的
-            raise Exception("必须在异步上下文中调用")
+    @classmethod
+    async def _ensure_async_client(cls):
+        """确保异步客户端已创建（只在专用事件循环上调用，连接在所有请求间复用）"""
+        if cls._async_client is None or cls._async_client.is_closed:
+            # 空闲超过 keepalive_expiry 的连接在复用前丢弃；
+            # 仍可能遇到服务端刚好关闭的连接，由 _execute_async_request 立即重试一次
+            limits = httpx.Limits(
+                max_keepalive_connections=cls.max_keepalive_connections,
+                keepalive_expiry=cls.keepalive_expiry,
+            )
+            cls._async_client = httpx.AsyncClient(
+                base_url=cls.config.get("url"),
+                headers={
+                    "User-Agent": f"PythonClient/2.0 (PID:{os.getpid()})",
+                    "Accept": "application/json",
+                    "Authorization": "Bearer " + cls._secret,
+                },
+                timeout=cls.config.get("timeout", 30),
+                limits=limits,  # 使用限制
+                trust_env=False,
+            )
+        return cls._async_client
 
     @classmethod
     async def _async_request(cls, method: str, endpoint: str, **kwargs) -> Dict:
@@ -86,6 +110,10 @@ class ManageApiClient:
         # 确保客户端已创建
         client = await cls._ensure_async_client()
         endpoint = endpoint.lstrip("/")
+        # 流式请求体不能重放，每次请求（包括重试）都重新生成
+        content_factory = kwargs.pop("content_factory", None)
+        if content_factory is not None:
+            kwargs["content"] = content_factory()
         response = None
         try:
             response = await client.request(method, endpoint, **kwargs)
@@ -127,14 +155,27 @@ class ManageApiClient:
     @classmethod
     async def _execute_async_request(cls, method: str, endpoint: str, **kwargs) -> Dict:
         """带重试机制的异步请求执行器"""
-        import asyncio
+        # 所有请求都在专用事件循环上执行，其它事件循环（主循环、临时的asyncio.run）只等待结果
+        loop = cls.get_loop()
+        if asyncio.get_running_loop() is not loop:
+            future = asyncio.run_coroutine_threadsafe(
+                cls._execute_async_request(method, endpoint, **kwargs), loop
+            )
+            return await asyncio.wrap_future(future)
 
         retry_count = 0
+        stale_retried = False
 
         while retry_count <= cls.max_retries:
             try:
                 # 执行异步请求
                 return await cls._async_request(method, endpoint, **kwargs)
+            except httpx.RemoteProtocolError:
+                # 复用的空闲连接已被服务端关闭，立即换新连接重试一次
+                if stale_retried:
+                    raise
+                stale_retried = True
+                continue
             except Exception as e:
                 # 判断是否应该重试
                 if retry_count < cls.max_retries and cls._should_retry(e):
@@ -149,19 +190,34 @@ class ManageApiClient:
                     raise
 
     @classmethod
-    def safe_close(cls):
-        """安全关闭所有异步连接池"""
-        import asyncio
+    def _reset_after_fork(cls):
+        """fork 出的工作进程没有父进程的请求线程，丢弃继承的事件循环和连接池，使用时重新创建"""
+        cls._loop = None
+        cls._async_client = None
+        cls._loop_lock = threading.Lock()
 
-        for client in list(cls._async_clients.values()):
-            try:
-                asyncio.run(client.aclose())
-            except Exception:
-                pass
-        cls._async_clients.clear()
+    @classmethod
+    def safe_close(cls):
+        """安全关闭连接池并停止专用事件循环"""
+        loop = cls._loop
+        if loop is not None and not loop.is_closed():
+            if cls._async_client is not None:
+                try:
+                    asyncio.run_coroutine_threadsafe(
+                        cls._async_client.aclose(), loop
+                    ).result(5)
+                except Exception:
+                    pass
+            loop.call_soon_threadsafe(loop.stop)
+        cls._async_client = None
+        cls._loop = None
         cls._instance = None
 
 
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=ManageApiClient._reset_after_fork)
+
+
 async def get_server_config() -> Optional[Dict]:
     """获取服务器基础配置"""
     return await ManageApiClient._instance._execute_async_request(
@@ -220,25 +276,68 @@ async def generate_and_save_chat_title(session_id: str) -> Optional[Dict]:
         return None
 
 
+def _report_body(payload: Dict, audio_chunks: Iterable[bytes]):
+    """
+    生成聊天记录上报的JSON请求体，audioBase64 字段边读边编码，不在内存中生成完整的base64字符串
+
+    Returns:
+        (body_factory, content_length)
+    """
+    head = json.dumps(payload, ensure_ascii=False)[:-1].encode("utf-8")
+    head += b',"audioBase64":"'
+    tail = b'"}'
+    audio_len = sum(len(chunk) for chunk in audio_chunks)
+    content_length = len(head) + (audio_len + 2) // 3 * 4 + len(tail)
+
+    async def body() -> AsyncIterator[bytes]:
+        yield head
+        buffer = bytearray()
+        for chunk in audio_chunks:
+            buffer += chunk
+            if len(buffer) >= REPORT_AUDIO_ENCODE_CHUNK:
+                cut = len(buffer) - len(buffer) % 3
+                yield base64.b64encode(buffer[:cut])
+                del buffer[:cut]
+        if buffer:
+            yield base64.b64encode(buffer)
+        yield tail
+
+    return body, content_length
+
+
 async def report(
     mac_address: str, session_id: str, chat_type: int, content: str, audio, report_time
 ) -> Optional[Dict]:
-    """异步聊天记录上报"""
+    """
+    异步聊天记录上报
+
+    audio 可以是 bytes，也可以是按顺序拼接的字节块列表（如WAV头+音频帧），为空时不上报音频
+    """
     if not content or not ManageApiClient._instance:
         return None
+    payload = {
+        "macAddress": mac_address,
+        "sessionId": session_id,
+        "chatType": chat_type,
+        "content": content,
+        "reportTime": report_time,
+    }
     try:
+        if not audio:
+            payload["audioBase64"] = None
+            return await ManageApiClient._instance._execute_async_request(
+                "POST", "/agent/chat-history/report", json=payload
+            )
+        # 请求体可能因重试生成多次，先固定为列表
+        audio = [audio] if isinstance(audio, (bytes, bytearray, memoryview)) else list(audio)
+        body, content_length = _report_body(payload, audio)
         return await ManageApiClient._instance._execute_async_request(
             "POST",
-            f"/agent/chat-history/report",
-            json={
-                "macAddress": mac_address,
-                "sessionId": session_id,
-                "chatType": chat_type,
-                "content": content,
-                "reportTime": report_time,
-                "audioBase64": (
-                    base64.b64encode(audio).decode("utf-8") if audio else None
-                ),
+            "/agent/chat-history/report",
+            content_factory=body,
+            headers={
+                "Content-Type": "application/json",
+                "Content-Length": str(content_length),
             },
         )
     except Exception as e:
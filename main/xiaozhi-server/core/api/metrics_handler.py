@@ -0,0 +1,134 @@
+import hmac
+
+from aiohttp import web
+from core.api.base_handler import BaseHandler
+from core.utils import intent_cache as intent_cache_module
+from core.utils import tts_cache as tts_cache_module
+from core.utils import provider_registry as provider_registry_module
+from core.utils.audio_pacing import get_pacing_scheduler
+from core.utils.tracing import get_tracer
+from core.providers.asr.session_pool import get_session_pool_stats
+from core.providers.asr.batch_decoder import get_batch_decode_stats
+
+TAG = __name__
+
+METRIC_PREFIX = "xiaozhi"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float))
+
+
+class MetricsHandler(BaseHandler):
+    """
+    以 Prometheus 文本格式输出阶段耗时直方图与各组件的运行状态
+    请求需携带 Authorization: Bearer <server.auth_key>
+    """
+
+    def __init__(self, config: dict):
+        super().__init__(config)
+        self.tracer = get_tracer(config)
+        self.auth_key = (config.get("server", {}) or {}).get("auth_key", "")
+
+    def _verify_auth(self, request) -> bool:
+        auth_header = request.headers.get("Authorization", "")
+        if not self.auth_key or not auth_header.startswith("Bearer "):
+            return False
+        return hmac.compare_digest(auth_header[7:].encode(), str(self.auth_key).encode())
+
+    async def handle_get(self, request):
+        if not self._verify_auth(request):
+            response = web.Response(text="# unauthorized\n", status=401)
+            self._add_cors_headers(response)
+            return response
+        try:
+            body = "\n".join(self.render()) + "\n"
+            response = web.Response(
+                body=body.encode("utf-8"),
+                headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+            )
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"生成指标失败: {e}")
+            response = web.Response(text=f"# error: {e}\n", status=500)
+        self._add_cors_headers(response)
+        return response
+
+    def render(self) -> list:
+        lines = []
+        self._render_latency(lines)
+        self._render_components(lines)
+        return lines
+
+    def _render_latency(self, lines: list):
+        name = f"{METRIC_PREFIX}_stage_latency_seconds"
+        snapshots = self.tracer.get_snapshots()
+        lines.append(f"# HELP {name} 每轮对话各阶段耗时（距上一阶段）及工具调用、记忆查询耗时")
+        lines.append(f"# TYPE {name} summary")
+        for stage, provider, snapshot in snapshots:
+            labels = {"stage": stage, "provider": provider}
+            for quantile, value in snapshot["quantiles"].items():
+                quantile_labels = dict(labels, quantile=quantile)
+                lines.append(f"{name}{_labels(quantile_labels)} {value:.6f}")
+            lines.append(f"{name}_sum{_labels(labels)} {snapshot['sum']:.6f}")
+            lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+        lines.append(f"# HELP {name}_max 各阶段的最大耗时")
+        lines.append(f"# TYPE {name}_max gauge")
+        for stage, provider, snapshot in snapshots:
+            labels = {"stage": stage, "provider": provider}
+            lines.append(f"{name}_max{_labels(labels)} {snapshot['max']:.6f}")
+
+        turns = f"{METRIC_PREFIX}_turns_total"
+        lines.append(f"# HELP {turns} 已追踪的对话轮次")
+        lines.append(f"# TYPE {turns} counter")
+        lines.append(f'{turns}{{status="completed"}} {self.tracer.turns_completed}')
+        lines.append(f'{turns}{{status="incomplete"}} {self.tracer.turns_incomplete}')
+
+    def _render_components(self, lines: list):
+        pacing = get_pacing_scheduler().get_metrics()
+        connections = pacing.pop("connections", {})
+        jitter = [stats.get("max_ms", 0) for stats in connections.values()]
+        pacing["connections"] = len(connections)
+        pacing["jitter_max_ms"] = max(jitter) if jitter else 0
+        self._render_gauges(lines, "pacing", {"": pacing})
+
+        # 只读取已创建的实例，不因为访问指标而初始化缓存
+        intent_cache = intent_cache_module._intent_cache
+        if intent_cache is not None:
+            self._render_gauges(lines, "intent_cache", {"": intent_cache.get_stats()})
+        tts_cache = tts_cache_module._tts_cache
+        if tts_cache:
+            self._render_gauges(lines, "tts_cache", {"": tts_cache.get_stats()})
+
+        provider_registry = provider_registry_module._provider_registry
+        if provider_registry is not None:
+            self._render_gauges(
+                lines, "provider_registry", provider_registry.get_stats(), "kind"
+            )
+
+        self._render_gauges(lines, "asr_session_pool", get_session_pool_stats(), "pool")
+        self._render_gauges(lines, "asr_batch_decode", get_batch_decode_stats(), "worker")
+
+    def _render_gauges(self, lines: list, component: str, groups: dict, label: str = None):
+        """groups 为 {标签值: {指标名: 数值}}，标签值为空时不带标签"""
+        series = {}
+        for group, stats in groups.items():
+            for key, value in (stats or {}).items():
+                if not _is_number(value):
+                    continue
+                labels = {label: group} if label and group else {}
+                series.setdefault(key, []).append((labels, value))
+        for key, values in series.items():
+            name = f"{METRIC_PREFIX}_{component}_{key}"
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in values:
+                lines.append(f"{name}{_labels(labels)} {float(value):g}")
@@ -12,6 +12,7 @@ from aiohttp import web
 from core.auth import AuthManager
 from core.utils.util import get_local_ip, get_vision_url
 from core.api.base_handler import BaseHandler
+from core.supervisor import get_device_affinity_port
 
 TAG = __name__
 
@@ -177,7 +178,10 @@ class OTAHandler(BaseHandler):
             # Distinguish ports:
             # - websocket_port is used to construct websocket URL (server["port"])
             # - http_port is used to construct OTA download URLs (server["http_port"])
-            websocket_port = int(server_config.get("port", 8000))
+            # 多进程模式开启设备亲和时，按device-id下发固定工作进程的端口
+            websocket_port = get_device_affinity_port(self.config, device_id) or int(
+                server_config.get("port", 8000)
+            )
             http_port = int(server_config.get("http_port", 8003))
             local_ip = get_local_ip()
 
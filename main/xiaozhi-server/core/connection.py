@@ -26,8 +26,10 @@ from core.utils.modules_initialize import (
     initialize_modules,
     initialize_tts,
     initialize_asr,
+    create_llm,
 )
-from core.handle.reportHandle import report, enqueue_tool_report
+from core.utils.provider_registry import get_provider_registry
+from core.handle.reportHandle import enqueue_tool_report, flush_reports
 from core.providers.tts.default import DefaultTTS
 from concurrent.futures import ThreadPoolExecutor
 from core.utils.dialogue import Message, Dialogue
@@ -44,7 +46,19 @@ from config.manage_api_client import DeviceNotFoundException, DeviceBindExceptio
 from core.utils.prompt_manager import PromptManager
 from core.utils.voiceprint_provider import VoiceprintProvider
 from core.utils.util import get_system_error_response
+from core.utils.pipeline import (
+    is_pipeline_enabled,
+    get_shared_executor,
+    cancel_tasks,
+)
 from core.utils import textUtils
+from core.utils.tracing import (
+    get_tracer,
+    trace_awaitable,
+    trace_end_session,
+    trace_mark,
+    trace_span,
+)
 
 
 TAG = __name__
@@ -117,15 +131,36 @@ class ConnectionHandler:
         self.client_is_speaking = False
         self.client_listen_mode = "auto"
         self.client_aec = False  # 是否启用了服务端AEC
+        # 服务端AEC：下发音频的参考帧缓存，首次下发音频时创建
+        self.aec_engine = None
+        # AEC计算是否提交到共享线程池，避免占用事件循环
+        self.aec_offload = str(
+            (self.config.get("aec", {}) or {}).get("offload", False)
+        ).lower() in ("true", "1", "yes")
+
+        # 本轮对话的分阶段耗时追踪，VAD判定说话结束时创建
+        self.turn_trace = None
+        # 上一帧的 client_voice_stop，用于识别说话结束的那一帧
+        self.traced_voice_stop = False
+        get_tracer(self.config)
 
         # 线程任务相关
         self.loop = None  # 在 handle_connection 中获取运行中的事件循环
         self.stop_event = threading.Event()
-        self.executor = ThreadPoolExecutor(max_workers=5)
+        # 异步流水线模式下使用进程级共享线程池，连接不再单独创建线程
+        self.pipeline_enabled = is_pipeline_enabled(self.config)
+        if self.pipeline_enabled:
+            self.executor = get_shared_executor(self.config)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=5)
 
-        # 添加上报线程池
-        self.report_queue = queue.Queue()
-        self.report_thread = None
+        # 当前对话轮次的任务，打断时用于取消正在读取的LLM流
+        self.llm_task = None
+        # 后台小任务（如情绪表情）需保留引用，避免未完成即被回收
+        self._background_tasks = set()
+        self._llm_streaming = False
+
+        # 聊天记录由进程级上报服务统一批量上报（见 core/handle/reportHandle.py）
         # 未来可以通过修改此处，调节asr的上报和tts的上报，目前默认都开启
         self.report_asr_enable = self.read_config_from_api
         self.report_tts_enable = self.read_config_from_api
@@ -139,6 +174,12 @@ class ConnectionHandler:
         self.llm = _llm
         self.memory = _memory
         self.intent = _intent
+        # 本连接在提供者注册表中持有的共享实例租约，连接关闭时归还
+        self.provider_registry = get_provider_registry(config)
+        self.provider_leases = []
+        # 直接复用的服务端公共组件同样持有租约，配置更新后旧实例要等本连接关闭才释放
+        for shared in (_vad, _asr, _llm, _memory, _intent):
+            self.provider_registry.lease_instance(shared, self.provider_leases)
 
         # 为每个连接单独管理声纹识别
         self.voiceprint_provider = None
@@ -163,7 +204,7 @@ class ConnectionHandler:
         self.system_introduced_speakers = set()  # 已在 system 注入过身份的说话人，控制 system 身份只首轮出现
 
         # llm相关变量
-        self.dialogue = Dialogue()
+        self.dialogue = Dialogue.from_config(self.config)
 
         # tts相关变量
         self.sentence_id = None
@@ -236,9 +277,6 @@ class ConnectionHandler:
             # 启动超时检查任务
             self.timeout_task = asyncio.create_task(self._check_timeout())
 
-            # 启动AEC缓存清理任务
-            self._aec_cache_cleanup_task = asyncio.create_task(self._check_aec_cache_expiry())
-
             self.welcome_msg = self.config["xiaozhi"]
             self.welcome_msg["session_id"] = self.session_id
 
@@ -295,7 +333,7 @@ class ConnectionHandler:
                         except Exception:
                             pass
 
-                threading.Thread(target=generate_title_task, daemon=True).start()
+                self._run_detached(generate_title_task)
 
             # 守护线程2：走老流程记忆保存（仅记忆，不含标题）
             if self.memory:
@@ -319,7 +357,7 @@ class ConnectionHandler:
                             pass
 
                 # 启动线程保存记忆，不等待完成
-                threading.Thread(target=save_memory_task, daemon=True).start()
+                self._run_detached(save_memory_task)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"保存记忆失败: {e}")
         finally:
@@ -331,6 +369,13 @@ class ConnectionHandler:
                     f"保存记忆后关闭连接失败: {close_error}"
                 )
 
+    def _run_detached(self, func):
+        """执行不需要等待结果的后台任务，异步流水线模式下提交到共享线程池"""
+        if self.pipeline_enabled:
+            get_shared_executor(self.config).submit(func)
+        else:
+            threading.Thread(target=func, daemon=True).start()
+
     async def _discard_message_with_bind_prompt(self):
         """丢弃消息并检查是否需要播放绑定提示"""
         current_time = time.time()
@@ -400,8 +445,13 @@ class ConnectionHandler:
                 return True
 
             # AEC处理：如果timestamp>0且启用了AEC
-            if timestamp > 0 and self.client_aec:
-                pcm_frame = self._apply_aec(timestamp, pcm_frame)
+            if timestamp > 0 and self.client_aec and self.aec_engine is not None:
+                if self.aec_offload:
+                    pcm_frame = await self.loop.run_in_executor(
+                        get_shared_executor(), self._apply_aec, timestamp, pcm_frame
+                    )
+                else:
+                    pcm_frame = self._apply_aec(timestamp, pcm_frame)
 
             self.asr_audio_queue.put(pcm_frame)
             return True
@@ -412,116 +462,11 @@ class ConnectionHandler:
         return False
 
     def _apply_aec(self, timestamp: int, pcm_frame: bytes) -> bytes:
-        """应用AEC处理 - 综合算法：互相关延迟估计 + Wiener滤波 + 频谱减法"""
+        """应用AEC处理 - 对数功率谱匹配参考帧 + 频域谱减法"""
         try:
-            if not pcm_frame or len(pcm_frame) == 0:
-                return pcm_frame
-
-            if not hasattr(self, "aec_audio_cache") or not self.aec_audio_cache:
-                return pcm_frame
-
-            mic_audio = np.frombuffer(pcm_frame, dtype=np.int16).astype(np.float32)
-            mic_rms = np.sqrt(np.mean(mic_audio ** 2))
-
-            if mic_rms < 100:
-                return pcm_frame
-
-            sorted_timestamps = sorted(self.aec_audio_cache.keys())
-            if len(sorted_timestamps) < 2:
-                return pcm_frame
-
-            # ========== 匹配参考帧（对数功率谱匹配） ==========
-            n = len(mic_audio)
-
-            # 找最接近的timestamp作为起点
-            closest_idx = min(range(len(sorted_timestamps)), key=lambda i: abs(sorted_timestamps[i] - timestamp))
-
-            # 预计算 mic_audio 的对数功率谱（循环内共用，避免重复FFT）
-            mic_window = np.hanning(n)
-            mic_fft = np.fft.rfft(mic_audio * mic_window)
-            mic_psd = np.abs(mic_fft) ** 2
-            mic_log_psd = 10 * np.log10(mic_psd + 1e-8)
-            mic_P_xx = np.dot(mic_log_psd, mic_log_psd)
-
-            # 用对数功率谱匹配找最佳帧：前后各找2帧
-            best_corr = -1
-            best_ref_idx = closest_idx
-            best_ref_rms = 0.0
-
-            for offset in range(-2, 3):  # T-2, T-1, T, T+1, T+2
-                test_idx = closest_idx + offset
-                if test_idx < 0 or test_idx >= len(sorted_timestamps):
-                    continue
-                test_ts = sorted_timestamps[test_idx]
-                test_ref = np.frombuffer(self.aec_audio_cache[test_ts], dtype=np.int16).astype(np.float32)
-                test_ref_rms = np.sqrt(np.mean(test_ref ** 2))
-                if test_ref_rms < 50:
-                    continue
-
-                # 对数功率谱相关性
-                test_window = np.hanning(len(test_ref))
-                test_fft = np.fft.rfft(test_ref * test_window)
-                test_psd = np.abs(test_fft) ** 2
-                test_log_psd = 10 * np.log10(test_psd + 1e-8)
-                P_xy = np.dot(mic_log_psd, test_log_psd)
-                P_yy = np.dot(test_log_psd, test_log_psd)
-                corr = abs(P_xy) / (np.sqrt(mic_P_xx) * np.sqrt(P_yy) + 1e-8)
-
-                if corr > best_corr:
-                    best_corr = corr
-                    best_ref_idx = test_idx
-                    best_ref_rms = test_ref_rms
-
-            best_ts = sorted_timestamps[best_ref_idx]
-            best_ref = np.frombuffer(self.aec_audio_cache[best_ts], dtype=np.int16).astype(np.float32)
-            ref_rms = best_ref_rms
-
-            if ref_rms < 50:
+            if not pcm_frame or self.aec_engine is None:
                 return pcm_frame
-
-            # 对齐参考信号（直接截取相同长度）
-            aligned_ref = best_ref[:n]
-            if len(aligned_ref) < n:
-                aligned_ref = np.pad(aligned_ref, (0, n - len(aligned_ref)))
-
-            # ========== 频域 AEC 处理（谱减法） ==========
-            # 时域信号经过声学路径后相位失真，导致时域相关性低且P_xy正负不定
-            # 频域幅度谱不受相位影响，对数功率谱相关性稳定在0.97+
-            # 公式：result_mag = max(|mic_fft| - |ref_fft| * scale * coef, 0)
-
-            mic_mag = np.abs(mic_fft)
-            mic_phase = np.angle(mic_fft)
-            ref_fft = np.fft.rfft(aligned_ref * np.hanning(n))
-            ref_mag = np.abs(ref_fft)
-
-            # 频域计算回声比例 scale
-            scale = np.sum(mic_mag * ref_mag) / (np.dot(ref_mag, ref_mag) + 1e-8)
-
-            # 自适应系数：根据scale和coh动态调整
-            # scale大（回声强）-> coef大；coh高（匹配准）-> coef大
-            raw_coef = 1.0 + scale * 3 + (best_corr - 0.97) * 30
-            coef = max(0.5, min(3.0, raw_coef))
-
-            # 谱减法（过减 + 半波整流）
-            echo_mag = ref_mag * scale * coef
-            result_mag = np.maximum(mic_mag - echo_mag * 1.5, mic_mag * 0.1)
-
-            # 保留相位重建信号
-            result_fft = result_mag * np.exp(1j * mic_phase)
-            output = np.fft.irfft(result_fft, n)
-
-            # 高置信度是纯回声时，再压一下确保VAD检测不到
-            if best_corr >= 0.97 and ref_rms > 500:
-                output = output * 0.3
-
-            # 后处理：限幅
-            output = np.clip(output, -32768, 32767)
-
-            # 转换为bytes
-            result = output.astype(np.int16).tobytes()
-
-            return result
-
+            return self.aec_engine.process(timestamp, pcm_frame)
         except Exception as e:
             self.logger.bind(tag=TAG).warning(f"[AEC] 处理失败: {e}")
             return pcm_frame
@@ -643,13 +588,15 @@ class ConnectionHandler:
             self._initialize_memory()
             """加载意图识别"""
             self._initialize_intent()
-            """初始化上报线程"""
-            self._init_report_threads()
             """更新系统提示词"""
             self._init_prompt_enhancement()
             """注入工具调用few-shot示例（仅function_call模式）"""
             self._inject_tool_call_fewshot()
 
+            # 初始化期间连接已关闭时，close 之后取得的租约在这里归还
+            if self.stop_event.is_set():
+                self.provider_registry.release_all(self.provider_leases)
+
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"实例化组件失败: {e}")
 
@@ -727,24 +674,11 @@ class ConnectionHandler:
 
         self.logger.bind(tag=TAG).debug("已注入工具调用 few-shot 示例")
 
-    def _init_report_threads(self):
-        """初始化ASR和TTS上报线程"""
-        if not self.read_config_from_api or self.need_bind:
-            return
-        if self.chat_history_conf == 0:
-            return
-        if self.report_thread is None or not self.report_thread.is_alive():
-            self.report_thread = threading.Thread(
-                target=self._report_worker, daemon=True
-            )
-            self.report_thread.start()
-            self.logger.bind(tag=TAG).info("TTS上报线程已启动")
-
     def _initialize_tts(self):
         """初始化TTS"""
         tts = None
         if not self.need_bind:
-            tts = initialize_tts(self.config)
+            tts = initialize_tts(self.config, self.provider_leases)
 
         if tts is None:
             tts = DefaultTTS(self.config, delete_audio_file=True)
@@ -764,7 +698,7 @@ class ConnectionHandler:
         else:
             # 如果公共ASR是远程服务，则初始化一个新实例
             # 因为远程ASR，涉及到websocket连接和接收线程，需要每个连接一个实例
-            asr = initialize_asr(self.config)
+            asr = initialize_asr(self.config, self.provider_leases)
 
         return asr
 
@@ -918,6 +852,7 @@ class ConnectionHandler:
                 init_tts,
                 init_memory,
                 init_intent,
+                self.provider_leases,
             )
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"初始化组件失败: {e}")
@@ -960,16 +895,14 @@ class ConnectionHandler:
                 "llm"
             ]
             if memory_llm_name and memory_llm_name in self.config["LLM"]:
-                # 如果配置了专用LLM，则创建独立的LLM实例
-                from core.utils import llm as llm_utils
-
+                # 如果配置了专用LLM，则使用独立的LLM实例（配置相同的连接共用）
                 memory_llm_config = self.config["LLM"][memory_llm_name]
                 memory_llm_type = memory_llm_config.get("type", memory_llm_name)
-                memory_llm = llm_utils.create_instance(
-                    memory_llm_type, memory_llm_config
+                memory_llm = create_llm(
+                    memory_llm_config, memory_llm_type, self.provider_leases
                 )
                 self.logger.bind(tag=TAG).info(
-                    f"为记忆总结创建了专用LLM: {memory_llm_name}, 类型: {memory_llm_type}"
+                    f"为记忆总结设置了专用LLM: {memory_llm_name}, 类型: {memory_llm_type}"
                 )
                 self.memory.set_llm(memory_llm)
             else:
@@ -1002,16 +935,14 @@ class ConnectionHandler:
             ]
 
             if intent_llm_name and intent_llm_name in self.config["LLM"]:
-                # 如果配置了专用LLM，则创建独立的LLM实例
-                from core.utils import llm as llm_utils
-
+                # 如果配置了专用LLM，则使用独立的LLM实例（配置相同的连接共用）
                 intent_llm_config = self.config["LLM"][intent_llm_name]
                 intent_llm_type = intent_llm_config.get("type", intent_llm_name)
-                intent_llm = llm_utils.create_instance(
-                    intent_llm_type, intent_llm_config
+                intent_llm = create_llm(
+                    intent_llm_config, intent_llm_type, self.provider_leases
                 )
                 self.logger.bind(tag=TAG).info(
-                    f"为意图识别创建了专用LLM: {intent_llm_name}, 类型: {intent_llm_type}"
+                    f"为意图识别设置了专用LLM: {intent_llm_name}, 类型: {intent_llm_type}"
                 )
                 self.intent.set_llm(intent_llm)
             else:
@@ -1031,7 +962,25 @@ class ConnectionHandler:
         # 更新系统prompt至上下文
         self.dialogue.update_system_message(self.prompt)
 
-    def chat(self, query, depth=0):
+    def _spawn_background(self, coro):
+        """在事件循环上启动后台任务并持有引用，任务结束后自动移除"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    def start_chat(self, query):
+        """在主事件循环上启动一轮对话（必须在主事件循环内调用）"""
+        self.llm_task = asyncio.create_task(self.achat(query))
+        return self.llm_task
+
+    def cancel_llm_stream(self):
+        """打断时取消正在读取LLM流的任务，上游HTTP流随之关闭"""
+        task = self.llm_task
+        if self._llm_streaming and task is not None and not task.done():
+            task.cancel()
+
+    async def achat(self, query, depth=0):
         # 保存当前任务的sentence_id到局部变量，避免被新任务覆盖
         current_sentence_id = None
 
@@ -1092,10 +1041,8 @@ class ConnectionHandler:
             memory_str = None
             # 仅当query非空（代表用户询问）时查询记忆
             if self.memory is not None and query:
-                future = asyncio.run_coroutine_threadsafe(
-                    self.memory.query_memory(query), self.loop
-                )
-                memory_str = future.result()
+                with trace_span("memory", self.memory):
+                    memory_str = await self.memory.query_memory(query)
 
             # 仅在该说话人首次出现时把身份注入 system，之后靠对话历史首轮保留，
             # 避免每轮在 system 重复出现名字诱导模型反复称呼
@@ -1107,7 +1054,7 @@ class ConnectionHandler:
 
             if self.intent_type == "function_call" and functions is not None:
                 # 使用支持functions的streaming接口
-                llm_responses = self.llm.response_with_functions(
+                llm_responses = self.llm.aresponse_with_functions(
                     self.session_id,
                     self.dialogue.get_llm_dialogue_with_memory(
                         memory_str, self.config.get("voiceprint", {}), speaker_for_system
@@ -1115,7 +1062,7 @@ class ConnectionHandler:
                     functions=functions,
                 )
             else:
-                llm_responses = self.llm.response(
+                llm_responses = self.llm.aresponse(
                     self.session_id,
                     self.dialogue.get_llm_dialogue_with_memory(
                         memory_str, self.config.get("voiceprint", {}), speaker_for_system
@@ -1131,10 +1078,12 @@ class ConnectionHandler:
         tool_calls_list = []  # 格式: [{"id": "", "name": "", "arguments": ""}]
         content_arguments = ""
         emotion_flag = True
+        self._llm_streaming = True
         try:
-            for response in llm_responses:
+            async for response in llm_responses:
                 if self.client_abort:
                     break
+                trace_mark(self, "llm_first_token", self.llm)
                 if self.intent_type == "function_call" and functions is not None:
                     content, tools_call = response
                     if "content" in response:
@@ -1180,10 +1129,7 @@ class ConnectionHandler:
                 # 在llm回复中获取情绪表情，一轮对话只在开头获取一次
                 if emotion_flag and content is not None and content.strip():
                     if (self.features or {}).get("emoji", True):
-                        asyncio.run_coroutine_threadsafe(
-                            textUtils.get_emotion(self, content),
-                            self.loop,
-                        )
+                        self._spawn_background(textUtils.get_emotion(self, content))
                     emotion_flag = False
 
                 if content is not None and len(content) > 0:
@@ -1197,6 +1143,15 @@ class ConnectionHandler:
                                 content_detail=content,
                             )
                         )
+        except asyncio.CancelledError:
+            # 被打断：上游流在下面的 finally 中关闭，已播报的内容写入对话历史后继续抛出，
+            # 让打断方的取消真正结束本轮对话
+            self.logger.bind(tag=TAG).info("LLM流式响应已被打断")
+            if response_message and not tool_call_flag:
+                text_buff = "".join(response_message)
+                self.tts.store_tts_text(current_sentence_id, text_buff)
+                self.dialogue.put(Message(role="assistant", content=text_buff))
+            raise
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"LLM stream processing error: {e}")
             self.tts.tts_text_queue.put(
@@ -1216,6 +1171,9 @@ class ConnectionHandler:
                     )
                 )
             return
+        finally:
+            self._llm_streaming = False
+            await llm_responses.aclose()
         # 处理function call
         if tool_call_flag:
             bHasError = False
@@ -1314,11 +1272,14 @@ class ConnectionHandler:
                     tool_input = json.loads(tool_call_data.get("arguments") or "{}")
                     enqueue_tool_report(self, tool_call_data['name'], tool_input)
 
-                    future = asyncio.run_coroutine_threadsafe(
-                        self.func_handler.handle_llm_function_call(
-                            self, tool_call_data
-                        ),
-                        self.loop,
+                    future = asyncio.ensure_future(
+                        trace_awaitable(
+                            "tool_call",
+                            tool_call_data["name"],
+                            self.func_handler.handle_llm_function_call(
+                                self, tool_call_data
+                            ),
+                        )
                     )
                     futures_with_data.append((future, tool_call_data, tool_input))
 
@@ -1329,7 +1290,10 @@ class ConnectionHandler:
 
                 for future, tool_call_data, tool_input in futures_with_data:
                     try:
-                        result = future.result(timeout=tool_call_timeout)
+                        # shield：超时只是不再等待，不取消工具本身（与原先的线程等待行为一致）
+                        result = await asyncio.wait_for(
+                            asyncio.shield(future), timeout=tool_call_timeout
+                        )
                         tool_results.append((result, tool_call_data))
                         # 使用公共方法上报工具调用结果
                         enqueue_tool_report(self, tool_call_data['name'], tool_input, str(result.result) if result.result else None, report_tool_call=False)
@@ -1348,7 +1312,7 @@ class ConnectionHandler:
 
                 # 统一处理工具调用结果
                 if tool_results:
-                    self._handle_function_result(tool_results, depth=depth, streamed_text=streamed_text)
+                    await self._handle_function_result(tool_results, depth=depth, streamed_text=streamed_text)
 
         # 存储对话内容
         if len(response_message) > 0:
@@ -1373,7 +1337,7 @@ class ConnectionHandler:
 
         return True
 
-    def _handle_function_result(self, tool_results, depth, streamed_text=""):
+    async def _handle_function_result(self, tool_results, depth, streamed_text=""):
         need_llm_tools = []
         record_tools = []
 
@@ -1479,41 +1443,7 @@ class ConnectionHandler:
                         )
                     )
 
-            self.chat(None, depth=depth + 1)
-
-    def _report_worker(self):
-        """聊天记录上报工作线程"""
-        while not self.stop_event.is_set():
-            try:
-                # 从队列获取数据，设置超时以便定期检查停止事件
-                item = self.report_queue.get(timeout=1)
-                if item is None:  # 检测毒丸对象
-                    break
-                try:
-                    # 检查线程池状态
-                    if self.executor is None:
-                        continue
-                    # 提交任务到线程池
-                    self.executor.submit(self._process_report, *item)
-                except Exception as e:
-                    self.logger.bind(tag=TAG).error(f"聊天记录上报线程异常: {e}")
-            except queue.Empty:
-                continue
-            except Exception as e:
-                self.logger.bind(tag=TAG).error(f"聊天记录上报工作线程异常: {e}")
-
-        self.logger.bind(tag=TAG).info("聊天记录上报线程已退出")
-
-    def _process_report(self, type, text, audio_data, report_time):
-        """处理上报任务"""
-        try:
-            # 执行异步上报（在事件循环中运行）
-            asyncio.run(report(self, type, text, audio_data, report_time))
-        except Exception as e:
-            self.logger.bind(tag=TAG).error(f"上报处理异常: {e}")
-        finally:
-            # 标记任务完成
-            self.report_queue.task_done()
+            await self.achat(None, depth=depth + 1)
 
     def clearSpeakStatus(self):
         self.client_is_speaking = False
@@ -1550,19 +1480,10 @@ class ConnectionHandler:
                     pass
                 self.timeout_task = None
 
-            # 取消AEC缓存清理任务
-            if hasattr(self, "_aec_cache_cleanup_task") and self._aec_cache_cleanup_task and not self._aec_cache_cleanup_task.done():
-                self._aec_cache_cleanup_task.cancel()
-                try:
-                    await self._aec_cache_cleanup_task
-                except asyncio.CancelledError:
-                    pass
-                self._aec_cache_cleanup_task = None
-
             # 清理AEC缓存
-            if hasattr(self, "aec_audio_cache"):
-                self.aec_audio_cache.clear()
-                self.aec_audio_cache_time.clear()
+            if self.aec_engine is not None:
+                self.aec_engine.clear()
+            trace_end_session(self)
 
             # 清理工具处理器资源
             if hasattr(self, "func_handler") and self.func_handler:
@@ -1577,6 +1498,12 @@ class ConnectionHandler:
             if self.stop_event:
                 self.stop_event.set()
 
+            # 取消异步流水线任务
+            await cancel_tasks([getattr(self, "asr_priority_task", None), self.llm_task])
+
+            # 立即上报本设备缓冲中的聊天记录
+            flush_reports(self)
+
             # 清空任务队列
             self.clear_queues()
 
@@ -1619,10 +1546,13 @@ class ConnectionHandler:
             if self.tts:
                 await self.tts.close()
             if self.asr:
+                # 共享 ASR 实例上属于本连接的识别会话需单独释放
+                if hasattr(self.asr, "release_conn_resources"):
+                    self.asr.release_conn_resources(self)
                 await self.asr.close()
 
-            # 最后关闭线程池（避免阻塞）
-            if self.executor:
+            # 最后关闭线程池（避免阻塞），共享线程池由进程统一管理
+            if self.executor and not self.pipeline_enabled:
                 try:
                     self.executor.shutdown(wait=False)
                 except Exception as executor_error:
@@ -1637,6 +1567,8 @@ class ConnectionHandler:
             # 确保停止事件被设置
             if self.stop_event:
                 self.stop_event.set()
+            # 归还共享实例的租约
+            self.provider_registry.release_all(self.provider_leases)
 
     def clear_queues(self):
         """清空所有任务队列"""
@@ -1649,7 +1581,6 @@ class ConnectionHandler:
             for q in [
                 self.tts.tts_text_queue,
                 self.tts.tts_audio_queue,
-                self.report_queue,
             ]:
                 if not q:
                     continue
@@ -1685,17 +1616,6 @@ class ConnectionHandler:
 
         self.logger.bind(tag=TAG).debug("All audio states reset.")
 
-    def chat_and_close(self, text):
-        """Chat with the user and then close the connection"""
-        try:
-            # Use the existing chat method
-            self.chat(text)
-
-            # After chat is complete, close the connection
-            self.close_after_chat = True
-        except Exception as e:
-            self.logger.bind(tag=TAG).error(f"Chat and close error: {str(e)}")
-
     async def _check_timeout(self):
         """检查连接超时"""
         try:
@@ -1727,26 +1647,6 @@ class ConnectionHandler:
         finally:
             self.logger.bind(tag=TAG).info("超时检查任务已退出")
 
-    async def _check_aec_cache_expiry(self):
-        """定期清理过期的AEC缓存"""
-        try:
-            while not self.stop_event.is_set():
-                if hasattr(self, "aec_audio_cache") and self.aec_audio_cache:
-                    current_time = time.time()
-                    expired_keys = [
-                        ts for ts, cache_time in list(self.aec_audio_cache_time.items())
-                        if current_time - cache_time > 120  # 2分钟过期
-                    ]
-                    for ts in expired_keys:
-                        self.aec_audio_cache.pop(ts, None)
-                        self.aec_audio_cache_time.pop(ts, None)
-                    if expired_keys:
-                        self.logger.bind(tag=TAG).debug(f"[AEC] 清理过期缓存 {len(expired_keys)} 条")
-                # 每30秒检查一次
-                await asyncio.sleep(30)
-        except Exception as e:
-            self.logger.bind(tag=TAG).error(f"AEC缓存清理任务出错: {e}")
-
     @staticmethod
     def _extract_direct_answer_response(arguments_str):
         """从 direct_answer 的参数中提取 response 值。
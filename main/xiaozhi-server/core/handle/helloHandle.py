@@ -1,3 +1,4 @@
+import os
 import time
 import json
 import uuid
@@ -11,6 +12,7 @@ from core.utils.dialogue import Message
 from core.utils.util import audio_to_data
 from core.providers.tts.dto.dto import SentenceType
 from core.utils.wakeup_word import WakeupWordsConfig
+from core.utils.shared_store import get_shared_store
 from core.handle.sendAudioHandle import sendAudioMessage, send_tts_message
 from core.utils.util import remove_punctuation_and_length, opus_datas_to_wav_bytes
 from core.providers.tools.device_mcp import MCPClient, send_mcp_initialize_message
@@ -102,8 +104,10 @@ async def checkWakeupWords(conn: "ConnectionHandler", text):
             "text": "我在这里哦！",
         }
 
-    # 获取音频数据
-    opus_packets = await audio_to_data(response.get("file_path"), use_cache=False)
+    # 获取音频数据（唤醒词回复文件会被覆盖更新，缓存按文件mtime自动失效）
+    opus_packets = await audio_to_data(
+        response.get("file_path"), sample_rate=conn.sample_rate
+    )
     # 播放唤醒词回复
     conn.client_abort = False
 
@@ -133,6 +137,15 @@ async def wakeupWordsResponse(conn: "ConnectionHandler"):
         if not await _wakeup_response_lock.acquire():
             return
 
+        # 获取当前音色
+        voice = getattr(conn.tts, "voice", "default")
+
+        # 多进程部署时同一音色的回复只由一个工作进程生成
+        if not get_shared_store().add(
+            "wakeup_words", str(voice), os.getpid(), ttl=WAKEUP_CONFIG["refresh_time"]
+        ):
+            return
+
         # 从预定义回复列表中随机选择一个回复
         result = random.choice(WAKEUP_CONFIG["responses"])
         if not result or len(result) == 0:
@@ -143,9 +156,6 @@ async def wakeupWordsResponse(conn: "ConnectionHandler"):
         if not tts_result:
             return
 
-        # 获取当前音色
-        voice = getattr(conn.tts, "voice", "default")
-
         # 使用链接的sample_rate
         wav_bytes = opus_datas_to_wav_bytes(tts_result, sample_rate=conn.sample_rate)
         file_path = wakeup_words_config.generate_file_path(voice)
@@ -10,13 +10,14 @@ from core.handle.abortHandle import handleAbortMessage
 from core.handle.intentHandler import handle_user_intent
 from core.utils.output_counter import check_device_output_limit
 from core.handle.sendAudioHandle import send_stt_message, SentenceType
+from core.utils.tracing import trace_vad_end
 
 TAG = __name__
 
 
 async def handleAudioMessage(conn: "ConnectionHandler", pcm_frame):
     # 当前片段是否有人说话
-    have_voice = conn.vad.is_vad(conn, pcm_frame)
+    have_voice = await conn.vad.is_vad_async(conn, pcm_frame)
     # 如果设备刚刚被唤醒，短暂忽略VAD检测
     if hasattr(conn, "just_woken_up") and conn.just_woken_up:
         have_voice = False
@@ -28,6 +29,11 @@ async def handleAudioMessage(conn: "ConnectionHandler", pcm_frame):
     if conn.client_aec and have_voice:
         if conn.client_is_speaking and conn.client_listen_mode != "manual":
             await handleAbortMessage(conn)
+    # VAD判定说话结束，开始本轮耗时追踪；只在标志由False变为True的那一帧记录
+    voice_stop = conn.client_voice_stop
+    if voice_stop and not conn.traced_voice_stop:
+        trace_vad_end(conn)
+    conn.traced_voice_stop = voice_stop
     # 设备长时间空闲检测，用于say goodbye
     await no_voice_close_connect(conn, have_voice)
     # 接收音频
@@ -77,8 +83,10 @@ async def startToChat(conn: "ConnectionHandler", text):
 
     # 如果当日的输出字数大于限定的字数
     if conn.max_output_size > 0:
-        if check_device_output_limit(
-            conn.headers.get("device-id"), conn.max_output_size
+        if await asyncio.to_thread(
+            check_device_output_limit,
+            conn.headers.get("device-id"),
+            conn.max_output_size,
         ):
             await max_out_size(conn)
             return
@@ -100,7 +108,7 @@ async def startToChat(conn: "ConnectionHandler", text):
     # 准备开始新会话
     conn.client_abort = False
 
-    conn.executor.submit(conn.chat, actual_text)
+    conn.start_chat(actual_text)
 
 
 async def no_voice_close_connect(conn: "ConnectionHandler", have_voice):
@@ -136,7 +144,7 @@ async def max_out_size(conn: "ConnectionHandler"):
     text = "不好意思，我现在有点事情要忙，明天这个时候我们再聊，约好了哦！明天不见不散，拜拜！"
     await send_stt_message(conn, text)
     file_path = "config/assets/max_output_size.wav"
-    opus_packets = await audio_to_data(file_path)
+    opus_packets = await audio_to_data(file_path, sample_rate=conn.sample_rate)
     conn.tts.tts_audio_queue.put((SentenceType.LAST, opus_packets, text))
     conn.close_after_chat = True
 
@@ -155,7 +163,7 @@ async def check_bind_device(conn: "ConnectionHandler"):
 
         # 播放提示音
         music_path = "config/assets/bind_code.wav"
-        opus_packets = await audio_to_data(music_path)
+        opus_packets = await audio_to_data(music_path, sample_rate=conn.sample_rate)
         conn.tts.tts_audio_queue.put((SentenceType.FIRST, opus_packets, text))
 
         # 逐个播放数字
@@ -163,7 +171,7 @@ async def check_bind_device(conn: "ConnectionHandler"):
             try:
                 digit = conn.bind_code[i]
                 num_path = f"config/assets/bind_code/{digit}.wav"
-                num_packets = await audio_to_data(num_path)
+                num_packets = await audio_to_data(num_path, sample_rate=conn.sample_rate)
                 conn.tts.tts_audio_queue.put((SentenceType.MIDDLE, num_packets, None))
             except Exception as e:
                 conn.logger.bind(tag=TAG).error(f"播放数字音频失败: {e}")
@@ -175,5 +183,5 @@ async def check_bind_device(conn: "ConnectionHandler"):
         text = f"没有找到该设备的版本信息，请正确配置 OTA地址，然后重新编译固件。"
         await send_stt_message(conn, text)
         music_path = "config/assets/bind_not_found.wav"
-        opus_packets = await audio_to_data(music_path)
+        opus_packets = await audio_to_data(music_path, sample_rate=conn.sample_rate)
         conn.tts.tts_audio_queue.put((SentenceType.LAST, opus_packets, text))
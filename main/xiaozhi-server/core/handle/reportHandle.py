@@ -1,99 +1,192 @@
 """
-TTS上报功能已集成到ConnectionHandler类中。
+聊天记录上报
 
-上报功能包括：
-1. 每个连接对象拥有自己的上报队列和处理线程
-2. 上报线程的生命周期与连接对象绑定
-3. 使用ConnectionHandler.enqueue_tts_report方法进行上报
-
-具体实现请参考core/connection.py中的相关代码。
+进程内只有一个上报服务（ChatHistoryReporter），运行在 manager-api 客户端的专用事件循环上：
+连接通过 enqueue_asr_report / enqueue_tts_report / enqueue_tool_report 提交记录，
+记录按设备缓冲，达到批量大小或超过刷新间隔后按提交顺序上报，所有请求复用同一个keep-alive连接池。
 """
 
 import time
 import json
-import opuslib_next
-from typing import TYPE_CHECKING
+import asyncio
+import threading
+from typing import TYPE_CHECKING, Dict, List
 
 if TYPE_CHECKING:
     from core.connection import ConnectionHandler
 
-from config.manage_api_client import report as manage_report
+from config.logger import setup_logging
+from config.manage_api_client import ManageApiClient, report as manage_report
 
 TAG = __name__
+logger = setup_logging()
+
+DEFAULT_BATCH_SIZE = 8
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_CONCURRENCY = 4
+
 
+def wav_header(data_len: int) -> bytes:
+    """生成单声道/16kHz/16位的WAV文件头"""
+    wav_header = bytearray()
+    wav_header.extend(b"RIFF")  # ChunkID
+    wav_header.extend((36 + data_len).to_bytes(4, "little"))  # ChunkSize
+    wav_header.extend(b"WAVE")  # Format
+    wav_header.extend(b"fmt ")  # Subchunk1ID
+    wav_header.extend((16).to_bytes(4, "little"))  # Subchunk1Size
+    wav_header.extend((1).to_bytes(2, "little"))  # AudioFormat (PCM)
+    wav_header.extend((1).to_bytes(2, "little"))  # NumChannels
+    wav_header.extend((16000).to_bytes(4, "little"))  # SampleRate
+    wav_header.extend((32000).to_bytes(4, "little"))  # ByteRate
+    wav_header.extend((2).to_bytes(2, "little"))  # BlockAlign
+    wav_header.extend((16).to_bytes(2, "little"))  # BitsPerSample
+    wav_header.extend(b"data")  # Subchunk2ID
+    wav_header.extend(data_len.to_bytes(4, "little"))  # Subchunk2Size
+    return bytes(wav_header)
 
-async def report(conn: "ConnectionHandler", type, text, opus_data, report_time):
-    """执行聊天记录上报操作
+
+def wav_chunks(audio_data) -> List[bytes]:
+    """
+    将音频数据包装为WAV字节块列表（WAV头 + 原始数据块），不拼接数据
 
     Args:
-        conn: 连接对象
-        type: 上报类型，1为用户，2为智能体，3为工具调用
-        text: 合成文本
-        opus_data: opus音频数据
-        report_time: 上报时间
+        audio_data: 音频数据（可能是列表或bytes）
     """
-    try:
-        if opus_data:
-            audio_data = opus_to_wav(conn, opus_data)
-        else:
-            audio_data = None
-        # 执行异步上报
-        await manage_report(
-            mac_address=conn.device_id,
-            session_id=conn.session_id,
-            chat_type=type,
-            content=text,
-            audio=audio_data,
-            report_time=report_time,
+    chunks = audio_data if isinstance(audio_data, list) else [audio_data]
+    data_len = sum(len(chunk) for chunk in chunks)
+    if data_len == 0:
+        return []
+    return [wav_header(data_len), *chunks]
+
+
+class ChatHistoryReporter:
+    """按设备批量上报聊天记录，同一设备的记录保持提交顺序"""
+
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.0, float(flush_interval))
+        self._semaphore = asyncio.Semaphore(max(1, int(max_concurrency)))
+        # 设备ID -> 待上报记录
+        self._buffers: Dict[str, List[tuple]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # 设备ID -> 最后一个上报任务，新批次在其完成后才开始发送
+        self._tails: Dict[str, asyncio.Task] = {}
+
+    def submit(self, device_id, session_id, chat_type, text, audio, report_time):
+        """提交一条上报记录（线程安全）"""
+        record = (device_id, session_id, chat_type, text, audio, report_time)
+        ManageApiClient.get_loop().call_soon_threadsafe(self._add, record)
+
+    def flush(self, device_id):
+        """立即上报该设备缓冲中的记录（线程安全）"""
+        ManageApiClient.get_loop().call_soon_threadsafe(self._flush_device, device_id)
+
+    def drain(self, timeout: float = 5.0):
+        """上报所有缓冲记录并等待完成（进程退出时调用，阻塞）"""
+        future = asyncio.run_coroutine_threadsafe(
+            self._drain(), ManageApiClient.get_loop()
         )
-    except Exception as e:
-        conn.logger.bind(tag=TAG).error(f"聊天记录上报失败: {e}")
+        try:
+            future.result(timeout)
+        except Exception as e:
+            future.cancel()
+            logger.bind(tag=TAG).warning(f"等待聊天记录上报完成超时: {e}")
 
+    # ---------- 以下方法只在专用事件循环上运行 ----------
 
-def opus_to_wav(conn: "ConnectionHandler", pcm_data):
-    """将PCM数据转换为WAV格式的字节流
+    def _add(self, record):
+        device_id = record[0]
+        buffer = self._buffers.setdefault(device_id, [])
+        buffer.append(record)
+        if len(buffer) >= self.batch_size:
+            self._flush_device(device_id)
+        elif device_id not in self._timers:
+            self._timers[device_id] = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._flush_device, device_id
+            )
 
-    Args:
-        output_dir: 输出目录（保留参数以保持接口兼容）
-        pcm_data: PCM音频数据（可能是列表或bytes）
+    def _flush_device(self, device_id):
+        timer = self._timers.pop(device_id, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._buffers.pop(device_id, None)
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(
+            self._send_batch(batch, self._tails.get(device_id))
+        )
+        self._tails[device_id] = task
+        task.add_done_callback(lambda t: self._release_tail(device_id, t))
 
-    Returns:
-        bytes: WAV格式的音频数据
-    """
-    try:
-        # 处理可能是列表或bytes的PCM数据
-        if isinstance(pcm_data, list):
-            pcm_data_bytes = b"".join(pcm_data)
-        else:
-            pcm_data_bytes = pcm_data
-
-        if not pcm_data_bytes:
-            raise ValueError("没有有效的PCM数据")
-
-        # 创建WAV文件头
-        num_samples = len(pcm_data_bytes) // 2  # 16-bit samples
-
-        # WAV文件头
-        wav_header = bytearray()
-        wav_header.extend(b"RIFF")  # ChunkID
-        wav_header.extend((36 + len(pcm_data_bytes)).to_bytes(4, "little"))  # ChunkSize
-        wav_header.extend(b"WAVE")  # Format
-        wav_header.extend(b"fmt ")  # Subchunk1ID
-        wav_header.extend((16).to_bytes(4, "little"))  # Subchunk1Size
-        wav_header.extend((1).to_bytes(2, "little"))  # AudioFormat (PCM)
-        wav_header.extend((1).to_bytes(2, "little"))  # NumChannels
-        wav_header.extend((16000).to_bytes(4, "little"))  # SampleRate
-        wav_header.extend((32000).to_bytes(4, "little"))  # ByteRate
-        wav_header.extend((2).to_bytes(2, "little"))  # BlockAlign
-        wav_header.extend((16).to_bytes(2, "little"))  # BitsPerSample
-        wav_header.extend(b"data")  # Subchunk2ID
-        wav_header.extend(len(pcm_data_bytes).to_bytes(4, "little"))  # Subchunk2Size
-
-        # 返回完整的WAV数据
-        return bytes(wav_header) + pcm_data_bytes
-    except Exception as e:
-        conn.logger.bind(tag=TAG).error(f"PCM转WAV失败: {e}", exc_info=True)
-        raise
+    def _release_tail(self, device_id, task):
+        if self._tails.get(device_id) is task:
+            del self._tails[device_id]
+
+    async def _send_batch(self, batch, previous):
+        if previous is not None:
+            await asyncio.wait([previous])
+        async with self._semaphore:
+            for device_id, session_id, chat_type, text, audio, report_time in batch:
+                try:
+                    await manage_report(
+                        mac_address=device_id,
+                        session_id=session_id,
+                        chat_type=chat_type,
+                        content=text,
+                        audio=wav_chunks(audio) if audio else None,
+                        report_time=report_time,
+                    )
+                except Exception as e:
+                    logger.bind(tag=TAG).error(f"聊天记录上报失败: {e}")
+
+    async def _drain(self):
+        for device_id in list(self._buffers):
+            self._flush_device(device_id)
+        if self._tails:
+            await asyncio.gather(*self._tails.values(), return_exceptions=True)
+
+
+_reporter = None
+_reporter_lock = threading.Lock()
+
+
+def get_chat_history_reporter() -> ChatHistoryReporter:
+    """获取进程级聊天记录上报服务（单例模式）"""
+    global _reporter
+    if _reporter is None:
+        with _reporter_lock:
+            if _reporter is None:
+                api_config = getattr(ManageApiClient, "config", None) or {}
+                _reporter = ChatHistoryReporter(
+                    batch_size=api_config.get("report_batch_size", DEFAULT_BATCH_SIZE),
+                    flush_interval=api_config.get(
+                        "report_flush_interval", DEFAULT_FLUSH_INTERVAL
+                    ),
+                    max_concurrency=api_config.get(
+                        "report_max_concurrency", DEFAULT_MAX_CONCURRENCY
+                    ),
+                )
+    return _reporter
+
+
+def _submit_report(conn: "ConnectionHandler", type, text, opus_data, report_time):
+    get_chat_history_reporter().submit(
+        conn.device_id, conn.session_id, type, text, opus_data, report_time
+    )
+
+
+def flush_reports(conn: "ConnectionHandler"):
+    """连接关闭时立即上报该设备缓冲中的记录"""
+    if not conn.read_config_from_api or conn.need_bind:
+        return
+    if conn.chat_history_conf == 0 or _reporter is None:
+        return
+    _reporter.flush(conn.device_id)
 
 
 def enqueue_tts_report(conn: "ConnectionHandler", text, opus_data):
@@ -111,12 +204,12 @@ def enqueue_tts_report(conn: "ConnectionHandler", text, opus_data):
     try:
         # 使用连接对象的队列，传入文本和二进制数据而非文件路径
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((2, text, opus_data, int(time.time() * 1000)))
+            _submit_report(conn, 2, text, opus_data, int(time.time() * 1000))
             conn.logger.bind(tag=TAG).debug(
                 f"TTS数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((2, text, None, int(time.time() * 1000)))
+            _submit_report(conn, 2, text, None, int(time.time() * 1000))
             conn.logger.bind(tag=TAG).debug(
                 f"TTS数据已加入上报队列: {conn.device_id}, 不上报音频"
             )
@@ -152,13 +245,13 @@ def enqueue_tool_report(conn: "ConnectionHandler", tool_name: str, tool_input: d
                     }
                 ]
             )
-            conn.report_queue.put((3, tool_text, None, timestamp))
+            _submit_report(conn, 3, tool_text, None, timestamp)
 
         # 构建工具结果内容
         if tool_result:
             result_display = f'{{"result":"{str(tool_result)}"}}'
             result_content = json.dumps([{"type": "tool_result", "text": result_display}], ensure_ascii=False)
-            conn.report_queue.put((3, result_content, None, timestamp + 1))
+            _submit_report(conn, 3, result_content, None, timestamp + 1)
     except Exception as e:
         conn.logger.bind(tag=TAG).error(f"加入工具上报队列失败: {e}")
 
@@ -178,12 +271,12 @@ def enqueue_asr_report(conn: "ConnectionHandler", text, opus_data):
     try:
         # 使用连接对象的队列，传入文本和二进制数据而非文件路径
         if conn.chat_history_conf == 2:
-            conn.report_queue.put((1, text, opus_data, int(time.time() * 1000)))
+            _submit_report(conn, 1, text, opus_data, int(time.time() * 1000))
             conn.logger.bind(tag=TAG).debug(
                 f"ASR数据已加入上报队列: {conn.device_id}, 音频大小: {len(opus_data)} "
             )
         else:
-            conn.report_queue.put((1, text, None, int(time.time() * 1000)))
+            _submit_report(conn, 1, text, None, int(time.time() * 1000))
             conn.logger.bind(tag=TAG).debug(
                 f"ASR数据已加入上报队列: {conn.device_id}, 不上报音频"
             )
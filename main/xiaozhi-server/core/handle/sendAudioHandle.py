@@ -8,8 +8,11 @@ if TYPE_CHECKING:
     from core.connection import ConnectionHandler
 from core.utils import textUtils
 from core.utils.util import audio_to_data
+from core.utils.aec import create_echo_canceller
 from core.providers.tts.dto.dto import SentenceType
 from core.utils.audioRateController import AudioRateController
+from core.utils.audio_pacing import PacedAudioController, get_pacing_scheduler
+from core.utils.tracing import trace_mark
 
 TAG = __name__
 # 音频帧时长（毫秒）
@@ -91,14 +94,12 @@ async def _send_to_mqtt_gateway(
     """
     # 如果启用了服务端AEC，缓存PCM数据用于后续AEC处理
     if conn.client_aec and timestamp > 0:
-        if not hasattr(conn, "aec_audio_cache"):
-            conn.aec_audio_cache = {}
-            conn.aec_audio_cache_time = {}
+        if getattr(conn, "aec_engine", None) is None:
+            conn.aec_engine = create_echo_canceller(conn.config, frame_samples=960)
             conn._send_opus_decoder = opuslib_next.Decoder(16000, 1)
-        # 解码opus为PCM后缓存
+        # 解码opus为PCM后缓存，同时预先计算参考帧频谱
         pcm_data = conn._send_opus_decoder.decode(bytes(opus_packet), 960)
-        conn.aec_audio_cache[timestamp] = bytes(pcm_data)
-        conn.aec_audio_cache_time[timestamp] = time.time()
+        conn.aec_engine.add_reference(timestamp, pcm_data)
 
     # 为opus数据包添加16字节头部
     header = bytearray(16)
@@ -183,7 +184,7 @@ def _get_or_create_rate_controller(
     if need_reset:
         # 创建或获取 rate_controller
         if not hasattr(conn, "audio_rate_controller"):
-            conn.audio_rate_controller = AudioRateController(frame_duration)
+            conn.audio_rate_controller = _create_rate_controller(conn, frame_duration)
         else:
             conn.audio_rate_controller.reset()
 
@@ -202,6 +203,16 @@ def _get_or_create_rate_controller(
     return conn.audio_rate_controller, conn.audio_flow_control
 
 
+def _create_rate_controller(conn: "ConnectionHandler", frame_duration):
+    """根据配置创建流控器：共享时间轮调度或每个连接独立的发送循环"""
+    pacing_config = conn.config.get("audio_pacing", {}) or {}
+    if str(pacing_config.get("shared_scheduler", False)).lower() in ("true", "1", "yes"):
+        scheduler = get_pacing_scheduler(int(pacing_config.get("tick_ms", 10)))
+        name = conn.headers.get("device-id") or conn.session_id
+        return PacedAudioController(frame_duration, name=name, scheduler=scheduler)
+    return AudioRateController(frame_duration)
+
+
 def _start_background_sender(conn: "ConnectionHandler", rate_controller, flow_control):
     """
     启动后台发送循环任务
@@ -221,7 +232,21 @@ def _start_background_sender(conn: "ConnectionHandler", rate_controller, flow_co
         await _do_send_audio(conn, packet, flow_control)
 
     # 使用 start_sending 启动后台循环
-    rate_controller.start_sending(send_callback)
+    if isinstance(rate_controller, PacedAudioController):
+        rate_controller.start_sending(
+            send_callback, writable=lambda: _send_buffer_writable(conn)
+        )
+    else:
+        rate_controller.start_sending(send_callback)
+
+
+def _send_buffer_writable(conn: "ConnectionHandler") -> bool:
+    """发送缓冲区低于上限的一半时，发送只写入缓冲区而不会等待客户端读取"""
+    transport = getattr(conn.websocket, "transport", None)
+    if transport is None:
+        return True
+    _, high = transport.get_write_buffer_limits()
+    return transport.get_write_buffer_size() < high // 2
 
 
 async def _send_audio_with_rate_control(
@@ -270,6 +295,8 @@ async def _do_send_audio(conn: "ConnectionHandler", opus_packet, flow_control):
     else:
         # 直接发送opus数据包
         await conn.websocket.send(opus_packet)
+    if packet_index == 0:
+        trace_mark(conn, "first_audio", conn.tts)
 
     # 更新流控状态
     flow_control["packet_count"] = packet_index + 1
@@ -294,7 +321,9 @@ async def send_tts_message(conn: "ConnectionHandler", state, text=None):
             stop_tts_notify_voice = conn.config.get(
                 "stop_tts_notify_voice", "config/assets/tts_notify.mp3"
             )
-            audios = await audio_to_data(stop_tts_notify_voice, is_opus=True)
+            audios = await audio_to_data(
+                stop_tts_notify_voice, is_opus=True, sample_rate=conn.sample_rate
+            )
             await sendAudio(conn, audios)
         # 等待所有音频包发送完成
         await _wait_for_audio_completion(conn)
@@ -3,16 +3,23 @@ from aiohttp import web
 from config.logger import setup_logging
 from core.api.ota_handler import OTAHandler
 from core.api.vision_handler import VisionHandler
+from core.api.metrics_handler import MetricsHandler
+from core.supervisor import get_metrics_port_base
 
 TAG = __name__
 
 
 class SimpleHttpServer:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, worker_index: int = None):
         self.config = config
         self.logger = setup_logging()
+        self.worker_index = worker_index
+        # 多进程模式下各工作进程以 SO_REUSEPORT 监听同一端口
+        self.reuse_port = worker_index is not None
+        self.started = asyncio.Event()
         self.ota_handler = OTAHandler(config)
         self.vision_handler = VisionHandler(config)
+        self.metrics_handler = MetricsHandler(config)
 
     def _get_websocket_url(self, local_ip: str, port: int) -> str:
         """获取websocket地址
@@ -32,6 +39,21 @@ class SimpleHttpServer:
         else:
             return f"ws://{local_ip}:{port}/xiaozhi/v1/"
 
+    async def _start_worker_metrics(self, host: str):
+        """多进程模式下共享端口的请求会落到任意工作进程，指标改由各进程在独立端口提供"""
+        port_base = get_metrics_port_base(self.config)
+        if port_base is None:
+            self.logger.bind(tag=TAG).warning(
+                "多进程模式下未配置 metrics.worker_port_base，不开放 /metrics 接口"
+            )
+            return
+        app = web.Application()
+        app.add_routes([web.get("/metrics", self.metrics_handler.handle_get)])
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port_base + self.worker_index)
+        await site.start()
+
     async def start(self):
         try:
             server_config = self.config["server"]
@@ -39,6 +61,10 @@ class SimpleHttpServer:
             host = server_config.get("ip", "0.0.0.0")
             port = int(server_config.get("http_port", 8003))
 
+            if not port:
+                # 未配置http端口，不启动http服务
+                self.started.set()
+
             if port:
                 app = web.Application()
 
@@ -75,11 +101,22 @@ class SimpleHttpServer:
                     ]
                 )
 
+                metrics_config = self.config.get("metrics", {}) or {}
+                metrics_enabled = str(metrics_config.get("http_enabled", False)).lower() in ("true", "1", "yes")
+                if metrics_enabled and not self.reuse_port:
+                    # Prometheus 指标接口
+                    app.add_routes(
+                        [web.get("/metrics", self.metrics_handler.handle_get)]
+                    )
+
                 # 运行服务
                 runner = web.AppRunner(app)
                 await runner.setup()
-                site = web.TCPSite(runner, host, port)
+                site = web.TCPSite(runner, host, port, reuse_port=self.reuse_port)
                 await site.start()
+                if metrics_enabled and self.reuse_port:
+                    await self._start_worker_metrics(host)
+                self.started.set()
 
                 # 保持服务运行
                 while True:
@@ -5,6 +5,7 @@ import hmac
 import base64
 import hashlib
 import asyncio
+import threading
 import requests
 import websockets
 from urllib import parse
@@ -12,7 +13,13 @@ from datetime import datetime
 from config.logger import setup_logging
 from core.providers.asr.base import ASRProviderBase
 from core.providers.asr.dto.dto import InterfaceType
-from typing import TYPE_CHECKING
+from core.providers.asr.session_pool import (
+    DEFAULT_DEMAND_WINDOW,
+    DEFAULT_IDLE_TTL,
+    DEFAULT_POOL_SIZE,
+    get_session_pool,
+)
+from typing import TYPE_CHECKING, Dict
 
 if TYPE_CHECKING:
     from core.connection import ConnectionHandler
@@ -67,6 +74,95 @@ class AccessToken:
         return None, None
 
 
+def _parse_expire_time(expire_time_str):
+    """解析Token过期时间，提前60秒视为过期"""
+    try:
+        expire_str = str(expire_time_str).strip()
+        if expire_str.isdigit():
+            expire_time = datetime.fromtimestamp(int(expire_str))
+        else:
+            expire_time = datetime.strptime(expire_str, "%Y-%m-%dT%H:%M:%SZ")
+        return expire_time.timestamp() - 60
+    except Exception:
+        return None
+
+
+class TokenManager:
+    """
+    同一AccessKey共享的NLS Token，在过期前由后台任务刷新，
+    建立识别连接时直接使用缓存的Token，不再同步请求Token接口
+    """
+
+    # 在过期前多久开始后台刷新（秒）
+    REFRESH_AHEAD = 600
+
+    def __init__(self, access_key_id, access_key_secret):
+        self.access_key_id = access_key_id
+        self.access_key_secret = access_key_secret
+        self.token = None
+        self._lock = threading.Lock()
+        self._refresh_task = None
+
+    def refresh(self):
+        """同步刷新Token（阻塞调用）"""
+        token, expire_time_str = AccessToken.create_token(
+            self.access_key_id, self.access_key_secret
+        )
+        if not token:
+            raise ValueError("无法获取有效的访问Token")
+        with self._lock:
+            self.token = token
+            self.expire_time = _parse_expire_time(expire_time_str)
+        return token
+
+    def is_expired(self):
+        return self.token is None or (
+            self.expire_time is not None and time.time() > self.expire_time
+        )
+
+    async def get_token(self):
+        """获取有效Token，只有缓存失效时才在线程中刷新"""
+        self._ensure_refresher()
+        if self.is_expired():
+            await asyncio.to_thread(self.refresh)
+        return self.token
+
+    def _ensure_refresher(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            if self.expire_time is None:
+                # 无法解析过期时间时按小时刷新
+                delay = 3600
+            else:
+                delay = max(5.0, self.expire_time - self.REFRESH_AHEAD - time.time())
+            await asyncio.sleep(delay)
+            try:
+                await asyncio.to_thread(self.refresh)
+                logger.bind(tag=TAG).debug("NLS Token已在后台刷新")
+            except Exception as e:
+                logger.bind(tag=TAG).warning(f"后台刷新NLS Token失败: {e}")
+                await asyncio.sleep(30)
+
+
+_token_managers: Dict[str, TokenManager] = {}
+_token_managers_lock = threading.Lock()
+
+
+def get_token_manager(access_key_id, access_key_secret) -> TokenManager:
+    """按AccessKey获取共享的Token管理器（单例模式）"""
+    manager = _token_managers.get(access_key_id)
+    if manager is None:
+        with _token_managers_lock:
+            manager = _token_managers.get(access_key_id)
+            if manager is None:
+                manager = TokenManager(access_key_id, access_key_secret)
+                _token_managers[access_key_id] = manager
+    return manager
+
+
 class ASRProvider(ASRProviderBase):
     def __init__(self, config, delete_audio_file):
         super().__init__()
@@ -94,35 +190,58 @@ class ASRProvider(ASRProviderBase):
         self.max_sentence_silence = config.get("max_sentence_silence")
         self.output_dir = config.get("output_dir", "./audio_output")
         self.delete_audio_file = delete_audio_file
-        self.expire_time = None
 
         self.task_id = uuid.uuid4().hex
+        self._stop_sent = False
+
+        # 预热会话池：pool_size 为0时每次识别都新建连接
+        self.pool_size = int(config.get("pool_size", DEFAULT_POOL_SIZE))
+        self.pool_idle_ttl = float(config.get("pool_idle_ttl", DEFAULT_IDLE_TTL))
+        self.pool_demand_window = float(
+            config.get("pool_demand_window", DEFAULT_DEMAND_WINDOW)
+        )
+        self._session_pool = None
 
-        # Token管理
+        # Token管理：同一AccessKey共享Token，首次获取后由后台任务在过期前刷新
+        self.token_manager = None
         if self.access_key_id and self.access_key_secret:
-            self._refresh_token()
+            self.token_manager = get_token_manager(
+                self.access_key_id, self.access_key_secret
+            )
+            if self.token_manager.is_expired():
+                self.token_manager.refresh()
         elif not self.token:
             raise ValueError("必须提供access_key_id+access_key_secret或者直接提供token")
 
-    def _refresh_token(self):
-        """刷新Token"""
-        self.token, expire_time_str = AccessToken.create_token(self.access_key_id, self.access_key_secret)
-        if not self.token:
-            raise ValueError("无法获取有效的访问Token")
-        
-        try:
-            expire_str = str(expire_time_str).strip()
-            if expire_str.isdigit():
-                expire_time = datetime.fromtimestamp(int(expire_str))
-            else:
-                expire_time = datetime.strptime(expire_str, "%Y-%m-%dT%H:%M:%SZ")
-            self.expire_time = expire_time.timestamp() - 60
-        except:
-            self.expire_time = None
-
-    def _is_token_expired(self):
-        """检查Token是否过期"""
-        return self.expire_time and time.time() > self.expire_time
+    def _get_session_pool(self):
+        """获取本配置共享的会话池，池中的会话已完成TLS与Token鉴权握手"""
+        if self._session_pool is None:
+            ws_url = self.ws_url
+            token_manager = self.token_manager
+            static_token = self.token
+
+            async def connect():
+                token = (
+                    await token_manager.get_token() if token_manager else static_token
+                )
+                return await websockets.connect(
+                    ws_url,
+                    additional_headers={"X-NLS-Token": token},
+                    max_size=1000000000,
+                    ping_interval=None,
+                    ping_timeout=None,
+                    close_timeout=5,
+                )
+
+            key = ("aliyun_stream", ws_url, self.access_key_id or static_token)
+            self._session_pool = get_session_pool(
+                key,
+                connect,
+                self.pool_size,
+                self.pool_idle_ttl,
+                self.pool_demand_window,
+            )
+        return self._session_pool
 
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
@@ -149,21 +268,11 @@ class ASRProvider(ASRProviderBase):
 
     async def _start_recognition(self, conn: "ConnectionHandler"):
         """开始识别会话"""
-        if self._is_token_expired():
-            self._refresh_token()
-        
-        # 建立连接
-        headers = {"X-NLS-Token": self.token}
-        self.asr_ws = await websockets.connect(
-            self.ws_url,
-            additional_headers=headers,
-            max_size=1000000000,
-            ping_interval=None,
-            ping_timeout=None,
-            close_timeout=5,
-        )
+        # 从会话池取出已完成握手的连接，池为空时当场建立
+        self.asr_ws = await self._get_session_pool().acquire()
 
         self.task_id = uuid.uuid4().hex
+        self._stop_sent = False
 
         logger.bind(tag=TAG).debug(f"WebSocket连接建立成功, task_id: {self.task_id}")
 
@@ -275,7 +384,7 @@ class ASRProvider(ASRProviderBase):
             logger.bind(tag=TAG).error(f"结果转发失败: {str(e)}")
         finally:
             # 清理连接的音频缓存
-            await self._cleanup()
+            await self._cleanup(recycle=True)
             conn.reset_audio_states()
 
     async def _send_stop_request(self):
@@ -285,29 +394,64 @@ class ASRProvider(ASRProviderBase):
                 # 先停止音频发送
                 self.is_processing = False
 
-                stop_msg = {
-                    "header": {
-                        "namespace": "SpeechTranscriber",
-                        "name": "StopTranscription",
-                        "message_id": uuid.uuid4().hex,
-                        "task_id": self.task_id,
-                        "appkey": self.appkey
-                    }
-                }
+                self._stop_sent = True
                 logger.bind(tag=TAG).debug("停止识别请求已发送")
-                await self.asr_ws.send(json.dumps(stop_msg, ensure_ascii=False))
+                await self.asr_ws.send(self._stop_message(self.task_id))
             except Exception as e:
                 logger.bind(tag=TAG).error(f"发送停止识别请求失败: {e}")
 
-    async def _cleanup(self):
-        """清理资源（关闭连接）"""
+    def _stop_message(self, task_id):
+        return json.dumps(
+            {
+                "header": {
+                    "namespace": "SpeechTranscriber",
+                    "name": "StopTranscription",
+                    "message_id": uuid.uuid4().hex,
+                    "task_id": task_id,
+                    "appkey": self.appkey,
+                }
+            },
+            ensure_ascii=False,
+        )
+
+    async def _recycle_session(self, ws, task_id, stop_sent):
+        """结束本次识别任务，收到TranscriptionCompleted后把连接归还会话池复用"""
+        reusable = False
+        try:
+            if not stop_sent:
+                await ws.send(self._stop_message(task_id))
+
+            async def wait_completed():
+                while True:
+                    header = json.loads(await ws.recv()).get("header", {})
+                    if header.get("status", 20000000) != 20000000:
+                        return False
+                    if header.get("name") == "TranscriptionCompleted":
+                        return True
+
+            reusable = await asyncio.wait_for(wait_completed(), timeout=3.0)
+        except Exception as e:
+            logger.bind(tag=TAG).debug(f"ASR会话无法复用，将关闭: {e}")
+        await self._get_session_pool().release(ws, reuse=reusable)
+
+    async def _cleanup(self, recycle=False):
+        """
+        清理资源（关闭连接）
+
+        Args:
+            recycle: 识别任务已正常开始且没有其它协程在读取连接时，结束任务后把连接归还会话池
+        """
         logger.bind(tag=TAG).debug(f"开始ASR会话清理 | 当前状态: processing={self.is_processing}, server_ready={self.server_ready}")
+        recycle = recycle and self.server_ready and self.pool_size > 0
 
         # 状态重置
         self.is_processing = False
         self.server_ready = False
         logger.bind(tag=TAG).debug("ASR状态已重置")
 
+        if self.asr_ws and recycle:
+            ws, self.asr_ws = self.asr_ws, None
+            asyncio.create_task(self._recycle_session(ws, self.task_id, self._stop_sent))
         # 关闭连接
         if self.asr_ws:
             try:
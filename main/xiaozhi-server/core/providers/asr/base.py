@@ -17,6 +17,8 @@ from core.providers.asr.dto.dto import InterfaceType
 from core.handle.receiveAudioHandle import startToChat
 from core.handle.reportHandle import enqueue_asr_report
 from core.utils.util import remove_punctuation_and_length
+from core.utils.pipeline import is_pipeline_enabled, LoopBridgeQueue
+from core.utils.tracing import trace_mark, trace_vad_end
 from core.handle.receiveAudioHandle import handleAudioMessage
 from typing import Optional, Tuple, List, NamedTuple, TYPE_CHECKING
 
@@ -29,11 +31,23 @@ logger = setup_logging()
 
 
 class ASRProviderBase(ABC):
+    # 远程ASR每个连接有自己的websocket连接和接收线程，不能共享；本地模型可被多个连接共用，置为True
+    SHAREABLE = False
+
     def __init__(self):
         pass
 
     # 打开音频通道
     async def open_audio_channels(self, conn: "ConnectionHandler"):
+        if is_pipeline_enabled(conn.config):
+            # 异步流水线模式：音频接收作为事件循环内的任务运行，不创建线程
+            conn.asr_audio_queue = LoopBridgeQueue.from_queue(
+                conn.asr_audio_queue, conn.loop
+            )
+            conn.asr_priority_task = asyncio.create_task(
+                self.asr_audio_intake_task(conn)
+            )
+            return
         conn.asr_priority_thread = threading.Thread(
             target=self.asr_text_priority_thread, args=(conn,), daemon=True
         )
@@ -57,6 +71,22 @@ class ASRProviderBase(ABC):
                 )
                 continue
 
+    # 异步流水线模式下有序处理ASR音频
+    async def asr_audio_intake_task(self, conn: "ConnectionHandler"):
+        while not conn.stop_event.is_set():
+            try:
+                message = await conn.asr_audio_queue.async_get(timeout=1)
+                await handleAudioMessage(conn, message)
+            except queue.Empty:
+                continue
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"处理ASR文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
+                )
+                continue
+
     # 接收音频
     async def receive_audio(self, conn: "ConnectionHandler", pcm_frame, audio_have_voice):
         if conn.client_listen_mode == "manual":
@@ -85,6 +115,8 @@ class ASRProviderBase(ABC):
         """并行处理ASR和声纹识别"""
         try:
             total_start_time = time.monotonic()
+            # 流式ASR在收到VAD结束时已开始本轮追踪，这里不会覆盖起点
+            trace_vad_end(conn)
 
             # 数据已经是PCM直接使用
             pcm_data = asr_audio_task
@@ -111,6 +143,7 @@ class ASRProviderBase(ABC):
             else:
                 asr_result = await asr_task
                 voiceprint_result = None
+            trace_mark(conn, "asr", self)
 
             # 记录识别结果 - 检查是否为异常
             if isinstance(asr_result, Exception):
@@ -216,6 +249,10 @@ class ASRProviderBase(ABC):
     async def close(self):
         pass
 
+    def cleanup(self):
+        """释放实例持有的模型、线程等资源；共享实例被淘汰时调用，单个连接关闭时调用 close"""
+        pass
+
     class AudioArtifacts(NamedTuple):
         pcm_frames: List[bytes]
         """PCM音频帧列表"""
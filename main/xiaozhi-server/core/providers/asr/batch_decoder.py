@@ -0,0 +1,217 @@
+"""
+离线识别批量解码线程
+所有连接共用一个 sherpa-onnx OfflineRecognizer：说话结束时把PCM数组提交到队列，
+解码线程在很短的时间窗内收集各连接的请求，用一次 decode_streams 批量解码，
+再把结果回填到各连接事件循环上的 future，不再写临时WAV文件，也不阻塞事件循环。
+"""
+
+import time
+import queue
+import asyncio
+import weakref
+import threading
+from collections import Counter
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_BATCH_WINDOW_MS = 20
+DEFAULT_MAX_BATCH_SIZE = 32
+# close() 等待解码线程退出的时间（秒）
+CLOSE_TIMEOUT = 10
+# 放入队列通知解码线程退出
+_STOP = None
+
+
+_workers = weakref.WeakSet()
+
+
+class _DecodeRequest(NamedTuple):
+    samples: np.ndarray
+    sample_rate: int
+    loop: asyncio.AbstractEventLoop
+    future: asyncio.Future
+    enqueued_at: float
+
+
+def pcm16_to_float32(pcm_bytes: bytes) -> np.ndarray:
+    """16位PCM字节转换为 [-1, 1] 范围的 float32 数组"""
+    if len(pcm_bytes) % 2:
+        pcm_bytes = pcm_bytes[:-1]
+    return np.frombuffer(pcm_bytes, dtype=np.int16).astype(np.float32) / 32768
+
+
+def _set_result(future: asyncio.Future, result):
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future, exc: BaseException):
+    if not future.done():
+        future.set_exception(exc)
+
+
+def _resolve(request: _DecodeRequest, setter, value):
+    try:
+        request.loop.call_soon_threadsafe(setter, request.future, value)
+    except RuntimeError:
+        # 提交请求的事件循环已关闭
+        pass
+
+
+class BatchDecodeWorker:
+    """在独立线程中批量解码，线程安全，可被任意事件循环调用"""
+
+    def __init__(
+        self,
+        recognizer,
+        batch_window_ms: int = DEFAULT_BATCH_WINDOW_MS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        name: str = "asr-batch-decoder",
+    ):
+        self.recognizer = recognizer
+        self.batch_window = max(0, int(batch_window_ms)) / 1000
+        self.max_batch_size = max(1, int(max_batch_size))
+        self._queue: "queue.Queue[_DecodeRequest]" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._requests = 0
+        self._audio_seconds = 0.0
+        self._decode_seconds = 0.0
+        self._max_wait_ms = 0.0
+        self.name = name
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        _workers.add(self)
+
+    async def decode(self, samples: np.ndarray, sample_rate: int = 16000) -> str:
+        """提交一段完整语音，等待批量解码后返回识别文本"""
+        if self._closed:
+            raise RuntimeError(f"{self.name} 已关闭")
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put(
+            _DecodeRequest(samples, sample_rate, loop, future, time.monotonic())
+        )
+        return await future
+
+    def _collect(self) -> Tuple[List[_DecodeRequest], bool]:
+        """
+        阻塞等待第一个请求，然后在时间窗内继续收集，直到达到批大小上限
+        返回 (本批请求, 是否收到退出通知)
+        """
+        request = self._queue.get()
+        if request is _STOP:
+            return [], True
+        batch = [request]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    request = self._queue.get(timeout=remaining)
+                else:
+                    request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is _STOP:
+                return batch, True
+            batch.append(request)
+        return batch, False
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch, stopping = self._collect()
+            # 调用方已取消（连接关闭、被打断）的请求不再解码
+            batch = [request for request in batch if not request.future.cancelled()]
+            if not batch:
+                continue
+            try:
+                start = time.monotonic()
+                streams = []
+                for request in batch:
+                    stream = self.recognizer.create_stream()
+                    stream.accept_waveform(request.sample_rate, request.samples)
+                    streams.append(stream)
+                self.recognizer.decode_streams(streams)
+                decode_seconds = time.monotonic() - start
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"批量解码失败: {e}")
+                for request in batch:
+                    _resolve(request, _set_exception, e)
+                continue
+
+            self._record(batch, start, decode_seconds)
+            for request, stream in zip(batch, streams):
+                _resolve(request, _set_result, stream.result.text)
+
+        # 退出通知之后才提交的请求不再解码
+        closed = RuntimeError(f"{self.name} 已关闭")
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not _STOP:
+                _resolve(request, _set_exception, closed)
+
+    def close(self, timeout: float = CLOSE_TIMEOUT):
+        """
+        停止解码线程并释放识别模型：已提交的请求解码完成后线程退出，之后的 decode 调用抛出异常
+        可重复调用
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.bind(tag=TAG).warning(f"{self.name} 解码线程未在{timeout}秒内退出")
+        _workers.discard(self)
+        self.recognizer = None
+
+    def _record(self, batch: List[_DecodeRequest], start: float, decode_seconds: float):
+        audio_seconds = sum(len(r.samples) / r.sample_rate for r in batch)
+        max_wait_ms = max((start - r.enqueued_at) * 1000 for r in batch)
+        with self._stats_lock:
+            self._batch_sizes[len(batch)] += 1
+            self._requests += len(batch)
+            self._audio_seconds += audio_seconds
+            self._decode_seconds += decode_seconds
+            self._max_wait_ms = max(self._max_wait_ms, max_wait_ms)
+        logger.bind(tag=TAG).debug(
+            f"批量解码 {len(batch)} 条, 音频 {audio_seconds:.2f}s, 耗时 {decode_seconds:.3f}s"
+        )
+
+    def get_stats(self) -> Dict:
+        """队列深度、批大小分布与实时率（解码耗时/音频时长）"""
+        with self._stats_lock:
+            batches = sum(self._batch_sizes.values())
+            return {
+                "queue_depth": self._queue.qsize(),
+                "requests": self._requests,
+                "batches": batches,
+                "mean_batch_size": round(self._requests / batches, 2) if batches else 0.0,
+                "batch_size_histogram": dict(sorted(self._batch_sizes.items())),
+                "audio_seconds": round(self._audio_seconds, 2),
+                "decode_seconds": round(self._decode_seconds, 3),
+                "rtf": (
+                    round(self._decode_seconds / self._audio_seconds, 4)
+                    if self._audio_seconds
+                    else 0.0
+                ),
+                "max_wait_ms": round(self._max_wait_ms, 1),
+            }
+
+
+def get_batch_decode_stats() -> Dict[str, Dict]:
+    """所有批量解码线程的统计信息"""
+    return {worker.name: worker.get_stats() for worker in list(_workers)}
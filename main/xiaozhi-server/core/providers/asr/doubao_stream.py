@@ -6,6 +6,12 @@ import websockets
 from core.providers.asr.base import ASRProviderBase
 from config.logger import setup_logging
 from core.providers.asr.dto.dto import InterfaceType
+from core.providers.asr.session_pool import (
+    DEFAULT_DEMAND_WINDOW,
+    DEFAULT_IDLE_TTL,
+    DEFAULT_POOL_SIZE,
+    get_session_pool,
+)
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -63,6 +69,50 @@ class ASRProvider(ASRProviderBase):
         end_window_size = config.get("end_window_size")
         self.end_window_size = int(end_window_size) if end_window_size else 200
 
+        # 预热会话池：pool_size 为0时每次识别都新建连接
+        # 火山引擎每个连接只承载一次识别，用完即关闭，由会话池在后台补足
+        self.pool_size = int(config.get("pool_size", DEFAULT_POOL_SIZE))
+        self.pool_idle_ttl = float(config.get("pool_idle_ttl", DEFAULT_IDLE_TTL))
+        self.pool_demand_window = float(
+            config.get("pool_demand_window", DEFAULT_DEMAND_WINDOW)
+        )
+        self._session_pool = None
+
+    def _get_session_pool(self):
+        """获取本配置共享的会话池，池中的会话已完成TLS与鉴权握手"""
+        if self._session_pool is None:
+            ws_url = self.ws_url
+            use_token = self.auth_method == "token"
+            token_auth = self.token_auth
+
+            async def connect():
+                # 每个连接使用新的 X-Api-Connect-Id
+                return await websockets.connect(
+                    ws_url,
+                    additional_headers=token_auth() if use_token else None,
+                    max_size=1000000000,
+                    ping_interval=None,
+                    ping_timeout=None,
+                    close_timeout=10,
+                )
+
+            key = (
+                "doubao_stream",
+                ws_url,
+                self.appid,
+                self.access_token,
+                self.resource_id,
+                self.auth_method,
+            )
+            self._session_pool = get_session_pool(
+                key,
+                connect,
+                self.pool_size,
+                self.pool_idle_ttl,
+                self.pool_demand_window,
+            )
+        return self._session_pool
+
     async def open_audio_channels(self, conn):
         await super().open_audio_channels(conn)
 
@@ -74,18 +124,9 @@ class ASRProvider(ASRProviderBase):
         if audio_have_voice and self.asr_ws is None and not self.is_processing:
             try:
                 self.is_processing = True
-                # 建立新的WebSocket连接
-                headers = self.token_auth() if self.auth_method == "token" else None
-                logger.bind(tag=TAG).info(f"正在连接ASR服务，headers: {headers}")
-
-                self.asr_ws = await websockets.connect(
-                    self.ws_url,
-                    additional_headers=headers,
-                    max_size=1000000000,
-                    ping_interval=None,
-                    ping_timeout=None,
-                    close_timeout=10,
-                )
+                # 从会话池取出已完成握手的连接，池为空时当场建立
+                logger.bind(tag=TAG).info("正在连接ASR服务")
+                self.asr_ws = await self._get_session_pool().acquire()
 
                 # 发送初始化请求
                 request_params = self.construct_request(str(uuid.uuid4()))
@@ -38,6 +38,9 @@ class CaptureOutput:
 
 
 class ASRProvider(ASRProviderBase):
+    # 本地模型，多个连接共用一个实例
+    SHAREABLE = True
+
     def __init__(self, config: dict, delete_audio_file: bool):
         super().__init__()
         
@@ -0,0 +1,48 @@
+import os
+import zlib
+import asyncio
+from config.logger import setup_logging
+from typing import Optional, Tuple, List
+from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.dto.dto import InterfaceType
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_TEXTS = [
+    "今天天气怎么样",
+    "给我讲个笑话吧",
+    "现在几点了",
+    "帮我把音量调大一点",
+]
+
+
+class ASRProvider(ASRProviderBase):
+    """
+    本地模拟ASR，用于离线压力测试
+    识别结果按音频内容的CRC从配置的文本中选取，同一段音频总是得到相同的结果；
+    delay_ms 模拟识别耗时，不占用CPU。
+    """
+
+    SHAREABLE = True
+
+    def __init__(self, config: dict, delete_audio_file: bool):
+        super().__init__()
+        self.interface_type = InterfaceType.LOCAL
+        self.output_dir = config.get("output_dir", "tmp/")
+        self.delete_audio_file = delete_audio_file
+        delay_ms = config.get("delay_ms", "200")
+        self.delay = (float(delay_ms) if delay_ms else 0) / 1000
+        self.texts = config.get("texts") or DEFAULT_TEXTS
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    async def speech_to_text(
+        self, opus_data: List[bytes], session_id: str, artifacts=None
+    ) -> Tuple[Optional[str], Optional[str]]:
+        if artifacts is None:
+            return "", None
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+        text = self.texts[zlib.crc32(artifacts.pcm_bytes) % len(self.texts)]
+        logger.bind(tag=TAG).debug(f"模拟识别结果: {text}")
+        return text, artifacts.file_path
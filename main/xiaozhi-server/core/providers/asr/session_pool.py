@@ -0,0 +1,245 @@
+"""
+流式ASR会话池
+每个提供者（按服务地址与鉴权信息区分）在后台保持 N 个已完成TLS与鉴权握手的空闲WebSocket会话，
+VAD检测到开始说话时直接取用，首个识别结果不再承担建连耗时；
+识别结束后协议允许复用的会话归还到池中，否则关闭，由后台任务补足。
+服务端会断开长时间空闲的连接，空闲超过 idle_ttl 的会话会被轮换。
+只在有识别需求时预热：最近 demand_window 秒内没有取用会话时不再补足，
+过期会话关闭后后台任务退出，空闲的服务端不会周期性地重新握手，下次取用时再恢复预热。
+"""
+
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from websockets.protocol import State
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_POOL_SIZE = 2
+# 阿里云、火山等服务端在无指令约10秒后断开连接，空闲会话需在此之前轮换
+DEFAULT_IDLE_TTL = 8.0
+# 最后一次取用后继续保持预热的时间（秒）
+DEFAULT_DEMAND_WINDOW = 60.0
+MAINTAIN_INTERVAL = 1.0
+MAX_RETRY_DELAY = 30.0
+
+
+class StreamingSessionPool:
+    """单个提供者的预热会话池，只能在创建它的事件循环中使用"""
+
+    def __init__(
+        self,
+        name: str,
+        connect: Callable[[], Awaitable],
+        size: int = DEFAULT_POOL_SIZE,
+        idle_ttl: float = DEFAULT_IDLE_TTL,
+        demand_window: float = DEFAULT_DEMAND_WINDOW,
+    ):
+        self.name = name
+        self._connect = connect
+        self.size = max(0, int(size))
+        self.idle_ttl = float(idle_ttl)
+        self.demand_window = float(demand_window)
+        self._last_demand = time.monotonic()
+        # (websocket, 放入池中的时间)
+        self._idle = deque()
+        self._opening = 0
+        self._open_tasks = set()
+        self._wakeup = asyncio.Event()
+        self._maintainer: Optional[asyncio.Task] = None
+        self._closed = False
+        self._retry_delay = 0.0
+        self._retry_at = 0.0
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+        self.discarded = 0
+
+    def _usable(self, ws, idle_since: float) -> bool:
+        return (
+            ws.state is State.OPEN
+            and time.monotonic() - idle_since < self.idle_ttl
+        )
+
+    async def acquire(self):
+        """取出一个已就绪的会话，池中没有可用会话时当场建立连接"""
+        self._last_demand = time.monotonic()
+        self._ensure_maintainer()
+        while self._idle:
+            ws, idle_since = self._idle.popleft()
+            if self._usable(ws, idle_since):
+                self.hits += 1
+                self._wakeup.set()
+                return ws
+            self._discard(ws)
+        self.misses += 1
+        self._wakeup.set()
+        return await self._connect()
+
+    async def release(self, ws, reuse: bool = False):
+        """归还会话：reuse 为 True 且连接仍可用时放回池中，否则关闭"""
+        if (
+            reuse
+            and not self._closed
+            and ws.state is State.OPEN
+            and len(self._idle) < self.size
+        ):
+            self._idle.append((ws, time.monotonic()))
+            self.recycled += 1
+            return
+        await self._close_ws(ws)
+
+    def _discard(self, ws):
+        self.discarded += 1
+        asyncio.create_task(self._close_ws(ws))
+
+    @staticmethod
+    async def _close_ws(ws):
+        try:
+            await asyncio.wait_for(ws.close(), timeout=2.0)
+        except Exception:
+            pass
+
+    def _ensure_maintainer(self):
+        if self.size <= 0 or self._closed:
+            return
+        if self._maintainer is None or self._maintainer.done():
+            self._maintainer = asyncio.create_task(self._maintain())
+
+    async def _maintain(self):
+        """后台轮换过期会话，有识别需求时补足空闲会话数，需求消失且池已清空后退出"""
+        while not self._closed:
+            for _ in range(len(self._idle)):
+                ws, idle_since = self._idle.popleft()
+                if self._usable(ws, idle_since):
+                    self._idle.append((ws, idle_since))
+                else:
+                    self._discard(ws)
+
+            now = time.monotonic()
+            if now - self._last_demand >= self.demand_window:
+                if not self._idle and not self._opening:
+                    return
+                missing = 0
+            else:
+                missing = self.size - len(self._idle) - self._opening
+            if missing > 0 and now >= self._retry_at:
+                for _ in range(missing):
+                    self._opening += 1
+                    task = asyncio.create_task(self._open_one())
+                    self._open_tasks.add(task)
+                    task.add_done_callback(self._open_tasks.discard)
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=MAINTAIN_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _open_one(self):
+        try:
+            ws = await self._connect()
+        except Exception as e:
+            if self._closed:
+                return
+            # 连续失败时指数退避，避免服务不可用时反复握手
+            self._retry_delay = min(MAX_RETRY_DELAY, max(1.0, self._retry_delay * 2))
+            self._retry_at = time.monotonic() + self._retry_delay
+            logger.bind(tag=TAG).warning(
+                f"{self.name} 预热会话建立失败，{self._retry_delay:.0f}秒后重试: {e}"
+            )
+            return
+        finally:
+            self._opening -= 1
+        self._retry_delay = 0.0
+        if self._closed or len(self._idle) >= self.size:
+            await self._close_ws(ws)
+            return
+        self._idle.append((ws, time.monotonic()))
+
+    def get_stats(self) -> Dict:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "opening": self._opening,
+            "hits": self.hits,
+            "misses": self.misses,
+            "recycled": self.recycled,
+            "discarded": self.discarded,
+        }
+
+    async def close(self):
+        self._closed = True
+        if self._maintainer is not None:
+            self._maintainer.cancel()
+        for task in list(self._open_tasks):
+            task.cancel()
+        while self._idle:
+            ws, _ = self._idle.popleft()
+            await self._close_ws(ws)
+
+
+# 事件循环 -> {key: 会话池}；会话池的任务与连接都属于创建它的事件循环
+_pools: Dict[asyncio.AbstractEventLoop, Dict[Hashable, StreamingSessionPool]] = {}
+_pools_lock = threading.Lock()
+
+
+def _prune_closed_loops():
+    """丢弃已关闭事件循环上的会话池，调用方已持有 _pools_lock"""
+    for loop in [loop for loop in _pools if loop.is_closed()]:
+        del _pools[loop]
+
+
+def get_session_pool(
+    key: Hashable,
+    connect: Callable[[], Awaitable],
+    size: int = DEFAULT_POOL_SIZE,
+    idle_ttl: float = DEFAULT_IDLE_TTL,
+    demand_window: float = DEFAULT_DEMAND_WINDOW,
+) -> StreamingSessionPool:
+    """
+    获取当前事件循环上 key 对应的会话池（不存在时创建），必须在事件循环内调用
+
+    key 需包含服务地址与鉴权信息，配置相同的提供者实例共用一个池
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop, {}).get(key)
+    if pool is None:
+        with _pools_lock:
+            _prune_closed_loops()
+            loop_pools = _pools.setdefault(loop, {})
+            pool = loop_pools.get(key)
+            if pool is None:
+                pool = StreamingSessionPool(
+                    str(key[0]), connect, size, idle_ttl, demand_window
+                )
+                loop_pools[key] = pool
+                logger.bind(tag=TAG).info(
+                    f"流式ASR会话池已创建: {pool.name}, 预热会话数: {pool.size}"
+                )
+    return pool
+
+
+async def close_session_pools():
+    """关闭当前事件循环上的所有会话池，事件循环退出前调用"""
+    with _pools_lock:
+        loop_pools = _pools.pop(asyncio.get_running_loop(), {})
+    for pool in loop_pools.values():
+        await pool.close()
+
+
+def get_session_pool_stats() -> Dict[str, Dict]:
+    """所有会话池的统计信息"""
+    with _pools_lock:
+        _prune_closed_loops()
+        pools = [pool for loop_pools in _pools.values() for pool in loop_pools.values()]
+    return {
+        f"{pool.name}#{index}": pool.get_stats() for index, pool in enumerate(pools)
+    }
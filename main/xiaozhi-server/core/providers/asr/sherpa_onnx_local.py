@@ -1,5 +1,4 @@
 import time
-import wave
 import os
 import sys
 import io
@@ -7,8 +6,13 @@ from config.logger import setup_logging
 from typing import Optional, Tuple, List
 from core.providers.asr.dto.dto import InterfaceType
 from core.providers.asr.base import ASRProviderBase
+from core.providers.asr.batch_decoder import (
+    BatchDecodeWorker,
+    DEFAULT_BATCH_WINDOW_MS,
+    DEFAULT_MAX_BATCH_SIZE,
+    pcm16_to_float32,
+)
 
-import numpy as np
 import sherpa_onnx
 
 from modelscope.hub.file_download import model_file_download
@@ -35,6 +39,9 @@ class CaptureOutput:
 
 
 class ASRProvider(ASRProviderBase):
+    # 本地模型，多个连接共用一个实例
+    SHAREABLE = True
+
     def __init__(self, config: dict, delete_audio_file: bool):
         super().__init__()
         self.interface_type = InterfaceType.LOCAL
@@ -96,32 +103,18 @@ class ASRProvider(ASRProviderBase):
                     use_itn=True,
                 )
 
-    def read_wave(self, wave_filename: str) -> Tuple[np.ndarray, int]:
-        """
-        Args:
-        wave_filename:
-            Path to a wave file. It should be single channel and each sample should
-            be 16-bit. Its sample rate does not need to be 16kHz.
-        Returns:
-        Return a tuple containing:
-        - A 1-D array of dtype np.float32 containing the samples, which are
-        normalized to the range [-1, 1].
-        - sample rate of the wave file
-        """
-
-        with wave.open(wave_filename) as f:
-            assert f.getnchannels() == 1, f.getnchannels()
-            assert f.getsampwidth() == 2, f.getsampwidth()  # it is in bytes
-            num_samples = f.getnframes()
-            samples = f.readframes(num_samples)
-            samples_int16 = np.frombuffer(samples, dtype=np.int16)
-            samples_float32 = samples_int16.astype(np.float32)
-
-            samples_float32 = samples_float32 / 32768
-            return samples_float32, f.getframerate()
-
-    def requires_file(self) -> bool:
-        return True
+        # 所有连接共用一个模型实例，说话结束的请求在时间窗内合并为一批解码
+        self.decoder = BatchDecodeWorker(
+            self.model,
+            batch_window_ms=config.get("batch_window_ms", DEFAULT_BATCH_WINDOW_MS),
+            max_batch_size=config.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE),
+            name=f"sherpa-{self.model_type}-decoder",
+        )
+
+    def cleanup(self):
+        """停止批量解码线程并释放模型，实例被提供者注册表淘汰时调用"""
+        self.decoder.close()
+        self.model = None
 
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, artifacts=None
@@ -134,11 +127,9 @@ class ASRProvider(ASRProviderBase):
             file_path = artifacts.file_path
 
             start_time = time.time()
-            s = self.model.create_stream()
-            samples, sample_rate = self.read_wave(file_path)
-            s.accept_waveform(sample_rate, samples)
-            self.model.decode_stream(s)
-            text = s.result.text
+            # 直接使用内存中的PCM数据，无需写入并回读WAV文件
+            samples = pcm16_to_float32(artifacts.pcm_bytes)
+            text = await self.decoder.decode(samples, 16000)
             logger.bind(tag=TAG).debug(
                 f"语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text}"
             )
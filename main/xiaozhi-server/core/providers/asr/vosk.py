@@ -1,58 +1,312 @@
 import os
 import json
 import time
-from typing import Optional, Tuple, List
+import zlib
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Dict, Optional, Tuple, List
 from .base import ASRProviderBase
 from config.logger import setup_logging
 from core.providers.asr.dto.dto import InterfaceType
+from core.handle.sendAudioHandle import send_display_message
 import vosk
 
 TAG = __name__
 logger = setup_logging()
 
+# VOSK推荐每次送入2000字节的数据
+CHUNK_SIZE = 2000
+SAMPLE_RATE = 16000
+DEFAULT_MAX_WORKERS = 4
+# 连接断开等原因未结束的识别会话，超过该时间(秒)没有新音频时回收
+SESSION_IDLE_TIMEOUT = 60
+
+
+class RecognizerPool:
+    """所有连接共享只读的 Model，每句话租用一个 KaldiRecognizer，归还时重置后复用"""
+
+    def __init__(self, model, sample_rate: int = SAMPLE_RATE, max_idle: int = 32):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            self.created += 1
+        return vosk.KaldiRecognizer(self.model, self.sample_rate)
+
+    def release(self, recognizer):
+        try:
+            recognizer.Reset()
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"重置VOSK识别器失败，丢弃: {e}")
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(recognizer)
+
+
+class UtteranceSession:
+    """
+    一句话的增量识别会话：音频到达时即在线程池中解码并更新中间结果，
+    说话结束时只需补齐剩余音频并取最终结果。同一会话的解码任务串行执行。
+    中间结果变化时调用 on_partial，推送失败不影响识别。
+    """
+
+    def __init__(
+        self,
+        pool: RecognizerPool,
+        executor: ThreadPoolExecutor,
+        on_partial: Optional[Callable[[str], Awaitable]] = None,
+    ):
+        self.pool = pool
+        self.executor = executor
+        self.on_partial = on_partial
+        self.recognizer = None
+        self.segments: List[str] = []
+        self.partial = ""
+        self.fed_bytes = 0
+        self.fed_crc = 0
+        self.last_active = time.monotonic()
+        self._aborted = False
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    def feed(self, pcm: bytes):
+        self.fed_bytes += len(pcm)
+        self.fed_crc = zlib.crc32(pcm, self.fed_crc)
+        self.last_active = time.monotonic()
+        self._queue.put_nowait(pcm)
+
+    def abort(self):
+        """放弃本句识别，识别器由解码任务归还"""
+        if not self._aborted:
+            self._aborted = True
+            self._queue.put_nowait(None)
+
+    async def finish(self, pcm_bytes: bytes) -> Optional[str]:
+        """
+        结束本句并返回最终文本
+
+        已送入的音频必须是 pcm_bytes 的前缀，否则放弃会话并返回 None，由调用方整句重新识别
+        """
+        if (
+            self._aborted
+            or self.fed_bytes > len(pcm_bytes)
+            or zlib.crc32(pcm_bytes[: self.fed_bytes]) != self.fed_crc
+        ):
+            self.abort()
+            return None
+        if len(pcm_bytes) > self.fed_bytes:
+            self.feed(pcm_bytes[self.fed_bytes :])
+        self._queue.put_nowait(None)
+        # 调用方被取消时解码任务仍会完成并归还识别器
+        return await asyncio.shield(self._task)
+
+    async def _run(self) -> str:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                # 一次取出所有积压的音频，减少线程切换
+                chunks = [await self._queue.get()]
+                while not self._queue.empty():
+                    chunks.append(self._queue.get_nowait())
+                finished = chunks[-1] is None
+
+                if self._aborted:
+                    return ""
+                data = b"".join(chunk for chunk in chunks if chunk)
+                if data:
+                    partial = await loop.run_in_executor(
+                        self.executor, self._accept, data
+                    )
+                    if partial != self.partial:
+                        self.partial = partial
+                        await self._publish_partial(partial)
+                if finished:
+                    return await loop.run_in_executor(self.executor, self._final)
+        finally:
+            if self.recognizer is not None:
+                recognizer, self.recognizer = self.recognizer, None
+                try:
+                    await loop.run_in_executor(
+                        self.executor, self.pool.release, recognizer
+                    )
+                except RuntimeError:
+                    # 提供者已释放，线程池已关闭
+                    pass
+
+    async def _publish_partial(self, partial: str):
+        logger.bind(tag=TAG).debug(f"VOSK中间结果: {partial}")
+        # 说话已结束或被放弃时不再推送，避免中间结果晚于最终结果到达
+        if not partial or self.on_partial is None or self._aborted:
+            return
+        try:
+            await self.on_partial(partial)
+        except Exception as e:
+            logger.bind(tag=TAG).debug(f"推送VOSK中间结果失败: {e}")
+
+    def _accept(self, data: bytes) -> str:
+        """在线程池中送入音频，返回当前中间结果"""
+        if self.recognizer is None:
+            self.recognizer = self.pool.acquire()
+        for i in range(0, len(data), CHUNK_SIZE):
+            if self.recognizer.AcceptWaveform(data[i : i + CHUNK_SIZE]):
+                text = json.loads(self.recognizer.Result()).get("text", "")
+                if text:
+                    self.segments.append(text)
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return " ".join(self.segments + [partial]).strip()
+
+    def _final(self) -> str:
+        if self.recognizer is None:
+            return ""
+        text = json.loads(self.recognizer.FinalResult()).get("text", "")
+        if text:
+            self.segments.append(text)
+        return " ".join(self.segments).strip()
+
+
 class ASRProvider(ASRProviderBase):
+    # 本地模型，多个连接共用一个实例
+    SHAREABLE = True
+
     def __init__(self, config: dict, delete_audio_file: bool = True):
         super().__init__()
         self.interface_type = InterfaceType.LOCAL
         self.model_path = config.get("model_path")
         self.output_dir = config.get("output_dir", "tmp/")
         self.delete_audio_file = delete_audio_file
-        
+
+        # 解码线程池大小，限制同时占用CPU解码的句子数
+        max_workers = int(config.get("max_workers", DEFAULT_MAX_WORKERS))
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="vosk-decode"
+        )
+        # 进行中的识别会话，按连接的 session_id 区分
+        self._sessions: Dict[str, UtteranceSession] = {}
+        # 是否把中间结果以 stt 消息实时推送给设备
+        self.send_partial = str(config.get("send_partial", True)).lower() in (
+            "true",
+            "1",
+            "yes",
+        )
+
         # 初始化VOSK模型
         self.model = None
-        self.recognizer = None
+        self.recognizer_pool = None
         self._load_model()
-        
+
         # 确保输出目录存在
         os.makedirs(self.output_dir, exist_ok=True)
 
+    def cleanup(self):
+        """放弃未完成的识别会话，停止解码线程池并释放模型，实例被提供者注册表释放时调用"""
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            try:
+                session._task.get_loop().call_soon_threadsafe(session.abort)
+            except RuntimeError:
+                # 会话所在的事件循环已关闭
+                pass
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.recognizer_pool = None
+        self.model = None
+
     def _load_model(self):
         """加载VOSK模型"""
         try:
             if not os.path.exists(self.model_path):
                 raise FileNotFoundError(f"VOSK模型路径不存在: {self.model_path}")
-                
+
             logger.bind(tag=TAG).info(f"正在加载VOSK模型: {self.model_path}")
             self.model = vosk.Model(self.model_path)
 
-            # 初始化VOSK识别器（采样率必须为16kHz）
-            self.recognizer = vosk.KaldiRecognizer(self.model, 16000)
+            # 识别器按句租用（采样率必须为16kHz）
+            self.recognizer_pool = RecognizerPool(self.model, SAMPLE_RATE)
 
             logger.bind(tag=TAG).info("VOSK模型加载成功")
         except Exception as e:
             logger.bind(tag=TAG).error(f"加载VOSK模型失败: {e}")
             raise
 
+    async def receive_audio(self, conn, pcm_frame, audio_have_voice):
+        session_id = conn.session_id
+        session = self._sessions.get(session_id)
+        if session is not None and not conn.asr_audio:
+            # 上一句已被重置（音频过短、重新开始拾音等），放弃未完成的识别
+            self._sessions.pop(session_id).abort()
+            session = None
+
+        if session is None and self.model and (
+            audio_have_voice
+            or conn.client_have_voice
+            or conn.client_listen_mode == "manual"
+        ):
+            # 开始说话：先送入预缓存的音频
+            session = self._start_session(conn)
+            for frame in conn.asr_audio:
+                session.feed(frame)
+        if session is not None:
+            session.feed(pcm_frame)
+
+        await super().receive_audio(conn, pcm_frame, audio_have_voice)
+
+    def release_conn_resources(self, conn):
+        """释放连接未完成的识别会话（连接关闭时调用）"""
+        session = self._sessions.pop(getattr(conn, "session_id", None), None)
+        if session is not None:
+            session.abort()
+
+    def _start_session(self, conn) -> UtteranceSession:
+        now = time.monotonic()
+        for stale_id, stale in list(self._sessions.items()):
+            if now - stale.last_active > SESSION_IDLE_TIMEOUT:
+                self._sessions.pop(stale_id).abort()
+        on_partial = None
+        if self.send_partial:
+
+            async def on_partial(text: str):
+                await send_display_message(conn, text)
+
+        session = UtteranceSession(self.recognizer_pool, self.executor, on_partial)
+        self._sessions[conn.session_id] = session
+        return session
+
+    def _decode_once(self, pcm_bytes: bytes) -> str:
+        """没有增量会话时整句识别（在线程池中执行）"""
+        recognizer = self.recognizer_pool.acquire()
+        try:
+            segments = []
+            for i in range(0, len(pcm_bytes), CHUNK_SIZE):
+                if recognizer.AcceptWaveform(pcm_bytes[i : i + CHUNK_SIZE]):
+                    text = json.loads(recognizer.Result()).get("text", "")
+                    if text:
+                        segments.append(text)
+            final_text = json.loads(recognizer.FinalResult()).get("text", "")
+            if final_text:
+                segments.append(final_text)
+            return " ".join(segments).strip()
+        finally:
+            self.recognizer_pool.release(recognizer)
+
     async def speech_to_text(
         self, opus_data: List[bytes], session_id: str, artifacts=None
     ) -> Tuple[Optional[str], Optional[str]]:
         """将语音数据转换为文本"""
+        session = self._sessions.pop(session_id, None)
         try:
             # 检查模型是否加载成功
             if not self.model:
                 logger.bind(tag=TAG).error("VOSK模型未加载，无法进行识别")
                 return "", None
-            
+
             if artifacts is None:
                 return "", None
             if not artifacts.pcm_bytes:
@@ -60,32 +314,25 @@ class ASRProvider(ASRProviderBase):
                 return "", None
 
             start_time = time.time()
-            
-            
-            # 进行识别（VOSK推荐每次送入2000字节的数据）
-            chunk_size = 2000
-            text_result = ""
-            
-            for i in range(0, len(artifacts.pcm_bytes), chunk_size):
-                chunk = artifacts.pcm_bytes[i:i+chunk_size]
-                if self.recognizer.AcceptWaveform(chunk):
-                    result = json.loads(self.recognizer.Result())
-                    text = result.get('text', '')
-                    if text:
-                        text_result += text + " "
-            
-            # 获取最终结果
-            final_result = json.loads(self.recognizer.FinalResult())
-            final_text = final_result.get('text', '')
-            if final_text:
-                text_result += final_text
-            
+
+            text_result = None
+            if session is not None:
+                text_result = await session.finish(artifacts.pcm_bytes)
+                session = None
+            if text_result is None:
+                text_result = await asyncio.get_running_loop().run_in_executor(
+                    self.executor, self._decode_once, artifacts.pcm_bytes
+                )
+
             logger.bind(tag=TAG).debug(
-                f"VOSK语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text_result.strip()}"
+                f"VOSK语音识别耗时: {time.time() - start_time:.3f}s | 结果: {text_result}"
             )
-            
-            return text_result.strip(), artifacts.file_path
-            
+
+            return text_result, artifacts.file_path
+
         except Exception as e:
             logger.bind(tag=TAG).error(f"VOSK语音识别失败: {e}")
             return "", None
+        finally:
+            if session is not None:
+                session.abort()
@@ -3,12 +3,12 @@ from typing import List, Dict, TYPE_CHECKING
 if TYPE_CHECKING:
     from core.connection import ConnectionHandler
 from ..base import IntentProviderBase
-from plugins_func.functions.play_music import initialize_music_handler
+from plugins_func.functions.play_music import get_music_prompt_candidates
 from config.logger import setup_logging
 from core.utils.util import get_system_error_response
+from core.utils.intent_cache import get_intent_cache
 import re
 import json
-import hashlib
 import time
 
 
@@ -22,11 +22,8 @@ class IntentProvider(IntentProviderBase):
         super().__init__(config)
         self.llm = None
         self.promot = ""
-        # 导入全局缓存管理器
-        from core.utils.cache.manager import cache_manager, CacheType
-
-        self.cache_manager = cache_manager
-        self.CacheType = CacheType
+        # 进程级两级意图缓存（规范化精确匹配 + 语义近邻），设备无关的意图在设备间共享
+        self.intent_cache = get_intent_cache(config)
         self.history_count = 4  # 默认使用最近4条对话记录
 
     def get_intent_system_prompt(self, functions_list: str) -> str:
@@ -147,15 +144,12 @@ class IntentProvider(IntentProviderBase):
         model_info = getattr(self.llm, "model_name", str(self.llm.__class__.__name__))
         logger.bind(tag=TAG).debug(f"使用意图识别模型: {model_info}")
 
-        # 计算缓存键
-        cache_key = hashlib.md5((conn.device_id + text).encode()).hexdigest()
-
         # 检查缓存
-        cached_intent = self.cache_manager.get(self.CacheType.INTENT, cache_key)
+        cached_intent = self.intent_cache.get(conn.device_id, text)
         if cached_intent is not None:
             cache_time = time.time() - total_start_time
             logger.bind(tag=TAG).debug(
-                f"使用缓存的意图: {cache_key} -> {cached_intent}, 耗时: {cache_time:.4f}秒"
+                f"使用缓存的意图: {text} -> {cached_intent}, 耗时: {cache_time:.4f}秒"
             )
             return cached_intent
 
@@ -170,8 +164,8 @@ class IntentProvider(IntentProviderBase):
 
             self.promot = self.get_intent_system_prompt(functions)
 
-        music_config = initialize_music_handler(conn)
-        music_file_names = music_config["music_file_names"]
+        # 只携带与本次输入最相关的前K首歌名，避免曲库较大时提示词过长
+        music_file_names = await get_music_prompt_candidates(conn, text)
         prompt_music = f"{self.promot}\n<musicNames>{music_file_names}\n</musicNames>"
 
         home_assistant_cfg = conn.config["plugins"].get("home_assistant")
@@ -207,7 +201,8 @@ class IntentProvider(IntentProviderBase):
         logger.bind(tag=TAG).debug(f"开始LLM意图识别调用, 模型: {model_info}")
 
         try:
-            intent = self.llm.response_no_stream(
+            # 异步调用，不阻塞连接所在的事件循环；同步提供者在有界线程池中执行
+            intent = await self.llm.aresponse_no_stream(
                 system_prompt=prompt_music, user_prompt=user_prompt
             )
         except Exception as e:
@@ -272,7 +267,7 @@ class IntentProvider(IntentProviderBase):
                     logger.bind(tag=TAG).info(f"检测到函数调用意图: {function_name}")
 
             # 统一缓存处理和返回
-            self.cache_manager.set(self.CacheType.INTENT, cache_key, intent)
+            self.intent_cache.put(conn.device_id, text, intent, total_time * 1000)
             postprocess_time = time.time() - postprocess_start_time
             logger.bind(tag=TAG).debug(f"意图后处理耗时: {postprocess_time:.4f}秒")
             return intent
@@ -0,0 +1,90 @@
+"""
+LLM 异步客户端池
+进程内按 (事件循环, base_url, api_key, 超时) 共享一个 AsyncOpenAI 客户端，所有连接、所有轮次复用同一个
+httpx 连接池（安装了 h2 时对 https 上游开启HTTP/2多路复用）；
+每个上游配置一个并发上限，超出的请求排队等待，而不是在连接池里等到 pool 超时。
+"""
+
+import asyncio
+import threading
+from typing import Dict, Tuple
+
+import httpx
+import openai
+
+from config.logger import setup_logging
+
+try:
+    import h2  # noqa: F401  httpx 的HTTP/2支持依赖 h2
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_MAX_CONCURRENCY = 200
+DEFAULT_KEEPALIVE_CONNECTIONS = 50
+
+_clients: Dict[Tuple, Tuple[openai.AsyncOpenAI, asyncio.Semaphore]] = {}
+_lock = threading.Lock()
+
+
+def get_async_llm_client(
+    base_url: str,
+    api_key: str,
+    timeout: httpx.Timeout,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    http2: bool = True,
+) -> Tuple[openai.AsyncOpenAI, asyncio.Semaphore]:
+    """
+    获取当前事件循环上共享的异步客户端与并发限制信号量，必须在事件循环内调用
+
+    同一上游的并发上限以第一次创建时的配置为准
+    """
+    loop = asyncio.get_running_loop()
+    key = (id(loop), base_url, api_key, repr(timeout))
+    entry = _clients.get(key)
+    if entry is not None:
+        return entry
+    with _lock:
+        entry = _clients.get(key)
+        if entry is None:
+            max_concurrency = max(1, int(max_concurrency or DEFAULT_MAX_CONCURRENCY))
+            http_client = httpx.AsyncClient(
+                http2=http2 and HTTP2_AVAILABLE,
+                timeout=timeout,
+                limits=httpx.Limits(
+                    max_connections=max_concurrency,
+                    max_keepalive_connections=min(
+                        max_concurrency, DEFAULT_KEEPALIVE_CONNECTIONS
+                    ),
+                ),
+            )
+            client = openai.AsyncOpenAI(
+                api_key=api_key,
+                base_url=base_url,
+                timeout=timeout,
+                http_client=http_client,
+            )
+            entry = (client, asyncio.Semaphore(max_concurrency))
+            _clients[key] = entry
+            logger.bind(tag=TAG).info(
+                f"LLM异步客户端已创建: {base_url}, 并发上限: {max_concurrency}, "
+                f"HTTP/2: {http2 and HTTP2_AVAILABLE}"
+            )
+    return entry
+
+
+async def close_async_llm_clients():
+    """关闭当前事件循环上创建的所有异步客户端"""
+    loop_id = id(asyncio.get_running_loop())
+    with _lock:
+        keys = [key for key in _clients if key[0] == loop_id]
+        entries = [_clients.pop(key) for key in keys]
+    for client, _ in entries:
+        try:
+            await client.close()
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"关闭LLM异步客户端失败: {e}")
@@ -1,10 +1,44 @@
+import asyncio
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from config.logger import setup_logging
 
 TAG = __name__
 logger = setup_logging()
 
+# 未提供原生异步接口的提供者，其同步流在此线程池中逐块读取（线程按需创建）
+_sync_stream_executor = ThreadPoolExecutor(
+    max_workers=256, thread_name_prefix="llm-sync-stream"
+)
+_STREAM_END = object()
+
+
+async def iterate_in_thread(generator):
+    """把同步生成器包装为异步生成器，每次取下一块时才占用线程"""
+    future = None
+    try:
+        while True:
+            future = _sync_stream_executor.submit(next, generator, _STREAM_END)
+            item = await asyncio.wrap_future(future)
+            if item is _STREAM_END:
+                break
+            yield item
+    finally:
+        close = getattr(generator, "close", None)
+        if close is not None:
+            if future is not None and not future.done():
+                # 被取消时线程仍在读取下一块，等它返回后再关闭生成器
+                future.add_done_callback(
+                    lambda _: _sync_stream_executor.submit(close)
+                )
+            else:
+                await asyncio.wrap_future(_sync_stream_executor.submit(close))
+
+
 class LLMProviderBase(ABC):
+    # 不保存连接级状态（会话按 session_id 区分），配置相同时由提供者注册表在连接间共享
+    SHAREABLE = True
+
     @abstractmethod
     def response(self, session_id, dialogue):
         """LLM response generator"""
@@ -21,6 +55,17 @@ class LLMProviderBase(ABC):
             result += part
         return result
     
+    async def aresponse_no_stream(self, system_prompt, user_prompt, **kwargs):
+        """异步版本的 response_no_stream，不阻塞事件循环"""
+        dialogue = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        parts = []
+        async for part in self.aresponse("", dialogue, **kwargs):
+            parts.append(part)
+        return "".join(parts)
+
     def response_with_functions(self, session_id, dialogue, functions=None):
         """
         Default implementation for function calling (streaming)
@@ -32,3 +77,19 @@ class LLMProviderBase(ABC):
         for token in self.response(session_id, dialogue):
             yield token, None
 
+    async def aresponse(self, session_id, dialogue, **kwargs):
+        """
+        异步流式响应，异步生成器。提供者可覆盖为原生实现；
+        默认实现在线程池中读取同步的 response 生成器。
+        """
+        async for token in iterate_in_thread(
+            self.response(session_id, dialogue, **kwargs)
+        ):
+            yield token
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None, **kwargs):
+        """异步版本的 response_with_functions，产出 (content, tool_calls)"""
+        async for item in iterate_in_thread(
+            self.response_with_functions(session_id, dialogue, functions=functions, **kwargs)
+        ):
+            yield item
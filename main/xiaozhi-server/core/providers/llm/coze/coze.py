@@ -18,6 +18,9 @@ logger = setup_logging()
 
 
 class LLMProvider(LLMProviderBase):
+    # 按 session_id 记录平台会话，共享时映射随连接数无限增长，每个连接单独创建
+    SHAREABLE = False
+
     def __init__(self, config):
         self.personal_access_token = config.get("personal_access_token")
         self.bot_id = str(config.get("bot_id"))
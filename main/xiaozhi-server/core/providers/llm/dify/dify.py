@@ -10,6 +10,9 @@ logger = setup_logging()
 
 
 class LLMProvider(LLMProviderBase):
+    # 按 session_id 记录平台会话，共享时映射随连接数无限增长，每个连接单独创建
+    SHAREABLE = False
+
     def __init__(self, config):
         self.api_key = config["api_key"]
         self.mode = config.get("mode", "chat-messages")
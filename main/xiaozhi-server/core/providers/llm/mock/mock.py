@@ -0,0 +1,56 @@
+import time
+import asyncio
+from config.logger import setup_logging
+from core.providers.llm.base import LLMProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_REPLY = "好的，我听到你说：{query}。这是一段用于压力测试的固定回复，会被分成几句话依次合成播放。"
+
+
+class LLMProvider(LLMProviderBase):
+    """
+    本地模拟LLM，用于离线压力测试
+    按固定的首字延迟和分片间隔流式输出回复模板，回复内容只取决于最后一条用户消息。
+    """
+
+    def __init__(self, config):
+        first_token_ms = config.get("first_token_ms", "300")
+        token_interval_ms = config.get("token_interval_ms", "30")
+        chunk_chars = config.get("chunk_chars", "2")
+        self.first_token_delay = (float(first_token_ms) if first_token_ms else 0) / 1000
+        self.token_interval = (float(token_interval_ms) if token_interval_ms else 0) / 1000
+        self.chunk_chars = max(1, int(chunk_chars) if chunk_chars else 2)
+        self.reply = config.get("reply") or DEFAULT_REPLY
+
+    def _chunks(self, dialogue):
+        query = ""
+        for message in reversed(dialogue):
+            if message.get("role") == "user":
+                query = message.get("content") or ""
+                break
+        text = self.reply.replace("{query}", query)
+        return [
+            text[i : i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)
+        ]
+
+    def response(self, session_id, dialogue, **kwargs):
+        for index, chunk in enumerate(self._chunks(dialogue)):
+            time.sleep(self.first_token_delay if index == 0 else self.token_interval)
+            yield chunk
+
+    def response_with_functions(self, session_id, dialogue, functions=None, **kwargs):
+        for chunk in self.response(session_id, dialogue):
+            yield chunk, None
+
+    async def aresponse(self, session_id, dialogue, **kwargs):
+        for index, chunk in enumerate(self._chunks(dialogue)):
+            await asyncio.sleep(
+                self.first_token_delay if index == 0 else self.token_interval
+            )
+            yield chunk
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None, **kwargs):
+        async for chunk in self.aresponse(session_id, dialogue):
+            yield chunk, None
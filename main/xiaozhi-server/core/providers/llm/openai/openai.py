@@ -4,6 +4,10 @@ from openai.types import CompletionUsage
 from config.logger import setup_logging
 from core.utils.util import check_model_key
 from core.providers.llm.base import LLMProviderBase
+from core.providers.llm.async_client import (
+    DEFAULT_MAX_CONCURRENCY,
+    get_async_llm_client,
+)
 from urllib.parse import urlparse
 
 TAG = __name__
@@ -42,6 +46,12 @@ class LLMProvider(LLMProviderBase):
         else:
             # 未配置或配置无效，使用默认值
             custom_timeout = httpx.Timeout(300)
+        self.timeout = custom_timeout
+        # 异步接口共享连接池，同一上游同时进行的流式请求数上限
+        self.max_concurrency = int(
+            config.get("max_concurrency") or DEFAULT_MAX_CONCURRENCY
+        )
+        self.http2 = str(config.get("http2", True)).lower() in ("true", "1", "yes")
 
         param_defaults = {
             "max_tokens": int,
@@ -88,14 +98,14 @@ class LLMProvider(LLMProviderBase):
                 logger.bind(tag=TAG).info(f"为域名 {domain} 禁用思考模式，参数: {params}")
                 break
 
-    def response(self, session_id, dialogue, **kwargs):
-        dialogue = self.normalize_dialogue(dialogue)
-
+    def _build_request_params(self, dialogue, functions=None, **kwargs):
         request_params = {
             "model": self.model_name,
-            "messages": dialogue,
+            "messages": self.normalize_dialogue(dialogue),
             "stream": True,
         }
+        if functions is not None:
+            request_params["tools"] = functions
 
         # 添加可选参数,只有当参数不为None时才添加
         optional_params = {
@@ -111,68 +121,98 @@ class LLMProvider(LLMProviderBase):
 
         # 禁用思考模式
         self._apply_thinking_disabled(request_params)
+        return request_params
+
+    @staticmethod
+    def _filter_think(chunk, is_active):
+        """提取文本增量并过滤 <think> 段，返回 (content, is_active)"""
+        try:
+            delta = chunk.choices[0].delta if getattr(chunk, "choices", None) else None
+            content = getattr(delta, "content", "") if delta else ""
+        except IndexError:
+            content = ""
+        if content:
+            if "<think>" in content:
+                is_active = False
+                content = content.split("<think>")[0]
+            if "</think>" in content:
+                is_active = True
+                content = content.split("</think>")[-1]
+        return (content if is_active else ""), is_active
 
+    @staticmethod
+    def _parse_function_chunk(chunk):
+        """解析带工具调用的流式数据块，返回 (content, tool_calls)，不含增量时返回 None"""
+        if getattr(chunk, "choices", None):
+            delta = chunk.choices[0].delta
+            return getattr(delta, "content", ""), getattr(delta, "tool_calls", None)
+        if isinstance(getattr(chunk, "usage", None), CompletionUsage):
+            usage_info = getattr(chunk, "usage", None)
+            logger.bind(tag=TAG).info(
+                f"Token 消耗：输入 {getattr(usage_info, 'prompt_tokens', '未知')}，"
+                f"输出 {getattr(usage_info, 'completion_tokens', '未知')}，"
+                f"共计 {getattr(usage_info, 'total_tokens', '未知')}"
+            )
+        return None
+
+    def response(self, session_id, dialogue, **kwargs):
+        request_params = self._build_request_params(dialogue, **kwargs)
         responses = self.client.chat.completions.create(**request_params)
 
         is_active = True
-        try:            
+        try:
             for chunk in responses:
-                try:
-                    delta = chunk.choices[0].delta if getattr(chunk, "choices", None) else None
-                    content = getattr(delta, "content", "") if delta else ""
-                except IndexError:
-                    content = ""
+                content, is_active = self._filter_think(chunk, is_active)
                 if content:
-                    if "<think>" in content:
-                        is_active = False
-                        content = content.split("<think>")[0]
-                    if "</think>" in content:
-                        is_active = True
-                        content = content.split("</think>")[-1]
-                    if is_active:
-                        yield content
+                    yield content
         finally:
             responses.close()
 
     def response_with_functions(self, session_id, dialogue, functions=None, **kwargs):
-        dialogue = self.normalize_dialogue(dialogue)
-
-        request_params = {
-            "model": self.model_name,
-            "messages": dialogue,
-            "stream": True,
-            "tools": functions,
-        }
-
-        optional_params = {
-            "max_tokens": kwargs.get("max_tokens", self.max_tokens),
-            "temperature": kwargs.get("temperature", self.temperature),
-            "top_p": kwargs.get("top_p", self.top_p),
-            "frequency_penalty": kwargs.get("frequency_penalty", self.frequency_penalty),
-        }
-
-        for key, value in optional_params.items():
-            if value is not None:
-                request_params[key] = value
-
-        # 禁用思考模式
-        self._apply_thinking_disabled(request_params)
-
+        request_params = self._build_request_params(dialogue, functions=functions, **kwargs)
         stream = self.client.chat.completions.create(**request_params)
 
         try:
             for chunk in stream:
-                if getattr(chunk, "choices", None):
-                    delta = chunk.choices[0].delta
-                    content = getattr(delta, "content", "")
-                    tool_calls = getattr(delta, "tool_calls", None)
-                    yield content, tool_calls
-                elif isinstance(getattr(chunk, "usage", None), CompletionUsage):
-                    usage_info = getattr(chunk, "usage", None)
-                    logger.bind(tag=TAG).info(
-                        f"Token 消耗：输入 {getattr(usage_info, 'prompt_tokens', '未知')}，"
-                        f"输出 {getattr(usage_info, 'completion_tokens', '未知')}，"
-                        f"共计 {getattr(usage_info, 'total_tokens', '未知')}"
-                    )
+                parsed = self._parse_function_chunk(chunk)
+                if parsed is not None:
+                    yield parsed
         finally:
             stream.close()
+
+    def _get_async_client(self):
+        return get_async_llm_client(
+            self.base_url,
+            self.api_key,
+            self.timeout,
+            max_concurrency=self.max_concurrency,
+            http2=self.http2,
+        )
+
+    async def aresponse(self, session_id, dialogue, **kwargs):
+        """原生异步流式响应：共享连接池，按上游并发上限排队；任务被取消时立即关闭上游流"""
+        request_params = self._build_request_params(dialogue, **kwargs)
+        client, limiter = self._get_async_client()
+        async with limiter:
+            stream = await client.chat.completions.create(**request_params)
+            is_active = True
+            try:
+                async for chunk in stream:
+                    content, is_active = self._filter_think(chunk, is_active)
+                    if content:
+                        yield content
+            finally:
+                await stream.close()
+
+    async def aresponse_with_functions(self, session_id, dialogue, functions=None, **kwargs):
+        request_params = self._build_request_params(dialogue, functions=functions, **kwargs)
+        client, limiter = self._get_async_client()
+        async with limiter:
+            stream = await client.chat.completions.create(**request_params)
+            try:
+                async for chunk in stream:
+                    parsed = self._parse_function_chunk(chunk)
+                    if parsed is not None:
+                        yield parsed
+            finally:
+                await stream.close()
@@ -141,6 +141,24 @@ class ServerMCPClient:
         fut: concurrent.futures.Future = asyncio.run_coroutine_threadsafe(coro, loop)
         return await asyncio.wrap_future(fut)
 
+    async def ping(self) -> Any:
+        """发送ping请求，用于健康检查
+
+        Raises:
+            RuntimeError: 客户端未初始化时抛出
+        """
+        if not self.session:
+            raise RuntimeError("服务端MCP客户端未初始化")
+
+        loop = self._worker_task.get_loop()
+        coro = self.session.send_ping()
+
+        if loop is asyncio.get_running_loop():
+            return await coro
+
+        fut: concurrent.futures.Future = asyncio.run_coroutine_threadsafe(coro, loop)
+        return await asyncio.wrap_future(fut)
+
     def is_connected(self) -> bool:
         """检查MCP客户端是否连接正常
 
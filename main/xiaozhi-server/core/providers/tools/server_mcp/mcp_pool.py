@@ -0,0 +1,305 @@
+"""进程级服务端MCP连接池
+
+所有设备连接共享同一组MCP会话，避免每个连接重复拉起stdio子进程或建立SSE/HTTP会话。
+"""
+
+import asyncio
+import os
+import json
+from typing import Dict, Any, List, Optional
+
+from mcp.types import LoggingMessageNotificationParams
+
+from config.config_loader import get_project_dir
+from config.logger import setup_logging
+from .mcp_client import ServerMCPClient
+
+TAG = __name__
+logger = setup_logging()
+
+
+class _PooledServer:
+    """单个MCP服务的固定数量会话"""
+
+    def __init__(self, name: str, config: Dict[str, Any], size: int):
+        self.name = name
+        self.config = config
+        self.size = max(1, size)
+        self.slots: List[Optional[ServerMCPClient]] = [None] * self.size
+        # 每个会话上正在执行的调用数，用于挑选最空闲的会话
+        self.inflight: List[int] = [0] * self.size
+        self.reconnect_locks = [asyncio.Lock() for _ in range(self.size)]
+        # 缓存工具名，会话全部断开时仍能把调用路由到该服务并触发重连
+        self.tool_names = set()
+
+    def pick_slot(self) -> int:
+        """挑选一个已连接且并发调用最少的会话"""
+        best = -1
+        for i, client in enumerate(self.slots):
+            if client is None or not client.is_connected():
+                continue
+            if best < 0 or self.inflight[i] < self.inflight[best]:
+                best = i
+        return best
+
+    def has_tool(self, tool_name: str) -> bool:
+        return tool_name in self.tool_names
+
+
+class ServerMCPPool:
+    """进程级MCP会话池：固定会话数、调用复用、工具列表共享、健康检查重连"""
+
+    def __init__(self):
+        self.config_path = get_project_dir() + "data/.mcp_server_settings.json"
+        self.servers: Dict[str, _PooledServer] = {}
+        self.tools: List[Dict[str, Any]] = []
+        self._loaded = False
+        self._config_mtime = None
+        self._init_lock = asyncio.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+        self.health_check_interval = 30
+        self.init_timeout = 10
+
+    def load_config(self) -> Dict[str, Any]:
+        """加载MCP服务配置"""
+        if not os.path.exists(self.config_path):
+            return {}
+
+        try:
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            return config.get("mcpServers", {})
+        except Exception as e:
+            logger.bind(tag=TAG).error(
+                f"Error loading MCP config from {self.config_path}: {e}"
+            )
+            return {}
+
+    def _current_mtime(self):
+        try:
+            return os.path.getmtime(self.config_path)
+        except OSError:
+            return None
+
+    async def ensure_initialized(self) -> None:
+        """首次调用时初始化所有MCP服务，配置文件变更后重新初始化"""
+        mtime = self._current_mtime()
+        if self._loaded and mtime == self._config_mtime:
+            return
+
+        async with self._init_lock:
+            mtime = self._current_mtime()
+            if self._loaded and mtime == self._config_mtime:
+                return
+
+            if self.servers:
+                logger.bind(tag=TAG).info("MCP服务配置已变更，重新初始化连接池")
+                await self._close_all()
+
+            if mtime is None:
+                logger.bind(tag=TAG).warning(
+                    f"请检查mcp服务配置文件：data/.mcp_server_settings.json"
+                )
+
+            config = self.load_config()
+            tasks = []
+            for name, srv_config in config.items():
+                if not srv_config.get("command") and not srv_config.get("url"):
+                    logger.bind(tag=TAG).warning(
+                        f"Skipping server {name}: neither command nor url specified"
+                    )
+                    continue
+                pool_size = int(srv_config.get("pool_size", 1))
+                server = _PooledServer(name, srv_config, pool_size)
+                self.servers[name] = server
+                for slot in range(server.size):
+                    tasks.append(self._connect_slot(server, slot))
+
+            if tasks:
+                await asyncio.gather(*tasks)
+
+            self._refresh_tools()
+            self._config_mtime = mtime
+            self._loaded = True
+
+            if self.servers and (self._health_task is None or self._health_task.done()):
+                self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _connect_slot(self, server: _PooledServer, slot: int) -> bool:
+        """建立（或重建）指定会话"""
+        old_client = server.slots[slot]
+        server.slots[slot] = None
+        if old_client is not None:
+            try:
+                await old_client.cleanup()
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"关闭MCP会话 {server.name}#{slot} 时出错: {e}")
+
+        client = ServerMCPClient(server.config)
+        try:
+            logger.bind(tag=TAG).info(f"初始化服务端MCP会话: {server.name}#{slot}")
+            await asyncio.wait_for(
+                client.initialize(logging_callback=self.logging_callback),
+                timeout=self.init_timeout,
+            )
+            if not client.is_connected():
+                raise RuntimeError("会话未建立")
+            server.slots[slot] = client
+            server.inflight[slot] = 0
+            server.tool_names.update(client.tools_dict.keys())
+            return True
+        except asyncio.TimeoutError:
+            logger.bind(tag=TAG).error(
+                f"Failed to initialize MCP server {server.name}#{slot}: Timeout"
+            )
+        except Exception as e:
+            logger.bind(tag=TAG).error(
+                f"Failed to initialize MCP server {server.name}#{slot}: {e}"
+            )
+        await client.cleanup()
+        return False
+
+    async def _reconnect_slot(self, server: _PooledServer, slot: int) -> bool:
+        """重连会话，同一会话的并发重连只执行一次"""
+        lock = server.reconnect_locks[slot]
+        if lock.locked():
+            async with lock:
+                return server.slots[slot] is not None
+        async with lock:
+            ok = await self._connect_slot(server, slot)
+        if ok:
+            self._refresh_tools()
+        return ok
+
+    def _refresh_tools(self):
+        """从每个服务的任一可用会话汇总工具列表，所有连接共享"""
+        tools = []
+        for server in self.servers.values():
+            for client in server.slots:
+                if client is not None:
+                    tools.extend(client.get_available_tools())
+                    break
+        self.tools = tools
+
+    def get_all_tools(self) -> List[Dict[str, Any]]:
+        """获取所有服务的工具function定义"""
+        return self.tools
+
+    def is_mcp_tool(self, tool_name: str) -> bool:
+        """检查是否是MCP工具"""
+        for tool in self.tools:
+            if (
+                tool.get("function") is not None
+                and tool["function"].get("name") == tool_name
+            ):
+                return True
+        return False
+
+    def _find_server(self, tool_name: str) -> Optional[_PooledServer]:
+        for server in self.servers.values():
+            if server.has_tool(tool_name):
+                return server
+        return None
+
+    async def execute_tool(
+        self, tool_name: str, arguments: Dict[str, Any], progress_callback=None
+    ) -> Any:
+        """在最空闲的会话上执行工具调用，失败时重连该会话后重试"""
+        logger.bind(tag=TAG).info(f"执行服务端MCP工具 {tool_name}，参数: {arguments}")
+
+        max_retries = 3  # 最大重试次数
+        retry_interval = 2  # 重试间隔(秒)
+
+        server = self._find_server(tool_name)
+        if server is None:
+            raise ValueError(f"工具 {tool_name} 在任意MCP服务中未找到")
+
+        for attempt in range(max_retries):
+            slot = server.pick_slot()
+            try:
+                if slot < 0:
+                    raise RuntimeError(f"MCP服务 {server.name} 无可用会话")
+                server.inflight[slot] += 1
+                try:
+                    return await server.slots[slot].call_tool(
+                        tool_name, arguments, progress_callback=progress_callback
+                    )
+                finally:
+                    server.inflight[slot] -= 1
+            except Exception as e:
+                # 最后一次尝试失败时直接抛出异常
+                if attempt == max_retries - 1:
+                    raise
+
+                logger.bind(tag=TAG).warning(
+                    f"执行工具 {tool_name} 失败 (尝试 {attempt+1}/{max_retries}): {e}"
+                )
+                # 重连失败的会话（无可用会话时重连第一个）
+                await self._reconnect_slot(server, max(slot, 0))
+                await asyncio.sleep(retry_interval)
+
+    async def _health_loop(self):
+        """定期ping所有会话，异常会话自动重连"""
+        try:
+            while True:
+                await asyncio.sleep(self.health_check_interval)
+                for server in list(self.servers.values()):
+                    for slot, client in enumerate(server.slots):
+                        healthy = False
+                        if client is not None and client.is_connected():
+                            try:
+                                await asyncio.wait_for(client.ping(), timeout=5)
+                                healthy = True
+                            except Exception as e:
+                                logger.bind(tag=TAG).warning(
+                                    f"MCP会话 {server.name}#{slot} 健康检查失败: {e}"
+                                )
+                        if not healthy:
+                            await self._reconnect_slot(server, slot)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"MCP连接池健康检查任务出错: {e}")
+
+    async def _close_all(self):
+        for server in self.servers.values():
+            for slot, client in enumerate(server.slots):
+                if client is None:
+                    continue
+                try:
+                    await asyncio.wait_for(client.cleanup(), timeout=20)
+                    logger.bind(tag=TAG).info(f"服务端MCP会话已关闭: {server.name}#{slot}")
+                except (asyncio.TimeoutError, Exception) as e:
+                    logger.bind(tag=TAG).error(
+                        f"关闭服务端MCP会话 {server.name}#{slot} 时出错: {e}"
+                    )
+        self.servers.clear()
+        self.tools = []
+
+    async def shutdown(self) -> None:
+        """进程退出时关闭所有会话"""
+        if self._health_task and not self._health_task.done():
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+        self._health_task = None
+        async with self._init_lock:
+            await self._close_all()
+            self._loaded = False
+
+    async def logging_callback(self, params: LoggingMessageNotificationParams):
+        logger.bind(tag=TAG).info(f"[Server Log - {params.level.upper()}] {params.data}")
+
+
+# 全局单例
+_mcp_pool_instance = None
+
+
+def get_mcp_pool() -> ServerMCPPool:
+    """获取进程级MCP连接池实例（单例模式）"""
+    global _mcp_pool_instance
+    if _mcp_pool_instance is None:
+        _mcp_pool_instance = ServerMCPPool()
+    return _mcp_pool_instance
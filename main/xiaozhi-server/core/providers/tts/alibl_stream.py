@@ -41,6 +41,8 @@ class TTSProvider(TTSProviderBase):
         self._monitor_task = None
         self.activate_session = False
         self.last_active_time = None
+        # 本会话发往服务端的文本，会话完成后作为整段音频的缓存键
+        self._session_text = []
 
         # 模型和音色配置
         self.model = config.get("model", "cosyvoice-v2")
@@ -148,7 +150,10 @@ class TTSProvider(TTSProviderBase):
                         continue
 
                 elif ContentType.TEXT == message.content_type:
-                    if message.content_detail:
+                    # 会话尚未向服务端发送文本时，整句命中缓存则直接播放
+                    if message.content_detail and not self._play_cached_stream_text(
+                        message.content_detail
+                    ):
                         try:
                             logger.bind(tag=TAG).debug(
                                 f"开始发送TTS文本: {message.content_detail}"
@@ -158,6 +163,7 @@ class TTSProvider(TTSProviderBase):
                                 loop=self.conn.loop,
                             )
                             future.result(timeout=self.tts_timeout)
+                            self._mark_stream_text_sent(message.content_detail)
                         except Exception as e:
                             logger.bind(tag=TAG).error(f"发送TTS文本失败: {str(e)}")
                             continue
@@ -217,6 +223,7 @@ class TTSProvider(TTSProviderBase):
                         }
                         await self.ws.send(json.dumps(continue_task_message))
                         self.last_active_time = time.time()
+                        self._session_text.append(txt)
             return
         except Exception as e:
             logger.bind(tag=TAG).error(f"发送TTS文本失败: {str(e)}")
@@ -274,6 +281,9 @@ class TTSProvider(TTSProviderBase):
 
             await self.ws.send(json.dumps(run_task_message))
             self.last_active_time = time.time()
+            # 服务端不返回句子边界，按整个会话录制音频
+            self._session_text = []
+            self._start_stream_recorder()
             logger.bind(tag=TAG).debug("会话启动请求已发送")
         except Exception as e:
             logger.bind(tag=TAG).error(f"启动会话失败: {str(e)}")
@@ -370,6 +380,9 @@ class TTSProvider(TTSProviderBase):
                                     self.clear_tts_text(self.conn.sentence_id)
                             elif event == "task-finished":
                                 logger.bind(tag=TAG).debug("TTS任务完成~")
+                                self._commit_stream_recorder(
+                                    self._tts_cache_key("".join(self._session_text))
+                                )
                                 self.activate_session = False
                                 self._process_before_stop_play_files()
                             elif event == "task-failed":
@@ -383,7 +396,7 @@ class TTSProvider(TTSProviderBase):
                             logger.bind(tag=TAG).warning("收到无效的JSON消息")
                     elif isinstance(msg, (bytes, bytearray)):
                         self.opus_encoder.encode_pcm_to_opus_stream(
-                            msg, False, callback=self.handle_opus
+                            msg, False, callback=self._handle_stream_opus
                         )
                 except websockets.ConnectionClosed:
                     logger.bind(tag=TAG).warning("WebSocket连接已关闭")
@@ -492,8 +505,7 @@ class TTSProvider(TTSProviderBase):
 
                     # 发送文本
                     filtered_text = MarkdownCleaner.clean_markdown(text)
-                    if self._correct_words_pattern:
-                        filtered_text = self._correct_words_pattern.sub(lambda m: self.correct_words[m.group(0)], filtered_text)
+                    filtered_text = self._apply_correct_words(filtered_text)
                     # 发送continue-task消息
                     continue_task_message = {
                         "header": {
@@ -580,8 +580,7 @@ class TTSProvider(TTSProviderBase):
 
                     # 发送文本合成请求
                     filtered_text = MarkdownCleaner.clean_markdown(text)
-                    if self._correct_words_pattern:
-                        filtered_text = self._correct_words_pattern.sub(lambda m: self.correct_words[m.group(0)], filtered_text)
+                    filtered_text = self._apply_correct_words(filtered_text)
                     run_request = {
                         "header": {
                             "message_id": uuid.uuid4().hex,
@@ -3,21 +3,38 @@ import re
 import uuid
 import queue
 import asyncio
+import time
 import threading
 import traceback
 import concurrent.futures
 
 from core.utils import p3
 from datetime import datetime
-from core.utils import textUtils
 from typing import Callable, Any
 from abc import ABC, abstractmethod
 from config.logger import setup_logging
 from core.utils import opus_encoder_utils
 from core.utils.tts import MarkdownCleaner, convert_percentage_to_range
 from core.utils.output_counter import add_device_output
+from core.utils.synthesis_loop import acquire_synthesis_loop
+from core.utils.tts_cache import (
+    get_tts_cache,
+    config_identity,
+    normalize_sentence,
+    SentenceRecorder,
+)
+from core.utils.sentence_segmenter import SentenceSegmenter
+from core.utils.correct_words import get_correct_words_table
+from core.utils.tracing import trace_mark
 from core.handle.reportHandle import enqueue_tts_report
 from core.handle.sendAudioHandle import sendAudioMessage
+from core.utils.pipeline import (
+    is_pipeline_enabled,
+    run_blocking,
+    cancel_tasks,
+    LoopBridgeQueue,
+)
+from core.utils.audio_decoder import iter_pcm16_chunks
 from core.utils.util import audio_bytes_to_data_stream, audio_to_data_stream
 from core.providers.tts.dto.dto import (
     TTSMessageDTO,
@@ -29,8 +46,18 @@ from core.providers.tts.dto.dto import (
 TAG = __name__
 logger = setup_logging()
 
+# 文件流式播放的分块时长（毫秒），与下发的Opus帧时长一致
+FILE_STREAM_FRAME_MS = 60
+# 文件流式播放时播放队列最多预读的帧数（约3秒），超过后暂停解码等待发送
+FILE_STREAM_READ_AHEAD_FRAMES = 50
+
 
 class TTSProviderBase(ABC):
+    # text_to_speak 内没有阻塞调用的提供者置为True，合成协程提交到进程级常驻事件循环执行
+    USE_SYNTHESIS_LOOP = False
+    # TTS实例持有连接和文本/音频队列，每个连接单独创建
+    SHAREABLE = False
+
     def __init__(self, config, delete_audio_file):
         self.interface_type = InterfaceType.NON_STREAM
         self.conn = None
@@ -38,6 +65,15 @@ class TTSProviderBase(ABC):
         self.audio_file_type = "wav"
         self.output_file = config.get("output_dir", "tmp/")
         self.tts_timeout = int(config.get("tts_timeout", 15))
+        self._synthesis_loop = None
+        # 进程级TTS结果缓存，在 open_audio_channels 中按配置获取
+        self.tts_cache = None
+        # 参与TTS缓存键的配置哈希，子类可覆盖以声明自己的缓存身份
+        self.cache_identity = config_identity(config)
+        # 双流式会话中是否已有文本发往服务端，之后的句子不再使用缓存以保证播放顺序
+        self._stream_text_sent = False
+        # 双流式提供者录制服务端返回的句子音频
+        self._stream_recorder = None
         self.tts_text_queue = queue.Queue()
         self.tts_audio_queue = queue.Queue()
         self.tts_audio_first_sentence = True
@@ -45,67 +81,22 @@ class TTSProviderBase(ABC):
         self.report_on_last = False
         # sentence_id 到文本的映射，用于流式TTS获取正确的字幕文本
         self._sentence_text_map = {}
-        # 加载替换词，用于一次性正则替换
-        raw_words = config.get("correct_words", [])
-        self.correct_words = {}
-        for item in raw_words:
-            parts = item.split("|", 1)
-            if len(parts) == 2:
-                self.correct_words[parts[0]] = parts[1]
-        # 构建正则表达式，使用最长匹配优先（排序后转义拼接）
-        if self.correct_words:
-            # 按key长度降序排列，长的先匹配，避免短词部分干扰
-            sorted_keys = sorted(self.correct_words.keys(), key=len, reverse=True)
-            pattern_str = "|".join(re.escape(k) for k in sorted_keys)
-            self._correct_words_pattern = re.compile(pattern_str)
-            # 构建反向替换正则，用于将TTS服务返回的替换后文本还原为原始文本（字幕显示）
-            reverse_map = {v: k for k, v in self.correct_words.items()}
-            sorted_reverse_keys = sorted(reverse_map.keys(), key=len, reverse=True)
-            reverse_pattern_str = "|".join(re.escape(k) for k in sorted_reverse_keys)
-            self._reverse_words_pattern = re.compile(reverse_pattern_str)
-            self._reverse_words_map = reverse_map
-            # 流式滑动窗口：按首字分组的替换词字典，用于快速查找
-            self._words_by_first_char = {}
-            for key in sorted_keys:  # 使用已按长度降序排列的keys，确保长词优先匹配
-                first_char = key[0] if key else ""
-                if first_char not in self._words_by_first_char:
-                    self._words_by_first_char[first_char] = []
-                self._words_by_first_char[first_char].append(key)
+        # 加载替换词，编译结果按词表内容在所有连接间共享
+        self._correct_words_table = get_correct_words_table(
+            config.get("correct_words", [])
+        )
+        if self._correct_words_table:
+            self.correct_words = self._correct_words_table.correct_words
+            self._words_by_first_char = self._correct_words_table.words_by_first_char
         else:
-            self._correct_words_pattern = None
-            self._reverse_words_pattern = None
-            self._reverse_words_map = None
+            self.correct_words = {}
+            self._words_by_first_char = {}
 
         # 流式滑动窗口：待匹配的缓存文本
         self._pending_prefix = ""
-        self.tts_text_buff = []
-        self.punctuations = (
-            "。",
-            "？",
-            "?",
-            "！",
-            "!",
-            "；",
-            ";",
-            "：",
-        )
-        self.first_sentence_punctuations = (
-            "，",
-            "~",
-            "、",
-            ",",
-            "。",
-            "？",
-            "?",
-            "！",
-            "!",
-            "；",
-            ";",
-            "：",
-        )
+        # 流式文本增量分句，在 open_audio_channels 中按 tts_segment 配置重新创建
+        self.segmenter = SentenceSegmenter()
         self.tts_stop_request = False
-        self.processed_chars = 0
-        self.is_first_sentence = True
 
     def generate_filename(self, extension=".wav"):
         return os.path.join(
@@ -124,15 +115,23 @@ class TTSProviderBase(ABC):
         # 保留原始文本用于显示/上报
         original_text = text
         text = MarkdownCleaner.clean_markdown(text)
-        # 使用正则一次性替换，避免重复遍历和部分匹配问题
-        if self._correct_words_pattern:
-            text = self._correct_words_pattern.sub(lambda m: self.correct_words[m.group(0)], text)
+        # 一次扫描完成替换，避免重复遍历和部分匹配问题
+        text = self._apply_correct_words(text)
+        # 命中缓存时直接下发帧序列，跳过合成与编码
+        cache_key = self._tts_cache_key(text)
+        if self._play_cached_sentence(cache_key, original_text, opus_handler):
+            return None
+        recorder = None
+        if cache_key is not None:
+            recorder = SentenceRecorder(self.tts_cache, cache_key)
+            opus_handler = self._recording_handler(recorder, opus_handler)
+        sentence_id = self.conn.sentence_id
         max_repeat_time = 5
         if self.delete_audio_file:
             # 需要删除文件的直接转为音频数据
             while max_repeat_time > 0:
                 try:
-                    audio_bytes = asyncio.run(self.text_to_speak(text, None))
+                    audio_bytes = self._run_text_to_speak(text, None)
                     if audio_bytes:
                         # 使用原始文本用于显示/上报
                         self.tts_audio_queue.put((SentenceType.FIRST, None, original_text, getattr(self, 'current_sentence_id', None)))
@@ -144,6 +143,7 @@ class TTSProviderBase(ABC):
                             sample_rate=self.conn.sample_rate,
                             opus_encoder=self.opus_encoder,
                         )
+                        self._commit_recorder(recorder, sentence_id)
                         break
                     else:
                         max_repeat_time -= 1
@@ -166,7 +166,7 @@ class TTSProviderBase(ABC):
             try:
                 while not os.path.exists(tmp_file) and max_repeat_time > 0:
                     try:
-                        asyncio.run(self.text_to_speak(text, tmp_file))
+                        self._run_text_to_speak(text, tmp_file)
                     except Exception as e:
                         logger.bind(tag=TAG).warning(
                             f"语音生成失败{5 - max_repeat_time + 1}次: {original_text}，错误: {e}"
@@ -186,6 +186,8 @@ class TTSProviderBase(ABC):
                     )
                 self.tts_audio_queue.put((SentenceType.FIRST, None, original_text, getattr(self, 'current_sentence_id', None)))
                 self._process_audio_file_stream(tmp_file, callback=opus_handler)
+                if max_repeat_time > 0:
+                    self._commit_recorder(recorder, sentence_id)
             except Exception as e:
                 logger.bind(tag=TAG).error(f"Failed to generate TTS file: {e}")
                 return None
@@ -194,14 +196,18 @@ class TTSProviderBase(ABC):
         # 保留原始文本用于日志/显示
         original_text = text
         text = MarkdownCleaner.clean_markdown(text)
-        if self._correct_words_pattern:
-            text = self._correct_words_pattern.sub(lambda m: self.correct_words[m.group(0)], text)
+        text = self._apply_correct_words(text)
         max_repeat_time = 5
         if self.delete_audio_file:
+            cache_key = self._tts_cache_key(text)
+            if cache_key is not None:
+                cached_frames = self.tts_cache.get(cache_key)
+                if cached_frames is not None:
+                    return list(cached_frames)
             # 需要删除文件的直接转为音频数据
             while max_repeat_time > 0:
                 try:
-                    audio_bytes = asyncio.run(self.text_to_speak(text, None))
+                    audio_bytes = self._run_text_to_speak(text, None)
                     if audio_bytes:
                         audio_datas = []
                         audio_bytes_to_data_stream(
@@ -211,6 +217,8 @@ class TTSProviderBase(ABC):
                             callback=lambda data: audio_datas.append(data),
                             sample_rate=self.conn.sample_rate,
                         )
+                        if cache_key is not None:
+                            self.tts_cache.put(cache_key, audio_datas)
                         return audio_datas
                     else:
                         max_repeat_time -= 1
@@ -233,7 +241,7 @@ class TTSProviderBase(ABC):
             try:
                 while not os.path.exists(tmp_file) and max_repeat_time > 0:
                     try:
-                        asyncio.run(self.text_to_speak(text, tmp_file))
+                        self._run_text_to_speak(text, tmp_file)
                     except Exception as e:
                         logger.bind(tag=TAG).warning(
                             f"语音生成失败{5 - max_repeat_time + 1}次: {original_text}，错误: {e}"
@@ -257,6 +265,16 @@ class TTSProviderBase(ABC):
                 logger.bind(tag=TAG).error(f"Failed to generate TTS file: {e}")
                 return None
 
+    def _run_text_to_speak(self, *args):
+        """在工作线程中同步执行 text_to_speak"""
+        if not self.USE_SYNTHESIS_LOOP:
+            return asyncio.run(self.text_to_speak(*args))
+        if self._synthesis_loop is None:
+            self._synthesis_loop = acquire_synthesis_loop()
+        return self._synthesis_loop.run(
+            self.text_to_speak(*args), timeout=self.tts_timeout or None
+        )
+
     @abstractmethod
     async def text_to_speak(self, text, output_file):
         pass
@@ -303,6 +321,8 @@ class TTSProviderBase(ABC):
 
     async def open_audio_channels(self, conn):
         self.conn = conn
+        self.tts_cache = get_tts_cache(conn.config)
+        self.segmenter = SentenceSegmenter.from_config(conn.config.get("tts_segment"))
 
         # 根据conn的sample_rate创建编码器，如果子类已经创建则不覆盖（IndexTTS接口返回为24kHZ-待重采样处理）
         if not hasattr(self, 'opus_encoder') or self.opus_encoder is None:
@@ -310,17 +330,134 @@ class TTSProviderBase(ABC):
                 sample_rate=conn.sample_rate, channels=1, frame_size_ms=60
             )
 
-        # tts 消化线程
-        self.tts_priority_thread = threading.Thread(
-            target=self.tts_text_priority_thread, daemon=True
+        pipeline_enabled = is_pipeline_enabled(conn.config)
+        self._pipeline_tasks = []
+
+        if pipeline_enabled and self._supports_async_text_pipeline():
+            # 异步流水线模式：文本分段作为事件循环内的任务运行，合成调用提交到共享线程池
+            self.tts_text_queue = LoopBridgeQueue.from_queue(
+                self.tts_text_queue, conn.loop
+            )
+            self._pipeline_tasks.append(
+                asyncio.create_task(self._tts_text_pipeline_task())
+            )
+        else:
+            if pipeline_enabled:
+                logger.bind(tag=TAG).debug(
+                    f"{type(self).__name__} 自定义了文本处理线程，文本分段保持线程模式"
+                )
+            # tts 消化线程
+            self.tts_priority_thread = threading.Thread(
+                target=self.tts_text_priority_thread, daemon=True
+            )
+            self.tts_priority_thread.start()
+
+        if pipeline_enabled:
+            # 音频播放作为事件循环内的任务运行
+            self.tts_audio_queue = LoopBridgeQueue.from_queue(
+                self.tts_audio_queue, conn.loop
+            )
+            self._pipeline_tasks.append(
+                asyncio.create_task(self._audio_play_pipeline_task())
+            )
+        else:
+            # 音频播放 消化线程
+            self.audio_play_priority_thread = threading.Thread(
+                target=self._audio_play_priority_thread, daemon=True
+            )
+            self.audio_play_priority_thread.start()
+
+    def _tts_cache_key(self, text):
+        """text 为实际送入合成的文本（已清理Markdown并应用替换词），不缓存时返回 None"""
+        if self.tts_cache is None or self.conn is None:
+            return None
+        return self.tts_cache.make_key(
+            self, text, self.conn.sample_rate, getattr(self.conn, "audio_format", "opus")
+        )
+
+    def _commit_recorder(self, recorder, sentence_id):
+        """播放被打断或已切换到新的一轮对话时帧序列不完整，不写入缓存"""
+        if (
+            recorder is not None
+            and not self.conn.client_abort
+            and self.conn.sentence_id == sentence_id
+        ):
+            recorder.commit()
+
+    def _play_cached_sentence(self, cache_key, display_text, opus_handler) -> bool:
+        """缓存命中时把句子开始标记和帧序列放入播放队列，返回是否命中"""
+        if cache_key is None:
+            return False
+        frames = self.tts_cache.get(cache_key)
+        if frames is None:
+            return False
+        self.tts_audio_queue.put(
+            (SentenceType.FIRST, None, display_text, getattr(self, "current_sentence_id", None))
         )
-        self.tts_priority_thread.start()
+        for frame in frames:
+            opus_handler(frame)
+        logger.bind(tag=TAG).debug(f"TTS缓存命中: {display_text}")
+        return True
 
-        # 音频播放 消化线程
-        self.audio_play_priority_thread = threading.Thread(
-            target=self._audio_play_priority_thread, daemon=True
+    @staticmethod
+    def _recording_handler(recorder, opus_handler):
+        def handler(frame):
+            recorder.add(frame)
+            opus_handler(frame)
+
+        return handler
+
+    def _play_cached_stream_text(self, text) -> bool:
+        """
+        双流式提供者在本会话尚未向服务端发送文本时，整句命中缓存则直接播放；
+        一旦有文本发往服务端，后续文本都交给服务端合成，避免缓存音频插队
+        """
+        if self._stream_text_sent or self.tts_cache is None or not text:
+            return False
+        synth_text = MarkdownCleaner.clean_markdown(text)
+        synth_text = self._apply_correct_words(synth_text)
+        return self._play_cached_sentence(
+            self._tts_cache_key(synth_text), text, self.handle_opus
+        )
+
+    def _mark_stream_text_sent(self, text):
+        """记录本会话已有文本发往服务端（纯标点等无需合成的片段除外）"""
+        if normalize_sentence(text):
+            self._stream_text_sent = True
+
+    def _start_stream_recorder(self, text=None):
+        """
+        开始录制双流式服务端返回的音频；text 为服务端返回的句子文本，
+        不传时在结束录制时再提供缓存键
+        """
+        self._stream_recorder = None
+        if self.tts_cache is None:
+            return
+        cache_key = None
+        if text is not None:
+            cache_key = self._tts_cache_key(text)
+            if cache_key is None:
+                return
+        self._stream_recorder = SentenceRecorder(self.tts_cache, cache_key)
+
+    def _commit_stream_recorder(self, cache_key=None):
+        """结束录制并写入缓存，被打断的会话不写入"""
+        recorder, self._stream_recorder = self._stream_recorder, None
+        if recorder is not None and not self.conn.client_abort:
+            recorder.commit(cache_key)
+
+    def _handle_stream_opus(self, opus_data: bytes):
+        """双流式提供者的音频回调：录制后放入播放队列"""
+        if self._stream_recorder is not None:
+            self._stream_recorder.add(opus_data)
+        self.handle_opus(opus_data)
+
+    def _supports_async_text_pipeline(self):
+        """未重写文本处理线程的提供者才能使用异步文本分段任务"""
+        return (
+            type(self).tts_text_priority_thread
+            is TTSProviderBase.tts_text_priority_thread
         )
-        self.audio_play_priority_thread.start()
 
     def store_tts_text(self, sentence_id, text):
         """存储指定 sentence_id 对应的文本，用于流式TTS获取正确的字幕文本
@@ -356,12 +493,16 @@ class TTSProviderBase(ABC):
         if sentence_id in self._sentence_text_map:
             del self._sentence_text_map[sentence_id]
 
+    def _apply_correct_words(self, text):
+        """按替换词表替换发音"""
+        if not self._correct_words_table or not text:
+            return text
+        return self._correct_words_table.replacer.replace(text)
+
     def _restore_original_text(self, text):
-        if not self._reverse_words_pattern or not text:
+        if not self._correct_words_table or not text:
             return text
-        return self._reverse_words_pattern.sub(
-            lambda m: self._reverse_words_map[m.group(0)], text
-        )
+        return self._correct_words_table.reverse_replacer.replace(text)
 
     # 这里默认是非流式的处理方式
     # 流式处理方式请在子类中重写
@@ -369,90 +510,76 @@ class TTSProviderBase(ABC):
         while not self.conn.stop_event.is_set():
             try:
                 message = self.tts_text_queue.get(timeout=1)
-                if self.conn.client_abort:
-                    logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理线程")
-                    continue
-                # 过滤旧消息：检查sentence_id是否匹配
-                if message.sentence_id != self.conn.sentence_id:
-                    continue
-                if message.sentence_type == SentenceType.FIRST:
-                    self.current_sentence_id = message.sentence_id
-                    self.tts_stop_request = False
-                    self.processed_chars = 0
-                    self.tts_text_buff = []
-                    self.is_first_sentence = True
-                    self.tts_audio_first_sentence = True
-                elif ContentType.TEXT == message.content_type:
-                    self.tts_text_buff.append(message.content_detail)
-                    segment_text = self._get_segment_text()
-                    if segment_text:
-                        self.to_tts_stream(segment_text, opus_handler=self.handle_opus)
-                elif ContentType.FILE == message.content_type:
-                    self._process_remaining_text_stream(opus_handler=self.handle_opus)
-                    tts_file = message.content_file
-                    if tts_file and os.path.exists(tts_file):
-                        self._process_audio_file_stream(
-                            tts_file, callback=self.handle_opus
-                        )
-                if message.sentence_type == SentenceType.LAST:
-                    self._process_remaining_text_stream(opus_handler=self.handle_opus)
-                    self.tts_audio_queue.put(
-                        (message.sentence_type, [], message.content_detail, message.sentence_id)
-                    )
+                self._handle_tts_text_message(message)
+            except queue.Empty:
+                continue
+            except Exception as e:
+                logger.bind(tag=TAG).error(
+                    f"处理TTS文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
+                )
+                continue
 
+    async def _tts_text_pipeline_task(self):
+        """异步流水线模式下的文本分段任务，阻塞的合成调用提交到共享线程池"""
+        while not self.conn.stop_event.is_set():
+            try:
+                message = await self.tts_text_queue.async_get(timeout=1)
+                await run_blocking(self._handle_tts_text_message, message)
             except queue.Empty:
                 continue
+            except asyncio.CancelledError:
+                break
             except Exception as e:
                 logger.bind(tag=TAG).error(
                     f"处理TTS文本失败: {str(e)}, 类型: {type(e).__name__}, 堆栈: {traceback.format_exc()}"
                 )
                 continue
 
+    def _handle_tts_text_message(self, message):
+        if self.conn.client_abort:
+            logger.bind(tag=TAG).info("收到打断信息，终止TTS文本处理线程")
+            return
+        # 过滤旧消息：检查sentence_id是否匹配
+        if message.sentence_id != self.conn.sentence_id:
+            return
+        if message.sentence_type == SentenceType.FIRST:
+            self.current_sentence_id = message.sentence_id
+            self.tts_stop_request = False
+            self.segmenter.reset()
+            self.tts_audio_first_sentence = True
+        elif ContentType.TEXT == message.content_type:
+            for segment_text in self._get_segment_text(message.content_detail):
+                self.to_tts_stream(segment_text, opus_handler=self.handle_opus)
+        elif ContentType.FILE == message.content_type:
+            self._process_remaining_text_stream(opus_handler=self.handle_opus)
+            tts_file = message.content_file
+            if tts_file and os.path.exists(tts_file):
+                self._process_audio_file_stream(
+                    tts_file, callback=self.handle_opus
+                )
+        if message.sentence_type == SentenceType.LAST:
+            self._process_remaining_text_stream(opus_handler=self.handle_opus)
+            self.tts_audio_queue.put(
+                (message.sentence_type, [], message.content_detail, message.sentence_id)
+            )
+
     def _audio_play_priority_thread(self):
         # 需要上报的文本和音频列表
-        enqueue_text = None
-        enqueue_audio = []
+        self._enqueue_text, self._enqueue_audio = None, []
         while not self.conn.stop_event.is_set():
             text = None
             try:
                 try:
                     item = self.tts_audio_queue.get(timeout=0.1)
-                    if len(item) == 4:
-                        sentence_type, audio_datas, text, sentence_id = item
-                    else:
-                        sentence_type, audio_datas, text = item
-                        sentence_id = None
                 except queue.Empty:
                     if self.conn.stop_event.is_set():
                         break
                     continue
 
-                if self.conn.client_abort:
-                    logger.bind(tag=TAG).debug("收到打断信号，跳过当前音频数据")
-                    enqueue_text, enqueue_audio = None, []
+                play_item = self._prepare_audio_play_item(item)
+                if play_item is None:
                     continue
-
-                # 收到下一个文本开始或会话结束时进行上报
-                if sentence_type is not SentenceType.MIDDLE:
-                    if self.report_on_last:
-                        # 累积模式：适用于全程只有一个语音流的TTS（如seed-tts-2.0）
-                        # FIRST时只记录文本，音频持续累积，仅在LAST时统一上报
-                        if text:
-                            enqueue_text = text
-                        if sentence_type == SentenceType.LAST:
-                            enqueue_tts_report(self.conn, enqueue_text, enqueue_audio)
-                            enqueue_audio = []
-                            enqueue_text = None
-                    else:
-                        # 非累积模式：每个句子分别上报
-                        if enqueue_text is not None:
-                            enqueue_tts_report(self.conn, enqueue_text, enqueue_audio)
-                        enqueue_audio = []
-                        enqueue_text = text
-
-                # 收集上报音频数据
-                if isinstance(audio_datas, bytes):
-                    enqueue_audio.append(audio_datas)
+                sentence_type, audio_datas, text, sentence_id = play_item
 
                 # 发送音频
                 future = asyncio.run_coroutine_threadsafe(
@@ -468,6 +595,75 @@ class TTSProviderBase(ABC):
             except Exception as e:
                 logger.bind(tag=TAG).error(f"audio_play_priority_thread: {text} {e}")
 
+    async def _audio_play_pipeline_task(self):
+        """异步流水线模式下的音频播放任务"""
+        self._enqueue_text, self._enqueue_audio = None, []
+        while not self.conn.stop_event.is_set():
+            text = None
+            try:
+                try:
+                    item = await self.tts_audio_queue.async_get(timeout=1)
+                except queue.Empty:
+                    continue
+
+                play_item = self._prepare_audio_play_item(item)
+                if play_item is None:
+                    continue
+                sentence_type, audio_datas, text, sentence_id = play_item
+
+                # 发送音频
+                await sendAudioMessage(
+                    self.conn, sentence_type, audio_datas, text, sentence_id
+                )
+
+                # 记录输出和报告（计数可能落在跨进程共享存储上，放到线程池执行）
+                if self.conn.max_output_size > 0 and text:
+                    await run_blocking(
+                        add_device_output, self.conn.headers.get("device-id"), len(text)
+                    )
+
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.bind(tag=TAG).error(f"audio_play_pipeline_task: {text} {e}")
+
+    def _prepare_audio_play_item(self, item):
+        """解析音频队列数据并处理上报，返回 None 表示跳过该数据"""
+        if len(item) == 4:
+            sentence_type, audio_datas, text, sentence_id = item
+        else:
+            sentence_type, audio_datas, text = item
+            sentence_id = None
+
+        if self.conn.client_abort:
+            logger.bind(tag=TAG).debug("收到打断信号，跳过当前音频数据")
+            self._enqueue_text, self._enqueue_audio = None, []
+            return None
+
+        # 收到下一个文本开始或会话结束时进行上报
+        if sentence_type is not SentenceType.MIDDLE:
+            if self.report_on_last:
+                # 累积模式：适用于全程只有一个语音流的TTS（如seed-tts-2.0）
+                # FIRST时只记录文本，音频持续累积，仅在LAST时统一上报
+                if text:
+                    self._enqueue_text = text
+                if sentence_type == SentenceType.LAST:
+                    enqueue_tts_report(self.conn, self._enqueue_text, self._enqueue_audio)
+                    self._enqueue_audio = []
+                    self._enqueue_text = None
+            else:
+                # 非累积模式：每个句子分别上报
+                if self._enqueue_text is not None:
+                    enqueue_tts_report(self.conn, self._enqueue_text, self._enqueue_audio)
+                self._enqueue_audio = []
+                self._enqueue_text = text
+
+        # 收集上报音频数据
+        if isinstance(audio_datas, bytes):
+            self._enqueue_audio.append(audio_datas)
+
+        return sentence_type, audio_datas, text, sentence_id
+
     async def start_session(self, session_id):
         pass
 
@@ -477,47 +673,16 @@ class TTSProviderBase(ABC):
     async def close(self):
         """资源清理方法"""
         self._sentence_text_map.clear()
+        await cancel_tasks(getattr(self, "_pipeline_tasks", []))
         if hasattr(self, "ws") and self.ws:
             await self.ws.close()
 
-    def _get_segment_text(self):
-        # 合并当前全部文本并处理未分割部分
-        full_text = "".join(self.tts_text_buff)
-        current_text = full_text[self.processed_chars :]  # 从未处理的位置开始
-        last_punct_pos = -1
-
-        # 根据是否是第一句话选择不同的标点符号集合
-        punctuations_to_use = (
-            self.first_sentence_punctuations
-            if self.is_first_sentence
-            else self.punctuations
-        )
-
-        for punct in punctuations_to_use:
-            pos = current_text.rfind(punct)
-            if (pos != -1 and last_punct_pos == -1) or (
-                pos != -1 and pos < last_punct_pos
-            ):
-                last_punct_pos = pos
-
-        if last_punct_pos != -1:
-            segment_text_raw = current_text[: last_punct_pos + 1]
-            segment_text = textUtils.get_string_no_punctuation_or_emoji(
-                segment_text_raw
-            )
-            self.processed_chars += len(segment_text_raw)  # 更新已处理字符位置
-
-            # 如果是第一句话，在找到第一个逗号后，将标志设置为False
-            if self.is_first_sentence:
-                self.is_first_sentence = False
-
-            return segment_text
-        elif self.tts_stop_request and current_text:
-            segment_text = current_text
-            self.is_first_sentence = True  # 重置标志
-            return segment_text
-        else:
-            return None
+    def _get_segment_text(self, text):
+        """追加LLM输出的文本，返回可以送去合成的分段列表"""
+        segments = self.segmenter.feed(text)
+        if segments:
+            trace_mark(self.conn, "tts_first_segment", self)
+        return segments
 
     def _process_audio_file_stream(
         self, tts_file, callback: Callable[[Any], Any]
@@ -530,10 +695,8 @@ class TTSProviderBase(ABC):
         """
         if tts_file.endswith(".p3"):
             p3.decode_opus_from_file_stream(tts_file, callback=callback)
-        elif self.conn.audio_format == "pcm":
-            self.audio_to_pcm_data_stream(tts_file, callback=callback)
         else:
-            self.audio_to_opus_data_stream(tts_file, callback=callback)
+            self._stream_audio_file(tts_file, callback=callback)
 
         if (
             self.delete_audio_file
@@ -543,6 +706,58 @@ class TTSProviderBase(ABC):
         ):
             os.remove(tts_file)
 
+    def _stream_audio_file(self, tts_file, callback: Callable[[Any], Any]) -> None:
+        """按60ms分块边解码边编码，避免整首音乐解码到内存后才开始下发
+
+        播放队列积压超过预读上限时暂停解码，由 AudioRateController 的发送节奏驱动；
+        收到打断或切换到新句子时立即停止。
+        """
+        is_opus = self.conn.audio_format != "pcm"
+        sample_rate = self.conn.sample_rate
+        frame_bytes = sample_rate * FILE_STREAM_FRAME_MS // 1000 * 2
+        sentence_id = self.conn.sentence_id
+
+        pending = None
+        for chunk in iter_pcm16_chunks(tts_file, sample_rate, FILE_STREAM_FRAME_MS):
+            if not self._wait_for_playback_space(sentence_id):
+                logger.bind(tag=TAG).info(f"音频文件播放被打断: {tts_file}")
+                if is_opus:
+                    self.opus_encoder.reset_state()
+                return
+            # 延后一块输出，以便最后一块携带 end_of_stream
+            if pending is not None:
+                self._emit_pcm_chunk(pending, False, is_opus, frame_bytes, callback)
+            pending = chunk
+        if pending is not None:
+            self._emit_pcm_chunk(pending, True, is_opus, frame_bytes, callback)
+
+    def _emit_pcm_chunk(self, chunk, is_last, is_opus, frame_bytes, callback):
+        if is_opus:
+            self.opus_encoder.encode_pcm_to_opus_stream(
+                chunk, end_of_stream=is_last, callback=callback
+            )
+            return
+        if len(chunk) < frame_bytes:
+            chunk += b"\x00" * (frame_bytes - len(chunk))
+        callback(chunk)
+
+    def _wait_for_playback_space(self, sentence_id) -> bool:
+        """背压等待：待发送帧数超过预读上限时等待，返回 False 表示播放已被打断"""
+        while True:
+            if (
+                self.conn.client_abort
+                or self.conn.stop_event.is_set()
+                or self.conn.sentence_id != sentence_id
+            ):
+                return False
+            queued = self.tts_audio_queue.qsize()
+            rate_controller = getattr(self.conn, "audio_rate_controller", None)
+            if rate_controller is not None:
+                queued += rate_controller.pending_audio_count()
+            if queued < FILE_STREAM_READ_AHEAD_FRAMES:
+                return True
+            time.sleep(FILE_STREAM_FRAME_MS / 1000)
+
     def _process_before_stop_play_files(self):
         for audio_datas, text in self.before_stop_play_files:
             self.tts_audio_queue.put((SentenceType.MIDDLE, audio_datas, text, getattr(self, 'current_sentence_id', None)))
@@ -557,14 +772,11 @@ class TTSProviderBase(ABC):
         Returns:
             bool: 是否成功处理了文本
         """
-        full_text = "".join(self.tts_text_buff)
-        remaining_text = full_text[self.processed_chars :]
-        if remaining_text:
-            segment_text = textUtils.get_string_no_punctuation_or_emoji(remaining_text)
-            if segment_text:
-                self.to_tts_stream(segment_text, opus_handler=opus_handler)
-                self.processed_chars += len(full_text)
-                return True
+        segment_text = self.segmenter.flush()
+        if segment_text:
+            trace_mark(self.conn, "tts_first_segment", self)
+            self.to_tts_stream(segment_text, opus_handler=opus_handler)
+            return True
         return False
 
     def _apply_percentage_params(self, config):
@@ -583,6 +795,9 @@ class TTSProviderBase(ABC):
         Returns:
             tuple: (确定的文本列表, 剩余待匹配的前缀)
         """
+        if text:
+            # 双流式TTS收到的第一段文本即为首句
+            trace_mark(self.conn, "tts_first_segment", self)
         if not self.correct_words or not text:
             return [text] if text else [], ""
 
@@ -634,3 +849,5 @@ class TTSProviderBase(ABC):
     def reset_stream_state(self):
         """重置流式处理状态，用于会话开始时清理残留状态"""
         self._pending_prefix = ""
+        self._stream_text_sent = False
+        self._stream_recorder = None
@@ -325,7 +325,10 @@ class TTSProvider(TTSProviderBase):
                         continue
 
                 elif ContentType.TEXT == message.content_type:
-                    if message.content_detail:
+                    # 会话尚未向服务端发送文本时，整句命中缓存则直接播放
+                    if message.content_detail and not self._play_cached_stream_text(
+                        message.content_detail
+                    ):
                         try:
                             logger.bind(tag=TAG).debug(
                                 f"开始发送TTS文本: {message.content_detail}"
@@ -335,6 +338,7 @@ class TTSProvider(TTSProviderBase):
                                 loop=self.conn.loop,
                             )
                             future.result(timeout=self.tts_timeout)
+                            self._mark_stream_text_sent(message.content_detail)
                         except Exception as e:
                             logger.bind(tag=TAG).error(f"发送TTS文本失败: {str(e)}")
                             continue
@@ -518,6 +522,7 @@ class TTSProvider(TTSProviderBase):
                         # 将TTS服务返回的替换后文本还原为原始文本，用于字幕显示
                         display_text = self._restore_original_text(self.tts_text)
                         self.tts_audio_queue.put((SentenceType.FIRST, [], display_text))
+                        self._start_stream_recorder(self.tts_text)
                     elif (
                         res.optional.event == EVENT_TTSResponse
                         and res.header.message_type == AUDIO_ONLY_RESPONSE
@@ -533,9 +538,10 @@ class TTSProvider(TTSProviderBase):
                                     (SentenceType.FIRST, [], tts_text)
                                 )
                                 self.clear_tts_text(self.conn.sentence_id)
-                        self.wav_to_opus_data_audio_raw_stream(res.payload, callback=self.handle_opus)
+                        self.wav_to_opus_data_audio_raw_stream(res.payload, callback=self._handle_stream_opus)
                     elif not self.resource_type and res.optional.event == EVENT_TTSSentenceEnd:
                         logger.bind(tag=TAG).info(f"句子语音生成成功：{self.tts_text}")
+                        self._commit_stream_recorder()
                     elif res.optional.event == EVENT_SessionFinished:
                         logger.bind(tag=TAG).debug(f"会话结束～～")
                         self.activate_session = False
@@ -1,14 +1,13 @@
 import os
 import time
 import queue
-import aiohttp
-import asyncio
 import requests
 import traceback
 from config.logger import setup_logging
 from core.utils.tts import MarkdownCleaner
 from core.providers.tts.base import TTSProviderBase
-from core.utils import opus_encoder_utils, textUtils
+from core.utils.synthesis_loop import pooled_session
+from core.utils import opus_encoder_utils
 from core.providers.tts.dto.dto import SentenceType, ContentType, InterfaceType
 
 TAG = __name__
@@ -16,6 +15,8 @@ logger = setup_logging()
 
 
 class TTSProvider(TTSProviderBase):
+    USE_SYNTHESIS_LOOP = True
+
     def __init__(self, config, delete_audio_file):
         super().__init__(config, delete_audio_file)
         self.interface_type = InterfaceType.SINGLE_STREAM
@@ -44,13 +45,10 @@ class TTSProvider(TTSProviderBase):
                 if message.sentence_type == SentenceType.FIRST:
                     # 初始化参数
                     self.tts_stop_request = False
-                    self.processed_chars = 0
-                    self.tts_text_buff = []
+                    self.segmenter.reset()
                     self.before_stop_play_files.clear()
                 elif ContentType.TEXT == message.content_type:
-                    self.tts_text_buff.append(message.content_detail)
-                    segment_text = self._get_segment_text()
-                    if segment_text:
+                    for segment_text in self._get_segment_text(message.content_detail):
                         self.to_tts_single_stream(segment_text)
 
                 elif ContentType.FILE == message.content_type:
@@ -77,15 +75,9 @@ class TTSProvider(TTSProviderBase):
         Returns:
             bool: 是否成功处理了文本
         """
-        full_text = "".join(self.tts_text_buff)
-        remaining_text = full_text[self.processed_chars :]
-        if remaining_text:
-            segment_text = textUtils.get_string_no_punctuation_or_emoji(remaining_text)
-            if segment_text:
-                self.to_tts_single_stream(segment_text, is_last)
-                self.processed_chars += len(full_text)
-            else:
-                self._process_before_stop_play_files()
+        segment_text = self.segmenter.flush()
+        if segment_text:
+            self.to_tts_single_stream(segment_text, is_last)
         else:
             self._process_before_stop_play_files()
 
@@ -94,10 +86,9 @@ class TTSProvider(TTSProviderBase):
             max_repeat_time = 5
             original_text = text
             text = MarkdownCleaner.clean_markdown(text)
-            if self._correct_words_pattern:
-                text = self._correct_words_pattern.sub(lambda m: self.correct_words[m.group(0)], text)
+            text = self._apply_correct_words(text)
             try:
-                asyncio.run(self.text_to_speak(text, is_last))
+                self._run_text_to_speak(text, is_last)
             except Exception as e:
                 logger.bind(tag=TAG).warning(
                     f"语音生成失败{5 - max_repeat_time + 1}次: {original_text}，错误: {e}"
@@ -129,7 +120,7 @@ class TTSProvider(TTSProviderBase):
             * 2
         )  # 16-bit = 2 bytes
         try:
-            async with aiohttp.ClientSession() as session:
+            async with pooled_session("index_stream") as session:
                 async with session.post(self.api_url, json=payload, timeout=10) as resp:
 
                     if resp.status != 200:
@@ -206,8 +197,7 @@ class TTSProvider(TTSProviderBase):
         """
         start_time = time.time()
         text = MarkdownCleaner.clean_markdown(text)
-        if self._correct_words_pattern:
-            text = self._correct_words_pattern.sub(lambda m: self.correct_words[m.group(0)], text)
+        text = self._apply_correct_words(text)
 
         payload = {"text": text, "character": self.voice}
 
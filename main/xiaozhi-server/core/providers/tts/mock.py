@@ -0,0 +1,51 @@
+import io
+import os
+import wave
+import zlib
+import asyncio
+import numpy as np
+from core.providers.tts.base import TTSProviderBase
+
+SAMPLE_RATE = 16000
+
+
+class TTSProvider(TTSProviderBase):
+    """
+    本地模拟TTS，用于离线压力测试
+    按文本长度生成固定时长的正弦波音频（频率由文本决定），delay_ms 模拟合成耗时；
+    生成的WAV与真实TTS一样经过重采样和Opus编码后下发。
+    """
+
+    USE_SYNTHESIS_LOOP = True
+
+    def __init__(self, config, delete_audio_file):
+        super().__init__(config, delete_audio_file)
+        self.audio_file_type = "wav"
+        delay_ms = config.get("delay_ms", "150")
+        ms_per_char = config.get("ms_per_char", "150")
+        self.delay = (float(delay_ms) if delay_ms else 0) / 1000
+        self.ms_per_char = float(ms_per_char) if ms_per_char else 150.0
+
+    def _synthesize(self, text) -> bytes:
+        samples = max(1, int(len(text) * self.ms_per_char * SAMPLE_RATE / 1000))
+        frequency = 200 + zlib.crc32(text.encode("utf-8")) % 400
+        t = np.arange(samples, dtype=np.float32) / SAMPLE_RATE
+        pcm = (np.sin(2 * np.pi * frequency * t) * 8000).astype(np.int16)
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(SAMPLE_RATE)
+            wav_file.writeframes(pcm.tobytes())
+        return buffer.getvalue()
+
+    async def text_to_speak(self, text, output_file):
+        if self.delay > 0:
+            await asyncio.sleep(self.delay)
+        audio_bytes = self._synthesize(text)
+        if output_file:
+            os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+            with open(output_file, "wb") as f:
+                f.write(audio_bytes)
+            return None
+        return audio_bytes
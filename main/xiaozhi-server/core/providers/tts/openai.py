@@ -1,6 +1,7 @@
-import requests
+import aiohttp
 from core.utils.util import check_model_key
 from core.providers.tts.base import TTSProviderBase
+from core.utils.synthesis_loop import pooled_session
 from config.logger import setup_logging
 
 TAG = __name__
@@ -8,6 +9,7 @@ logger = setup_logging()
 
 
 class TTSProvider(TTSProviderBase):
+    USE_SYNTHESIS_LOOP = True
     TTS_PARAM_CONFIG = [
         ("ttsRate", "speed", 0.25, 4, 1, lambda v: round(float(v), 2)),
     ]
@@ -47,14 +49,21 @@ class TTSProvider(TTSProviderBase):
             "response_format": self.audio_file_type,
             "speed": self.speed,
         }
-        response = requests.post(self.api_url, json=data, headers=headers)
-        if response.status_code == 200:
-            if output_file:
-                with open(output_file, "wb") as audio_file:
-                    audio_file.write(response.content)
-            else:
-                return response.content
-        else:
-            raise Exception(
-                f"OpenAI TTS请求失败: {response.status_code} - {response.text}"
-            )
+        async with pooled_session("openai") as session:
+            async with session.post(
+                self.api_url,
+                json=data,
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=self.tts_timeout),
+            ) as response:
+                if response.status == 200:
+                    content = await response.read()
+                    if output_file:
+                        with open(output_file, "wb") as audio_file:
+                            audio_file.write(content)
+                    else:
+                        return content
+                else:
+                    raise Exception(
+                        f"OpenAI TTS请求失败: {response.status} - {await response.text()}"
+                    )
@@ -450,8 +450,7 @@ class TTSProvider(TTSProviderBase):
 
                 try:
                     filtered_text = MarkdownCleaner.clean_markdown(text)
-                    if self._correct_words_pattern:
-                        filtered_text = self._correct_words_pattern.sub(lambda m: self.correct_words[m.group(0)], filtered_text)
+                    filtered_text = self._apply_correct_words(filtered_text)
 
                     text_request = self._build_base_request(status=2,text=filtered_text)
 
@@ -3,7 +3,18 @@ from typing import Optional
 
 
 class VADProviderBase(ABC):
+    # 检测状态保存在连接上，配置相同时由提供者注册表在连接间共享
+    SHAREABLE = True
+
     @abstractmethod
     def is_vad(self, conn, data) -> bool:
         """检测音频数据中的语音活动"""
         pass
+
+    async def is_vad_async(self, conn, data) -> bool:
+        """异步检测语音活动，默认直接调用同步实现，支持批量推理的实现可覆盖"""
+        return self.is_vad(conn, data)
+
+    def cleanup(self):
+        """释放模型、线程池等资源，共享实例被提供者注册表释放时调用"""
+        pass
@@ -0,0 +1,53 @@
+import time
+import numpy as np
+from config.logger import setup_logging
+from core.providers.vad.base import VADProviderBase
+
+TAG = __name__
+logger = setup_logging()
+
+
+class VADProvider(VADProviderBase):
+    """
+    基于能量的模拟VAD，用于离线压力测试
+    每帧PCM的均方根超过阈值即判为有声，说话结束的判定（滑动窗口、静默时长）与SileroVAD一致，
+    不加载模型，结果只取决于输入音频。
+    """
+
+    def __init__(self, config):
+        logger.bind(tag=TAG).info("MockVAD", config)
+        threshold_rms = config.get("threshold_rms", "300")
+        min_silence_duration_ms = config.get("min_silence_duration_ms", "500")
+        self.threshold_rms = float(threshold_rms) if threshold_rms else 300.0
+        self.silence_threshold_ms = (
+            int(min_silence_duration_ms) if min_silence_duration_ms else 500
+        )
+        self.frame_window_threshold = 3
+
+    def is_vad(self, conn, pcm_frame):
+        # 手动模式：直接返回True，不进行实时VAD检测，所有音频都缓存
+        if conn.client_listen_mode == "manual":
+            return True
+
+        samples = np.frombuffer(pcm_frame, dtype=np.int16).astype(np.float32)
+        is_voice = bool(len(samples)) and float(
+            np.sqrt(np.mean(samples**2))
+        ) >= self.threshold_rms
+        conn.last_is_voice = is_voice
+
+        # 更新滑动窗口
+        conn.client_voice_window.append(is_voice)
+        client_have_voice = (
+            conn.client_voice_window.count(True) >= self.frame_window_threshold
+        )
+
+        # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
+        if conn.client_have_voice and not client_have_voice:
+            stop_duration = time.time() * 1000 - conn.vad_last_voice_time
+            if stop_duration >= self.silence_threshold_ms:
+                conn.client_voice_stop = True
+        if client_have_voice:
+            conn.client_have_voice = True
+            conn.vad_last_voice_time = time.time() * 1000
+
+        return client_have_voice
@@ -1,13 +1,91 @@
 import time
 import os
+import asyncio
 import numpy as np
 import onnxruntime
+from concurrent.futures import ThreadPoolExecutor
 from config.logger import setup_logging
 from core.providers.vad.base import VADProviderBase
 
 TAG = __name__
 logger = setup_logging()
 
+# Silero VAD 每次推理的采样点数（16kHz 下 32ms）及上下文长度
+CHUNK_SAMPLES = 512
+CONTEXT_SAMPLES = 64
+CHUNK_DURATION_MS = CHUNK_SAMPLES * 1000 / 16000
+
+
+class SileroBatchScheduler:
+    """跨连接的 Silero VAD 批量推理调度器
+
+    所有连接的待推理分片先进入等待队列，凑满 max_batch_size 或等待超过
+    max_wait_ms 后，将各连接的 state/context 拼接成一个 batch，
+    在专用线程中执行一次 session.run，再把概率和新状态分发回各连接。
+    max_wait_ms 不超过一帧时长，保证单个连接的等待不超过一帧。
+    """
+
+    def __init__(self, session, max_batch_size=64, max_wait_ms=8):
+        self.session = session
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = min(float(max_wait_ms), CHUNK_DURATION_MS) / 1000
+        self._pending = []
+        self._flush_handle = None
+        # onnxruntime 推理放在单独线程，避免阻塞事件循环
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="silero-vad-batch"
+        )
+
+    async def infer(self, audio_input: np.ndarray, state: np.ndarray):
+        """提交一个分片，返回 (speech_prob, new_state)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((audio_input, state, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_wait, self._flush, loop)
+
+        return await future
+
+    def _flush(self, loop):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        run_future = loop.run_in_executor(self._executor, self._run_batch, batch)
+        run_future.add_done_callback(lambda f: self._dispatch(batch, f))
+
+    def _run_batch(self, batch):
+        ort_inputs = {
+            "input": np.concatenate([item[0] for item in batch], axis=0),
+            "state": np.concatenate([item[1] for item in batch], axis=1),
+            "sr": np.array(16000, dtype=np.int64),
+        }
+        return self.session.run(None, ort_inputs)
+
+    def close(self):
+        """停止推理线程，等待已提交的批次完成"""
+        self._executor.shutdown(wait=True)
+
+    @staticmethod
+    def _dispatch(batch, run_future):
+        error = run_future.exception()
+        if error is None:
+            out, state = run_future.result()
+        for i, (_, _, future) in enumerate(batch):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result((float(out[i]), state[:, i : i + 1, :].copy()))
+
 
 class VADProvider(VADProviderBase):
     def __init__(self, config):
@@ -36,12 +114,34 @@ class VADProvider(VADProviderBase):
 
         self.frame_window_threshold = 3
 
+        # 跨连接批量推理（默认关闭）
+        batch_enabled = str(config.get("batch_enabled", False)).lower()
+        batch_max_size = config.get("batch_max_size", "64")
+        batch_max_wait_ms = config.get("batch_max_wait_ms", "8")
+        self.batch_scheduler = None
+        if batch_enabled in ("true", "1", "yes"):
+            self.batch_scheduler = SileroBatchScheduler(
+                self.session,
+                max_batch_size=int(batch_max_size) if batch_max_size else 64,
+                max_wait_ms=float(batch_max_wait_ms) if batch_max_wait_ms else 8,
+            )
+            logger.bind(tag=TAG).info(
+                f"SileroVAD 批量推理已启用: batch_max_size={self.batch_scheduler.max_batch_size}, "
+                f"batch_max_wait_ms={self.batch_scheduler.max_wait * 1000:.1f}"
+            )
+
+    def cleanup(self):
+        """停止批量推理线程并释放模型，实例被提供者注册表释放时调用"""
+        if self.batch_scheduler is not None:
+            self.batch_scheduler.close()
+        self.session = None
+
     def _init_connection_state(self, conn):
         """为连接初始化独立的 VAD 状态"""
         if not hasattr(conn, "_vad_state"):
             conn._vad_state = np.zeros((2, 1, 128), dtype=np.float32)
         if not hasattr(conn, "_vad_context"):
-            conn._vad_context = np.zeros((1, 64), dtype=np.float32)
+            conn._vad_context = np.zeros((1, CONTEXT_SAMPLES), dtype=np.float32)
 
     def release_conn_resources(self, conn):
         """释放连接的 VAD 资源（连接关闭时调用）"""
@@ -52,6 +152,47 @@ class VADProvider(VADProviderBase):
                 except Exception:
                     pass
 
+    def _next_chunk_input(self, conn):
+        """从连接缓冲区取出一个分片，拼接上下文后返回模型输入"""
+        chunk = conn.client_audio_buffer[: CHUNK_SAMPLES * 2]
+        conn.client_audio_buffer = conn.client_audio_buffer[CHUNK_SAMPLES * 2 :]
+
+        audio_int16 = np.frombuffer(chunk, dtype=np.int16)
+        audio_float32 = audio_int16.astype(np.float32) / 32768.0
+        return np.concatenate(
+            [conn._vad_context, audio_float32.reshape(1, -1)], axis=1
+        ).astype(np.float32)
+
+    def _update_voice_state(self, conn, speech_prob):
+        """根据单个分片的语音概率更新连接的 VAD 状态，返回滑动窗口判定结果"""
+        # 双阈值判断
+        if speech_prob >= self.vad_threshold:
+            is_voice = True
+        elif speech_prob <= self.vad_threshold_low:
+            is_voice = False
+        else:
+            is_voice = conn.last_is_voice
+
+        # 声音没低于最低值则延续前一个状态，判断为有声音
+        conn.last_is_voice = is_voice
+
+        # 更新滑动窗口
+        conn.client_voice_window.append(is_voice)
+        client_have_voice = (
+            conn.client_voice_window.count(True) >= self.frame_window_threshold
+        )
+
+        # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
+        if conn.client_have_voice and not client_have_voice:
+            stop_duration = time.time() * 1000 - conn.vad_last_voice_time
+            if stop_duration >= self.silence_threshold_ms:
+                conn.client_voice_stop = True
+        if client_have_voice:
+            conn.client_have_voice = True
+            conn.vad_last_voice_time = time.time() * 1000
+
+        return client_have_voice
+
     def is_vad(self, conn, pcm_frame):
         # 手动模式：直接返回True，不进行实时VAD检测，所有音频都缓存
         if conn.client_listen_mode == "manual":
@@ -64,15 +205,8 @@ class VADProvider(VADProviderBase):
             conn.client_audio_buffer.extend(pcm_frame)
 
             client_have_voice = False
-            while len(conn.client_audio_buffer) >= 512 * 2:
-                chunk = conn.client_audio_buffer[: 512 * 2]
-                conn.client_audio_buffer = conn.client_audio_buffer[512 * 2 :]
-
-                audio_int16 = np.frombuffer(chunk, dtype=np.int16)
-                audio_float32 = audio_int16.astype(np.float32) / 32768.0
-                audio_input = np.concatenate(
-                    [conn._vad_context, audio_float32.reshape(1, -1)], axis=1
-                ).astype(np.float32)
+            while len(conn.client_audio_buffer) >= CHUNK_SAMPLES * 2:
+                audio_input = self._next_chunk_input(conn)
 
                 ort_inputs = {
                     "input": audio_input,
@@ -82,34 +216,34 @@ class VADProvider(VADProviderBase):
                 out, state = self.session.run(None, ort_inputs)
 
                 conn._vad_state = state
-                conn._vad_context = audio_input[:, -64:]
-                speech_prob = out.item()
-
-                # 双阈值判断
-                if speech_prob >= self.vad_threshold:
-                    is_voice = True
-                elif speech_prob <= self.vad_threshold_low:
-                    is_voice = False
-                else:
-                    is_voice = conn.last_is_voice
-
-                # 声音没低于最低值则延续前一个状态，判断为有声音
-                conn.last_is_voice = is_voice
-
-                # 更新滑动窗口
-                conn.client_voice_window.append(is_voice)
-                client_have_voice = (
-                    conn.client_voice_window.count(True) >= self.frame_window_threshold
+                conn._vad_context = audio_input[:, -CONTEXT_SAMPLES:]
+                client_have_voice = self._update_voice_state(conn, out.item())
+
+            return client_have_voice
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"Error processing audio packet: {e}")
+
+    async def is_vad_async(self, conn, pcm_frame):
+        if self.batch_scheduler is None or conn.client_listen_mode == "manual":
+            return self.is_vad(conn, pcm_frame)
+
+        try:
+            self._init_connection_state(conn)
+
+            conn.client_audio_buffer.extend(pcm_frame)
+
+            client_have_voice = False
+            while len(conn.client_audio_buffer) >= CHUNK_SAMPLES * 2:
+                audio_input = self._next_chunk_input(conn)
+
+                # 同一连接的分片必须串行：下一个分片依赖本次输出的状态
+                speech_prob, state = await self.batch_scheduler.infer(
+                    audio_input, conn._vad_state
                 )
 
-                # 如果之前有声音，但本次没有声音，且与上次有声音的时间差已经超过了静默阈值，则认为已经说完一句话
-                if conn.client_have_voice and not client_have_voice:
-                    stop_duration = time.time() * 1000 - conn.vad_last_voice_time
-                    if stop_duration >= self.silence_threshold_ms:
-                        conn.client_voice_stop = True
-                if client_have_voice:
-                    conn.client_have_voice = True
-                    conn.vad_last_voice_time = time.time() * 1000
+                conn._vad_state = state
+                conn._vad_context = audio_input[:, -CONTEXT_SAMPLES:]
+                client_have_voice = self._update_voice_state(conn, speech_prob)
 
             return client_have_voice
         except Exception as e:
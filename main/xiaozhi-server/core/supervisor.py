@@ -0,0 +1,235 @@
+import os
+import sys
+import time
+import zlib
+import signal
+import socket
+import multiprocessing
+from typing import Callable, Dict, List, Optional
+
+from config.logger import setup_logging
+from core.utils.shared_store import get_shared_store
+
+TAG = __name__
+logger = setup_logging()
+
+# 工作进程启动后很快退出视为启动失败，重新拉起前等待一段时间，避免反复崩溃占满CPU
+CRASH_WINDOW = 10
+RESPAWN_DELAY = 5
+
+
+def supports_reuse_port() -> bool:
+    """多个进程共享同一监听端口依赖 SO_REUSEPORT，并需要 fork"""
+    return sys.platform != "win32" and hasattr(socket, "SO_REUSEPORT")
+
+
+def get_configured_worker_count(config: Dict) -> int:
+    """读取配置的工作进程数，0表示与CPU核数相同"""
+    count = (config.get("workers", {}) or {}).get("count", 1)
+    try:
+        count = int(count) if count not in (None, "") else 1
+    except (TypeError, ValueError):
+        count = 1
+    if count <= 0:
+        count = os.cpu_count() or 1
+    return count
+
+
+def get_worker_count(config: Dict) -> int:
+    """实际运行的工作进程数，平台不支持时只能单进程运行"""
+    count = get_configured_worker_count(config)
+    return count if count > 1 and supports_reuse_port() else 1
+
+
+def get_affinity_port_base(config: Dict) -> Optional[int]:
+    """设备亲和端口的起始值，未配置或单进程运行时返回None"""
+    base = (config.get("workers", {}) or {}).get("affinity_port_base")
+    if not base or get_worker_count(config) <= 1:
+        return None
+    try:
+        return int(base)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_metrics_port_base(config: Dict) -> Optional[int]:
+    """多进程模式下各工作进程独立指标端口的起始值，未配置或单进程运行时返回None"""
+    base = (config.get("metrics", {}) or {}).get("worker_port_base")
+    if not base or get_worker_count(config) <= 1:
+        return None
+    try:
+        return int(base)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_device_affinity_port(config: Dict, device_id: str) -> Optional[int]:
+    """按device-id固定分配到某个工作进程的亲和端口，同一设备总是连到同一个进程"""
+    base = get_affinity_port_base(config)
+    if base is None or not device_id:
+        return None
+    return base + zlib.crc32(device_id.encode("utf-8")) % get_worker_count(config)
+
+
+class _Worker:
+    def __init__(self, index: int, process, ready):
+        self.index = index
+        self.process = process
+        self.ready = ready
+        self.started_at = time.monotonic()
+        self.drain_started_at = None
+
+
+class WorkerSupervisor:
+    """
+    多进程主控：fork出多个工作进程，各自以 SO_REUSEPORT 监听同一端口，由内核分配新连接
+    - 工作进程异常退出时自动重新拉起
+    - SIGHUP：逐个滚动重启，新进程就绪后旧进程才开始平滑下线
+    - SIGINT/SIGTERM：所有工作进程平滑下线后退出
+    主进程只管理进程，不加载模型、不处理连接。
+    """
+
+    def __init__(self, config: Dict, target: Callable):
+        """
+        Args:
+            config: 完整配置，fork 后由工作进程直接使用
+            target: 工作进程入口，调用方式为 target(config, worker_index, ready_event)，
+                    服务开始监听后需调用 ready_event.set()
+        """
+        self.config = config
+        self.target = target
+        self.count = get_worker_count(config)
+        workers_config = config.get("workers", {}) or {}
+        self.drain_timeout = float(workers_config.get("drain_timeout", 30) or 0)
+        self.ready_timeout = float(workers_config.get("ready_timeout", 120) or 120)
+        self._ctx = multiprocessing.get_context("fork")
+        self.workers: Dict[int, _Worker] = {}
+        self.draining: List[_Worker] = []
+        self._respawn_at: Dict[int, float] = {}
+        self._stopping = False
+        self._reload_requested = False
+
+    # ---------- 信号 ----------
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    def _on_reload(self, signum, frame):
+        self._reload_requested = True
+
+    # ---------- 进程管理 ----------
+
+    def _spawn(self, index: int) -> _Worker:
+        ready = self._ctx.Event()
+        process = self._ctx.Process(
+            target=self.target,
+            args=(self.config, index, ready),
+            name=f"xiaozhi-worker-{index}",
+        )
+        process.start()
+        worker = _Worker(index, process, ready)
+        self.workers[index] = worker
+        logger.bind(tag=TAG).info(f"工作进程 {index} 已启动 (pid={process.pid})")
+        return worker
+
+    def _drain(self, worker: _Worker):
+        """通知工作进程平滑下线：停止接受新连接，等进行中的对话结束后退出"""
+        if worker.process.is_alive():
+            try:
+                os.kill(worker.process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        worker.drain_started_at = time.monotonic()
+        self.draining.append(worker)
+
+    def _wait_ready(self, worker: _Worker) -> bool:
+        deadline = time.monotonic() + self.ready_timeout
+        while time.monotonic() < deadline and not self._stopping:
+            if worker.ready.wait(0.5):
+                return True
+            if not worker.process.is_alive():
+                return False
+        return False
+
+    def _rolling_restart(self):
+        logger.bind(tag=TAG).info("开始滚动重启工作进程")
+        for index in range(self.count):
+            if self._stopping:
+                return
+            old = self.workers.get(index)
+            new = self._spawn(index)
+            if not self._wait_ready(new):
+                logger.bind(tag=TAG).error(f"新的工作进程 {index} 未能就绪，停止滚动重启")
+                if new.process.is_alive():
+                    new.process.kill()
+                new.process.join(5)
+                if old is not None:
+                    self.workers[index] = old
+                return
+            if old is not None:
+                self._drain(old)
+        logger.bind(tag=TAG).info("滚动重启完成")
+
+    def _reap(self):
+        now = time.monotonic()
+        for index, worker in list(self.workers.items()):
+            if worker.process.is_alive():
+                continue
+            del self.workers[index]
+            delay = RESPAWN_DELAY if now - worker.started_at < CRASH_WINDOW else 0
+            logger.bind(tag=TAG).error(
+                f"工作进程 {index} 异常退出 (exitcode={worker.process.exitcode})，{delay}秒后重新拉起"
+            )
+            self._respawn_at[index] = now + delay
+
+        for index, respawn_at in list(self._respawn_at.items()):
+            if now >= respawn_at:
+                del self._respawn_at[index]
+                self._spawn(index)
+
+        for worker in list(self.draining):
+            if not worker.process.is_alive():
+                worker.process.join(0)
+                self.draining.remove(worker)
+                logger.bind(tag=TAG).info(f"旧工作进程 (pid={worker.process.pid}) 已下线")
+            elif now - worker.drain_started_at > self.drain_timeout + 10:
+                # 工作进程自身会在 drain_timeout 后强制关闭连接，这里只处理卡死的情况
+                worker.process.kill()
+
+    def _shutdown(self):
+        logger.bind(tag=TAG).info("正在停止所有工作进程...")
+        for worker in list(self.workers.values()):
+            self._drain(worker)
+        self.workers.clear()
+        deadline = time.monotonic() + self.drain_timeout + 10
+        for worker in self.draining:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join(5)
+        self.draining.clear()
+
+    def run(self):
+        """阻塞运行，直到收到退出信号且所有工作进程退出"""
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGHUP, self._on_reload)
+        logger.bind(tag=TAG).info(
+            f"多进程模式启动 {self.count} 个工作进程，SIGHUP 滚动重启，SIGTERM 平滑退出"
+        )
+        # 共享存储只在本次运行内有效：主进程启动时清空，滚动重启时保留；
+        # 主进程在 fork 前关闭自己的连接，工作进程各自重新打开
+        store = get_shared_store(self.config)
+        store.clear()
+        store.close()
+        for index in range(self.count):
+            self._spawn(index)
+        try:
+            while not self._stopping:
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._rolling_restart()
+                self._reap()
+                time.sleep(0.5)
+        finally:
+            self._shutdown()
@@ -0,0 +1,204 @@
+"""
+服务端回声消除
+下发给MQTT网关的音频按时间戳写入固定大小的环形缓冲区，写入时即计算好参考帧的幅度谱与对数功率谱；
+收到麦克风帧时用二分查找定位时间戳最接近的参考帧，前后各2帧的相关性一次矩阵运算完成，
+再做谱减法。算法与原实现一致：对数功率谱匹配 + 频域谱减法。
+"""
+
+import bisect
+import threading
+from functools import lru_cache
+from typing import Dict, Optional
+
+import numpy as np
+
+DEFAULT_BUFFER_SECONDS = 30
+DEFAULT_FRAME_MS = 60
+# 麦克风帧前后各检查的参考帧数
+SEARCH_RADIUS = 2
+MIC_RMS_THRESHOLD = 100
+REF_RMS_THRESHOLD = 50
+EPS = 1e-8
+
+
+@lru_cache(maxsize=8)
+def hanning_window(n: int) -> np.ndarray:
+    """缓存的汉宁窗，只读"""
+    window = np.hanning(n)
+    window.setflags(write=False)
+    return window
+
+
+class _TimestampView:
+    """按时间先后顺序访问环形缓冲区中的时间戳，供 bisect 使用"""
+
+    def __init__(self, engine: "EchoCanceller"):
+        self.engine = engine
+
+    def __len__(self):
+        return self.engine._count
+
+    def __getitem__(self, index):
+        engine = self.engine
+        return engine._timestamps[(engine._head + index) % engine.capacity]
+
+
+class EchoCanceller:
+    """
+    单个连接的回声消除器
+
+    add_reference 在发送音频的事件循环中调用，process 可在工作线程中调用，两者通过锁同步。
+    """
+
+    def __init__(
+        self,
+        frame_samples: int = 960,
+        buffer_seconds: float = DEFAULT_BUFFER_SECONDS,
+        frame_ms: int = DEFAULT_FRAME_MS,
+    ):
+        self.frame_samples = int(frame_samples)
+        self.capacity = max(SEARCH_RADIUS * 2 + 1, int(buffer_seconds * 1000 / frame_ms))
+        bins = self.frame_samples // 2 + 1
+        self._timestamps = np.zeros(self.capacity, dtype=np.int64)
+        self._rms = np.zeros(self.capacity, dtype=np.float32)
+        self._mag = np.zeros((self.capacity, bins), dtype=np.float32)
+        self._log_psd = np.zeros((self.capacity, bins), dtype=np.float32)
+        self._log_norm = np.zeros(self.capacity, dtype=np.float32)
+        # 最早一帧的位置与帧数
+        self._head = 0
+        self._count = 0
+        self._view = _TimestampView(self)
+        self._lock = threading.Lock()
+        self.frames_processed = 0
+        self.frames_suppressed = 0
+
+    def add_reference(self, timestamp: int, pcm: bytes):
+        """缓存一帧下发的音频，时间戳回退（新的播放流）时清空旧数据"""
+        samples = np.frombuffer(pcm, dtype=np.int16).astype(np.float32)
+        if len(samples) != self.frame_samples:
+            samples = np.pad(samples[: self.frame_samples], (0, max(0, self.frame_samples - len(samples))))
+        rms = np.sqrt(np.mean(samples**2))
+        mag = np.abs(np.fft.rfft(samples * hanning_window(self.frame_samples)))
+        log_psd = 10 * np.log10(mag**2 + EPS)
+        log_norm = np.sqrt(np.dot(log_psd, log_psd))
+
+        with self._lock:
+            if self._count and timestamp <= self._view[self._count - 1]:
+                if timestamp == self._view[self._count - 1]:
+                    index = (self._head + self._count - 1) % self.capacity
+                else:
+                    self._head = self._count = 0
+                    index = self._append_slot()
+            else:
+                index = self._append_slot()
+            self._timestamps[index] = timestamp
+            self._rms[index] = rms
+            self._mag[index] = mag
+            self._log_psd[index] = log_psd
+            self._log_norm[index] = log_norm
+
+    def _append_slot(self) -> int:
+        if self._count < self.capacity:
+            index = (self._head + self._count) % self.capacity
+            self._count += 1
+        else:
+            # 缓冲区已满，覆盖最早的一帧
+            index = self._head
+            self._head = (self._head + 1) % self.capacity
+        return index
+
+    def clear(self):
+        with self._lock:
+            self._head = self._count = 0
+
+    def _candidates(self, timestamp: int):
+        """时间戳最接近的参考帧及前后各 SEARCH_RADIUS 帧，返回缓冲区下标数组"""
+        with self._lock:
+            count = self._count
+            if count < 2:
+                return None
+            position = bisect.bisect_left(self._view, timestamp)
+            if position == count or (
+                position > 0
+                and timestamp - self._view[position - 1] <= self._view[position] - timestamp
+            ):
+                position -= 1
+            start = max(0, position - SEARCH_RADIUS)
+            end = min(count, position + SEARCH_RADIUS + 1)
+            indexes = (self._head + np.arange(start, end)) % self.capacity
+            return (
+                position - start,
+                self._rms[indexes].copy(),
+                self._mag[indexes].copy(),
+                self._log_psd[indexes].copy(),
+                self._log_norm[indexes].copy(),
+            )
+
+    def process(self, timestamp: int, pcm_frame: bytes) -> bytes:
+        """对一帧麦克风音频做回声消除，无法处理时原样返回"""
+        mic_audio = np.frombuffer(pcm_frame, dtype=np.int16).astype(np.float32)
+        n = len(mic_audio)
+        if n != self.frame_samples:
+            return pcm_frame
+        if np.sqrt(np.mean(mic_audio**2)) < MIC_RMS_THRESHOLD:
+            return pcm_frame
+
+        candidates = self._candidates(timestamp)
+        if candidates is None:
+            return pcm_frame
+        closest, rms, mags, log_psds, log_norms = candidates
+        self.frames_processed += 1
+
+        # ========== 匹配参考帧（对数功率谱匹配） ==========
+        mic_fft = np.fft.rfft(mic_audio * hanning_window(n))
+        mic_mag = np.abs(mic_fft)
+        mic_log_psd = 10 * np.log10(mic_mag**2 + EPS)
+        mic_norm = np.sqrt(np.dot(mic_log_psd, mic_log_psd))
+        corr = np.abs(log_psds @ mic_log_psd) / (mic_norm * log_norms + EPS)
+        # 静音参考帧不参与匹配
+        corr[rms < REF_RMS_THRESHOLD] = -1
+        best = int(np.argmax(corr))
+        if corr[best] < 0:
+            best = closest
+        best_corr = float(corr[best])
+        ref_rms = float(rms[best])
+        if ref_rms < REF_RMS_THRESHOLD:
+            return pcm_frame
+
+        # ========== 频域 AEC 处理（谱减法） ==========
+        # 频域幅度谱不受声学路径相位失真的影响
+        ref_mag = mags[best].astype(np.float64)
+        scale = np.sum(mic_mag * ref_mag) / (np.dot(ref_mag, ref_mag) + EPS)
+
+        # 自适应系数：回声越强、匹配越准，过减系数越大
+        coef = max(0.5, min(3.0, 1.0 + scale * 3 + (best_corr - 0.97) * 30))
+        echo_mag = ref_mag * scale * coef
+        result_mag = np.maximum(mic_mag - echo_mag * 1.5, mic_mag * 0.1)
+
+        # 保留相位重建信号
+        output = np.fft.irfft(result_mag * np.exp(1j * np.angle(mic_fft)), n)
+
+        # 高置信度是纯回声时，再压一下确保VAD检测不到
+        if best_corr >= 0.97 and ref_rms > 500:
+            output = output * 0.3
+        self.frames_suppressed += 1
+        return np.clip(output, -32768, 32767).astype(np.int16).tobytes()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            buffered = self._count
+        return {
+            "buffered_frames": buffered,
+            "capacity": self.capacity,
+            "frames_processed": self.frames_processed,
+            "frames_suppressed": self.frames_suppressed,
+        }
+
+
+def create_echo_canceller(config: Optional[Dict] = None, frame_samples: int = 960) -> EchoCanceller:
+    """根据 aec 配置创建回声消除器"""
+    aec_config = (config or {}).get("aec", {}) or {}
+    return EchoCanceller(
+        frame_samples=frame_samples,
+        buffer_seconds=float(aec_config.get("buffer_seconds", DEFAULT_BUFFER_SECONDS)),
+    )
@@ -82,6 +82,10 @@ class AudioRateController:
         self.queue_empty_event.clear()
         self.queue_has_data_event.set()
 
+    def pending_audio_count(self):
+        """队列中尚未发送的音频包数量，供生产方做背压判断"""
+        return sum(1 for item in tuple(self.queue) if item[0] == "audio")
+
     def _get_elapsed_ms(self):
         """获取已经过的时间（毫秒）"""
         if self.start_timestamp is None:
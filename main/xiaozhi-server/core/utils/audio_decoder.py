@@ -0,0 +1,257 @@
+"""
+进程内音频解码
+WAV 直接解析 RIFF 结构，MP3 使用 miniaudio 在进程内解码，
+声道混合与重采样（多相FIR）均基于 NumPy 完成，避免每次调用都启动 ffmpeg 子进程。
+不支持的格式返回 None，由调用方回退到 pydub。
+"""
+
+import os
+import struct
+from functools import lru_cache
+from io import BytesIO
+from math import gcd
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from config.logger import setup_logging
+
+try:
+    import miniaudio
+except ImportError:
+    miniaudio = None
+
+TAG = __name__
+logger = setup_logging()
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# miniaudio 支持边解码边输出的格式
+STREAM_FILE_TYPES = ("mp3", "wav", "flac")
+
+# 重采样分块输出的样本数，控制索引矩阵的内存占用
+_RESAMPLE_CHUNK = 8192
+
+
+def _read_source(source) -> bytes:
+    """source 可以是文件路径、bytes 或类文件对象"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    if isinstance(source, BytesIO):
+        return source.getvalue()
+    if hasattr(source, "read"):
+        return source.read()
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def parse_wav(data: bytes) -> Tuple[np.ndarray, int, int]:
+    """
+    解析WAV数据
+
+    Returns:
+        (samples, channels, sample_rate)，samples 为 float32，范围[-1, 1]，按帧交织
+
+    Raises:
+        ValueError: 非RIFF/WAVE数据或不支持的编码
+    """
+    if len(data) < 12 or data[0:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("不是有效的WAV数据")
+
+    fmt = None
+    pcm = None
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", data, offset)
+        body_start = offset + 8
+        body_end = min(body_start + chunk_size, len(data))
+        if chunk_id == b"fmt ":
+            audio_format, channels, sample_rate, _, _, bits = struct.unpack_from(
+                "<HHIIHH", data, body_start
+            )
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # 扩展格式的真实编码在子格式GUID的前两个字节
+                audio_format = struct.unpack_from("<H", data, body_start + 24)[0]
+            fmt = (audio_format, channels, sample_rate, bits)
+        elif chunk_id == b"data":
+            # 流式生成的WAV可能把data长度写成0或0xFFFFFFFF，此时读到末尾
+            if chunk_size in (0, 0xFFFFFFFF):
+                body_end = len(data)
+            pcm = data[body_start:body_end]
+            break
+        # RIFF块按2字节对齐
+        offset = body_start + chunk_size + (chunk_size & 1)
+
+    if fmt is None or pcm is None:
+        raise ValueError("WAV数据缺少fmt或data块")
+
+    audio_format, channels, sample_rate, bits = fmt
+    if channels <= 0 or sample_rate <= 0:
+        raise ValueError(f"WAV参数无效: channels={channels}, rate={sample_rate}")
+
+    block = channels * bits // 8
+    if block <= 0:
+        raise ValueError(f"不支持的WAV位深: {bits}")
+    pcm = pcm[: len(pcm) - len(pcm) % block]
+
+    if audio_format == WAVE_FORMAT_PCM:
+        if bits == 16:
+            samples = np.frombuffer(pcm, dtype="<i2").astype(np.float32) / 32768.0
+        elif bits == 8:
+            samples = (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        elif bits == 24:
+            raw = np.frombuffer(pcm, dtype=np.uint8).reshape(-1, 3)
+            ints = (
+                raw[:, 0].astype(np.int32)
+                | (raw[:, 1].astype(np.int32) << 8)
+                | (raw[:, 2].astype(np.int32) << 16)
+            )
+            ints = np.where(ints & 0x800000, ints - 0x1000000, ints)
+            samples = ints.astype(np.float32) / 8388608.0
+        elif bits == 32:
+            samples = np.frombuffer(pcm, dtype="<i4").astype(np.float32) / 2147483648.0
+        else:
+            raise ValueError(f"不支持的WAV位深: {bits}")
+    elif audio_format == WAVE_FORMAT_IEEE_FLOAT:
+        if bits == 32:
+            samples = np.frombuffer(pcm, dtype="<f4").astype(np.float32)
+        elif bits == 64:
+            samples = np.frombuffer(pcm, dtype="<f8").astype(np.float32)
+        else:
+            raise ValueError(f"不支持的浮点WAV位深: {bits}")
+    else:
+        raise ValueError(f"不支持的WAV编码格式: {audio_format}")
+
+    return samples, channels, sample_rate
+
+
+def decode_mp3(data: bytes) -> Tuple[np.ndarray, int, int]:
+    """使用miniaudio在进程内解码MP3，返回 (samples, channels, sample_rate)"""
+    if miniaudio is None:
+        raise ValueError("未安装miniaudio，无法在进程内解码MP3")
+    decoded = miniaudio.mp3_read_s16(data)
+    samples = np.frombuffer(decoded.samples, dtype=np.int16).astype(np.float32) / 32768.0
+    return samples, decoded.nchannels, decoded.sample_rate
+
+
+def mix_to_mono(samples: np.ndarray, channels: int) -> np.ndarray:
+    """交织的多声道数据取平均混合为单声道"""
+    if channels == 1:
+        return samples
+    frames = len(samples) // channels
+    return samples[: frames * channels].reshape(frames, channels).mean(axis=1)
+
+
+@lru_cache(maxsize=16)
+def _polyphase_filter(up: int, down: int) -> Tuple[np.ndarray, int]:
+    """
+    设计Kaiser窗低通滤波器并拆分为多相形式
+
+    Returns:
+        (phases, half_len)，phases[p, j] = h[p + j * up]
+    """
+    max_rate = max(up, down)
+    half_len = 10 * max_rate
+    n = np.arange(-half_len, half_len + 1, dtype=np.float64)
+    cutoff = 1.0 / max_rate
+    h = cutoff * np.sinc(cutoff * n) * np.kaiser(len(n), 5.0) * up
+    taps = -(-len(h) // up)
+    h = np.concatenate([h, np.zeros(taps * up - len(h))])
+    phases = h.reshape(taps, up).T.astype(np.float32)
+    return np.ascontiguousarray(phases), half_len
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """多相FIR重采样（与 scipy.signal.resample_poly 等价的实现）"""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    g = gcd(src_rate, dst_rate)
+    up, down = dst_rate // g, src_rate // g
+    phases, half_len = _polyphase_filter(up, down)
+    taps = phases.shape[1]
+
+    out_len = -(-len(samples) * up // down)
+    # 前补 taps 个零保证负索引有效，后补足够的零覆盖滤波器延迟
+    tail = half_len // up + taps + 1
+    padded = np.concatenate(
+        [np.zeros(taps, dtype=np.float32), samples.astype(np.float32), np.zeros(tail, dtype=np.float32)]
+    )
+    offsets = np.arange(taps)
+
+    out = np.empty(out_len, dtype=np.float32)
+    for start in range(0, out_len, _RESAMPLE_CHUNK):
+        n = np.arange(start, min(start + _RESAMPLE_CHUNK, out_len))
+        m = n * down + half_len
+        phase = m % up
+        base = m // up + taps
+        window = padded[base[:, None] - offsets[None, :]]
+        out[start : start + len(n)] = np.einsum("ij,ij->i", window, phases[phase])
+    return out
+
+
+def to_pcm16(samples: np.ndarray) -> bytes:
+    """float32 转为16位小端PCM"""
+    return (np.clip(samples, -1.0, 1.0) * 32767.0).astype("<i2").tobytes()
+
+
+def decode_to_pcm16(source, file_type: str, sample_rate: int = 16000) -> Optional[bytes]:
+    """
+    将音频解码为单声道/指定采样率/16位小端PCM
+
+    Args:
+        source: 文件路径、bytes 或类文件对象
+        file_type: 文件类型（wav、mp3）
+        sample_rate: 目标采样率
+
+    Returns:
+        PCM数据；格式不支持或解码失败时返回 None，由调用方回退到 pydub
+    """
+    file_type = (file_type or "").lower().lstrip(".")
+    if file_type not in ("wav", "mp3"):
+        return None
+    if file_type == "mp3" and miniaudio is None:
+        return None
+    try:
+        data = _read_source(source)
+        if file_type == "wav":
+            samples, channels, src_rate = parse_wav(data)
+        else:
+            samples, channels, src_rate = decode_mp3(data)
+        samples = mix_to_mono(samples, channels)
+        samples = resample(samples, src_rate, sample_rate)
+        return to_pcm16(samples)
+    except Exception as e:
+        logger.bind(tag=TAG).debug(f"进程内解码{file_type}失败，回退到pydub: {e}")
+        return None
+
+
+def iter_pcm16_chunks(
+    file_path: str, sample_rate: int = 16000, frame_ms: int = 60
+) -> Iterator[bytes]:
+    """
+    边解码边输出单声道/指定采样率/16位PCM，每块 frame_ms 毫秒（最后一块可能不足）
+
+    安装了 miniaudio 时 mp3/wav/flac 逐块解码，内存占用与文件长度无关；
+    其他情况整段解码后再分块输出。
+    """
+    frames_per_chunk = sample_rate * frame_ms // 1000
+    file_type = os.path.splitext(file_path)[1].lstrip(".").lower()
+    if miniaudio is not None and file_type in STREAM_FILE_TYPES:
+        for samples in miniaudio.stream_file(
+            file_path,
+            output_format=miniaudio.SampleFormat.SIGNED16,
+            nchannels=1,
+            sample_rate=sample_rate,
+            frames_to_read=frames_per_chunk,
+        ):
+            yield samples.tobytes()
+        return
+
+    from core.utils.util import load_pcm16
+
+    raw_data = load_pcm16(file_path, file_type, sample_rate)
+    chunk_bytes = frames_per_chunk * 2
+    for i in range(0, len(raw_data), chunk_bytes):
+        yield raw_data[i : i + chunk_bytes]
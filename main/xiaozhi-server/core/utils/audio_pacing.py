@@ -0,0 +1,332 @@
+"""
+进程级音频发送节奏调度器
+所有连接共用一个哈希时间轮：每个tick只唤醒一次驱动任务，由它依次发送所有连接到期的音频帧，
+替代每个连接一个 _send_loop 任务、每帧一次 asyncio.sleep 的方式。
+发送缓冲区未积压时 websocket 发送只是写入缓冲区、不会等待，因此在同一个任务中依次发送不会互相拖慢；
+积压的连接转交独立的发送任务。没有待发送的帧时驱动任务退出，下次登记时重新创建。
+"""
+
+import math
+import time
+import asyncio
+import weakref
+import threading
+from typing import Dict, List, Optional
+
+from config.logger import setup_logging
+from core.utils.audioRateController import AudioRateController
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_TICK_MS = 10
+DEFAULT_WHEEL_SLOTS = 512
+
+
+class PacedAudioController(AudioRateController):
+    """
+    与 AudioRateController 接口一致的流控器（add_audio/add_message/queue_empty_event/reset），
+    发送时机由进程级时间轮驱动：到期的帧直接在时间轮的tick中发送，播放期间不需要每个连接的发送任务。
+    连接的发送缓冲区积压（客户端读取过慢）时，本次播放改由独立的发送任务继续，避免拖慢其他连接
+    """
+
+    def __init__(self, frame_duration=60, name=None, scheduler=None):
+        super().__init__(frame_duration)
+        self.name = name or f"conn-{id(self):x}"
+        self._scheduler = scheduler or get_pacing_scheduler()
+        self._send_audio_callback = None
+        self._writable = None
+        # 积压时接管本次播放的发送任务与唤醒事件
+        self._sender_task = None
+        self._due_event = None
+        self._flushing = False
+        # 已登记到时间轮的到期时间（monotonic秒），None 表示未登记
+        self._scheduled_at = None
+        # 抖动统计：实际发送时刻相对理想播放时刻的偏差（毫秒）
+        self._jitter_count = 0
+        self._jitter_sum = 0.0
+        self._jitter_max = 0.0
+        self._jitter_last = 0.0
+        self._jitter_ewma = 0.0
+
+    def reset(self):
+        super().reset()
+        self._cancel_sender()
+        self._scheduled_at = None
+
+    def add_audio(self, opus_packet):
+        super().add_audio(opus_packet)
+        self._wake()
+
+    def add_message(self, message_callback):
+        super().add_message(message_callback)
+        self._wake()
+
+    def start_sending(self, send_audio_callback, writable=None):
+        """
+        登记发送回调；pending_send_task 在发送停止（被打断或出错）时完成
+        writable 返回 False 表示连接的发送缓冲区已积压，此时不在时间轮的tick中发送
+        """
+        self._send_audio_callback = send_audio_callback
+        self._writable = writable
+        self.pending_send_task = asyncio.get_running_loop().create_future()
+        self._scheduler.register(self)
+        self._wake()
+        return self.pending_send_task
+
+    def stop_sending(self):
+        self._stop()
+        self.logger.bind(tag=TAG).debug("已取消音频发送任务")
+
+    def get_jitter_stats(self) -> Dict[str, float]:
+        """返回本连接的发送抖动统计（毫秒）"""
+        count = self._jitter_count
+        return {
+            "frames": count,
+            "mean_ms": round(self._jitter_sum / count, 3) if count else 0.0,
+            "max_ms": round(self._jitter_max, 3),
+            "last_ms": round(self._jitter_last, 3),
+            "ewma_ms": round(self._jitter_ewma, 3),
+        }
+
+    # ---------- 调度器回调 ----------
+
+    def _is_active(self) -> bool:
+        return (
+            self._send_audio_callback is not None
+            and self.pending_send_task is not None
+            and not self.pending_send_task.done()
+        )
+
+    def _wake(self):
+        if not self._is_active() or self._flushing:
+            return
+        self._scheduler.schedule(self, time.monotonic())
+
+    async def _on_due(self):
+        """时间轮到期时由调度器的驱动任务调用，直接发送到期的帧"""
+        self._scheduled_at = None
+        if not self._is_active():
+            return
+        if self._sender_task is not None:
+            # 本次播放已由独立的发送任务接管
+            self._due_event.set()
+            return
+        pending = self.pending_send_task
+        self._flushing = True
+        try:
+            await self._flush(inline=True)
+        except asyncio.CancelledError:
+            # 发送回调因客户端中止抛出 CancelledError
+            self.logger.bind(tag=TAG).debug("音频发送已停止")
+            if not pending.done():
+                pending.cancel()
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"音频发送异常: {e}")
+            if not pending.done():
+                pending.cancel()
+        finally:
+            if pending is self.pending_send_task and self._sender_task is None:
+                self._flushing = False
+
+    def _start_sender(self):
+        """发送缓冲区积压：本次播放剩余的帧改由独立任务发送"""
+        self._due_event = asyncio.Event()
+        self._sender_task = asyncio.get_running_loop().create_task(
+            self._sender(self.pending_send_task, self._due_event)
+        )
+        self._due_event.set()
+
+    async def _sender(self, pending: asyncio.Future, due_event: asyncio.Event):
+        """
+        积压连接的发送任务，只结束自己对应的 pending 任务：
+        reset 后旧任务的取消晚于新一次 start_sending 执行时，不会误停新的播放
+        """
+        try:
+            while not pending.done():
+                await due_event.wait()
+                due_event.clear()
+                self._flushing = True
+                try:
+                    await self._flush()
+                finally:
+                    if due_event is self._due_event:
+                        self._flushing = False
+        except asyncio.CancelledError:
+            # 任务被取消，或发送回调因客户端中止抛出 CancelledError
+            self.logger.bind(tag=TAG).debug("音频发送循环已停止")
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"音频发送循环异常: {e}")
+        finally:
+            if not pending.done():
+                pending.cancel()
+
+    async def _flush(self, inline: bool = False):
+        """
+        发送所有已到期的帧，下一帧未到期时登记到时间轮
+        inline 为 True 表示在时间轮的tick中执行，连接积压时转交独立的发送任务
+        """
+        while self.queue:
+            if inline and self._writable is not None and not self._writable():
+                self._start_sender()
+                return
+            item_type, payload = self.queue[0]
+            if item_type == "message":
+                # 消息类型：立即发送，不占用播放时间
+                self.queue.popleft()
+                await payload()
+                continue
+
+            if self.start_timestamp is None:
+                self.start_timestamp = time.monotonic()
+            lateness_ms = self._get_elapsed_ms() - self.play_position
+            if lateness_ms < 0:
+                # 还没到发送时间，登记到时间轮后等待唤醒
+                self._scheduler.schedule(
+                    self, self.start_timestamp + self.play_position / 1000
+                )
+                return
+
+            self._record_jitter(lateness_ms)
+            self.queue.popleft()
+            self.play_position += self.frame_duration
+            await self._send_audio_callback(payload)
+
+        # 队列处理完后清除事件
+        self.queue_empty_event.set()
+        self.queue_has_data_event.clear()
+        self._last_queue_empty_time = time.monotonic()
+
+    def _record_jitter(self, lateness_ms: float):
+        self._jitter_count += 1
+        self._jitter_sum += lateness_ms
+        self._jitter_last = lateness_ms
+        if lateness_ms > self._jitter_max:
+            self._jitter_max = lateness_ms
+        self._jitter_ewma += (lateness_ms - self._jitter_ewma) / 16
+
+    def _cancel_sender(self):
+        if self._sender_task is not None and not self._sender_task.done():
+            if self._sender_task is not asyncio.current_task():
+                self._sender_task.cancel()
+        self._sender_task = None
+        self._due_event = None
+        self._flushing = False
+
+    def _stop(self):
+        self._scheduled_at = None
+        if self.pending_send_task is not None and not self.pending_send_task.done():
+            self.pending_send_task.cancel()
+        self._cancel_sender()
+
+
+class AudioPacingScheduler:
+    """哈希时间轮：按到期tick把流控器放入槽位，驱动任务每个tick只唤醒一次"""
+
+    def __init__(self, tick_ms: int = DEFAULT_TICK_MS, slots: int = DEFAULT_WHEEL_SLOTS):
+        self.tick = tick_ms / 1000
+        self.slots: List[List] = [[] for _ in range(slots)]
+        self._pending = 0
+        self._last_tick = None
+        self._driver_task: Optional[asyncio.Task] = None
+        self._controllers = weakref.WeakSet()
+        # 统计信息
+        self.ticks = 0
+        self.fired = 0
+        self.max_tick_lag_ms = 0.0
+
+    def register(self, controller: PacedAudioController):
+        self._controllers.add(controller)
+
+    def schedule(self, controller: PacedAudioController, when: float):
+        """登记 controller 在 when（monotonic秒）到期；已登记更早的到期时间时忽略"""
+        if controller._scheduled_at is not None and controller._scheduled_at <= when:
+            return
+        self._ensure_driver()
+        controller._scheduled_at = when
+        # 已经处理过的tick不会再被访问，到期时间落在其中的放到下一个tick
+        due_tick = max(math.ceil(when / self.tick), self._last_tick + 1)
+        self.slots[due_tick % len(self.slots)].append((due_tick, when, controller))
+        self._pending += 1
+
+    def _ensure_driver(self):
+        if self._driver_task is None or self._driver_task.done():
+            self._last_tick = math.floor(time.monotonic() / self.tick) - 1
+            self._driver_task = asyncio.get_running_loop().create_task(self._drive())
+
+    async def _drive(self):
+        try:
+            while self._pending > 0:
+                current_tick = math.floor(time.monotonic() / self.tick)
+
+                # 补处理上次之后经过的所有tick（超过一圈时每个槽位只需处理一次）
+                start_tick = max(self._last_tick + 1, current_tick - len(self.slots) + 1)
+                due = []
+                for tick in range(start_tick, current_tick + 1):
+                    due.extend(self._fire_slot(tick, current_tick))
+                self._last_tick = current_tick
+                self.ticks += 1
+                for controller in due:
+                    self.fired += 1
+                    await controller._on_due()
+
+                # 睡到下一个tick的绝对时刻，避免误差累积
+                next_time = (current_tick + 1) * self.tick
+                await asyncio.sleep(max(0.0, next_time - time.monotonic()))
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"音频节奏调度器异常: {e}")
+
+    def _fire_slot(self, tick: int, current_tick: int) -> List[PacedAudioController]:
+        """取出槽位中已到期的流控器"""
+        index = tick % len(self.slots)
+        slot = self.slots[index]
+        if not slot:
+            return []
+        keep = []
+        due = []
+        for entry in slot:
+            due_tick, when, controller = entry
+            if due_tick > current_tick:
+                # 多圈之后才到期
+                keep.append(entry)
+                continue
+            self._pending -= 1
+            # 登记时间已被更早的到期时间替换，忽略旧记录
+            if controller._scheduled_at != when:
+                continue
+            due.append(controller)
+            lag_ms = (time.monotonic() - when) * 1000
+            if lag_ms > self.max_tick_lag_ms:
+                self.max_tick_lag_ms = lag_ms
+        self.slots[index] = keep
+        return due
+
+    def get_metrics(self) -> Dict:
+        """调度器与各连接的抖动指标"""
+        return {
+            "tick_ms": self.tick * 1000,
+            "ticks": self.ticks,
+            "fired": self.fired,
+            "pending": self._pending,
+            "max_tick_lag_ms": round(self.max_tick_lag_ms, 3),
+            "connections": {
+                controller.name: controller.get_jitter_stats()
+                for controller in list(self._controllers)
+            },
+        }
+
+
+_pacing_scheduler = None
+_pacing_scheduler_lock = threading.Lock()
+
+
+def get_pacing_scheduler(tick_ms: int = DEFAULT_TICK_MS) -> AudioPacingScheduler:
+    """获取进程级音频节奏调度器（单例模式）"""
+    global _pacing_scheduler
+    if _pacing_scheduler is None:
+        with _pacing_scheduler_lock:
+            if _pacing_scheduler is None:
+                _pacing_scheduler = AudioPacingScheduler(tick_ms=tick_ms)
+    return _pacing_scheduler
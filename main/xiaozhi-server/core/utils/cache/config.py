@@ -19,7 +19,6 @@ class CacheType(Enum):
     CONFIG = "config"
     DEVICE_PROMPT = "device_prompt"
     VOICEPRINT_HEALTH = "voiceprint_health"  # 声纹识别健康检查
-    AUDIO_DATA = "audio_data"  # 音频数据缓存
 
 
 @dataclass
@@ -30,22 +29,23 @@ class CacheConfig:
     ttl: Optional[float] = 300  # 默认5分钟
     max_size: Optional[int] = 1000  # 默认最大1000条
     cleanup_interval: float = 60  # 清理间隔（秒）
+    shared: bool = False  # 多进程部署时是否放入跨进程共享存储
 
     @classmethod
     def for_type(cls, cache_type: CacheType) -> "CacheConfig":
         """根据缓存类型返回预设配置"""
         configs = {
             CacheType.LOCATION: cls(
-                strategy=CacheStrategy.TTL, ttl=None, max_size=1000  # 手动失效
+                strategy=CacheStrategy.TTL, ttl=None, max_size=1000, shared=True  # 手动失效
             ),
             CacheType.IP_INFO: cls(
-                strategy=CacheStrategy.TTL, ttl=86400, max_size=1000  # 24小时
+                strategy=CacheStrategy.TTL, ttl=86400, max_size=1000, shared=True  # 24小时
             ),
             CacheType.WEATHER: cls(
-                strategy=CacheStrategy.TTL, ttl=28800, max_size=1000  # 8小时
+                strategy=CacheStrategy.TTL, ttl=28800, max_size=1000, shared=True  # 8小时
             ),
             CacheType.LUNAR: cls(
-                strategy=CacheStrategy.TTL, ttl=2592000, max_size=365  # 30天过期
+                strategy=CacheStrategy.TTL, ttl=2592000, max_size=365, shared=True  # 30天过期
             ),
             CacheType.INTENT: cls(
                 strategy=CacheStrategy.TTL_LRU, ttl=600, max_size=1000  # 10分钟
@@ -54,13 +54,10 @@ class CacheConfig:
                 strategy=CacheStrategy.FIXED_SIZE, ttl=None, max_size=20  # 手动失效
             ),
             CacheType.DEVICE_PROMPT: cls(
-                strategy=CacheStrategy.TTL, ttl=None, max_size=1000  # 手动失效
+                strategy=CacheStrategy.TTL, ttl=None, max_size=1000, shared=True  # 手动失效
             ),
             CacheType.VOICEPRINT_HEALTH: cls(
                 strategy=CacheStrategy.TTL, ttl=600, max_size=100  # 10分钟过期
             ),
-            CacheType.AUDIO_DATA: cls(
-                strategy=CacheStrategy.TTL, ttl=600, max_size=100  # 10分钟过期
-            ),
         }
         return configs.get(cache_type, cls())
@@ -21,6 +21,13 @@ class GlobalCacheManager:
         self._global_lock = threading.RLock()
         self._last_cleanup = time.time()
         self._stats = {"hits": 0, "misses": 0, "evictions": 0, "cleanups": 0}
+        # 多进程部署时接入的跨进程存储，标记为 shared 的缓存类型直接读写该存储
+        self._shared_store = None
+        self._shared_configs: Dict[CacheType, CacheConfig] = {}
+        for cache_type in CacheType:
+            config = CacheConfig.for_type(cache_type)
+            if config.shared:
+                self._shared_configs[cache_type] = config
 
     @property
     def logger(self):
@@ -31,6 +38,15 @@ class GlobalCacheManager:
             self._logger = setup_logging()
         return self._logger
 
+    def attach_shared_store(self, store) -> None:
+        """接入跨进程共享存储（见 core/utils/shared_store.py），之后共享类型的缓存对所有工作进程可见"""
+        self._shared_store = store
+
+    def _shared_config(self, cache_type: CacheType) -> Optional[CacheConfig]:
+        if self._shared_store is None:
+            return None
+        return self._shared_configs.get(cache_type)
+
     def _get_cache_name(self, cache_type: CacheType, namespace: str = "") -> str:
         """生成缓存名称"""
         if namespace:
@@ -62,6 +78,12 @@ class GlobalCacheManager:
     ) -> None:
         """设置缓存值"""
         cache_name = self._get_cache_name(cache_type, namespace)
+        shared_config = self._shared_config(cache_type)
+        if shared_config is not None:
+            self._shared_store.set(
+                cache_name, key, value, ttl if ttl is not None else shared_config.ttl
+            )
+            return
         config = self._configs.get(cache_name) or CacheConfig.for_type(cache_type)
         cache = self._get_or_create_cache(cache_name, config)
 
@@ -104,6 +126,10 @@ class GlobalCacheManager:
     ) -> Optional[Any]:
         """获取缓存值"""
         cache_name = self._get_cache_name(cache_type, namespace)
+        if self._shared_config(cache_type) is not None:
+            value = self._shared_store.get(cache_name, key)
+            self._stats["hits" if value is not None else "misses"] += 1
+            return value
 
         if cache_name not in self._caches:
             self._stats["misses"] += 1
@@ -139,6 +165,8 @@ class GlobalCacheManager:
     def delete(self, cache_type: CacheType, key: str, namespace: str = "") -> bool:
         """删除缓存条目"""
         cache_name = self._get_cache_name(cache_type, namespace)
+        if self._shared_config(cache_type) is not None:
+            return self._shared_store.delete(cache_name, key)
 
         if cache_name not in self._caches:
             return False
@@ -154,6 +182,9 @@ class GlobalCacheManager:
     def clear(self, cache_type: CacheType, namespace: str = "") -> None:
         """清空指定缓存"""
         cache_name = self._get_cache_name(cache_type, namespace)
+        if self._shared_config(cache_type) is not None:
+            self._shared_store.clear(cache_name)
+            return
 
         if cache_name not in self._caches:
             return
@@ -166,6 +197,8 @@ class GlobalCacheManager:
     ) -> int:
         """按模式失效缓存条目"""
         cache_name = self._get_cache_name(cache_type, namespace)
+        if self._shared_config(cache_type) is not None:
+            return self._shared_store.delete_matching(cache_name, pattern)
 
         if cache_name not in self._caches:
             return 0
@@ -1,64 +1,217 @@
+import time
+import json
+import asyncio
+import hashlib
+import threading
 import httpx
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from config.logger import setup_logging
 
 TAG = __name__
 
+# 单个上下文源的请求超时（秒）
+DEFAULT_TIMEOUT = 3
+# 缓存有效期（秒），过期后仍可在 stale_ttl 内先返回旧数据，同时在后台刷新
+DEFAULT_TTL = 60
+DEFAULT_STALE_TTL = 600
+MAX_CACHE_ENTRIES = 4096
+
+# 进程级缓存：(url, 请求头哈希, device_id) -> (格式化后的行, 获取时间)
+_cache: Dict[Tuple[str, str, str], Tuple[List[str], float]] = {}
+_refreshing = set()
+# 最近请求失败的源 -> 失败时间，ttl 内不再同步等待，改为后台重试
+_failed: Dict[Tuple[str, str, str], float] = {}
+_cache_lock = threading.Lock()
+# 按事件循环复用的异步HTTP客户端
+_clients: Dict[int, httpx.AsyncClient] = {}
+
+
+def _get_client() -> httpx.AsyncClient:
+    loop_id = id(asyncio.get_running_loop())
+    client = _clients.get(loop_id)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient()
+        _clients[loop_id] = client
+    return client
+
+
 class ContextDataProvider:
     """数据上下文填充，负责从配置的API获取数据"""
-    
+
     def __init__(self, config: Dict[str, Any], logger=None):
         self.config = config
         self.logger = logger or setup_logging()
         self.context_data = ""
 
-    def fetch_all(self, device_id: str) -> str:
-        """获取所有配置的上下文数据"""
-        context_providers = self.config.get("context_providers", [])
-        if not context_providers:
-            return ""
-
-        formatted_lines = []
-        for provider in context_providers:
+    def _sources(self, device_id: str) -> List[Dict[str, Any]]:
+        """解析配置的上下文源"""
+        sources = []
+        for provider in self.config.get("context_providers", []) or []:
             url = provider.get("url")
-            headers = provider.get("headers", {})
-
             if not url:
                 continue
+            headers = provider.get("headers", {})
+            headers = headers.copy() if isinstance(headers, dict) else {}
+            # 将 device_id 添加到请求头
+            headers["device-id"] = device_id
+            headers_hash = hashlib.sha1(
+                json.dumps(headers, sort_keys=True, default=str).encode("utf-8")
+            ).hexdigest()
+            sources.append(
+                {
+                    "url": url,
+                    "headers": headers,
+                    "key": (url, headers_hash, device_id),
+                    "timeout": float(provider.get("timeout", DEFAULT_TIMEOUT)),
+                    "ttl": float(provider.get("ttl", DEFAULT_TTL)),
+                    "stale_ttl": float(provider.get("stale_ttl", DEFAULT_STALE_TTL)),
+                }
+            )
+        return sources
 
-            try:
-                headers = headers.copy() if isinstance(headers, dict) else {}
-                # 将 device_id 添加到请求头
-                headers["device-id"] = device_id
-                
-                # 发送请求
-                response = httpx.get(url, headers=headers, timeout=3)
-                
-                if response.status_code == 200:
-                    result = response.json()
-                    if isinstance(result, dict):
-                        if result.get("code") == 0:
-                            data = result.get("data")
-                            # 格式化数据
-                            if isinstance(data, dict):
-                                for k, v in data.items():
-                                    formatted_lines.append(f"- **{k}：** {v}")
-                            elif isinstance(data, list):
-                                for item in data:
-                                    formatted_lines.append(f"- {item}")
-                            else:
-                                formatted_lines.append(f"- {data}")
-                        else:
-                            self.logger.bind(tag=TAG).warning(f"API {url} 返回错误码: {result.get('msg')}")
-                    else:
-                        self.logger.bind(tag=TAG).warning(f"API {url} 返回的不是JSON字典")
-                else:
-                    self.logger.bind(tag=TAG).warning(f"API {url} 请求失败: {response.status_code}")
-            except Exception as e:
-                self.logger.bind(tag=TAG).error(f"获取上下文数据 {url} 失败: {e}")
-        
+    def fetch_all(self, device_id: str, loop: asyncio.AbstractEventLoop = None) -> str:
+        """
+        获取所有配置的上下文数据（在工作线程中调用）
+
+        未过期的缓存直接使用；过期但仍在 stale_ttl 内的先返回旧数据并在后台刷新；
+        没有缓存的源并发请求，整体等待时间不超过最慢一个源的超时。
+        传入 loop 时请求在该事件循环上执行并复用连接，否则临时创建事件循环。
+        """
+        sources = self._sources(device_id)
+        if not sources:
+            return ""
+
+        results: Dict[int, List[str]] = {}
+        missing, stale = [], []
+        now = time.monotonic()
+        with _cache_lock:
+            for index, source in enumerate(sources):
+                entry = _cache.get(source["key"])
+                if entry is None or now - entry[1] > source["ttl"] + source["stale_ttl"]:
+                    failed_at = _failed.get(source["key"])
+                    if failed_at is None or now - failed_at > source["ttl"]:
+                        missing.append(index)
+                    elif source["key"] not in _refreshing:
+                        _refreshing.add(source["key"])
+                        stale.append(index)
+                    continue
+                results[index] = entry[0]
+                if now - entry[1] > source["ttl"] and source["key"] not in _refreshing:
+                    _refreshing.add(source["key"])
+                    stale.append(index)
+
+        if loop is not None and loop.is_running():
+            if stale:
+                # 后台刷新，不等待结果
+                asyncio.run_coroutine_threadsafe(
+                    self._fetch_many([sources[i] for i in stale]), loop
+                )
+            if missing:
+                future = asyncio.run_coroutine_threadsafe(
+                    self._fetch_many([sources[i] for i in missing]), loop
+                )
+                wait = max(sources[i]["timeout"] for i in missing) + 1
+                try:
+                    fetched = future.result(wait)
+                except Exception as e:
+                    future.cancel()
+                    self.logger.bind(tag=TAG).error(f"获取上下文数据超时: {e}")
+                    fetched = [None] * len(missing)
+                for index, lines in zip(missing, fetched):
+                    if lines is not None:
+                        results[index] = lines
+        elif missing or stale:
+            indexes = missing + stale
+            fetched = asyncio.run(self._fetch_detached([sources[i] for i in indexes]))
+            for index, lines in zip(indexes, fetched):
+                if lines is not None:
+                    results[index] = lines
+
+        formatted_lines = []
+        for index in sorted(results):
+            formatted_lines.extend(results[index])
         # 将所有格式化后的行拼接成一个字符串
         self.context_data = "\n".join(formatted_lines)
         if self.context_data:
             self.logger.bind(tag=TAG).debug(f"已注入动态上下文数据:\n{self.context_data}")
         return self.context_data
+
+    async def _fetch_detached(self, sources: List[Dict[str, Any]]) -> List[Optional[List[str]]]:
+        """在临时事件循环中请求，使用一次性的HTTP客户端"""
+        async with httpx.AsyncClient() as client:
+            return await self._fetch_many(sources, client)
+
+    async def _fetch_many(
+        self, sources: List[Dict[str, Any]], client: httpx.AsyncClient = None
+    ) -> List[Optional[List[str]]]:
+        """并发请求多个上下文源，失败的源返回 None"""
+        client = client or _get_client()
+        try:
+            return await asyncio.gather(
+                *(self._fetch_one(client, source) for source in sources)
+            )
+        finally:
+            with _cache_lock:
+                for source in sources:
+                    _refreshing.discard(source["key"])
+
+    async def _fetch_one(
+        self, client: httpx.AsyncClient, source: Dict[str, Any]
+    ) -> Optional[List[str]]:
+        lines = await self._request(client, source)
+        with _cache_lock:
+            if lines is None:
+                _failed.pop(source["key"], None)
+                _failed[source["key"]] = time.monotonic()
+                while len(_failed) > MAX_CACHE_ENTRIES:
+                    _failed.pop(next(iter(_failed)))
+                return None
+            _failed.pop(source["key"], None)
+            _cache.pop(source["key"], None)
+            _cache[source["key"]] = (lines, time.monotonic())
+            # 字典按写入顺序保存，超出上限时丢弃最早写入的条目
+            while len(_cache) > MAX_CACHE_ENTRIES:
+                _cache.pop(next(iter(_cache)))
+        return lines
+
+    async def _request(
+        self, client: httpx.AsyncClient, source: Dict[str, Any]
+    ) -> Optional[List[str]]:
+        """请求单个上下文源并格式化数据，失败返回 None"""
+        url = source["url"]
+        try:
+            response = await asyncio.wait_for(
+                client.get(
+                    url, headers=source["headers"], timeout=source["timeout"]
+                ),
+                timeout=source["timeout"],
+            )
+            if response.status_code != 200:
+                self.logger.bind(tag=TAG).warning(f"API {url} 请求失败: {response.status_code}")
+                return None
+            result = response.json()
+            if not isinstance(result, dict):
+                self.logger.bind(tag=TAG).warning(f"API {url} 返回的不是JSON字典")
+                return None
+            if result.get("code") != 0:
+                self.logger.bind(tag=TAG).warning(f"API {url} 返回错误码: {result.get('msg')}")
+                return None
+        except asyncio.TimeoutError:
+            self.logger.bind(tag=TAG).warning(f"获取上下文数据 {url} 超时")
+            return None
+        except Exception as e:
+            self.logger.bind(tag=TAG).error(f"获取上下文数据 {url} 失败: {e}")
+            return None
+
+        data = result.get("data")
+        # 格式化数据
+        lines = []
+        if isinstance(data, dict):
+            for k, v in data.items():
+                lines.append(f"- **{k}：** {v}")
+        elif isinstance(data, list):
+            for item in data:
+                lines.append(f"- {item}")
+        else:
+            lines.append(f"- {data}")
+        return lines
@@ -0,0 +1,151 @@
+"""
+TTS替换词匹配
+替换词表（"原词|替换词"）编译为 Aho–Corasick 自动机，按最左最长原则一次扫描完成替换，
+每句话的匹配耗时只与句子长度有关，与词表大小无关。
+编译结果按词表内容哈希缓存，使用相同词表的连接共用同一份。
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Optional
+
+# 进程内最多缓存的词表数（不同设备可能配置不同的词表）
+MAX_TABLES = 64
+
+
+class AhoCorasickReplacer:
+    """多模式串替换，语义与按长度降序拼接的正则 alternation 相同（最左最长、不重叠）"""
+
+    def __init__(self, mapping: Dict[str, str]):
+        # 空字符串不参与匹配
+        self.mapping = {k: v for k, v in mapping.items() if k}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        # 以该状态结尾的最长模式串长度，0表示没有
+        self._out: List[int] = [0]
+        for key in self.mapping:
+            self._insert(key)
+        self._build_fail_links()
+
+    def _insert(self, key: str):
+        state = 0
+        for char in key:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._depth.append(self._depth[state] + 1)
+                self._out.append(0)
+            state = next_state
+        self._out[state] = len(key)
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # 自身不是模式串结尾时，继承失败链上最长的模式串
+            if not self._out[state]:
+                self._out[state] = self._out[self._fail[state]]
+            for char, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                queue.append(child)
+
+    def replace(self, text: str) -> str:
+        if not self.mapping or not text:
+            return text
+        goto, fail, depth, out = self._goto, self._fail, self._depth, self._out
+        result = []
+        emitted = 0
+        position = 0
+        length = len(text)
+        while position < length:
+            state = 0
+            # 当前候选匹配 [best_start, best_end)
+            best_start = -1
+            best_end = -1
+            index = position
+            while index < length:
+                char = text[index]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(char, 0)
+                match_length = out[state]
+                if match_length:
+                    start = index + 1 - match_length
+                    if best_start < 0 or start < best_start or (
+                        start == best_start and index + 1 > best_end
+                    ):
+                        best_start, best_end = start, index + 1
+                # 之后的匹配起点都不早于 index + 1 - depth，候选匹配已确定
+                if best_start >= 0 and best_start < index + 1 - depth[state]:
+                    break
+                index += 1
+            if best_start < 0:
+                break
+            result.append(text[emitted:best_start])
+            result.append(self.mapping[text[best_start:best_end]])
+            emitted = position = best_end
+        if not result:
+            return text
+        result.append(text[emitted:])
+        return "".join(result)
+
+
+class CorrectWordsTable:
+    """一份替换词表的编译结果，只读，可在线程间共享"""
+
+    def __init__(self, correct_words: Dict[str, str]):
+        self.correct_words = correct_words
+        self.replacer = AhoCorasickReplacer(correct_words)
+        # 将TTS服务返回的替换后文本还原为原始文本（字幕显示）
+        self.reverse_replacer = AhoCorasickReplacer(
+            {v: k for k, v in correct_words.items()}
+        )
+        # 流式滑动窗口：按首字分组的替换词，长词在前
+        self.words_by_first_char: Dict[str, List[str]] = {}
+        for key in sorted(correct_words, key=len, reverse=True):
+            if key:
+                self.words_by_first_char.setdefault(key[0], []).append(key)
+
+
+def parse_correct_words(raw_words: Iterable[str]) -> Dict[str, str]:
+    """解析 "原词|替换词" 格式的配置"""
+    correct_words = {}
+    for item in raw_words or []:
+        parts = item.split("|", 1)
+        if len(parts) == 2:
+            correct_words[parts[0]] = parts[1]
+    return correct_words
+
+
+_tables: "OrderedDict[str, CorrectWordsTable]" = OrderedDict()
+_tables_lock = threading.Lock()
+
+
+def get_correct_words_table(raw_words: Iterable[str]) -> Optional[CorrectWordsTable]:
+    """获取替换词表的编译结果（按内容哈希缓存），词表为空时返回 None"""
+    raw_words = [str(item) for item in raw_words or []]
+    if not raw_words:
+        return None
+    digest = hashlib.sha1("\n".join(raw_words).encode("utf-8")).hexdigest()
+    with _tables_lock:
+        table = _tables.get(digest)
+        if table is not None:
+            _tables.move_to_end(digest)
+            return table
+    correct_words = parse_correct_words(raw_words)
+    if not correct_words:
+        return None
+    table = CorrectWordsTable(correct_words)
+    with _tables_lock:
+        table = _tables.setdefault(digest, table)
+        while len(_tables) > MAX_TABLES:
+            _tables.popitem(last=False)
+    return table
@@ -1,8 +1,38 @@
 import uuid
 import re
-from typing import List, Dict
+import json
+from typing import Callable, List, Dict, Optional
 from datetime import datetime
 
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+MEMORY_PATTERN = re.compile(r"<memory>.*?</memory>", flags=re.DOTALL)
+INTERRUPTED_TOOL_CONTENT = '{"status": "interrupted", "message": "动作已取消/被打断"}'
+# 每条消息的角色、分隔符等固定开销
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """本地估算token数：中日韩字符按1个token计，其余字符约4个计1个token"""
+    if not text:
+        return 0
+    cjk = 0
+    for char in text:
+        if "\u2e80" <= char <= "\u9fff" or "\uac00" <= char <= "\ud7af" or "\uff00" <= char <= "\uffef":
+            cjk += 1
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def get_token_estimator(name: str = None) -> Callable[[str], int]:
+    """按名称获取token估算函数，tiktoken 未安装时退回本地估算"""
+    if name and str(name).lower() == "tiktoken" and tiktoken is not None:
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text)) if text else 0
+    return estimate_tokens
+
 
 class Message:
     def __init__(
@@ -20,32 +50,134 @@ class Message:
         self.tool_calls = tool_calls
         self.tool_call_id = tool_call_id
         self.is_temporary = is_temporary  # 标记临时消息（如工具调用提醒）
+        # 序列化结果与token数缓存，消息写入后内容不再变化
+        self._payload = None
+        self._tokens = None
 
 
 class Dialogue:
-    def __init__(self):
-        self.dialogue: List[Message] = []
+    """
+    对话历史
+
+    完整历史保存在 dialogue 中（记忆、上报使用）；发给大模型的窗口增量维护：
+    每条消息的序列化结果与token数只计算一次，超过 max_tokens 时从最早的轮次整轮移出窗口，
+    工具调用与其结果总在同一轮内，移出时不会被拆开。max_tokens 为0时不限制。
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 0,
+        token_estimator: Optional[Callable[[str], int]] = None,
+    ):
+        self.max_tokens = max(0, int(max_tokens or 0))
+        self.token_estimator = token_estimator or estimate_tokens
         # 获取当前时间
         self.current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self._system_cache = None
+        self.dialogue = []
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "Dialogue":
+        """根据 dialogue_window 配置创建"""
+        window_config = (config or {}).get("dialogue_window", {}) or {}
+        return cls(
+            max_tokens=window_config.get("max_tokens", 0),
+            token_estimator=get_token_estimator(window_config.get("tokenizer")),
+        )
+
+    @property
+    def dialogue(self) -> List[Message]:
+        return self._messages
+
+    @dialogue.setter
+    def dialogue(self, messages: List[Message]):
+        """整体替换历史（如清理工具消息）时重建窗口"""
+        self._messages: List[Message] = []
+        self._fewshot: List[Message] = []
+        self._actual: List[Message] = []
+        # 尚未收到结果的 tool_call id，按出现顺序保存
+        self._fewshot_pending: Dict[str, None] = {}
+        self._actual_pending: Dict[str, None] = {}
+        self._window_start = 0
+        self._window_tokens = 0
+        for message in messages:
+            self.put(message)
 
     def put(self, message: Message):
-        self.dialogue.append(message)
+        self._messages.append(message)
+        if message.role == "system":
+            return
+        if message.is_temporary:
+            self._fewshot.append(message)
+            self._track_tool_calls(message, self._fewshot_pending)
+            return
+        self._actual.append(message)
+        self._track_tool_calls(message, self._actual_pending)
+        self._window_tokens += self.count_tokens(message)
+        self._trim()
 
-    def getMessages(self, m, dialogue):
-        if m.tool_calls is not None:
-            dialogue.append({"role": m.role, "tool_calls": m.tool_calls})
-        elif m.role == "tool":
-            dialogue.append(
-                {
+    @staticmethod
+    def _tool_call_ids(message: Message) -> List[str]:
+        ids = []
+        for tc in message.tool_calls or []:
+            tc_id = tc.get("id") if isinstance(tc, dict) else getattr(tc, "id", None)
+            if tc_id:
+                ids.append(tc_id)
+        return ids
+
+    def _track_tool_calls(self, message: Message, pending: Dict[str, None]):
+        if message.role == "assistant" and message.tool_calls:
+            for tc_id in self._tool_call_ids(message):
+                pending[tc_id] = None
+        elif message.role == "tool" and message.tool_call_id:
+            pending.pop(message.tool_call_id, None)
+
+    def _trim(self):
+        """窗口超出预算时按轮次（以用户消息开头）移出最早的消息，至少保留最近一轮"""
+        if not self.max_tokens:
+            return
+        while self._window_tokens > self.max_tokens:
+            end = self._window_start + 1
+            while end < len(self._actual) and self._actual[end].role != "user":
+                end += 1
+            if end >= len(self._actual):
+                break
+            for message in self._actual[self._window_start : end]:
+                self._window_tokens -= self.count_tokens(message)
+                # 被打断的工具调用随所在轮次一起移出，不再补齐结果
+                for tc_id in self._tool_call_ids(message):
+                    self._actual_pending.pop(tc_id, None)
+            self._window_start = end
+
+    def serialize(self, m: Message) -> Dict:
+        """消息转换为大模型接口格式（结果缓存在消息上）"""
+        if m._payload is None:
+            if m.tool_calls is not None:
+                m._payload = {"role": m.role, "tool_calls": m.tool_calls}
+            elif m.role == "tool":
+                m._payload = {
                     "role": m.role,
                     "tool_call_id": (
                         str(uuid.uuid4()) if m.tool_call_id is None else m.tool_call_id
                     ),
                     "content": m.content,
                 }
-            )
-        else:
-            dialogue.append({"role": m.role, "content": m.content})
+            else:
+                m._payload = {"role": m.role, "content": m.content}
+        return m._payload
+
+    def count_tokens(self, m: Message) -> int:
+        """消息的估算token数（结果缓存在消息上）"""
+        if m._tokens is None:
+            text = m.content or ""
+            if m.tool_calls is not None:
+                text += json.dumps(m.tool_calls, ensure_ascii=False, default=str)
+            m._tokens = self.token_estimator(text) + MESSAGE_TOKEN_OVERHEAD
+        return m._tokens
+
+    def getMessages(self, m, dialogue):
+        # 返回副本，调用方（如部分LLM提供者）会修改消息内容
+        dialogue.append(dict(self.serialize(m)))
 
     def get_llm_dialogue(self) -> List[Dict[str, str]]:
         # 直接调用get_llm_dialogue_with_memory，传入None作为memory_str
@@ -55,41 +187,46 @@ class Dialogue:
     def update_system_message(self, new_content: str):
         """更新或添加系统消息"""
         # 查找第一个系统消息
-        system_msg = next((msg for msg in self.dialogue if msg.role == "system"), None)
+        system_msg = next((msg for msg in self._messages if msg.role == "system"), None)
         if system_msg:
             system_msg.content = new_content
         else:
             self.put(Message(role="system", content=new_content))
 
-    def _ensure_tool_calls_complete(self, messages: List[Message]) -> List[Message]:
+    def get_window_stats(self) -> Dict:
+        """窗口内消息数与估算token数"""
+        return {
+            "messages": len(self._actual) - self._window_start,
+            "evicted": self._window_start,
+            "tokens": self._window_tokens,
+            "max_tokens": self.max_tokens,
+        }
+
+    def _build_system_prompt(self, content: str, memory_str: str = None) -> str:
+        """填充记忆，相同的系统提示与记忆复用上次的结果"""
+        key = (content, memory_str)
+        if self._system_cache is None or self._system_cache[0] != key:
+            prompt = content
+            if memory_str is not None:
+                prompt = MEMORY_PATTERN.sub(
+                    lambda _: f"<memory>\n{memory_str}\n</memory>", prompt
+                )
+            self._system_cache = (key, prompt)
+        return self._system_cache[1]
+
+    def _append_interrupted(self, pending: Dict[str, None], dialogue: List[Dict]):
         """
-        确保所有 tool_calls 都有对应的 tool 响应
+        补齐没有结果的 tool_calls
         修复被打断导致的悬空 tool_calls，防止大模型 API 报 400 错误
         """
-        pending_tool_calls = set()
-        result = []
-
-        for msg in messages:
-            result.append(msg)
-
-            if msg.role == "assistant" and msg.tool_calls:
-                for tc in msg.tool_calls:
-                    tc_id = tc.get("id") if isinstance(tc, dict) else getattr(tc, "id", None)
-                    if tc_id:
-                        pending_tool_calls.add(tc_id)
-
-            elif msg.role == "tool" and msg.tool_call_id:
-                pending_tool_calls.discard(msg.tool_call_id)
-
-        for missing_id in pending_tool_calls:
-            dummy_tool_msg = Message(
-                role="tool",
-                content='{"status": "interrupted", "message": "动作已取消/被打断"}',
-                tool_call_id=missing_id
+        for missing_id in pending:
+            dialogue.append(
+                {
+                    "role": "tool",
+                    "tool_call_id": missing_id,
+                    "content": INTERRUPTED_TOOL_CONTENT,
+                }
             )
-            result.append(dummy_tool_msg)
-
-        return result
 
     def get_llm_dialogue_with_memory(
             self, memory_str: str = None, voiceprint_config: dict = None,
@@ -100,26 +237,17 @@ class Dialogue:
 
         # 添加系统提示和记忆
         system_message = next(
-            (msg for msg in self.dialogue if msg.role == "system"), None
+            (msg for msg in self._messages if msg.role == "system"), None
         )
 
         if system_message:
-            full_prompt = system_message.content
+            full_prompt = self._build_system_prompt(system_message.content, memory_str)
 
             # 替换时间占位符
             full_prompt = full_prompt.replace(
                 "{{current_time}}", datetime.now().strftime("%H:%M")
             )
 
-            # 填充记忆
-            if memory_str is not None:
-                full_prompt = re.sub(
-                    r"<memory>.*?</memory>",
-                    f"<memory>\n{memory_str}\n</memory>",
-                    full_prompt,
-                    flags=re.DOTALL,
-                )
-
             # 追加说话人信息
             try:
                 current_speaker_name = (current_speaker or "").strip()
@@ -148,16 +276,13 @@ class Dialogue:
             dialogue.append({"role": "system", "content": full_prompt})
 
         # 第二段：few-shot 示例（会话内不变）
-        non_system_messages = [m for m in self.dialogue if m.role != "system"]
-        fewshot_messages = [m for m in non_system_messages if m.is_temporary]
-        complete_fewshot = self._ensure_tool_calls_complete(fewshot_messages)
-        for m in complete_fewshot:
+        for m in self._fewshot:
             self.getMessages(m, dialogue)
+        self._append_interrupted(self._fewshot_pending, dialogue)
 
-        # 第三段：实际对话历史（不含 few-shot）
-        actual_messages = [m for m in non_system_messages if not m.is_temporary]
-        complete_actual = self._ensure_tool_calls_complete(actual_messages)
-        for m in complete_actual:
+        # 第三段：实际对话历史（不含 few-shot），只包含窗口内的轮次
+        for m in self._actual[self._window_start :]:
             self.getMessages(m, dialogue)
+        self._append_interrupted(self._actual_pending, dialogue)
 
         return dialogue
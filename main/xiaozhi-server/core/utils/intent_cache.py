@@ -0,0 +1,229 @@
+"""
+意图识别结果缓存（两级）
+1. 规范化精确匹配：全角转半角、去除标点与空白、统一小写后作为键，
+   与设备无关且不带参数的意图（查询时间、上下文回答等）所有设备共享，其余按设备隔离；
+2. 语义近邻匹配：对共享意图的文本做本地字符n-gram哈希向量，余弦相似度超过阈值即复用，
+   文本中的数字必须完全一致。
+带参数的意图（调节音量、退出告别语等）参数取决于原话，“音量调到最小”与“音量调到最大”
+字面几乎相同，因此只在同一设备内精确匹配时复用，不进入共享层与语义层。
+统计命中率与节省的意图识别耗时。
+"""
+
+import re
+import json
+import time
+import threading
+import unicodedata
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.logger import setup_logging
+from core.utils.cache.manager import cache_manager, CacheType
+
+TAG = __name__
+logger = setup_logging()
+
+# 与设备无关、可在设备间共享的意图（仅在调用不带参数时共享）
+DEFAULT_SHARED_INTENTS = (
+    "result_for_context",
+    "get_time",
+)
+DEFAULT_SIMILARITY_THRESHOLD = 0.88
+DEFAULT_SEMANTIC_CAPACITY = 1024
+SEMANTIC_TTL = 600
+EMBEDDING_DIM = 512
+SHARED_SCOPE = "*"
+
+_PUNCTUATION_PATTERN = re.compile(r"[\W_]+")
+_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+def normalize_text(text: str) -> str:
+    """全角转半角、统一小写、去除标点与空白"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _PUNCTUATION_PATTERN.sub("", text)
+
+
+def embed_text(text: str) -> np.ndarray:
+    """字符 1~3-gram 哈希到固定维度并归一化，作为轻量的本地文本向量"""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for n, weight in ((1, 1.0), (2, 1.5), (3, 1.0)):
+        for i in range(len(text) - n + 1):
+            bucket = zlib.crc32(text[i : i + n].encode("utf-8")) % EMBEDDING_DIM
+            vector[bucket] += weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def intent_calls(intent: str) -> List[Dict]:
+    """解析意图JSON中的函数调用列表，解析失败返回空列表"""
+    try:
+        data = json.loads(intent)
+    except (json.JSONDecodeError, TypeError):
+        return []
+    if not isinstance(data, dict):
+        return []
+    calls = data.get("function_calls")
+    if not isinstance(calls, list):
+        calls = [data.get("function_call")]
+    return [call for call in calls if isinstance(call, dict)]
+
+
+class IntentCache:
+    """两级意图缓存，线程安全"""
+
+    def __init__(
+        self,
+        shared_intents=DEFAULT_SHARED_INTENTS,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        semantic_capacity: int = DEFAULT_SEMANTIC_CAPACITY,
+    ):
+        self.shared_intents = set(shared_intents)
+        self.similarity_threshold = float(similarity_threshold)
+        self.semantic_capacity = max(1, int(semantic_capacity))
+        self._lock = threading.Lock()
+        # 语义层：向量矩阵按行与条目一一对应
+        self._vectors = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        # (规范化文本, 数字序列, 意图, 过期时间, 识别耗时ms)
+        self._entries: List[Tuple[str, Tuple[str, ...], str, float, float]] = []
+        self._stats = {
+            "lookups": 0,
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "saved_ms": 0.0,
+        }
+
+    @staticmethod
+    def _exact_key(scope: str, normalized: str) -> str:
+        return f"{scope}:{normalized}"
+
+    def get(self, device_id: str, text: str) -> Optional[str]:
+        """查询缓存，先精确（共享、设备）后语义，未命中返回 None"""
+        normalized = normalize_text(text)
+        with self._lock:
+            self._stats["lookups"] += 1
+        if not normalized:
+            self._record_miss()
+            return None
+
+        for scope in (SHARED_SCOPE, device_id):
+            cached = cache_manager.get(
+                CacheType.INTENT, self._exact_key(scope, normalized)
+            )
+            if cached is not None:
+                intent, cost_ms = cached
+                self._record_hit("exact_hits", cost_ms)
+                return intent
+
+        hit = self._semantic_lookup(normalized)
+        if hit is not None:
+            intent, cost_ms, similarity = hit
+            self._record_hit("semantic_hits", cost_ms)
+            logger.bind(tag=TAG).debug(f"意图语义缓存命中: {text}, 相似度 {similarity:.3f}")
+            return intent
+
+        self._record_miss()
+        return None
+
+    def put(self, device_id: str, text: str, intent: str, cost_ms: float):
+        """写入缓存，cost_ms 为本次意图识别耗时，用于统计命中后节省的时间"""
+        normalized = normalize_text(text)
+        if not normalized:
+            return
+        calls = intent_calls(intent)
+        # 带参数的调用只在本设备精确复用
+        shared = bool(calls) and all(
+            call.get("name") in self.shared_intents and not call.get("arguments")
+            for call in calls
+        )
+        scope = SHARED_SCOPE if shared else device_id
+        cache_manager.set(
+            CacheType.INTENT, self._exact_key(scope, normalized), (intent, cost_ms)
+        )
+        if shared:
+            self._semantic_put(normalized, intent, cost_ms)
+
+    def _semantic_lookup(self, normalized: str) -> Optional[Tuple[str, float, float]]:
+        numbers = tuple(_NUMBER_PATTERN.findall(normalized))
+        query = embed_text(normalized)
+        now = time.time()
+        with self._lock:
+            if not self._entries:
+                return None
+            scores = self._vectors @ query
+            for index in np.argsort(scores)[::-1][:8]:
+                similarity = float(scores[index])
+                if similarity < self.similarity_threshold:
+                    break
+                _, entry_numbers, intent, expires_at, cost_ms = self._entries[index]
+                if expires_at > now and entry_numbers == numbers:
+                    return intent, cost_ms, similarity
+        return None
+
+    def _semantic_put(self, normalized: str, intent: str, cost_ms: float):
+        entry = (
+            normalized,
+            tuple(_NUMBER_PATTERN.findall(normalized)),
+            intent,
+            time.time() + SEMANTIC_TTL,
+            cost_ms,
+        )
+        vector = embed_text(normalized)
+        with self._lock:
+            for index, existing in enumerate(self._entries):
+                if existing[0] == normalized:
+                    self._entries[index] = entry
+                    return
+            if len(self._entries) >= self.semantic_capacity:
+                # 淘汰最早写入的条目
+                self._entries.pop(0)
+                self._vectors = self._vectors[1:]
+            self._entries.append(entry)
+            self._vectors = np.vstack([self._vectors, vector])
+
+    def _record_hit(self, kind: str, cost_ms: float):
+        with self._lock:
+            self._stats[kind] += 1
+            self._stats["saved_ms"] += cost_ms
+
+    def _record_miss(self):
+        with self._lock:
+            self._stats["misses"] += 1
+
+    def get_stats(self) -> Dict:
+        """命中率与累计节省的意图识别耗时"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["semantic_entries"] = len(self._entries)
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        stats["hit_rate"] = round(hits / stats["lookups"], 4) if stats["lookups"] else 0.0
+        stats["saved_ms"] = round(stats["saved_ms"], 1)
+        return stats
+
+
+_intent_cache = None
+_intent_cache_lock = threading.Lock()
+
+
+def get_intent_cache(config: Dict = None) -> IntentCache:
+    """获取进程级意图缓存（单例模式），首次创建时读取 intent_cache 配置"""
+    global _intent_cache
+    if _intent_cache is None:
+        with _intent_cache_lock:
+            if _intent_cache is None:
+                cache_config = (config or {}).get("intent_cache", {}) or {}
+                _intent_cache = IntentCache(
+                    shared_intents=cache_config.get(
+                        "shared_intents", DEFAULT_SHARED_INTENTS
+                    ),
+                    similarity_threshold=cache_config.get(
+                        "similarity_threshold", DEFAULT_SIMILARITY_THRESHOLD
+                    ),
+                    semantic_capacity=cache_config.get(
+                        "semantic_capacity", DEFAULT_SEMANTIC_CAPACITY
+                    ),
+                )
+    return _intent_cache
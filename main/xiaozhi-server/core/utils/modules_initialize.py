@@ -1,6 +1,7 @@
 from typing import Dict, Any
 from config.logger import setup_logging
 from core.utils import tts, llm, intent, memory, vad, asr
+from core.utils.provider_registry import get_provider_registry
 
 TAG = __name__
 logger = setup_logging()
@@ -15,22 +16,27 @@ def initialize_modules(
     init_tts=False,
     init_memory=False,
     init_intent=False,
+    leases=None,
 ) -> Dict[str, Any]:
     """
     初始化所有模块组件
 
     Args:
         config: 配置字典
+        leases: 租约列表，LLM、VAD、ASR、TTS 经提供者注册表获取，可共享的实例在连接间复用，
+                用完后交给 release_all 归还；记忆与意图模块带有连接级状态，始终新建
 
     Returns:
         Dict[str, Any]: 包含所有初始化后的模块的字典
     """
     modules = {}
+    # 首次调用时按配置创建注册表
+    get_provider_registry(config)
 
     # 初始化TTS模块
     if init_tts:
         select_tts_module = config["selected_module"]["TTS"]
-        modules["tts"] = initialize_tts(config)
+        modules["tts"] = initialize_tts(config, leases)
         logger.bind(tag=TAG).info(f"初始化组件: tts成功 {select_tts_module}")
 
     # 初始化LLM模块
@@ -41,10 +47,7 @@ def initialize_modules(
             if "type" not in config["LLM"][select_llm_module]
             else config["LLM"][select_llm_module]["type"]
         )
-        modules["llm"] = llm.create_instance(
-            llm_type,
-            config["LLM"][select_llm_module],
-        )
+        modules["llm"] = create_llm(config["LLM"][select_llm_module], llm_type, leases)
         logger.bind(tag=TAG).info(f"初始化组件: llm成功 {select_llm_module}")
 
     # 初始化Intent模块
@@ -84,46 +87,61 @@ def initialize_modules(
             if "type" not in config["VAD"][select_vad_module]
             else config["VAD"][select_vad_module]["type"]
         )
-        modules["vad"] = vad.create_instance(
+        vad_config = config["VAD"][select_vad_module]
+        modules["vad"] = get_provider_registry(config).acquire(
+            "vad",
             vad_type,
-            config["VAD"][select_vad_module],
+            vad_config,
+            lambda: vad.create_instance(vad_type, vad_config),
+            leases,
         )
         logger.bind(tag=TAG).info(f"初始化组件: vad成功 {select_vad_module}")
 
     # 初始化ASR模块
     if init_asr:
         select_asr_module = config["selected_module"]["ASR"]
-        modules["asr"] = initialize_asr(config)
+        modules["asr"] = initialize_asr(config, leases)
         logger.bind(tag=TAG).info(f"初始化组件: asr成功 {select_asr_module}")
     return modules
 
 
-def initialize_tts(config):
-    select_tts_module = config["selected_module"]["TTS"]
-    tts_type = (
-        select_tts_module
-        if "type" not in config["TTS"][select_tts_module]
-        else config["TTS"][select_tts_module]["type"]
+def create_llm(llm_config, llm_type, leases=None):
+    """按配置获取LLM实例，配置相同的LLM客户端在连接间共享"""
+    return get_provider_registry().acquire(
+        "llm",
+        llm_type,
+        llm_config,
+        lambda: llm.create_instance(llm_type, llm_config),
+        leases,
     )
-    new_tts = tts.create_instance(
+
+
+def initialize_tts(config, leases=None):
+    select_tts_module = config["selected_module"]["TTS"]
+    tts_config = config["TTS"][select_tts_module]
+    tts_type = select_tts_module if "type" not in tts_config else tts_config["type"]
+    delete_audio = str(config.get("delete_audio", True)).lower() in ("true", "1", "yes")
+    new_tts = get_provider_registry(config).acquire(
+        "tts",
         tts_type,
-        config["TTS"][select_tts_module],
-        str(config.get("delete_audio", True)).lower() in ("true", "1", "yes"),
+        dict(tts_config, delete_audio=delete_audio),
+        lambda: tts.create_instance(tts_type, tts_config, delete_audio),
+        leases,
     )
     return new_tts
 
 
-def initialize_asr(config):
+def initialize_asr(config, leases=None):
     select_asr_module = config["selected_module"]["ASR"]
-    asr_type = (
-        select_asr_module
-        if "type" not in config["ASR"][select_asr_module]
-        else config["ASR"][select_asr_module]["type"]
-    )
-    new_asr = asr.create_instance(
+    asr_config = config["ASR"][select_asr_module]
+    asr_type = select_asr_module if "type" not in asr_config else asr_config["type"]
+    delete_audio = str(config.get("delete_audio", True)).lower() in ("true", "1", "yes")
+    new_asr = get_provider_registry(config).acquire(
+        "asr",
         asr_type,
-        config["ASR"][select_asr_module],
-        str(config.get("delete_audio", True)).lower() in ("true", "1", "yes"),
+        dict(asr_config, delete_audio=delete_audio),
+        lambda: asr.create_instance(asr_type, asr_config, delete_audio),
+        leases,
     )
     logger.bind(tag=TAG).info("ASR模块初始化完成")
     return new_asr
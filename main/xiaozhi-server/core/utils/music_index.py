@@ -0,0 +1,357 @@
+"""
+本地音乐索引
+曲目元数据（时长、p3文件的Opus帧数）持久化到磁盘，按目录mtime增量刷新；
+歌名按字符n-gram和拼音建立倒排索引，查询只需比较与输入共享n-gram的少量候选。
+"""
+
+import os
+import re
+import json
+import struct
+import difflib
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from config.logger import setup_logging
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:
+    lazy_pinyin = None
+
+try:
+    import miniaudio
+except ImportError:
+    miniaudio = None
+
+TAG = __name__
+logger = setup_logging()
+
+INDEX_FILE = "data/.music_index.json"
+INDEX_VERSION = 1
+# 倒排召回后参与精确打分的候选数量
+RERANK_CANDIDATES = 50
+MATCH_THRESHOLD = 0.4
+
+_NORMALIZE_PATTERN = re.compile(r"[^\w]+")
+P3_FRAME_DURATION_MS = 60
+
+
+def _normalize(text: str) -> str:
+    return _NORMALIZE_PATTERN.sub("", text or "").lower()
+
+
+def _to_pinyin(text: str) -> Tuple[str, ...]:
+    """转为拼音音节序列，未安装 pypinyin 时返回空"""
+    if lazy_pinyin is None:
+        return ()
+    return tuple(lazy_pinyin(text))
+
+
+def _ngrams(text: str) -> Set[str]:
+    """
+    相邻二元组；单字歌名以单字本身作为索引项
+    不收录单字：常见字的倒排列表随曲库线性增长，召回计数会退化为遍历曲库
+    """
+    if len(text) == 1:
+        return {text}
+    return {text[i : i + 2] for i in range(len(text) - 1)}
+
+
+def _pinyin_ngrams(pinyin: Tuple[str, ...]) -> Set[str]:
+    """拼音音节的二元组，容忍同音字的ASR识别误差；单音节歌名以音节本身作为索引项"""
+    if len(pinyin) == 1:
+        return {"py:" + pinyin[0]}
+    return {
+        "py:" + pinyin[i] + " " + pinyin[i + 1] for i in range(len(pinyin) - 1)
+    }
+
+
+def _probe_track(path: str) -> Dict:
+    """读取曲目时长等元数据，失败时返回空值"""
+    meta = {"duration_ms": None, "opus_frames": None}
+    try:
+        if path.lower().endswith(".p3"):
+            # p3文件本身就是预编码的Opus帧序列，只需遍历帧头统计帧数
+            frames = 0
+            with open(path, "rb") as f:
+                while True:
+                    header = f.read(4)
+                    if len(header) < 4:
+                        break
+                    _, _, data_len = struct.unpack(">BBH", header)
+                    f.seek(data_len, os.SEEK_CUR)
+                    frames += 1
+            meta["opus_frames"] = frames
+            meta["duration_ms"] = frames * P3_FRAME_DURATION_MS
+        elif miniaudio is not None:
+            info = miniaudio.get_file_info(path)
+            meta["duration_ms"] = int(info.duration * 1000)
+    except Exception as e:
+        logger.bind(tag=TAG).debug(f"读取音乐元数据失败: {path}, {e}")
+    return meta
+
+
+class _IndexState:
+    """一份完整的索引快照，发布后不再修改；刷新时复制出新快照，构建完成后整体替换"""
+
+    __slots__ = ("tracks", "dirs", "postings", "track_keys", "files")
+
+    def __init__(self):
+        # 相对路径 -> {"duration_ms", "opus_frames"}
+        self.tracks: Dict[str, Dict] = {}
+        # 相对目录 -> (mtime_ns, 曲目相对路径列表, 子目录相对路径列表)
+        self.dirs: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        self.postings: Dict[str, Set[str]] = {}
+        self.track_keys: Dict[str, Tuple[str, Tuple[str, ...]]] = {}
+        self.files: Tuple[str, ...] = ()
+
+
+class _IndexBuilder:
+    """在旧快照的基础上增量构建新快照，只复制被修改的倒排列表"""
+
+    def __init__(self, base: _IndexState):
+        self.state = _IndexState()
+        self.state.tracks = dict(base.tracks)
+        self.state.dirs = dict(base.dirs)
+        self.state.postings = dict(base.postings)
+        self.state.track_keys = dict(base.track_keys)
+        self._copied: Set[str] = set()
+
+    def _posting(self, gram: str) -> Set[str]:
+        if gram not in self._copied:
+            self._copied.add(gram)
+            self.state.postings[gram] = set(self.state.postings.get(gram, ()))
+        return self.state.postings[gram]
+
+    def add_track(self, rel_path: str, meta: Dict):
+        name = _normalize(os.path.splitext(os.path.basename(rel_path))[0])
+        pinyin = _to_pinyin(name)
+        self.state.tracks[rel_path] = meta
+        self.state.track_keys[rel_path] = (name, pinyin)
+        for gram in _ngrams(name) | _pinyin_ngrams(pinyin):
+            self._posting(gram).add(rel_path)
+
+    def remove_track(self, rel_path: str):
+        self.state.tracks.pop(rel_path, None)
+        name, pinyin = self.state.track_keys.pop(rel_path, ("", ()))
+        for gram in _ngrams(name) | _pinyin_ngrams(pinyin):
+            if gram not in self.state.postings:
+                continue
+            posting = self._posting(gram)
+            posting.discard(rel_path)
+            if not posting:
+                del self.state.postings[gram]
+
+    def build(self) -> _IndexState:
+        self.state.files = tuple(sorted(self.state.tracks))
+        return self.state
+
+
+class MusicIndex:
+    """
+    音乐目录索引，线程安全
+    查询读取当前快照，不加锁；刷新在锁外构建新快照后整体替换，扫描目录期间查询不受影响
+    """
+
+    def __init__(self, music_dir: str, music_ext: Iterable[str], index_file: str = INDEX_FILE):
+        self.music_dir = os.path.abspath(music_dir)
+        self.music_ext = tuple(ext.lower() for ext in music_ext)
+        self.index_file = index_file
+        # 只串行化刷新与重新加载，查询不使用该锁
+        self._refresh_lock = threading.Lock()
+        self._state = _IndexState()
+        # 已加载/写入的索引文件mtime，多进程部署时据此发现其他进程写入的新索引
+        self._index_mtime = None
+        self._load()
+
+    @property
+    def tracks(self) -> Dict[str, Dict]:
+        return self._state.tracks
+
+    # ---------- 持久化 ----------
+
+    def _load(self):
+        """读取索引文件并替换当前快照，调用方已持有 _refresh_lock 或处于构造阶段"""
+        if not os.path.exists(self.index_file):
+            return
+        try:
+            self._index_mtime = os.stat(self.index_file).st_mtime_ns
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if (
+                data.get("version") != INDEX_VERSION
+                or data.get("music_dir") != self.music_dir
+                or tuple(data.get("music_ext", ())) != self.music_ext
+            ):
+                return
+            builder = _IndexBuilder(_IndexState())
+            builder.state.dirs = {
+                rel_dir: (mtime, files, subdirs)
+                for rel_dir, (mtime, files, subdirs) in data["dirs"].items()
+            }
+            for rel_path, meta in data["tracks"].items():
+                builder.add_track(rel_path, meta)
+            self._state = builder.build()
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"加载音乐索引失败，将重新扫描: {e}")
+
+    def _save(self, state: _IndexState):
+        try:
+            os.makedirs(os.path.dirname(self.index_file) or ".", exist_ok=True)
+            tmp_file = f"{self.index_file}.{os.getpid()}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": INDEX_VERSION,
+                        "music_dir": self.music_dir,
+                        "music_ext": list(self.music_ext),
+                        "dirs": state.dirs,
+                        "tracks": state.tracks,
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_file, self.index_file)
+            self._index_mtime = os.stat(self.index_file).st_mtime_ns
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"保存音乐索引失败: {e}")
+
+    # ---------- 增量刷新 ----------
+
+    def refresh(self) -> bool:
+        """
+        增量刷新：只重新列举mtime发生变化的目录（文件新增/删除/重命名都会改变所在目录的mtime）
+
+        Returns:
+            bool: 曲目列表是否有变化
+        """
+        if not os.path.isdir(self.music_dir):
+            return False
+        with self._refresh_lock:
+            base = self._state
+            builder = _IndexBuilder(base)
+            dirs = builder.state.dirs
+            changed = False
+            seen_dirs = set()
+            stack = [""]
+            while stack:
+                rel_dir = stack.pop()
+                abs_dir = os.path.join(self.music_dir, rel_dir)
+                try:
+                    mtime = os.stat(abs_dir).st_mtime_ns
+                except OSError:
+                    continue
+                seen_dirs.add(rel_dir)
+
+                # 目录未变化时只需一次stat，沿用缓存的子目录列表继续向下检查
+                cached = base.dirs.get(rel_dir)
+                if cached is not None and cached[0] == mtime:
+                    stack.extend(cached[2])
+                    continue
+
+                try:
+                    entries = list(os.scandir(abs_dir))
+                except OSError:
+                    continue
+                subdirs = [
+                    os.path.join(rel_dir, e.name) for e in entries if e.is_dir()
+                ]
+                stack.extend(subdirs)
+
+                files = []
+                for entry in entries:
+                    if entry.is_file() and os.path.splitext(entry.name)[1].lower() in self.music_ext:
+                        files.append(os.path.join(rel_dir, entry.name))
+                old_files = set(cached[1]) if cached else set()
+                for rel_path in old_files - set(files):
+                    builder.remove_track(rel_path)
+                for rel_path in set(files) - old_files:
+                    builder.add_track(
+                        rel_path, _probe_track(os.path.join(self.music_dir, rel_path))
+                    )
+                dirs[rel_dir] = (mtime, files, subdirs)
+                changed = True
+
+            # 已被删除的目录
+            for rel_dir in set(dirs) - seen_dirs:
+                for rel_path in dirs.pop(rel_dir)[1]:
+                    builder.remove_track(rel_path)
+                changed = True
+
+            if changed:
+                state = builder.build()
+                # 整体替换引用，进行中的查询继续使用旧快照
+                self._state = state
+                self._save(state)
+                logger.bind(tag=TAG).info(f"音乐索引已更新，共 {len(state.files)} 首")
+            return changed
+
+    def reload_if_changed(self) -> bool:
+        """
+        索引文件被其他进程更新时重新加载（多进程部署时每个刷新周期只由一个工作进程扫描目录）
+
+        Returns:
+            bool: 是否重新加载
+        """
+        try:
+            mtime = os.stat(self.index_file).st_mtime_ns
+        except OSError:
+            return False
+        with self._refresh_lock:
+            if mtime == self._index_mtime:
+                return False
+            self._load()
+            return True
+
+    # ---------- 查询 ----------
+
+    @property
+    def files(self) -> Tuple[str, ...]:
+        return self._state.files
+
+    @property
+    def names(self) -> List[str]:
+        return [os.path.splitext(rel_path)[0] for rel_path in self._state.files]
+
+    @staticmethod
+    def _score(
+        state: _IndexState, query: str, query_pinyin: Tuple[str, ...], rel_path: str
+    ) -> float:
+        name, pinyin = state.track_keys[rel_path]
+        score = difflib.SequenceMatcher(None, query, name).ratio()
+        if query_pinyin and pinyin:
+            score = max(
+                score, difflib.SequenceMatcher(None, query_pinyin, pinyin).ratio()
+            )
+        return score
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """按相似度返回最多 top_k 个 (相对路径, 分数)；曲库较大时应在线程中调用"""
+        query = _normalize(query)
+        if not query:
+            return []
+        query_pinyin = _to_pinyin(query)
+        state = self._state
+        hits = Counter()
+        for gram in _ngrams(query) | _pinyin_ngrams(query_pinyin):
+            for rel_path in state.postings.get(gram, ()):
+                hits[rel_path] += 1
+        candidates = [rel_path for rel_path, _ in hits.most_common(RERANK_CANDIDATES)]
+        scored = [
+            (rel_path, self._score(state, query, query_pinyin, rel_path))
+            for rel_path in candidates
+        ]
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:top_k]
+
+    def best_match(self, query: str) -> Optional[str]:
+        """查找最匹配的歌曲，相似度低于阈值时返回 None"""
+        results = self.search(query, top_k=1)
+        if results and results[0][1] > MATCH_THRESHOLD:
+            return results[0][0]
+        return None
+
+    def get_meta(self, rel_path: str) -> Optional[Dict]:
+        return self._state.tracks.get(rel_path)
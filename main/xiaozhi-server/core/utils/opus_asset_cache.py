@@ -0,0 +1,205 @@
+"""
+预编码音频资源缓存
+提示音、唤醒词回复、绑定码数字等固定音频在启动时按服务的每个采样率预先编码为Opus帧序列，
+以内容哈希命名写入磁盘，重启后直接读取；文件mtime变化时自动重新编码。
+内存中按最近使用保留有限条目，磁盘上长期未使用的旧缓存文件在预编码后清理。
+"""
+
+import os
+import time
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+ASSET_DIR = "config/assets"
+CACHE_DIR = "data/.opus_cache"
+ASSET_EXTENSIONS = (".wav", ".mp3")
+DEFAULT_SAMPLE_RATES = (16000, 24000)
+# 内存中保留的帧序列条目上限
+DEFAULT_MAX_ENTRIES = 256
+# 磁盘缓存文件超过该时间未被使用且不属于当前条目时删除（秒）
+PRUNE_AGE = 7 * 86400
+
+# 缓存文件格式: MAGIC | 版本 | 帧数 | 每帧长度(uint32 * 帧数) | 帧数据
+_MAGIC = b"XZOP"
+_VERSION = 1
+_HEADER = struct.Struct("<4sHI")
+# 编码参数变化时修改此值，使旧缓存全部失效
+_ENCODE_PARAMS = "frame=60ms;mono;s16le"
+
+
+def read_frames_blob(blob_path: str) -> Optional[List[bytes]]:
+    """读取帧序列缓存文件，文件不存在或格式不符时返回 None"""
+    if not os.path.exists(blob_path):
+        return None
+    try:
+        # 文件只有几十KB且帧要以 bytes 交给发送逻辑，内存映射后仍需逐帧拷贝，因此直接整体读取
+        with open(blob_path, "rb") as f:
+            data = f.read()
+        magic, version, count = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            return None
+        offset = _HEADER.size
+        lengths = struct.unpack_from(f"<{count}I", data, offset)
+        offset += 4 * count
+        frames = []
+        for length in lengths:
+            frames.append(data[offset : offset + length])
+            offset += length
+        return frames
+    except Exception as e:
+        logger.bind(tag=TAG).warning(f"读取音频缓存失败: {blob_path}, {e}")
+        return None
+
+
+def write_frames_blob(blob_path: str, frames: List[bytes]) -> bool:
+    """原子写入帧序列缓存文件"""
+    try:
+        os.makedirs(os.path.dirname(blob_path) or ".", exist_ok=True)
+        tmp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(frames)))
+            f.write(struct.pack(f"<{len(frames)}I", *(len(frame) for frame in frames)))
+            for frame in frames:
+                f.write(frame)
+        os.replace(tmp_path, blob_path)
+        return True
+    except Exception as e:
+        logger.bind(tag=TAG).warning(f"写入音频缓存失败: {blob_path}, {e}")
+        return False
+
+
+class OpusAssetCache:
+    """按 (文件路径, 采样率, 是否Opus) 缓存预编码的帧序列"""
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.max_entries = max(1, int(max_entries))
+        # (绝对路径, 采样率, is_opus) -> (mtime_ns, size, 缓存文件路径, frames)，按最近使用排序
+        self._entries: "OrderedDict[Tuple[str, int, bool], Tuple[int, int, str, List[bytes]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_cached(self, file_path: str, is_opus: bool, sample_rate: int) -> Optional[List[bytes]]:
+        """仅查询内存，文件未变化时直接返回帧序列，否则返回 None（可在事件循环内调用）"""
+        key = (os.path.abspath(file_path), int(sample_rate), bool(is_opus))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+            return None
+        return entry[3]
+
+    def get_frames(self, file_path: str, is_opus: bool, sample_rate: int) -> List[bytes]:
+        """获取帧序列，必要时从磁盘缓存加载或重新编码（阻塞调用）"""
+        frames = self.get_cached(file_path, is_opus, sample_rate)
+        if frames is not None:
+            return frames
+
+        stat = os.stat(file_path)
+        with open(file_path, "rb") as f:
+            content = f.read()
+        digest = hashlib.sha1(content)
+        digest.update(f"{_ENCODE_PARAMS};{sample_rate};{int(is_opus)}".encode())
+        blob_path = os.path.join(
+            self.cache_dir,
+            f"{digest.hexdigest()}_{sample_rate}_{'opus' if is_opus else 'pcm'}.bin",
+        )
+
+        frames = read_frames_blob(blob_path)
+        if frames is None:
+            from core.utils.util import encode_audio_file
+
+            frames = encode_audio_file(file_path, is_opus, sample_rate)
+            write_frames_blob(blob_path, frames)
+        else:
+            # 更新mtime，仍在使用的缓存文件不会被清理
+            try:
+                os.utime(blob_path)
+            except OSError:
+                pass
+
+        key = (os.path.abspath(file_path), int(sample_rate), bool(is_opus))
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            self._entries[key] = (stat.st_mtime_ns, stat.st_size, blob_path, frames)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            in_use = {entry[2] for entry in self._entries.values()}
+        # 源文件被覆盖（如唤醒词回复）后，旧内容对应的缓存文件不再需要
+        if previous is not None and previous[2] not in in_use:
+            self._remove_blob(previous[2])
+        return frames
+
+    @staticmethod
+    def _remove_blob(blob_path: str):
+        try:
+            os.remove(blob_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.bind(tag=TAG).warning(f"删除音频缓存失败: {blob_path}, {e}")
+
+    def prune(self, max_age: float = PRUNE_AGE) -> int:
+        """删除不属于当前条目且长期未使用的缓存文件，返回删除数量"""
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        with self._lock:
+            in_use = {os.path.abspath(entry[2]) for entry in self._entries.values()}
+        deadline = time.time() - max_age
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not name.endswith(".bin") or os.path.abspath(path) in in_use:
+                continue
+            try:
+                if os.path.getmtime(path) >= deadline:
+                    continue
+            except OSError:
+                continue
+            self._remove_blob(path)
+            removed += 1
+        return removed
+
+    def build(self, asset_dir: str = ASSET_DIR, sample_rates: Iterable[int] = DEFAULT_SAMPLE_RATES):
+        """遍历资源目录，为每个音频文件在每个采样率下预编码"""
+        count = 0
+        for root, _, files in os.walk(asset_dir):
+            for name in files:
+                if not name.lower().endswith(ASSET_EXTENSIONS):
+                    continue
+                path = os.path.join(root, name)
+                for sample_rate in sample_rates:
+                    try:
+                        self.get_frames(path, True, sample_rate)
+                        count += 1
+                    except Exception as e:
+                        logger.bind(tag=TAG).warning(f"预编码音频失败: {path}, {e}")
+        removed = self.prune()
+        logger.bind(tag=TAG).info(f"音频资源预编码完成，共 {count} 项，清理旧缓存 {removed} 个")
+
+
+_opus_asset_cache = None
+_opus_asset_cache_lock = threading.Lock()
+
+
+def get_opus_asset_cache() -> OpusAssetCache:
+    """获取预编码音频资源缓存（单例模式）"""
+    global _opus_asset_cache
+    if _opus_asset_cache is None:
+        with _opus_asset_cache_lock:
+            if _opus_asset_cache is None:
+                _opus_asset_cache = OpusAssetCache()
+    return _opus_asset_cache
@@ -1,10 +1,14 @@
 import datetime
-from typing import Dict, Tuple
+from core.utils.shared_store import get_shared_store
 
-# 全局字典，用于存储每个设备的每日输出字数
-_device_daily_output: Dict[Tuple[str, datetime.date], int] = {}
-# 记录最后一次检查的日期
-_last_check_date: datetime.date = None
+# 每个设备每日输出字数保存在共享存储中，多进程部署时所有工作进程共用同一份计数
+_NAMESPACE = "device_output"
+# 计数按日期分键，过期后自动清理，不再需要跨日时手动清空
+_COUNTER_TTL = 2 * 86400
+
+
+def _counter_key(device_id: str) -> str:
+    return f"{device_id}:{datetime.datetime.now().date().isoformat()}"
 
 
 def reset_device_output():
@@ -12,31 +16,23 @@ def reset_device_output():
     重置所有设备的每日输出字数
     每天0点调用此函数
     """
-    _device_daily_output.clear()
+    get_shared_store().clear(_NAMESPACE)
 
 
 def get_device_output(device_id: str) -> int:
     """
     获取设备当日的输出字数
     """
-    current_date = datetime.datetime.now().date()
-    return _device_daily_output.get((device_id, current_date), 0)
+    return int(get_shared_store().get(_NAMESPACE, _counter_key(device_id)) or 0)
 
 
 def add_device_output(device_id: str, char_count: int):
     """
     增加设备的输出字数
     """
-    current_date = datetime.datetime.now().date()
-    global _last_check_date
-
-    # 如果是第一次调用或者日期发生变化，清空计数器
-    if _last_check_date is None or _last_check_date != current_date:
-        _device_daily_output.clear()
-        _last_check_date = current_date
-
-    current_count = _device_daily_output.get((device_id, current_date), 0)
-    _device_daily_output[(device_id, current_date)] = current_count + char_count
+    get_shared_store().incr(
+        _NAMESPACE, _counter_key(device_id), char_count, ttl=_COUNTER_TTL
+    )
 
 
 def check_device_output_limit(device_id: str, max_output_size: int) -> bool:
@@ -0,0 +1,139 @@
+"""
+异步流水线模式
+开启后，ASR音频接收、TTS文本分段、音频播放、聊天记录上报都以asyncio任务的形式运行，
+任务之间通过队列连接；阻塞的提供者调用统一提交到进程级的有界线程池，
+每个连接不再单独创建线程。
+"""
+
+import queue
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+_shared_executor = None
+_shared_executor_lock = threading.Lock()
+
+
+def is_pipeline_enabled(config: Dict[str, Any]) -> bool:
+    """是否开启了异步流水线模式"""
+    pipeline_config = (config or {}).get("async_pipeline", {}) or {}
+    return str(pipeline_config.get("enabled", False)).lower() in ("true", "1", "yes")
+
+
+def get_shared_executor(config: Dict[str, Any] = None) -> ThreadPoolExecutor:
+    """
+    获取进程级共享线程池（单例模式）
+
+    Args:
+        config: 配置字典，首次创建时读取 async_pipeline.executor_workers
+
+    Returns:
+        ThreadPoolExecutor实例
+    """
+    global _shared_executor
+    if _shared_executor is None:
+        with _shared_executor_lock:
+            if _shared_executor is None:
+                pipeline_config = (config or {}).get("async_pipeline", {}) or {}
+                max_workers = int(pipeline_config.get("executor_workers", 32))
+                _shared_executor = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="pipeline-worker"
+                )
+                logger.bind(tag=TAG).info(
+                    f"异步流水线共享线程池已创建，最大线程数: {max_workers}"
+                )
+    return _shared_executor
+
+
+async def run_blocking(func: Callable, *args) -> Any:
+    """在共享线程池中执行阻塞调用"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_shared_executor(), func, *args)
+
+
+class LoopBridgeQueue:
+    """
+    线程安全写入、事件循环内异步读取的队列
+
+    写入接口与 queue.Queue 保持一致（put/put_nowait/get_nowait/qsize），
+    已有代码无需修改即可从任意线程投递；消费方在事件循环内通过 async_get 读取。
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._queue = asyncio.Queue()
+
+    @classmethod
+    def from_queue(cls, old_queue, loop: asyncio.AbstractEventLoop):
+        """替换已有的 queue.Queue，并迁移其中尚未消费的数据"""
+        if isinstance(old_queue, cls):
+            return old_queue
+        bridge = cls(loop)
+        while True:
+            try:
+                bridge._queue.put_nowait(old_queue.get_nowait())
+            except queue.Empty:
+                break
+        return bridge
+
+    def put(self, item, block=True, timeout=None):
+        try:
+            in_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            in_loop = False
+        if in_loop:
+            self._queue.put_nowait(item)
+        else:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, item)
+
+    def put_nowait(self, item):
+        self.put(item)
+
+    def get_nowait(self):
+        try:
+            return self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            raise queue.Empty
+
+    async def async_get(self, timeout=None):
+        """异步读取，超时抛出 queue.Empty，便于消费任务定期检查停止事件"""
+        if timeout is None:
+            return await self._queue.get()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise queue.Empty
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def empty(self) -> bool:
+        return self._queue.empty()
+
+    def task_done(self):
+        try:
+            self._queue.task_done()
+        except ValueError:
+            pass
+
+
+async def cancel_tasks(tasks):
+    """取消并等待流水线任务退出（跳过当前任务自身，它会在检测到停止事件后自行退出）"""
+    current = asyncio.current_task()
+    tasks = [task for task in tasks if task is not None and task is not current]
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    for task in tasks:
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.bind(tag=TAG).error(f"流水线任务退出异常: {e}")
@@ -11,7 +11,7 @@ from typing import Dict, Any, TYPE_CHECKING
 if TYPE_CHECKING:
     from core.connection import ConnectionHandler
 from config.logger import setup_logging
-from jinja2 import Template
+from core.utils.prompt_template import get_compiled_prompt
 
 TAG = __name__
 
@@ -49,6 +49,18 @@ EMOJI_List = [
     "🙄",
 ]
 
+# 每次构建都会变化的模板变量，作为动态槽位填入预渲染的静态文本
+DYNAMIC_PROMPT_VARIABLES = (
+    "today_date",
+    "today_weekday",
+    "lunar_date",
+    "local_address",
+    "weather_info",
+    "dynamic_context",
+    "device_id",
+    "client_ip",
+)
+
 
 class PromptManager:
     """系统提示词管理器，负责管理和更新系统提示词"""
@@ -237,7 +249,9 @@ class PromptManager:
                     self.base_prompt_template
                     and "dynamic_context" in self.base_prompt_template
                 ):
-                    self.context_data = self.context_provider.fetch_all(conn.device_id)
+                    self.context_data = self.context_provider.fetch_all(
+                        conn.device_id, getattr(conn, "loop", None)
+                    )
                 else:
                     self.context_data = ""
 
@@ -283,9 +297,12 @@ class PromptManager:
             )
             self.logger.bind(tag=TAG).debug(f"获取到选择的语言: {language}")
 
-            # 替换模板变量
-            template = Template(self.base_prompt_template)
-            enhanced_prompt = template.render(
+            # 替换模板变量（模板只编译一次，静态部分渲染结果复用）
+            template = get_compiled_prompt(
+                self.base_prompt_template, DYNAMIC_PROMPT_VARIABLES
+            )
+            variables = dict(*args)
+            variables.update(
                 base_prompt=user_prompt,
                 current_time="{{current_time}}",
                 today_date=today_date,
@@ -298,9 +315,9 @@ class PromptManager:
                 client_ip=client_ip,
                 dynamic_context=self.context_data,
                 language=language,
-                *args,
-                **kwargs,
             )
+            variables.update(kwargs)
+            enhanced_prompt = template.render(variables)
             device_cache_key = f"device_prompt:{device_id}"
             self.cache_manager.set(
                 self.CacheType.DEVICE_PROMPT, device_cache_key, enhanced_prompt
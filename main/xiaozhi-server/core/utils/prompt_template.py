@@ -0,0 +1,97 @@
+"""
+系统提示词模板编译缓存
+模板按内容哈希只编译一次；渲染时先用占位符代替每次都会变化的变量（日期、位置、天气、动态上下文等），
+把其余部分渲染成静态文本缓存下来，之后每次构建只需把几个动态槽位拼接进去。
+只有在模板中以 {{ 变量 }} 形式直接输出的变量才作为动态槽位，用于条件判断、过滤器的变量仍参与完整渲染。
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List
+
+from jinja2 import Environment, Template, nodes
+
+MAX_TEMPLATES = 16
+# 每个模板缓存的静态渲染结果数（按角色提示词、语言等静态变量区分）
+MAX_STATIC_RENDERS = 128
+_SLOT_MARK = "\x00"
+
+
+def _direct_output_names(ast) -> Dict[str, bool]:
+    """变量名 -> 是否只以 {{ 变量 }} 形式直接输出"""
+    usage = {}
+    direct = set()
+    for output in ast.find_all(nodes.Output):
+        for child in output.nodes:
+            if isinstance(child, nodes.Name):
+                direct.add(id(child))
+    for name in ast.find_all(nodes.Name):
+        if name.ctx != "load":
+            usage[name.name] = False
+            continue
+        usage[name.name] = usage.get(name.name, True) and id(name) in direct
+    return usage
+
+
+class CompiledPrompt:
+    """编译后的提示词模板，线程安全"""
+
+    def __init__(self, source: str, dynamic_names: Iterable[str]):
+        self.template = Template(source)
+        usage = _direct_output_names(Environment().parse(source))
+        # 模板中没有用到的动态变量不需要槽位
+        self.slot_names = frozenset(
+            name for name in dynamic_names if usage.get(name) is True
+        )
+        self._static_parts: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def render(self, variables: Dict[str, Any]) -> str:
+        static = {k: v for k, v in variables.items() if k not in self.slot_names}
+        parts = self._get_static_parts(static)
+        # parts 为 [静态文本, 槽位名, 静态文本, 槽位名, ..., 静态文本]
+        result = []
+        for index, part in enumerate(parts):
+            result.append(str(variables.get(part, "")) if index % 2 else part)
+        return "".join(result)
+
+    def _get_static_parts(self, static: Dict[str, Any]) -> List[str]:
+        key = repr(sorted(static.items()))
+        with self._lock:
+            parts = self._static_parts.get(key)
+            if parts is not None:
+                self._static_parts.move_to_end(key)
+                return parts
+
+        placeholders = {
+            name: f"{_SLOT_MARK}{name}{_SLOT_MARK}" for name in self.slot_names
+        }
+        rendered = self.template.render(**static, **placeholders)
+        parts = rendered.split(_SLOT_MARK)
+        with self._lock:
+            self._static_parts[key] = parts
+            while len(self._static_parts) > MAX_STATIC_RENDERS:
+                self._static_parts.popitem(last=False)
+        return parts
+
+
+_templates: "OrderedDict[tuple, CompiledPrompt]" = OrderedDict()
+_templates_lock = threading.Lock()
+
+
+def get_compiled_prompt(source: str, dynamic_names: Iterable[str] = ()) -> CompiledPrompt:
+    """获取模板的编译结果，按模板内容哈希缓存"""
+    dynamic_names = tuple(sorted(dynamic_names))
+    key = (hashlib.sha1(source.encode("utf-8")).hexdigest(), dynamic_names)
+    with _templates_lock:
+        compiled = _templates.get(key)
+        if compiled is not None:
+            _templates.move_to_end(key)
+            return compiled
+    compiled = CompiledPrompt(source, dynamic_names)
+    with _templates_lock:
+        compiled = _templates.setdefault(key, compiled)
+        while len(_templates) > MAX_TEMPLATES:
+            _templates.popitem(last=False)
+    return compiled
@@ -0,0 +1,274 @@
+"""
+连接间共享的提供者实例
+
+大量设备使用同一个智能体配置时，每次连接都重新创建LLM客户端、VAD、本地ASR模型，
+建连耗时和每个连接的内存都随之增长。这里按 (模块类别, 类型, 模块配置内容的哈希) 缓存实例：
+- 实例声明 SHAREABLE = True 时才会被缓存共享，否则每次都新建（行为与原先一致）
+- 每个使用者持有一个租约（引用计数），连接关闭时归还
+- 没有租约的实例空闲超过 idle_ttl 后释放；配置更新后不再使用的实例在最后一个租约归还时释放
+- 释放时调用实例的 cleanup()（模型、解码线程、线程池等），在后台线程中执行，不阻塞调用方
+"""
+
+import json
+import time
+import asyncio
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_IDLE_TTL = 600
+# 空闲实例的清理间隔上限（秒）
+SWEEP_INTERVAL = 30
+
+
+def config_digest(provider_type: str, module_config: Dict) -> str:
+    """模块配置的规范化哈希：键排序后序列化，与字典的插入顺序无关"""
+    payload = json.dumps(
+        [provider_type, module_config],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _cleanup_instances(instances: List[Any]):
+    for instance in instances:
+        cleanup = getattr(instance, "cleanup", None)
+        if not callable(cleanup):
+            continue
+        try:
+            result = cleanup()
+            if asyncio.iscoroutine(result):
+                asyncio.run(result)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"释放{type(instance).__module__}实例失败: {e}")
+
+
+def _schedule_cleanup(instances: List[Any]):
+    """在后台线程中调用被释放实例的 cleanup()，调用方不能持有 self._lock"""
+    if instances:
+        threading.Thread(
+            target=_cleanup_instances,
+            args=(instances,),
+            name="provider-cleanup",
+            daemon=True,
+        ).start()
+
+
+class _Entry:
+    __slots__ = ("kind", "instance", "refs", "idle_since", "retired")
+
+    def __init__(self, kind: str, instance: Any):
+        self.kind = kind
+        self.instance = instance
+        self.refs = 0
+        self.idle_since = None
+        # 配置已被替换，最后一个租约归还时立即释放
+        self.retired = False
+
+
+class ProviderRegistry:
+    """按模块配置共享提供者实例，线程安全"""
+
+    def __init__(self, enabled: bool = True, idle_ttl: float = DEFAULT_IDLE_TTL):
+        self.enabled = enabled
+        self.idle_ttl = max(0.0, float(idle_ttl))
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        # 同一配置的实例只创建一次，其余并发的建连等待创建完成
+        self._key_locks: Dict[str, threading.Lock] = {}
+        # 已知不可共享的配置，直接新建，不再排队
+        self._unshareable = set()
+        self._last_sweep = time.monotonic()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, kind: str, name: str):
+        stats = self._stats.setdefault(
+            kind, {"hits": 0, "misses": 0, "unshared": 0, "evictions": 0}
+        )
+        stats[name] += 1
+
+    def _lease(
+        self, key: str, entry: _Entry, leases: Optional[List], revive: bool = True
+    ):
+        """调用方已持有 self._lock；不带租约列表的调用不计引用"""
+        if revive:
+            # 仍有使用者按该配置获取实例，撤销配置替换时的释放标记
+            entry.retired = False
+        if leases is None:
+            return
+        entry.refs += 1
+        entry.idle_since = None
+        leases.append(key)
+
+    def acquire(
+        self,
+        kind: str,
+        provider_type: str,
+        module_config: Dict,
+        factory: Callable[[], Any],
+        leases: Optional[List] = None,
+    ) -> Any:
+        """
+        获取提供者实例
+        Args:
+            kind: 模块类别，如 llm、vad、asr
+            provider_type: 提供者类型，参与缓存键的计算
+            module_config: 模块配置，内容相同的配置共用一个实例
+            factory: 未命中时创建实例的函数
+            leases: 使用者的租约列表，共享实例的键会追加到其中，用完后交给 release_all 归还
+        """
+        if not self.enabled:
+            return factory()
+        key = f"{kind}:{provider_type}:{config_digest(provider_type, module_config)}"
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._lease(key, entry, leases)
+                self._count(kind, "hits")
+                return entry.instance
+            if key in self._unshareable:
+                self._count(kind, "unshared")
+                unshareable = True
+            else:
+                unshareable = False
+                key_lock = self._key_locks.setdefault(key, threading.Lock())
+        if unshareable:
+            return factory()
+
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._lease(key, entry, leases)
+                    self._count(kind, "hits")
+                    return entry.instance
+            try:
+                instance = factory()
+            finally:
+                # 创建失败时同样移除，等待中的建连会各自重试创建
+                with self._lock:
+                    if self._key_locks.get(key) is key_lock:
+                        del self._key_locks[key]
+            with self._lock:
+                if not getattr(instance, "SHAREABLE", False):
+                    self._unshareable.add(key)
+                    self._count(kind, "unshared")
+                    return instance
+                entry = _Entry(kind, instance)
+                entry.idle_since = time.monotonic()
+                self._entries[key] = entry
+                self._lease(key, entry, leases)
+                self._count(kind, "misses")
+                evicted = self._sweep(time.monotonic())
+        _schedule_cleanup(evicted)
+        logger.bind(tag=TAG).debug(f"创建共享{kind}实例: {provider_type}")
+        return instance
+
+    def lease_instance(self, instance: Any, leases: List) -> bool:
+        """
+        为已创建的共享实例追加一个租约，用于直接复用服务端公共组件的连接
+        实例不在注册表中（不可共享或已被释放）时返回 False
+        """
+        if instance is None:
+            return False
+        with self._lock:
+            for key, entry in self._entries.items():
+                if entry.instance is instance:
+                    # 只是延长已有实例的使用，配置已被替换的实例仍在最后一个租约归还时释放
+                    self._lease(key, entry, leases, revive=False)
+                    return True
+        return False
+
+    @staticmethod
+    def lease_kind(key: str) -> str:
+        """租约对应的模块类别"""
+        return key.split(":", 1)[0]
+
+    def release_all(self, leases: List, retire: bool = False):
+        """
+        归还租约列表中的所有共享实例，并清空列表
+        retire 为 True 表示这些实例的配置已被替换：不再有租约时立即释放，不等待 idle_ttl
+        """
+        if not leases:
+            return
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            while leases:
+                key = leases.pop()
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                if retire:
+                    entry.retired = True
+                if entry.refs > 0:
+                    entry.refs -= 1
+                    if entry.refs == 0:
+                        entry.idle_since = now
+                if entry.refs == 0 and entry.retired:
+                    evicted.append(self._evict(key))
+            evicted.extend(self._sweep(now))
+        _schedule_cleanup(evicted)
+
+    def _evict(self, key: str) -> Any:
+        """移出实例并返回，调用方已持有 self._lock，释放锁后再调用 cleanup"""
+        entry = self._entries.pop(key)
+        self._count(entry.kind, "evictions")
+        return entry.instance
+
+    def _sweep(self, now: float) -> List[Any]:
+        """移出空闲超时的实例并返回，调用方已持有 self._lock"""
+        if self.idle_ttl > 0 and now - self._last_sweep < min(SWEEP_INTERVAL, self.idle_ttl):
+            return []
+        self._last_sweep = now
+        # 仍在使用旧实例的连接（如配置更新前建立的连接）持有自己的引用，不受影响
+        return [
+            self._evict(key)
+            for key, entry in list(self._entries.items())
+            if entry.refs == 0 and now - entry.idle_since >= self.idle_ttl
+        ]
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """按模块类别统计实例数、租约数与命中情况"""
+        with self._lock:
+            stats = {kind: dict(values) for kind, values in self._stats.items()}
+            for entry in self._entries.values():
+                kind_stats = stats.setdefault(entry.kind, {})
+                kind_stats["instances"] = kind_stats.get("instances", 0) + 1
+                kind_stats["leases"] = kind_stats.get("leases", 0) + entry.refs
+        for kind_stats in stats.values():
+            kind_stats.setdefault("instances", 0)
+            kind_stats.setdefault("leases", 0)
+        return stats
+
+
+_provider_registry = None
+_provider_registry_lock = threading.Lock()
+
+
+def get_provider_registry(config: Dict = None) -> ProviderRegistry:
+    """获取进程级提供者实例注册表（单例模式），首次创建时读取 provider_registry 配置"""
+    global _provider_registry
+    if _provider_registry is None:
+        with _provider_registry_lock:
+            if _provider_registry is None:
+                registry_config = (config or {}).get("provider_registry", {}) or {}
+                enabled = registry_config.get("enabled", True)
+                idle_ttl = registry_config.get("idle_ttl", DEFAULT_IDLE_TTL)
+                try:
+                    idle_ttl = float(idle_ttl) if idle_ttl not in (None, "") else DEFAULT_IDLE_TTL
+                except (TypeError, ValueError):
+                    idle_ttl = DEFAULT_IDLE_TTL
+                _provider_registry = ProviderRegistry(
+                    enabled=str(enabled).lower() in ("true", "1", "yes"),
+                    idle_ttl=idle_ttl,
+                )
+    return _provider_registry
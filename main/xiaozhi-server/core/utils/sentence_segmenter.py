@@ -0,0 +1,108 @@
+"""
+流式文本增量分句
+LLM逐token输出时，只扫描新追加的字符查找断句标点，不再每来一个token就拼接并重新扫描全部已输出文本。
+首句使用包含逗号等的标点集合尽早断句以降低首包延迟；后续句子可按最小字数合并，减少TTS调用次数。
+标点与表情的清理在每个分段产出时只做一次。
+"""
+
+from typing import Dict, List, Optional
+
+from core.utils import textUtils
+
+# 后续句子的断句标点
+SENTENCE_PUNCTUATIONS = ("。", "？", "?", "！", "!", "；", ";", "：")
+# 首句的断句标点，包含逗号、顿号，尽快产出第一段可播报的文本
+FIRST_SEGMENT_PUNCTUATIONS = ("，", "~", "、", ",") + SENTENCE_PUNCTUATIONS
+
+
+class SentenceSegmenter:
+    """
+    增量分句器，非线程安全，每个TTS实例持有一个
+
+    first_min_chars: 首段最少字数，达到后遇到首句标点即断句（0 表示遇到标点立即断句）
+    min_chars: 后续分段最少字数，不足时继续合并后面的句子
+    """
+
+    def __init__(
+        self,
+        punctuations=SENTENCE_PUNCTUATIONS,
+        first_punctuations=FIRST_SEGMENT_PUNCTUATIONS,
+        first_min_chars: int = 0,
+        min_chars: int = 0,
+    ):
+        self.punctuations = frozenset(punctuations)
+        self.first_punctuations = frozenset(first_punctuations)
+        self.first_min_chars = max(0, int(first_min_chars))
+        self.min_chars = max(0, int(min_chars))
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> "SentenceSegmenter":
+        """根据 tts_segment 配置创建"""
+        config = config or {}
+        return cls(
+            first_min_chars=config.get("first_min_chars", 0),
+            min_chars=config.get("min_chars", 0),
+        )
+
+    def reset(self):
+        """开始新一轮对话"""
+        # 未产出的文本片段，产出分段时才拼接
+        self._chunks: List[str] = []
+        self._length = 0
+        self.is_first = True
+
+    def feed(self, text: str) -> List[str]:
+        """追加文本，只扫描新字符，返回新产生的分段（已去除首尾标点与表情）"""
+        if not text:
+            return []
+        offset = self._length
+        self._chunks.append(text)
+        self._length += len(text)
+
+        # 未产出文本在此前的调用中没有可断句的位置，当前分段总是从0开始
+        segment_start = 0
+        first_end = 0
+        last_end = 0
+        for i, char in enumerate(text):
+            end = offset + i + 1
+            if self.is_first:
+                if (
+                    char in self.first_punctuations
+                    and end - segment_start >= self.first_min_chars
+                ):
+                    first_end = segment_start = end
+                    self.is_first = False
+            elif char in self.punctuations and end - segment_start >= self.min_chars:
+                last_end = segment_start = end
+
+        if not first_end and not last_end:
+            return []
+
+        pending = "".join(self._chunks)
+        raw_segments = []
+        if first_end:
+            raw_segments.append(pending[:first_end])
+        if last_end:
+            # 同一次追加中出现的多个句子合并为一段
+            raw_segments.append(pending[first_end:last_end])
+        rest = pending[max(first_end, last_end) :]
+        self._chunks = [rest] if rest else []
+        self._length = len(rest)
+
+        segments = []
+        for raw in raw_segments:
+            segment = textUtils.get_string_no_punctuation_or_emoji(raw)
+            if segment:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> Optional[str]:
+        """取出剩余未断句的文本（对话结束时调用）"""
+        if not self._length:
+            return None
+        remaining = "".join(self._chunks)
+        self._chunks = []
+        self._length = 0
+        segment = textUtils.get_string_no_punctuation_or_emoji(remaining)
+        return segment or None
@@ -0,0 +1,362 @@
+"""
+跨进程共享状态存储
+
+多进程部署时，每日输出字数配额、位置/天气等热点缓存以及各类“只需一个进程去做”的租约
+需要在工作进程之间共享：
+- memory：进程内实现，单进程运行时的默认选择，行为与原先的模块级字典一致
+- sqlite：本地SQLite文件（WAL模式），读写互不阻塞，进程重启后仍保留
+- shm：同样的SQLite数据库放在 /dev/shm 内存文件系统上，读写不落盘
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from contextlib import contextmanager
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_DB_PATH = "data/.shared_store.db"
+SHM_DIR = "/dev/shm"
+# 写锁等待上限（秒）：调用方多在事件循环上，拿不到锁时按未命中处理，不长时间阻塞
+DEFAULT_BUSY_TIMEOUT = 0.05
+
+
+class SharedStore(ABC):
+    """共享存储接口，键按 namespace 分组，所有方法都是线程安全的"""
+
+    # 是否跨进程共享；进程内实现不需要接管全局缓存
+    cross_process = False
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """获取值，不存在或已过期返回None"""
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None):
+        """写入值，ttl为None表示不过期"""
+
+    @abstractmethod
+    def add(self, namespace: str, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """键不存在（或已过期）时才写入，返回是否写入成功，可用作跨进程租约"""
+
+    @abstractmethod
+    def incr(self, namespace: str, key: str, amount: int = 1, ttl: Optional[float] = None) -> int:
+        """计数器自增并返回新值，ttl 从计数器创建时开始计算"""
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> bool:
+        """删除条目，返回是否存在"""
+
+    @abstractmethod
+    def delete_matching(self, namespace: str, pattern: str) -> int:
+        """删除键中包含 pattern 的条目，返回删除数量"""
+
+    @abstractmethod
+    def clear(self, namespace: Optional[str] = None):
+        """清空指定 namespace，为None时清空全部"""
+
+    def close(self):
+        """关闭当前线程持有的资源"""
+
+
+class MemoryStore(SharedStore):
+    """进程内存储"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # namespace -> key -> (value, expire_at)
+        self._data: Dict[str, Dict[str, Tuple[Any, Optional[float]]]] = {}
+
+    def _alive(self, namespace, key, now) -> Optional[Tuple[Any, Optional[float]]]:
+        bucket = self._data.get(namespace)
+        if not bucket or key not in bucket:
+            return None
+        entry = bucket[key]
+        if entry[1] is not None and entry[1] <= now:
+            del bucket[key]
+            return None
+        return entry
+
+    def get(self, namespace, key):
+        with self._lock:
+            entry = self._alive(namespace, key, time.time())
+            return entry[0] if entry else None
+
+    def set(self, namespace, key, value, ttl=None):
+        expire_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._data.setdefault(namespace, {})[key] = (value, expire_at)
+
+    def add(self, namespace, key, value, ttl=None):
+        now = time.time()
+        with self._lock:
+            if self._alive(namespace, key, now):
+                return False
+            expire_at = now + ttl if ttl is not None else None
+            self._data.setdefault(namespace, {})[key] = (value, expire_at)
+            return True
+
+    def incr(self, namespace, key, amount=1, ttl=None):
+        now = time.time()
+        with self._lock:
+            entry = self._alive(namespace, key, now)
+            if entry:
+                value, expire_at = int(entry[0]) + amount, entry[1]
+            else:
+                value, expire_at = amount, (now + ttl if ttl is not None else None)
+            self._data.setdefault(namespace, {})[key] = (value, expire_at)
+            return value
+
+    def delete(self, namespace, key):
+        with self._lock:
+            bucket = self._data.get(namespace)
+            return bool(bucket) and bucket.pop(key, None) is not None
+
+    def delete_matching(self, namespace, pattern):
+        with self._lock:
+            bucket = self._data.get(namespace) or {}
+            keys = [key for key in bucket if pattern in key]
+            for key in keys:
+                del bucket[key]
+            return len(keys)
+
+    def clear(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                self._data.clear()
+            else:
+                self._data.pop(namespace, None)
+
+
+class SqliteStore(SharedStore):
+    """
+    基于SQLite（WAL模式）的跨进程存储
+    每个线程持有独立连接；值用pickle序列化，计数器单独存为整数列以便原子自增。
+    数据库异常（含等待写锁超时）只记录日志并按未命中处理，不影响对话流程。
+    """
+
+    cross_process = True
+    # 过期条目的清理间隔（秒）
+    PURGE_INTERVAL = 60
+
+    def __init__(self, path: str, busy_timeout: float = DEFAULT_BUSY_TIMEOUT):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._last_purge = 0.0
+        with self._transaction() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS kv ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB, "
+                "counter INTEGER, expire_at REAL, PRIMARY KEY (namespace, key)"
+                ") WITHOUT ROWID"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        # fork 出的子进程不能沿用父进程的连接
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(
+                self.path, timeout=self.busy_timeout, isolation_level=None
+            )
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+            self._local.pid = os.getpid()
+        return db
+
+    def close(self):
+        db = getattr(self._local, "db", None)
+        if db is not None and self._local.pid == os.getpid():
+            db.close()
+        self._local.db = None
+
+    @contextmanager
+    def _transaction(self):
+        db = self._connection()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def _run(self, operation, default):
+        try:
+            return operation()
+        except sqlite3.Error as e:
+            logger.bind(tag=TAG).warning(f"共享存储操作失败: {e}")
+            return default
+
+    def _maybe_purge(self, db, now):
+        if now - self._last_purge < self.PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        db.execute(
+            "DELETE FROM kv WHERE expire_at IS NOT NULL AND expire_at <= ?", (now,)
+        )
+
+    @staticmethod
+    def _select(db, namespace, key, now):
+        return db.execute(
+            "SELECT value, counter FROM kv WHERE namespace = ? AND key = ? "
+            "AND (expire_at IS NULL OR expire_at > ?)",
+            (namespace, key, now),
+        ).fetchone()
+
+    def get(self, namespace, key):
+        def operation():
+            row = self._select(self._connection(), namespace, key, time.time())
+            if row is None:
+                return None
+            return pickle.loads(row[0]) if row[0] is not None else row[1]
+
+        return self._run(operation, None)
+
+    def set(self, namespace, key, value, ttl=None):
+        def operation():
+            now = time.time()
+            with self._transaction() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO kv VALUES (?, ?, ?, NULL, ?)",
+                    (
+                        namespace,
+                        key,
+                        pickle.dumps(value),
+                        now + ttl if ttl is not None else None,
+                    ),
+                )
+                self._maybe_purge(db, now)
+
+        self._run(operation, None)
+
+    def add(self, namespace, key, value, ttl=None):
+        def operation():
+            now = time.time()
+            with self._transaction() as db:
+                if self._select(db, namespace, key, now) is not None:
+                    return False
+                db.execute(
+                    "INSERT OR REPLACE INTO kv VALUES (?, ?, ?, NULL, ?)",
+                    (
+                        namespace,
+                        key,
+                        pickle.dumps(value),
+                        now + ttl if ttl is not None else None,
+                    ),
+                )
+                return True
+
+        return self._run(operation, False)
+
+    def incr(self, namespace, key, amount=1, ttl=None):
+        def operation():
+            now = time.time()
+            with self._transaction() as db:
+                row = db.execute(
+                    "SELECT counter, expire_at FROM kv WHERE namespace = ? AND key = ? "
+                    "AND (expire_at IS NULL OR expire_at > ?)",
+                    (namespace, key, now),
+                ).fetchone()
+                if row is not None and row[0] is not None:
+                    value, expire_at = row[0] + amount, row[1]
+                else:
+                    value = amount
+                    expire_at = now + ttl if ttl is not None else None
+                db.execute(
+                    "INSERT OR REPLACE INTO kv VALUES (?, ?, NULL, ?, ?)",
+                    (namespace, key, value, expire_at),
+                )
+                self._maybe_purge(db, now)
+                return value
+
+        return self._run(operation, 0)
+
+    def delete(self, namespace, key):
+        def operation():
+            with self._transaction() as db:
+                return (
+                    db.execute(
+                        "DELETE FROM kv WHERE namespace = ? AND key = ?",
+                        (namespace, key),
+                    ).rowcount
+                    > 0
+                )
+
+        return self._run(operation, False)
+
+    def delete_matching(self, namespace, pattern):
+        def operation():
+            with self._transaction() as db:
+                # instr 按子串匹配，与进程内缓存的 invalidate_pattern 语义一致
+                return db.execute(
+                    "DELETE FROM kv WHERE namespace = ? AND instr(key, ?) > 0",
+                    (namespace, pattern),
+                ).rowcount
+
+        return self._run(operation, 0)
+
+    def clear(self, namespace=None):
+        def operation():
+            with self._transaction() as db:
+                if namespace is None:
+                    db.execute("DELETE FROM kv")
+                else:
+                    db.execute("DELETE FROM kv WHERE namespace = ?", (namespace,))
+
+        self._run(operation, None)
+
+
+def create_shared_store(config: Dict) -> SharedStore:
+    """
+    按 shared_store 配置创建存储
+    backend 为 auto 时：单进程使用 memory，多进程使用 shm（没有 /dev/shm 的平台使用 sqlite）
+    """
+    from core.supervisor import get_worker_count
+
+    store_config = (config or {}).get("shared_store", {}) or {}
+    backend = str(store_config.get("backend", "auto") or "auto").lower()
+    if backend == "auto":
+        backend = "shm" if get_worker_count(config or {}) > 1 else "memory"
+    if backend == "memory":
+        return MemoryStore()
+
+    path = store_config.get("path") or DEFAULT_DB_PATH
+    if backend == "shm":
+        if os.path.isdir(SHM_DIR):
+            # 同一台机器上可能运行多个实例，按端口区分数据库文件
+            port = ((config or {}).get("server", {}) or {}).get("port", 8000)
+            path = os.path.join(SHM_DIR, f"xiaozhi-{port}-{os.path.basename(path)}")
+        else:
+            logger.bind(tag=TAG).warning(f"{SHM_DIR} 不存在，共享存储改用本地文件: {path}")
+    elif backend != "sqlite":
+        logger.bind(tag=TAG).warning(f"未知的共享存储类型 {backend}，使用 sqlite")
+    try:
+        busy_timeout = float(store_config.get("busy_timeout", DEFAULT_BUSY_TIMEOUT))
+    except (TypeError, ValueError):
+        busy_timeout = DEFAULT_BUSY_TIMEOUT
+    logger.bind(tag=TAG).info(f"共享存储: {backend} ({path})")
+    return SqliteStore(path, busy_timeout)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_shared_store(config: Dict = None) -> SharedStore:
+    """获取进程级共享存储（单例模式），首次创建时读取 shared_store 配置"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = create_shared_store(config)
+    return _store
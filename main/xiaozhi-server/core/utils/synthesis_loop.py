@@ -0,0 +1,150 @@
+"""
+TTS合成事件循环
+每个进程维护少量常驻的事件循环线程，TTS提供者的 text_to_speak 协程统一提交到这里执行，
+替代每句话一次 asyncio.run（每次都要新建/销毁事件循环，并重新建立HTTP连接）。
+同一事件循环上的HTTP会话按提供者复用，TCP/TLS连接可以在句子和设备之间保持复用。
+"""
+
+import asyncio
+import itertools
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_LOOP_WORKERS = 2
+# 单个事件循环上每个HTTP会话的连接数上限
+DEFAULT_CONNECTION_LIMIT = 64
+DEFAULT_KEEPALIVE_TIMEOUT = 30
+# 合成超时后等待事件循环完成取消的额外时间（秒）
+LOOP_STALL_MARGIN = 5
+
+
+class SynthesisLoop:
+    """运行在独立守护线程中的常驻事件循环"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.loop = asyncio.new_event_loop()
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._thread = threading.Thread(
+            target=self._run, name=name, daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def run(self, coro, timeout: Optional[float] = None) -> Any:
+        """
+        从工作线程提交协程并阻塞等待结果，用法与 asyncio.run 相同
+        timeout 不为空时在事件循环内用 asyncio.wait_for 限制协程耗时，超时后协程被取消，
+        某个服务商请求卡住不会一直占用该事件循环上的任务
+        """
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("不能在合成事件循环线程内同步等待合成结果")
+        if timeout is not None:
+            coro = asyncio.wait_for(coro, timeout)
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            # 事件循环本身被阻塞时 wait_for 无法生效，调用方额外多等一会儿后放弃
+            return future.result(timeout + LOOP_STALL_MARGIN if timeout is not None else None)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def get_session(self, key: str) -> aiohttp.ClientSession:
+        """获取本事件循环上按key复用的HTTP会话，必须在本事件循环内调用"""
+        session = self._sessions.get(key)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=DEFAULT_CONNECTION_LIMIT,
+                keepalive_timeout=DEFAULT_KEEPALIVE_TIMEOUT,
+            )
+            session = aiohttp.ClientSession(connector=connector)
+            self._sessions[key] = session
+        return session
+
+    async def _close_sessions(self):
+        for session in self._sessions.values():
+            if not session.closed:
+                await session.close()
+        self._sessions.clear()
+
+    def close(self):
+        """关闭HTTP会话并停止事件循环"""
+        if self.loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self._close_sessions(), self.loop
+            ).result(5)
+        except Exception as e:
+            logger.bind(tag=TAG).warning(f"关闭合成HTTP会话失败: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+
+_loops = []
+_loop_by_id: Dict[int, SynthesisLoop] = {}
+_round_robin = None
+_lock = threading.Lock()
+
+
+def init_synthesis_loops(workers: int = DEFAULT_LOOP_WORKERS):
+    """创建合成事件循环（只有第一次调用生效）"""
+    global _round_robin
+    with _lock:
+        if _loops:
+            return
+        workers = max(1, int(workers or DEFAULT_LOOP_WORKERS))
+        for index in range(workers):
+            synthesis_loop = SynthesisLoop(f"tts-synthesis-{index}")
+            _loops.append(synthesis_loop)
+            _loop_by_id[id(synthesis_loop.loop)] = synthesis_loop
+        _round_robin = itertools.cycle(_loops)
+        logger.bind(tag=TAG).info(f"TTS合成事件循环已启动，数量: {workers}")
+
+
+def acquire_synthesis_loop() -> SynthesisLoop:
+    """按轮询方式分配一个合成事件循环，提供者实例分配后固定使用该循环"""
+    if not _loops:
+        init_synthesis_loops()
+    with _lock:
+        return next(_round_robin)
+
+
+def shutdown_synthesis_loops():
+    """进程退出时关闭所有合成事件循环"""
+    global _round_robin
+    with _lock:
+        loops = list(_loops)
+        _loops.clear()
+        _loop_by_id.clear()
+        _round_robin = None
+    for synthesis_loop in loops:
+        synthesis_loop.close()
+
+
+@asynccontextmanager
+async def pooled_session(key: str):
+    """
+    获取复用的HTTP会话
+
+    在合成事件循环上运行时返回该循环上按key复用的会话，退出时不关闭；
+    在其它事件循环上（例如性能测试工具直接 asyncio.run）则退化为临时会话。
+    """
+    synthesis_loop = _loop_by_id.get(id(asyncio.get_running_loop()))
+    if synthesis_loop is not None:
+        yield synthesis_loop.get_session(key)
+        return
+    async with aiohttp.ClientSession() as session:
+        yield session
@@ -0,0 +1,265 @@
+"""
+每轮对话的分阶段耗时追踪
+一轮对话从VAD判定说话结束开始，依次记录 ASR最终结果 → 意图识别 → LLM首字 → TTS首句 → 首帧音频下发，
+每个阶段的耗时（距上一个已记录阶段）按 (阶段, 服务商) 写入 HDR 风格的对数分桶直方图，
+工具调用、记忆查询等独立耗时也记为阶段。各阶段只记录每轮第一次到达的时间，重复调用的开销只有一次字典查询。
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from config.logger import setup_logging
+
+TAG = __name__
+logger = setup_logging()
+
+# 一轮对话依次经过的阶段
+TURN_STAGES = ("asr", "intent", "llm_first_token", "tts_first_segment", "first_audio")
+# VAD结束到首帧音频的总耗时
+TOTAL_STAGE = "turn_total"
+# 必须在本轮ASR完成后才记录的阶段，避免上一轮残留的合成与播放被算进新一轮
+_REQUIRES_ASR = frozenset(("llm_first_token", "tts_first_segment", "first_audio"))
+
+# 每个2的幂区间细分的桶数，相对误差不超过 1/SUB_BUCKETS
+SUB_BUCKETS = 32
+_SUB_BITS = int(math.log2(SUB_BUCKETS))
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class LatencyHistogram:
+    """
+    对数-线性分桶的耗时直方图（HDR Histogram 的简化实现）
+    以微秒为单位分桶，记录为 O(1)，内存只与出现过的数量级有关。
+    """
+
+    def __init__(self):
+        self._buckets: Dict[int, int] = {}
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index(micros: int) -> int:
+        if micros < SUB_BUCKETS:
+            return micros
+        # 最高位决定数量级，其后 _SUB_BITS 位决定数量级内的桶
+        bits = micros.bit_length()
+        return (bits - _SUB_BITS) * SUB_BUCKETS + (micros >> (bits - 1 - _SUB_BITS)) - SUB_BUCKETS
+
+    @staticmethod
+    def _bounds(index: int) -> Tuple[float, float]:
+        """桶对应的微秒区间 [lower, upper)"""
+        if index < SUB_BUCKETS:
+            return float(index), float(index + 1)
+        exponent, sub = divmod(index, SUB_BUCKETS)
+        width = 2.0 ** (exponent + _SUB_BITS - 1) / SUB_BUCKETS
+        lower = 2.0 ** (exponent + _SUB_BITS - 1) + sub * width
+        return lower, lower + width
+
+    def record(self, seconds: float):
+        if seconds < 0:
+            return
+        index = self._index(int(seconds * 1_000_000))
+        with self._lock:
+            self._buckets[index] = self._buckets.get(index, 0) + 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantiles(self, quantiles=DEFAULT_QUANTILES) -> Dict[float, float]:
+        """返回各分位数（秒），取所在桶的中点"""
+        with self._lock:
+            items = sorted(self._buckets.items())
+            count = self.count
+            max_value = self.max
+        result = {}
+        if not count:
+            return {q: 0.0 for q in quantiles}
+        for q in quantiles:
+            target = max(1, math.ceil(q * count))
+            seen = 0
+            for index, bucket_count in items:
+                seen += bucket_count
+                if seen >= target:
+                    lower, upper = self._bounds(index)
+                    result[q] = min((lower + upper) / 2 / 1_000_000, max_value)
+                    break
+        return result
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            count, total, max_value = self.count, self.sum, self.max
+        return {
+            "count": count,
+            "sum": total,
+            "max": max_value,
+            "quantiles": self.quantiles(),
+        }
+
+
+class TurnTrace:
+    """单轮对话的各阶段时间点"""
+
+    __slots__ = ("session_id", "sentence_id", "start", "marks", "finished")
+
+    def __init__(self, session_id: str, start: float):
+        self.session_id = session_id
+        self.sentence_id = None
+        self.start = start
+        # 阶段 -> (时间点, 服务商)
+        self.marks: Dict[str, Tuple[float, str]] = {}
+        self.finished = False
+
+    def last_mark_time(self) -> float:
+        last = self.start
+        for mark_time, _ in self.marks.values():
+            if mark_time > last:
+                last = mark_time
+        return last
+
+    def describe(self) -> str:
+        parts = []
+        previous = self.start
+        for stage in TURN_STAGES:
+            mark = self.marks.get(stage)
+            if mark is None:
+                continue
+            parts.append(f"{stage}={mark[0] - previous:.3f}s")
+            previous = mark[0]
+        return " ".join(parts)
+
+
+def provider_name(provider) -> str:
+    """服务商标签：字符串原样返回，对象取实现模块名（如 doubao_stream）"""
+    if provider is None:
+        return "unknown"
+    if isinstance(provider, str):
+        return provider
+    return type(provider).__module__.rsplit(".", 1)[-1]
+
+
+class LatencyTracer:
+    """进程级耗时追踪器，汇总所有连接的阶段耗时"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self.turns_completed = 0
+        self.turns_incomplete = 0
+
+    def histogram(self, stage: str, provider: str) -> LatencyHistogram:
+        key = (stage, provider)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, LatencyHistogram())
+        return histogram
+
+    def start_turn(self, session_id: str, previous: Optional[TurnTrace]) -> TurnTrace:
+        if previous is not None and not previous.finished and previous.marks:
+            self.turns_incomplete += 1
+        return TurnTrace(session_id, time.monotonic())
+
+    def mark(self, turn: TurnTrace, stage: str, provider) -> bool:
+        """记录阶段到达时间，返回本次是否是该阶段在本轮的首次到达"""
+        if turn.finished or stage in turn.marks:
+            return False
+        if stage in _REQUIRES_ASR and "asr" not in turn.marks:
+            return False
+        now = time.monotonic()
+        previous = turn.last_mark_time()
+        name = provider_name(provider)
+        turn.marks[stage] = (now, name)
+        self.histogram(stage, name).record(now - previous)
+        if stage == "first_audio":
+            self.finish_turn(turn, now)
+        return True
+
+    def finish_turn(self, turn: TurnTrace, end: float):
+        turn.finished = True
+        self.turns_completed += 1
+        self.histogram(TOTAL_STAGE, "all").record(end - turn.start)
+        logger.bind(tag=TAG).debug(
+            f"对话轮次耗时 session={turn.session_id} sentence={turn.sentence_id} "
+            f"{turn.describe()} 总计={end - turn.start:.3f}s"
+        )
+
+    def get_snapshots(self) -> List[Tuple[str, str, Dict]]:
+        with self._lock:
+            items = sorted(self._histograms.items())
+        return [(stage, provider, histogram.snapshot()) for (stage, provider), histogram in items]
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer(config: Dict = None) -> LatencyTracer:
+    """获取进程级耗时追踪器（单例模式），首次创建时读取 metrics 配置"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                metrics_config = (config or {}).get("metrics", {}) or {}
+                enabled = metrics_config.get("enabled", True)
+                _tracer = LatencyTracer(
+                    enabled=str(enabled).lower() in ("true", "1", "yes")
+                )
+    return _tracer
+
+
+# ---------- 以连接为参数的便捷函数 ----------
+
+
+def trace_vad_end(conn):
+    """VAD判定说话结束，开始新的一轮；本轮尚未拿到ASR结果时保持原起点"""
+    tracer = get_tracer()
+    if not tracer.enabled:
+        return
+    turn = getattr(conn, "turn_trace", None)
+    if turn is not None and not turn.finished and "asr" not in turn.marks:
+        return
+    conn.turn_trace = tracer.start_turn(getattr(conn, "session_id", None), turn)
+
+
+def trace_mark(conn, stage: str, provider=None):
+    """记录本轮对话到达某个阶段，同一阶段只记录第一次"""
+    turn = getattr(conn, "turn_trace", None)
+    if turn is None or turn.finished or stage in turn.marks:
+        return
+    if get_tracer().mark(turn, stage, provider) and stage == "llm_first_token":
+        turn.sentence_id = getattr(conn, "sentence_id", None)
+
+
+def trace_end_session(conn):
+    """连接关闭时结束未完成的一轮"""
+    turn = getattr(conn, "turn_trace", None)
+    if turn is not None and not turn.finished and turn.marks:
+        get_tracer().turns_incomplete += 1
+    conn.turn_trace = None
+
+
+@contextmanager
+def trace_span(stage: str, provider=None):
+    """记录一段独立耗时（工具调用、记忆查询等）"""
+    tracer = get_tracer()
+    if not tracer.enabled:
+        yield
+        return
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        tracer.histogram(stage, provider_name(provider)).record(time.monotonic() - start)
+
+
+async def trace_awaitable(stage: str, provider, awaitable):
+    """等待 awaitable 并记录耗时"""
+    with trace_span(stage, provider):
+        return await awaitable
@@ -0,0 +1,321 @@
+"""
+TTS合成结果缓存
+按 (提供者, 去除密钥后的整段提供者配置与运行时音色参数, 采样率, 音频格式, 规范化文本) 的哈希
+缓存最终下发的帧序列（Opus/PCM），
+命中时跳过合成与编码；内存层为按字节数限制的LRU，磁盘层按总大小预算淘汰最久未使用的文件。
+统计命中率与节省的合成音频字节数。
+"""
+
+import os
+import json
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from config.logger import setup_logging
+from core.utils.opus_asset_cache import read_frames_blob, write_frames_blob
+
+TAG = __name__
+logger = setup_logging()
+
+DEFAULT_CACHE_DIR = "data/.tts_cache"
+DEFAULT_MEMORY_MB = 32
+DEFAULT_DISK_MB = 256
+# 长句很少原样重复，超过该长度的文本不缓存
+DEFAULT_MAX_TEXT_LENGTH = 50
+# 不参与缓存键的配置项：鉴权信息（键名包含以下片段）与不影响合成结果的运行参数
+SECRET_KEY_PARTS = ("key", "secret", "token", "authorization", "password", "headers")
+NON_VOICE_KEYS = ("output_dir", "tts_timeout", "save_path", "correct_words")
+# 提供者在运行时可能按设备覆盖的参数（如 private_voice），以实例属性为准计入缓存键
+VOICE_ATTRIBUTES = (
+    "model",
+    "voice",
+    "speaker",
+    "voice_type",
+    "speed",
+    "speech_rate",
+    "rate",
+    "pitch",
+    "volume",
+    "emotion",
+    "language",
+    "audio_params",
+    "additions",
+    "mix_speaker",
+)
+
+
+def normalize_sentence(text: str) -> str:
+    """全角转半角、去除空白与首尾标点，保留句中标点（影响停顿）"""
+    text = "".join(unicodedata.normalize("NFKC", text or "").split())
+    start, end = 0, len(text)
+    while start < end and unicodedata.category(text[start]).startswith("P"):
+        start += 1
+    while end > start and unicodedata.category(text[end - 1]).startswith("P"):
+        end -= 1
+    return text[start:end]
+
+
+def config_identity(config: Dict) -> str:
+    """
+    提供者配置的哈希：服务地址、参考音频、说话人等所有配置项都计入，去除鉴权信息，
+    相同音色的不同账号共用缓存
+    """
+    params = {
+        name: value
+        for name, value in (config or {}).items()
+        if name not in NON_VOICE_KEYS
+        and not any(part in name.lower() for part in SECRET_KEY_PARTS)
+    }
+    payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def voice_identity(provider) -> str:
+    """提供者类型、配置哈希（提供者的 cache_identity）与运行时的音色参数"""
+    params = {
+        name: getattr(provider, name)
+        for name in VOICE_ATTRIBUTES
+        if getattr(provider, name, None) is not None
+    }
+    return (
+        f"{type(provider).__module__}:{getattr(provider, 'cache_identity', '')}:"
+        f"{json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)}"
+    )
+
+
+class TTSCache:
+    """两级TTS结果缓存，线程安全"""
+
+    def __init__(
+        self,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        memory_bytes: int = DEFAULT_MEMORY_MB * 1024 * 1024,
+        disk_bytes: int = DEFAULT_DISK_MB * 1024 * 1024,
+        max_text_length: int = DEFAULT_MAX_TEXT_LENGTH,
+    ):
+        self.cache_dir = cache_dir
+        self.memory_budget = max(0, int(memory_bytes))
+        self.disk_budget = max(0, int(disk_bytes))
+        self.max_text_length = max_text_length
+        self._lock = threading.Lock()
+        # key -> (frames, 字节数)
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._memory_size = 0
+        # key -> 文件大小，按最近使用排序；首次访问磁盘层时扫描目录
+        self._disk_index: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_size = 0
+        self._disk_loaded = False
+        # 磁盘写入与淘汰在后台线程执行，不阻塞调用方
+        self._disk_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="tts-cache-disk"
+        )
+        self._stats = {
+            "lookups": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "bytes_saved": 0,
+        }
+
+    def make_key(self, provider, text: str, sample_rate: int, audio_format: str) -> Optional[str]:
+        """生成缓存键，文本为空或过长（不缓存）时返回 None"""
+        normalized = normalize_sentence(text)
+        if not normalized or len(normalized) > self.max_text_length:
+            return None
+        raw = f"{voice_identity(provider)}|{sample_rate}|{audio_format}|{normalized}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: Optional[str]) -> Optional[List[bytes]]:
+        """查询缓存，先内存后磁盘（磁盘命中会读取文件，需在工作线程调用）"""
+        if key is None:
+            return None
+        with self._lock:
+            self._stats["lookups"] += 1
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                self._stats["bytes_saved"] += entry[1]
+                return entry[0]
+
+        frames = self._disk_get(key)
+        with self._lock:
+            if frames is None:
+                self._stats["misses"] += 1
+                return None
+            size = sum(len(frame) for frame in frames)
+            self._stats["disk_hits"] += 1
+            self._stats["bytes_saved"] += size
+        self._memory_put(key, frames, size)
+        return frames
+
+    def put(self, key: Optional[str], frames: List[bytes]):
+        """写入缓存，内存层立即生效，磁盘层在后台写入"""
+        if key is None or not frames:
+            return
+        frames = list(frames)
+        size = sum(len(frame) for frame in frames)
+        with self._lock:
+            self._stats["stores"] += 1
+        self._memory_put(key, frames, size)
+        if self.disk_budget > 0 and size <= self.disk_budget:
+            self._disk_executor.submit(self._disk_put, key, frames, size)
+
+    def _memory_put(self, key: str, frames: List[bytes], size: int):
+        if size > self.memory_budget:
+            return
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_size -= old[1]
+            self._memory[key] = (frames, size)
+            self._memory_size += size
+            while self._memory_size > self.memory_budget:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_size -= evicted
+
+    # ---------- 磁盘层 ----------
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.bin")
+
+    def _ensure_disk_index(self):
+        """扫描缓存目录，按修改时间建立最近使用顺序"""
+        with self._lock:
+            if self._disk_loaded:
+                return
+            self._disk_loaded = True
+        entries = []
+        if os.path.isdir(self.cache_dir):
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith(".bin"):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        entries.sort()
+        with self._lock:
+            for _, key, size in entries:
+                self._disk_index[key] = size
+                self._disk_size += size
+
+    def _disk_get(self, key: str) -> Optional[List[bytes]]:
+        if self.disk_budget <= 0:
+            return None
+        self._ensure_disk_index()
+        with self._lock:
+            if key not in self._disk_index:
+                return None
+            self._disk_index.move_to_end(key)
+        path = self._blob_path(key)
+        frames = read_frames_blob(path)
+        if frames is None:
+            with self._lock:
+                self._disk_size -= self._disk_index.pop(key, 0)
+            return None
+        try:
+            # 更新修改时间，重启后仍按最近使用顺序淘汰
+            os.utime(path)
+        except OSError:
+            pass
+        return frames
+
+    def _disk_put(self, key: str, frames: List[bytes], size: int):
+        self._ensure_disk_index()
+        with self._lock:
+            if key in self._disk_index:
+                return
+        path = self._blob_path(key)
+        if not write_frames_blob(path, frames):
+            return
+        try:
+            # 按文件实际大小（含帧长度索引）计入预算，与重启后扫描目录的结果一致
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        evicted = []
+        with self._lock:
+            self._disk_index[key] = size
+            self._disk_size += size
+            while self._disk_size > self.disk_budget and self._disk_index:
+                old_key, old_size = self._disk_index.popitem(last=False)
+                self._disk_size -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._blob_path(old_key))
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict:
+        """命中率与节省的合成音频字节数"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_size
+            stats["disk_entries"] = len(self._disk_index)
+            stats["disk_bytes"] = self._disk_size
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        stats["hit_rate"] = round(hits / stats["lookups"], 4) if stats["lookups"] else 0.0
+        return stats
+
+
+class SentenceRecorder:
+    """收集一句话合成后的帧序列，完整结束后写入缓存"""
+
+    def __init__(self, cache: TTSCache, key: Optional[str] = None):
+        self.cache = cache
+        self.key = key
+        self.frames: List[bytes] = []
+
+    def add(self, frame: bytes):
+        if isinstance(frame, (bytes, bytearray)):
+            self.frames.append(bytes(frame))
+
+    def commit(self, key: Optional[str] = None):
+        """写入缓存，key 为空时使用创建时的键"""
+        key = key or self.key
+        if key is not None and self.frames:
+            self.cache.put(key, self.frames)
+        self.frames = []
+
+
+_tts_cache = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache(config: Dict = None) -> Optional[TTSCache]:
+    """获取进程级TTS缓存（单例模式），首次创建时读取 tts_cache 配置，未启用时返回 None"""
+    global _tts_cache
+    if _tts_cache is None:
+        with _tts_cache_lock:
+            if _tts_cache is None:
+                cache_config = (config or {}).get("tts_cache", {}) or {}
+                enabled = cache_config.get("enabled", True)
+                if str(enabled).lower() not in ("true", "1", "yes"):
+                    _tts_cache = False
+                else:
+                    _tts_cache = TTSCache(
+                        cache_dir=cache_config.get("dir", DEFAULT_CACHE_DIR),
+                        memory_bytes=float(cache_config.get("memory_mb", DEFAULT_MEMORY_MB))
+                        * 1024
+                        * 1024,
+                        disk_bytes=float(cache_config.get("disk_mb", DEFAULT_DISK_MB))
+                        * 1024
+                        * 1024,
+                        max_text_length=int(
+                            cache_config.get("max_text_length", DEFAULT_MAX_TEXT_LENGTH)
+                        ),
+                    )
+                    logger.bind(tag=TAG).info(
+                        f"TTS结果缓存已启用，目录: {_tts_cache.cache_dir}"
+                    )
+    return _tts_cache or None
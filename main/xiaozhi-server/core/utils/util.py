@@ -11,6 +11,7 @@ import numpy as np
 import opuslib_next
 from io import BytesIO
 from core.utils import p3
+from core.utils.audio_decoder import decode_to_pcm16
 from pydub import AudioSegment
 from typing import Callable, Any
 
@@ -226,6 +227,23 @@ def extract_json_from_string(input_string):
     return None
 
 
+def load_pcm16(source, file_type, sample_rate=16000) -> bytes:
+    """
+    将音频文件路径或二进制数据解码为单声道/指定采样率/16位小端PCM
+    WAV、MP3走进程内解码，其他格式或解码失败时回退到pydub(ffmpeg)
+    """
+    raw_data = decode_to_pcm16(source, file_type, sample_rate)
+    if raw_data is not None:
+        return raw_data
+
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    # 读取音频文件，-nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
+    audio = AudioSegment.from_file(source, format=file_type, parameters=["-nostdin"])
+    audio = audio.set_channels(1).set_frame_rate(sample_rate).set_sample_width(2)
+    return audio.raw_data
+
+
 def audio_to_data_stream(
     audio_file_path, is_opus=True, callback: Callable[[Any], Any] = None, sample_rate=16000, opus_encoder=None
 ) -> None:
@@ -233,95 +251,87 @@ def audio_to_data_stream(
     file_type = os.path.splitext(audio_file_path)[1]
     if file_type:
         file_type = file_type.lstrip(".")
-    # 读取音频文件，-nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
-    audio = AudioSegment.from_file(
-        audio_file_path, format=file_type, parameters=["-nostdin"]
-    )
-
-    # 转换为单声道/指定采样率/16位小端编码（确保与编码器匹配）
-    audio = audio.set_channels(1).set_frame_rate(sample_rate).set_sample_width(2)
-
-    # 获取原始PCM数据（16位小端）
-    raw_data = audio.raw_data
+    raw_data = load_pcm16(audio_file_path, file_type, sample_rate)
     pcm_to_data_stream(raw_data, is_opus, callback, sample_rate, opus_encoder)
 
 
-async def audio_to_data(
-    audio_file_path: str, is_opus: bool = True, use_cache: bool = True
-) -> list[bytes]:
+def encode_audio_file(audio_file_path: str, is_opus: bool = True, sample_rate: int = 16000) -> list[bytes]:
     """
-    将音频文件转换为Opus/PCM编码的帧列表
+    将音频文件编码为60ms一帧的Opus/PCM帧列表（阻塞调用）
     Args:
         audio_file_path: 音频文件路径
         is_opus: 是否进行Opus编码
-        use_cache: 是否使用缓存
+        sample_rate: 目标采样率
     """
-    from core.utils.cache.manager import cache_manager
-    from core.utils.cache.config import CacheType
-
-    # 生成缓存键，包含文件路径和编码类型
-    cache_key = f"{audio_file_path}:{is_opus}"
-
-    # 尝试从缓存获取结果
-    if use_cache:
-        cached_result = cache_manager.get(CacheType.AUDIO_DATA, cache_key)
-        if cached_result is not None:
-            return cached_result
-
-    def _sync_audio_to_data():
-        # 获取文件后缀名
-        file_type = os.path.splitext(audio_file_path)[1]
-        if file_type:
-            file_type = file_type.lstrip(".")
-        # 读取音频文件，-nostdin 参数：不要从标准输入读取数据，否则FFmpeg会阻塞
-        audio = AudioSegment.from_file(
-            audio_file_path, format=file_type, parameters=["-nostdin"]
-        )
-
-        # 转换为单声道/16kHz采样率/16位小端编码（确保与编码器匹配）
-        audio = audio.set_channels(1).set_frame_rate(16000).set_sample_width(2)
+    # 获取文件后缀名
+    file_type = os.path.splitext(audio_file_path)[1]
+    if file_type:
+        file_type = file_type.lstrip(".")
+    # 转换为单声道/指定采样率/16位小端编码（确保与编码器匹配）
+    raw_data = load_pcm16(audio_file_path, file_type, sample_rate)
 
-        # 获取原始PCM数据（16位小端）
-        raw_data = audio.raw_data
+    # 初始化Opus编码器
+    encoder = (
+        opuslib_next.Encoder(sample_rate, 1, opuslib_next.APPLICATION_AUDIO)
+        if is_opus
+        else None
+    )
 
-        # 初始化Opus编码器
-        encoder = opuslib_next.Encoder(16000, 1, opuslib_next.APPLICATION_AUDIO)
+    # 编码参数
+    frame_duration = 60  # 60ms per frame
+    frame_size = int(sample_rate * frame_duration / 1000)  # samples/frame
 
-        # 编码参数
-        frame_duration = 60  # 60ms per frame
-        frame_size = int(16000 * frame_duration / 1000)  # 960 samples/frame
+    datas = []
+    # 按帧处理所有音频数据（包括最后一帧可能补零）
+    for i in range(0, len(raw_data), frame_size * 2):  # 16bit=2bytes/sample
+        # 获取当前帧的二进制数据
+        chunk = raw_data[i : i + frame_size * 2]
 
-        datas = []
-        # 按帧处理所有音频数据（包括最后一帧可能补零）
-        for i in range(0, len(raw_data), frame_size * 2):  # 16bit=2bytes/sample
-            # 获取当前帧的二进制数据
-            chunk = raw_data[i : i + frame_size * 2]
+        # 如果最后一帧不足，补零
+        if len(chunk) < frame_size * 2:
+            chunk += b"\x00" * (frame_size * 2 - len(chunk))
 
-            # 如果最后一帧不足，补零
-            if len(chunk) < frame_size * 2:
-                chunk += b"\x00" * (frame_size * 2 - len(chunk))
+        if is_opus:
+            # 转换为numpy数组处理
+            np_frame = np.frombuffer(chunk, dtype=np.int16)
+            # 编码Opus数据
+            frame_data = encoder.encode(np_frame.tobytes(), frame_size)
+        else:
+            frame_data = chunk if isinstance(chunk, bytes) else bytes(chunk)
 
-            if is_opus:
-                # 转换为numpy数组处理
-                np_frame = np.frombuffer(chunk, dtype=np.int16)
-                # 编码Opus数据
-                frame_data = encoder.encode(np_frame.tobytes(), frame_size)
-            else:
-                frame_data = chunk if isinstance(chunk, bytes) else bytes(chunk)
+        datas.append(frame_data)
 
-            datas.append(frame_data)
+    return datas
 
-        return datas
 
+async def audio_to_data(
+    audio_file_path: str, is_opus: bool = True, use_cache: bool = True, sample_rate: int = 16000
+) -> list[bytes]:
+    """
+    将音频文件转换为Opus/PCM编码的帧列表
+    Args:
+        audio_file_path: 音频文件路径
+        is_opus: 是否进行Opus编码
+        use_cache: 是否使用预编码缓存（文件修改后缓存自动失效）
+        sample_rate: 目标采样率
+    """
     loop = asyncio.get_running_loop()
-    # 在单独的线程中执行同步的音频处理操作
-    result = await loop.run_in_executor(None, _sync_audio_to_data)
+    if not use_cache:
+        # 在单独的线程中执行同步的音频处理操作
+        return await loop.run_in_executor(
+            None, encode_audio_file, audio_file_path, is_opus, sample_rate
+        )
 
-    # 将结果存入缓存，使用配置中定义的TTL（10分钟）
-    if use_cache:
-        cache_manager.set(CacheType.AUDIO_DATA, cache_key, result)
+    from core.utils.opus_asset_cache import get_opus_asset_cache
 
-    return result
+    asset_cache = get_opus_asset_cache()
+    # 内存命中时只需一次stat，无需切换线程
+    cached_result = asset_cache.get_cached(audio_file_path, is_opus, sample_rate)
+    if cached_result is not None:
+        return cached_result
+    return await loop.run_in_executor(
+        None, asset_cache.get_frames, audio_file_path, is_opus, sample_rate
+    )
 
 
 def audio_bytes_to_data_stream(
@@ -334,12 +344,8 @@ def audio_bytes_to_data_stream(
         # 直接用p3解码
         return p3.decode_opus_from_bytes_stream(audio_bytes, callback)
     else:
-        # 其他格式用pydub
-        audio = AudioSegment.from_file(
-            BytesIO(audio_bytes), format=file_type, parameters=["-nostdin"]
-        )
-        audio = audio.set_channels(1).set_frame_rate(sample_rate).set_sample_width(2)
-        raw_data = audio.raw_data
+        # 其他格式优先进程内解码，不支持时回退pydub
+        raw_data = load_pcm16(audio_bytes, file_type, sample_rate)
         pcm_to_data_stream(raw_data, is_opus, callback, sample_rate, opus_encoder)
 
 
@@ -70,21 +70,6 @@ class WakeupWordsConfig:
             print(f"加载配置文件时发生未知错误: {e}")
             return {}
 
-    def _save_config(self, config: Dict):
-        """保存配置到文件，使用文件锁保护"""
-        try:
-            with open(self.config_file, "w", encoding="utf-8") as f:
-                with FileLock(f, timeout=self._lock_timeout):
-                    yaml.dump(config, f, allow_unicode=True)
-                    self._config_cache = config
-                    self._last_load_time = time.time()
-        except (TimeoutError, IOError) as e:
-            print(f"保存配置文件失败: {e}")
-            raise
-        except Exception as e:
-            print(f"保存配置文件时发生未知错误: {e}")
-            raise
-
     def get_wakeup_response(self, voice: str) -> Dict:
         voice = hashlib.md5(voice.encode()).hexdigest()
         """获取唤醒词回复配置"""
@@ -105,16 +90,26 @@ class WakeupWordsConfig:
         try:
             # 过滤表情符号
             filtered_text = re.sub(r'[\U0001F600-\U0001F64F\U0001F900-\U0001F9FF]', '', text)
-            
-            config = self._load_config()
+
             voice_hash = hashlib.md5(voice.encode()).hexdigest()
-            config[voice_hash] = {
-                "voice": voice,
-                "file_path": file_path,
-                "time": time.time(),
-                "text": filtered_text,
-            }
-            self._save_config(config)
+            # 读取、修改、写回在同一把文件锁内完成，多个工作进程同时更新时不会互相覆盖
+            with open(self.config_file, "a+", encoding="utf-8") as f:
+                with FileLock(f, timeout=self._lock_timeout):
+                    f.seek(0)
+                    content = f.read()
+                    config = (yaml.safe_load(content) if content else None) or {}
+                    config[voice_hash] = {
+                        "voice": voice,
+                        "file_path": file_path,
+                        "time": time.time(),
+                        "text": filtered_text,
+                    }
+                    f.seek(0)
+                    f.truncate()
+                    yaml.dump(config, f, allow_unicode=True)
+                    f.flush()
+                    self._config_cache = config
+                    self._last_load_time = time.time()
         except Exception as e:
             print(f"更新唤醒词回复配置失败: {e}")
             raise
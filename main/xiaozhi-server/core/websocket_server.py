@@ -1,5 +1,7 @@
+import time
 import asyncio
 import logging
+import contextlib
 
 import websockets
 from config.logger import setup_logging
@@ -35,15 +37,27 @@ from config.config_loader import get_config_from_api_async
 from core.auth import AuthManager, AuthenticationError
 from core.utils.modules_initialize import initialize_modules
 from core.utils.util import check_vad_update, check_asr_update
+from core.supervisor import get_affinity_port_base
+from core.utils.provider_registry import get_provider_registry
 
 TAG = __name__
 
 
 class WebSocketServer:
-    def __init__(self, config: dict):
+    def __init__(self, config: dict, worker_index: int = None):
         self.config = config
         self.logger = setup_logging(config)
         self.config_lock = asyncio.Lock()
+        # 多进程模式下的工作进程序号，单进程运行时为None
+        self.worker_index = worker_index
+        # 开始监听后置位，多进程模式下据此通知主进程本进程已就绪
+        self.started = asyncio.Event()
+        self._servers = []
+        # 当前进程上的所有连接，平滑下线时逐个关闭
+        self.active_connections = set()
+        # 公共组件在提供者注册表中的租约，与公共配置相同的设备直接复用这些实例
+        self.provider_registry = get_provider_registry(config)
+        self._provider_leases = []
         modules = initialize_modules(
             self.logger,
             self.config,
@@ -53,6 +67,7 @@ class WebSocketServer:
             False,
             "Memory" in self.config["selected_module"],
             "Intent" in self.config["selected_module"],
+            leases=self._provider_leases,
         )
         self._vad = modules["vad"] if "vad" in modules else None
         self._asr = modules["asr"] if "asr" in modules else None
@@ -71,13 +86,77 @@ class WebSocketServer:
     async def start(self):
         server_config = self.config["server"]
         host = server_config.get("ip", "0.0.0.0")
-        port = int(server_config.get("port", 8000))
+        ports = [int(server_config.get("port", 8000))]
+        # 多进程模式：各工作进程以 SO_REUSEPORT 监听同一端口，开启设备亲和时再监听自己的专属端口
+        reuse_port = self.worker_index is not None
+        if reuse_port:
+            affinity_port_base = get_affinity_port_base(self.config)
+            if affinity_port_base is not None:
+                ports.append(affinity_port_base + self.worker_index)
 
-        async with websockets.serve(
-            self._handle_connection, host, port, process_request=self._http_response
-        ):
+        async with contextlib.AsyncExitStack() as stack:
+            for port in ports:
+                server = await stack.enter_async_context(
+                    websockets.serve(
+                        self._handle_connection,
+                        host,
+                        port,
+                        process_request=self._http_response,
+                        reuse_port=reuse_port,
+                    )
+                )
+                self._servers.append(server)
+            self.started.set()
             await asyncio.Future()
 
+    @staticmethod
+    def _is_mid_turn(handler: ConnectionHandler) -> bool:
+        """连接是否处于一轮对话中：用户正在说话、等待回复，或正在播放回复"""
+        llm_task = handler.llm_task
+        return (
+            handler.client_have_voice
+            or handler.client_is_speaking
+            or (llm_task is not None and not llm_task.done())
+        )
+
+    async def _close_for_restart(self, handler: ConnectionHandler):
+        try:
+            if handler.websocket is not None:
+                # 1012: 服务重启，设备会重新连接到其他工作进程
+                await handler.websocket.close(1012, "server restarting")
+        except Exception as e:
+            self.logger.bind(tag=TAG).warning(f"平滑下线时关闭连接出错: {e}")
+
+    async def drain(self, timeout: float):
+        """
+        平滑下线：停止接受新连接；空闲的连接立即关闭，正在对话的连接等本轮结束后再关闭，
+        超过 timeout 秒后关闭剩余连接
+        """
+        for server in self._servers:
+            server.close(close_connections=False)
+        self.logger.bind(tag=TAG).info(
+            f"停止接受新连接，等待 {len(self.active_connections)} 个连接结束当前对话"
+        )
+        deadline = time.monotonic() + timeout
+        closing = set()
+        while self.active_connections and time.monotonic() < deadline:
+            # 轮询间隔要短：一轮对话结束（TTS stop 已下发）后应在设备开始下一句话之前关闭
+            for handler in list(self.active_connections):
+                if handler not in closing and not self._is_mid_turn(handler):
+                    closing.add(handler)
+                    asyncio.create_task(self._close_for_restart(handler))
+            await asyncio.sleep(0.1)
+
+        remaining = [h for h in self.active_connections if h not in closing]
+        if remaining:
+            self.logger.bind(tag=TAG).warning(f"平滑下线超时，强制关闭 {len(remaining)} 个连接")
+            await asyncio.gather(*(self._close_for_restart(h) for h in remaining))
+        # 等待连接完成保存与清理
+        for _ in range(20):
+            if not self.active_connections:
+                break
+            await asyncio.sleep(0.25)
+
     async def _handle_connection(self, websocket: websockets.ServerConnection):
         headers = dict(websocket.request.headers)
         if headers.get("device-id", None) is None:
@@ -123,11 +202,13 @@ class WebSocketServer:
             self._intent,
             self,  # 传入server实例
         )
+        self.active_connections.add(handler)
         try:
             await handler.handle_connection(websocket)
         except Exception as e:
             self.logger.bind(tag=TAG).error(f"处理连接时出错: {e}")
         finally:
+            self.active_connections.discard(handler)
             # 强制关闭连接（如果还没有关闭的话）
             try:
                 # 安全地检查WebSocket状态并关闭
@@ -175,6 +256,7 @@ class WebSocketServer:
                 # 更新配置
                 self.config = new_config
                 # 重新初始化组件
+                new_leases = []
                 modules = initialize_modules(
                     self.logger,
                     new_config,
@@ -184,7 +266,19 @@ class WebSocketServer:
                     False,
                     "Memory" in new_config["selected_module"],
                     "Intent" in new_config["selected_module"],
+                    leases=new_leases,
                 )
+                # 归还被替换组件的租约，未重新初始化的组件沿用原租约
+                replaced, kept = [], []
+                for key in self._provider_leases:
+                    kind = self.provider_registry.lease_kind(key)
+                    (replaced if kind in modules else kept).append(key)
+                self._provider_leases = kept + new_leases
+                # 配置已变化的实例在最后一个旧连接关闭后立即释放
+                retired = [key for key in replaced if key not in new_leases]
+                replaced = [key for key in replaced if key in new_leases]
+                self.provider_registry.release_all(replaced)
+                self.provider_registry.release_all(retired, retire=True)
 
                 # 更新组件实例
                 if "vad" in modules:
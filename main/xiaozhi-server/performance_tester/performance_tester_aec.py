@@ -0,0 +1,182 @@
+import os
+import time
+import logging
+import statistics
+import numpy as np
+from tabulate import tabulate
+
+from core.utils.aec import EchoCanceller
+from core.utils.audio_decoder import decode_to_pcm16
+
+# 设置全局日志级别为 WARNING
+logging.basicConfig(level=logging.WARNING)
+
+description = "服务端回声消除性能测试（原实现与环形缓冲区+预计算频谱实现的每帧耗时与回声抑制量对比）"
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "assets")
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 960
+FRAME_MS = 60
+# 模拟声学路径：设备播放到麦克风拾音的延迟与衰减
+ECHO_DELAY_SAMPLES = 40
+ECHO_GAIN = 0.6
+
+
+class LegacyEchoCanceller:
+    """原实现：字典缓存参考帧，每帧排序全部时间戳、线性查找并重新计算候选帧频谱"""
+
+    def __init__(self):
+        self.aec_audio_cache = {}
+
+    def add_reference(self, timestamp, pcm):
+        self.aec_audio_cache[timestamp] = bytes(pcm)
+
+    def process(self, timestamp, pcm_frame):
+        mic_audio = np.frombuffer(pcm_frame, dtype=np.int16).astype(np.float32)
+        if np.sqrt(np.mean(mic_audio**2)) < 100:
+            return pcm_frame
+        sorted_timestamps = sorted(self.aec_audio_cache.keys())
+        if len(sorted_timestamps) < 2:
+            return pcm_frame
+        n = len(mic_audio)
+        closest_idx = min(
+            range(len(sorted_timestamps)), key=lambda i: abs(sorted_timestamps[i] - timestamp)
+        )
+        mic_fft = np.fft.rfft(mic_audio * np.hanning(n))
+        mic_log_psd = 10 * np.log10(np.abs(mic_fft) ** 2 + 1e-8)
+        mic_P_xx = np.dot(mic_log_psd, mic_log_psd)
+        best_corr, best_ref_idx, best_ref_rms = -1, closest_idx, 0.0
+        for offset in range(-2, 3):
+            test_idx = closest_idx + offset
+            if test_idx < 0 or test_idx >= len(sorted_timestamps):
+                continue
+            test_ref = np.frombuffer(
+                self.aec_audio_cache[sorted_timestamps[test_idx]], dtype=np.int16
+            ).astype(np.float32)
+            test_ref_rms = np.sqrt(np.mean(test_ref**2))
+            if test_ref_rms < 50:
+                continue
+            test_log_psd = 10 * np.log10(
+                np.abs(np.fft.rfft(test_ref * np.hanning(len(test_ref)))) ** 2 + 1e-8
+            )
+            P_xy = np.dot(mic_log_psd, test_log_psd)
+            P_yy = np.dot(test_log_psd, test_log_psd)
+            corr = abs(P_xy) / (np.sqrt(mic_P_xx) * np.sqrt(P_yy) + 1e-8)
+            if corr > best_corr:
+                best_corr, best_ref_idx, best_ref_rms = corr, test_idx, test_ref_rms
+        if best_ref_rms < 50:
+            return pcm_frame
+        best_ref = np.frombuffer(
+            self.aec_audio_cache[sorted_timestamps[best_ref_idx]], dtype=np.int16
+        ).astype(np.float32)[:n]
+        mic_mag = np.abs(mic_fft)
+        ref_mag = np.abs(np.fft.rfft(best_ref * np.hanning(n)))
+        scale = np.sum(mic_mag * ref_mag) / (np.dot(ref_mag, ref_mag) + 1e-8)
+        coef = max(0.5, min(3.0, 1.0 + scale * 3 + (best_corr - 0.97) * 30))
+        result_mag = np.maximum(mic_mag - ref_mag * scale * coef * 1.5, mic_mag * 0.1)
+        output = np.fft.irfft(result_mag * np.exp(1j * np.angle(mic_fft)), n)
+        if best_corr >= 0.97 and best_ref_rms > 500:
+            output = output * 0.3
+        return np.clip(output, -32768, 32767).astype(np.int16).tobytes()
+
+
+class AECPerformanceTester:
+    def __init__(self, history_seconds=120):
+        # 原实现最多保留120秒的参考帧，查找开销随缓存条数增长
+        self.history_frames = int(history_seconds * 1000 / FRAME_MS)
+        self.results = []
+
+    def _load_fixture(self, name):
+        pcm = decode_to_pcm16(os.path.join(ASSET_DIR, name), name.rsplit(".", 1)[-1], SAMPLE_RATE)
+        return np.frombuffer(pcm or b"", dtype=np.int16).astype(np.float32)
+
+    def _build_signals(self):
+        """播放音频为参考信号；麦克风信号为延迟衰减后的回声，后半段叠加近端说话"""
+        far = np.concatenate(
+            [self._load_fixture("wakeup_words.wav"), self._load_fixture("bind_not_found.wav")]
+        )
+        near = self._load_fixture("max_output_size.wav") * 0.8
+        frames = len(far) // FRAME_SAMPLES
+        far = far[: frames * FRAME_SAMPLES]
+        echo = np.zeros_like(far)
+        echo[ECHO_DELAY_SAMPLES:] = far[:-ECHO_DELAY_SAMPLES] * ECHO_GAIN
+        near_track = np.zeros_like(far)
+        start = len(far) // 2
+        length = min(len(near), len(far) - start)
+        near_track[start : start + length] = near[:length]
+        mic = np.clip(echo + near_track, -32768, 32767)
+        return far, mic, echo, near_track, frames
+
+    @staticmethod
+    def _energy(signal):
+        return float(np.sum(signal.astype(np.float64) ** 2)) + 1e-8
+
+    def _run_engine(self, name, engine, far, mic, echo, near_track, frames):
+        # 预先填充历史参考帧（时间戳早于本次播放），模拟长时间对话后的缓存规模
+        history = np.zeros(FRAME_SAMPLES, dtype=np.int16).tobytes()
+        base_ts = 1
+        for i in range(self.history_frames):
+            engine.add_reference(base_ts + i * FRAME_MS, history)
+        base_ts += self.history_frames * FRAME_MS
+
+        for i in range(frames):
+            chunk = far[i * FRAME_SAMPLES : (i + 1) * FRAME_SAMPLES]
+            engine.add_reference(base_ts + i * FRAME_MS, chunk.astype(np.int16).tobytes())
+
+        timings = []
+        output = np.zeros_like(mic)
+        for i in range(frames):
+            frame = mic[i * FRAME_SAMPLES : (i + 1) * FRAME_SAMPLES].astype(np.int16).tobytes()
+            start = time.perf_counter()
+            result = engine.process(base_ts + i * FRAME_MS, frame)
+            timings.append((time.perf_counter() - start) * 1000)
+            output[i * FRAME_SAMPLES : (i + 1) * FRAME_SAMPLES] = np.frombuffer(result, dtype=np.int16)
+
+        echo_only = near_track == 0
+        # ERLE：仅有回声的片段中，处理前后能量之比
+        erle = 10 * np.log10(self._energy(mic[echo_only]) / self._energy(output[echo_only]))
+        # 近端说话片段保留的能量比例
+        near_kept = self._energy(output[~echo_only]) / self._energy(mic[~echo_only])
+        self.results.append(
+            [
+                name,
+                f"{statistics.mean(timings):.3f}",
+                f"{sorted(timings)[int(len(timings) * 0.95) - 1]:.3f}",
+                f"{erle:.1f}",
+                f"{near_kept * 100:.0f}%",
+            ]
+        )
+
+    def run(self):
+        far, mic, echo, near_track, frames = self._build_signals()
+        if frames == 0:
+            print(f"{ASSET_DIR} 中的测试音频无法解码")
+            return
+        print(
+            f"开始测试：{frames} 帧（{frames * FRAME_MS / 1000:.1f}秒）音频，"
+            f"参考缓存中预置 {self.history_frames} 帧历史音频..."
+        )
+        self._run_engine("原实现", LegacyEchoCanceller(), far, mic, echo, near_track, frames)
+        self._run_engine(
+            "环形缓冲区+预计算频谱", EchoCanceller(FRAME_SAMPLES), far, mic, echo, near_track, frames
+        )
+        print(
+            tabulate(
+                self.results,
+                headers=["实现", "平均每帧(ms)", "P95每帧(ms)", "回声抑制ERLE(dB)", "近端语音保留"],
+                tablefmt="github",
+            )
+        )
+        print("\n测试说明:")
+        print("- 测试音频来自 config/assets，回声按固定延迟与衰减模拟")
+        print("- ERLE越大回声抑制越强；近端语音保留越接近100%越好")
+
+
+# 为了performance_tester.py的调用需求
+def main():
+    tester = AECPerformanceTester()
+    tester.run()
+
+
+if __name__ == "__main__":
+    main()
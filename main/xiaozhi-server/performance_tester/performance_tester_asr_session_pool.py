@@ -0,0 +1,134 @@
+import json
+import time
+import uuid
+import asyncio
+import logging
+import statistics
+
+import websockets
+from tabulate import tabulate
+
+from core.providers.asr.session_pool import StreamingSessionPool
+
+# 设置全局日志级别为 WARNING
+logging.basicConfig(level=logging.WARNING)
+# 取消预热握手时模拟服务端会打印无关的异常日志
+logging.getLogger("websockets").setLevel(logging.CRITICAL)
+
+description = "流式ASR预热会话池测试（本地模拟阿里云实时识别协议，对比冷启动与预热会话的首包就绪耗时）"
+
+
+class ASRSessionPoolTester:
+    def __init__(self, rounds=20, handshake_delay=0.15, start_delay=0.02):
+        self.rounds = rounds
+        # 模拟TLS与Token鉴权握手耗时
+        self.handshake_delay = handshake_delay
+        # 模拟服务端处理StartTranscription的耗时
+        self.start_delay = start_delay
+        self.results = []
+
+    async def _process_request(self, connection, request):
+        await asyncio.sleep(self.handshake_delay)
+        return None
+
+    async def _handler(self, ws):
+        """同一连接可依次承载多次识别任务，与阿里云实时识别协议一致"""
+        task_id = None
+        async for message in ws:
+            if isinstance(message, bytes):
+                continue
+            header = json.loads(message)["header"]
+            name = header["name"]
+            task_id = header.get("task_id", task_id)
+            if name == "StartTranscription":
+                await asyncio.sleep(self.start_delay)
+                reply = "TranscriptionStarted"
+            elif name == "StopTranscription":
+                reply = "TranscriptionCompleted"
+            else:
+                continue
+            await ws.send(
+                json.dumps(
+                    {"header": {"name": reply, "status": 20000000, "task_id": task_id}}
+                )
+            )
+
+    async def _run_mode(self, name, url, pool_size):
+        async def connect():
+            return await websockets.connect(url, ping_interval=None, close_timeout=2)
+
+        pool = StreamingSessionPool(name, connect, size=pool_size)
+        if pool_size:
+            # 让后台任务先完成预热
+            pool._ensure_maintainer()
+            await asyncio.sleep(self.handshake_delay * 3)
+
+        latencies = []
+        for _ in range(self.rounds):
+            start = time.perf_counter()
+            ws = await pool.acquire()
+            task_id = uuid.uuid4().hex
+            await ws.send(
+                json.dumps({"header": {"name": "StartTranscription", "task_id": task_id}})
+            )
+            await ws.recv()
+            latencies.append((time.perf_counter() - start) * 1000)
+            await ws.send(
+                json.dumps({"header": {"name": "StopTranscription", "task_id": task_id}})
+            )
+            reusable = json.loads(await ws.recv())["header"]["name"] == "TranscriptionCompleted"
+            await pool.release(ws, reuse=reusable and pool_size > 0)
+            # 模拟两次说话之间的间隔
+            await asyncio.sleep(0.05)
+
+        stats = pool.get_stats()
+        await pool.close()
+        latencies.sort()
+        self.results.append(
+            [
+                name,
+                f"{statistics.mean(latencies):.1f}",
+                f"{latencies[len(latencies) // 2]:.1f}",
+                f"{latencies[int(len(latencies) * 0.95) - 1]:.1f}",
+                f"{stats['hits']}/{stats['hits'] + stats['misses']}",
+                stats["recycled"],
+            ]
+        )
+
+    async def run(self):
+        server = await websockets.serve(
+            self._handler, "127.0.0.1", 0, process_request=self._process_request
+        )
+        port = server.sockets[0].getsockname()[1]
+        url = f"ws://127.0.0.1:{port}/ws/v1"
+        print(
+            f"开始测试：{self.rounds} 次识别，模拟握手耗时 {self.handshake_delay * 1000:.0f}ms，"
+            f"StartTranscription 耗时 {self.start_delay * 1000:.0f}ms..."
+        )
+        try:
+            await self._run_mode("每次新建连接", url, 0)
+            await self._run_mode("预热会话池", url, 2)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+        print(
+            tabulate(
+                self.results,
+                headers=["模式", "平均就绪(ms)", "P50(ms)", "P95(ms)", "池命中", "归还复用"],
+                tablefmt="github",
+            )
+        )
+        print("\n测试说明:")
+        print("- 就绪耗时：从VAD检测到说话到收到TranscriptionStarted的时间")
+        print("- 预热会话池模式下握手在后台完成，识别结束后连接归还池中复用")
+
+
+# 为了performance_tester.py的调用需求
+async def main():
+    tester = ASRSessionPoolTester()
+    await tester.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
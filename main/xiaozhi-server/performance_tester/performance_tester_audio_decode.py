@@ -0,0 +1,101 @@
+import os
+import glob
+import time
+import logging
+import statistics
+from io import BytesIO
+from tabulate import tabulate
+from pydub import AudioSegment
+
+from core.utils.audio_decoder import decode_to_pcm16
+
+# 设置全局日志级别为 WARNING
+logging.basicConfig(level=logging.WARNING)
+
+description = "音频解码性能测试（pydub/ffmpeg 与进程内解码对比）"
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config", "assets")
+
+
+class AudioDecodePerformanceTester:
+    def __init__(self, sample_rate=16000, rounds=20):
+        self.sample_rate = sample_rate
+        self.rounds = rounds
+        self.results = []
+
+    def _collect_files(self):
+        """收集测试音频：提示音、唤醒回复等，覆盖 wav 与 mp3"""
+        files = []
+        for pattern in ("*.wav", "*.mp3"):
+            files.extend(sorted(glob.glob(os.path.join(ASSET_DIR, pattern))))
+        return files
+
+    def _decode_pydub(self, audio_bytes, file_type):
+        audio = AudioSegment.from_file(
+            BytesIO(audio_bytes), format=file_type, parameters=["-nostdin"]
+        )
+        audio = audio.set_channels(1).set_frame_rate(self.sample_rate).set_sample_width(2)
+        return audio.raw_data
+
+    def _decode_native(self, audio_bytes, file_type):
+        return decode_to_pcm16(audio_bytes, file_type, self.sample_rate)
+
+    def _measure(self, func, audio_bytes, file_type):
+        timings = []
+        for _ in range(self.rounds):
+            start = time.perf_counter()
+            result = func(audio_bytes, file_type)
+            timings.append((time.perf_counter() - start) * 1000)
+            if result is None:
+                return None
+        return statistics.median(timings)
+
+    def run(self):
+        files = self._collect_files()
+        if not files:
+            print(f"{ASSET_DIR} 中没有找到测试音频")
+            return
+
+        print(f"开始音频解码性能测试，每个文件重复 {self.rounds} 次，取中位数...")
+        for path in files:
+            file_type = os.path.splitext(path)[1].lstrip(".")
+            with open(path, "rb") as f:
+                audio_bytes = f.read()
+
+            pydub_ms = self._measure(self._decode_pydub, audio_bytes, file_type)
+            native_ms = self._measure(self._decode_native, audio_bytes, file_type)
+            speedup = (
+                f"{pydub_ms / native_ms:.1f}x" if pydub_ms and native_ms else "-"
+            )
+            self.results.append(
+                [
+                    os.path.basename(path),
+                    file_type,
+                    f"{pydub_ms:.2f}" if pydub_ms is not None else "失败",
+                    f"{native_ms:.2f}" if native_ms is not None else "不支持(回退pydub)",
+                    speedup,
+                ]
+            )
+
+        print(
+            tabulate(
+                self.results,
+                headers=["文件", "格式", "pydub耗时(ms)", "进程内解码耗时(ms)", "加速比"],
+                tablefmt="github",
+                colalign=("left", "left", "right", "right", "right"),
+            )
+        )
+        print("\n测试说明:")
+        print(f"- 解码目标: 单声道/{self.sample_rate}Hz/16位PCM，与TTS下发路径一致")
+        print("- pydub 每次调用都会启动一个 ffmpeg 子进程")
+        print("- MP3 进程内解码需要安装 miniaudio，否则显示为回退pydub")
+
+
+# 为了performance_tester.py的调用需求
+def main():
+    tester = AudioDecodePerformanceTester()
+    tester.run()
+
+
+if __name__ == "__main__":
+    main()
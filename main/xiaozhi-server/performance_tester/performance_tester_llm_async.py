@@ -0,0 +1,170 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+from aiohttp import web
+from tabulate import tabulate
+
+from core.providers.llm.openai.openai import LLMProvider
+
+# 设置全局日志级别为 WARNING
+logging.basicConfig(level=logging.WARNING)
+
+description = "LLM并发流式对话资源占用测试（同步线程模式与异步连接池对比，本地模拟OpenAI接口）"
+
+
+def _run_mock_server(port_queue, tokens, interval):
+    """在独立进程中运行模拟的OpenAI兼容接口，避免服务端占用计入测试进程"""
+
+    async def chat_completions(request):
+        body = await request.json()
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+        for i in range(tokens):
+            chunk = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": body.get("model", "mock"),
+                "choices": [
+                    {"index": 0, "delta": {"content": f"字{i}"}, "finish_reason": None}
+                ],
+            }
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            await asyncio.sleep(interval)
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def serve():
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", chat_completions)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, backlog=2048)
+        await site.start()
+        port_queue.put(site._server.sockets[0].getsockname()[1])
+        await asyncio.Event().wait()
+
+    asyncio.run(serve())
+
+
+class LLMAsyncPerformanceTester:
+    def __init__(self, concurrency=500, tokens=40, interval=0.025):
+        self.concurrency = concurrency
+        self.tokens = tokens
+        self.interval = interval
+        self.process = psutil.Process()
+        self.results = []
+
+    async def _sample(self, stop_event, stats):
+        """周期性记录线程数与RSS峰值"""
+        while not stop_event.is_set():
+            stats["threads"] = max(stats["threads"], threading.active_count())
+            stats["rss"] = max(stats["rss"], self.process.memory_info().rss)
+            await asyncio.sleep(0.05)
+
+    async def _run_mode(self, name, provider, run_turns):
+        stats = {"threads": threading.active_count(), "rss": self.process.memory_info().rss}
+        base_threads, base_rss = stats["threads"], stats["rss"]
+        stop_event = asyncio.Event()
+        sampler = asyncio.create_task(self._sample(stop_event, stats))
+        start = time.perf_counter()
+        outputs = await run_turns(provider)
+        elapsed = time.perf_counter() - start
+        stop_event.set()
+        await sampler
+
+        complete = sum(1 for text in outputs if isinstance(text, str) and text)
+        self.results.append(
+            [
+                name,
+                f"{complete}/{self.concurrency}",
+                f"{elapsed:.2f}",
+                stats["threads"],
+                stats["threads"] - base_threads,
+                f"{stats['rss'] / 1024 / 1024:.1f}",
+                f"{(stats['rss'] - base_rss) / 1024 / 1024:.1f}",
+            ]
+        )
+
+    async def _sync_turns(self, provider):
+        """原有方式：每个进行中的对话占用一个线程迭代同步流"""
+        loop = asyncio.get_running_loop()
+        dialogue = [{"role": "user", "content": "你好"}]
+
+        def turn():
+            return "".join(provider.response("bench", list(dialogue)))
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return await asyncio.gather(
+                *(loop.run_in_executor(executor, turn) for _ in range(self.concurrency)),
+                return_exceptions=True,
+            )
+
+    async def _async_turns(self, provider):
+        """异步方式：所有对话在事件循环上复用共享连接池"""
+        dialogue = [{"role": "user", "content": "你好"}]
+
+        async def turn():
+            parts = []
+            async for token in provider.aresponse("bench", list(dialogue)):
+                parts.append(token)
+            return "".join(parts)
+
+        return await asyncio.gather(
+            *(turn() for _ in range(self.concurrency)), return_exceptions=True
+        )
+
+    async def run(self):
+        port_queue = multiprocessing.Queue()
+        server = multiprocessing.Process(
+            target=_run_mock_server,
+            args=(port_queue, self.tokens, self.interval),
+            daemon=True,
+        )
+        server.start()
+        try:
+            port = port_queue.get(timeout=10)
+            config = {
+                "model_name": "mock",
+                "api_key": "sk-mock",
+                "base_url": f"http://127.0.0.1:{port}/v1",
+                "max_concurrency": self.concurrency,
+            }
+            print(
+                f"开始测试：{self.concurrency} 个并发流式对话，"
+                f"每个 {self.tokens} 个token，间隔 {self.interval * 1000:.0f}ms..."
+            )
+            await self._run_mode("同步线程", LLMProvider(config), self._sync_turns)
+            await self._run_mode("异步连接池", LLMProvider(config), self._async_turns)
+        finally:
+            server.terminate()
+
+        print(
+            tabulate(
+                self.results,
+                headers=["模式", "完成", "耗时(s)", "峰值线程", "线程增量", "峰值RSS(MB)", "RSS增量(MB)"],
+                tablefmt="github",
+            )
+        )
+        print("\n测试说明:")
+        print("- 模拟服务运行在独立进程中，线程与内存只统计测试进程")
+        print("- 同步线程模式对应原先每轮对话占用一个线程池线程的方式")
+
+
+# 为了performance_tester.py的调用需求
+async def main():
+    tester = LLMAsyncPerformanceTester()
+    await tester.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,465 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import asyncio
+import argparse
+import statistics
+
+import psutil
+import websockets
+
+# 直接运行本脚本时把项目根目录加入路径，Provider 工厂按相对路径查找实现，需在项目根目录下运行
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from config.config_loader import read_config
+
+description = "多设备离线压力测试（进程内启动WebSocketServer，使用本地模拟ASR/LLM/TTS/VAD，输出JSON报告）"
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 960
+FRAME_MS = 60
+# 作为录音使用的测试音频
+UTTERANCE_ASSETS = ["wakeup_words.wav", "wakeup_words_short.wav", "max_output_size.wav"]
+MOCK_TOOL = {
+    "name": "self.get_device_status",
+    "description": "获取设备的音量、屏幕等状态",
+    "inputSchema": {"type": "object", "properties": {}},
+}
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))]
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def build_config(args) -> dict:
+    """以 config.yaml 为基础，选择模拟Provider并关闭所有需要外部服务的功能"""
+    config = read_config(os.path.join(PROJECT_DIR, "config.yaml"))
+    config["read_config_from_api"] = False
+    config["server"]["ip"] = "127.0.0.1"
+    config["server"]["port"] = args.port or _free_port()
+    config["server"]["auth_key"] = uuid.uuid4().hex
+    config["server"].setdefault("auth", {})["enabled"] = False
+    config["log"]["log_level"] = args.log_level
+    config["close_connection_no_voice_time"] = 3600
+    config["enable_greeting"] = False
+    config["context_providers"] = []
+    config["voiceprint"] = {}
+    config["selected_module"] = {
+        "VAD": "MockVAD",
+        "ASR": "MockASR",
+        "LLM": "MockLLM",
+        "TTS": "MockTTS",
+        "Memory": "nomem",
+        "Intent": "nointent",
+    }
+    config["VAD"]["MockVAD"] = {
+        "type": "mock",
+        "threshold_rms": 300,
+        "min_silence_duration_ms": args.vad_silence_ms,
+    }
+    config["ASR"]["MockASR"] = {
+        "type": "mock",
+        "delay_ms": args.asr_ms,
+        "output_dir": "tmp/",
+    }
+    config["LLM"]["MockLLM"] = {
+        "type": "mock",
+        "first_token_ms": args.llm_first_token_ms,
+        "token_interval_ms": args.llm_token_ms,
+    }
+    config["TTS"]["MockTTS"] = {
+        "type": "mock",
+        "delay_ms": args.tts_ms,
+        "ms_per_char": args.tts_ms_per_char,
+        "output_dir": "tmp/",
+    }
+    config["async_pipeline"] = {
+        "enabled": args.pipeline,
+        "executor_workers": config.get("async_pipeline", {}).get("executor_workers", 32),
+    }
+    return config
+
+
+def prepare_environment(config):
+    """
+    让服务端模块使用压测配置：写入配置缓存供 setup_logging 等读取，
+    并预置位置、天气缓存，避免构建提示词时访问外部接口
+    """
+    from config import settings
+    from core.utils.cache.manager import cache_manager, CacheType
+
+    settings.config_file_valid = True
+    cache_manager.set(CacheType.CONFIG, "main_config", config)
+    cache_manager.set(CacheType.LOCATION, "127.0.0.1", "压测机房")
+    cache_manager.set(CacheType.WEATHER, "压测机房", "晴，25℃")
+
+
+def load_utterances(silence_ms: int):
+    """把测试音频编码为Opus帧序列，末尾追加静音帧以触发服务端VAD的说话结束判定"""
+    import numpy as np
+    import opuslib_next
+    from core.utils.audio_decoder import decode_to_pcm16
+
+    encoder = opuslib_next.Encoder(SAMPLE_RATE, 1, opuslib_next.APPLICATION_VOIP)
+    frame_bytes = FRAME_SAMPLES * 2
+    silence = encoder.encode(bytes(frame_bytes), FRAME_SAMPLES)
+    silence_frames = silence_ms // FRAME_MS + 3
+    utterances = []
+    for name in UTTERANCE_ASSETS:
+        path = os.path.join(PROJECT_DIR, "config", "assets", name)
+        pcm = decode_to_pcm16(path, "wav", SAMPLE_RATE)
+        if not pcm:
+            continue
+        pcm = pcm[: len(pcm) // frame_bytes * frame_bytes]
+        # 编码器有状态，每段音频前先编码几帧静音复位
+        for _ in range(3):
+            encoder.encode(bytes(frame_bytes), FRAME_SAMPLES)
+        frames = [
+            encoder.encode(pcm[i : i + frame_bytes], FRAME_SAMPLES)
+            for i in range(0, len(pcm), frame_bytes)
+        ]
+        level = float(np.sqrt(np.mean(np.frombuffer(pcm, dtype=np.int16).astype(np.float32) ** 2)))
+        utterances.append({"name": name, "frames": frames, "rms": round(level, 1)})
+    return utterances, [silence] * silence_frames
+
+
+class SimulatedDevice:
+    """模拟一台设备：hello握手、应答MCP、按实时节奏发送录音并等待播放结束"""
+
+    def __init__(self, index, url, utterances, silence_frames, stats, args):
+        self.device_id = f"load-test-{index:04d}"
+        self.url = f"{url}?device-id={self.device_id}&client-id={uuid.uuid4()}"
+        self.utterances = utterances
+        self.silence_frames = silence_frames
+        self.stats = stats
+        self.args = args
+        self.random = random.Random(index)
+        self.websocket = None
+        self.session_id = None
+        self.hello_event = asyncio.Event()
+        self.first_audio_event = asyncio.Event()
+        self.tts_stop_event = asyncio.Event()
+        self.first_audio_at = None
+
+    async def run(self):
+        try:
+            async with websockets.connect(self.url, max_size=None) as websocket:
+                self.websocket = websocket
+                receiver = asyncio.create_task(self._receive())
+                try:
+                    await self._hello()
+                    for _ in range(self.args.turns):
+                        await self._turn()
+                        await asyncio.sleep(self.random.uniform(0, self.args.think_ms / 1000))
+                finally:
+                    receiver.cancel()
+        except Exception as e:
+            self.stats["errors"].append(f"{self.device_id}: {type(e).__name__}: {e}")
+
+    async def _hello(self):
+        await self.websocket.send(
+            json.dumps(
+                {
+                    "type": "hello",
+                    "version": 1,
+                    "transport": "websocket",
+                    "features": {"mcp": True},
+                    "audio_params": {
+                        "format": "opus",
+                        "sample_rate": SAMPLE_RATE,
+                        "channels": 1,
+                        "frame_duration": FRAME_MS,
+                    },
+                }
+            )
+        )
+        await asyncio.wait_for(self.hello_event.wait(), timeout=self.args.timeout)
+
+    async def _send_frames(self, frames, until=None):
+        """按60ms帧间隔发送，until 事件触发后停止"""
+        start = time.monotonic()
+        for index, frame in enumerate(frames):
+            if until is not None and until.is_set():
+                return
+            delay = start + index * FRAME_MS / 1000 - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.websocket.send(frame)
+            self.stats["frames_sent"] += 1
+
+    async def _turn(self):
+        utterance = self.utterances[self.random.randrange(len(self.utterances))]
+        self.first_audio_event.clear()
+        self.tts_stop_event.clear()
+        self.first_audio_at = None
+        await self.websocket.send(json.dumps({"type": "listen", "state": "start", "mode": "auto"}))
+        await self._send_frames(utterance["frames"])
+        speech_end = time.monotonic()
+        # 说话结束后继续发送静音，直到服务端开始回复
+        await self._send_frames(self.silence_frames, until=self.first_audio_event)
+        try:
+            await asyncio.wait_for(self.first_audio_event.wait(), timeout=self.args.timeout)
+        except asyncio.TimeoutError:
+            self.stats["turns_failed"] += 1
+            return
+        self.stats["latencies"].append((self.first_audio_at - speech_end) * 1000)
+        if self.random.random() < self.args.abort_ratio:
+            await asyncio.sleep(self.random.uniform(0.1, 0.5))
+            await self.websocket.send(json.dumps({"type": "abort", "reason": "wake_word_detected"}))
+            self.stats["turns_aborted"] += 1
+            return
+        try:
+            await asyncio.wait_for(self.tts_stop_event.wait(), timeout=self.args.timeout)
+            self.stats["turns_completed"] += 1
+        except asyncio.TimeoutError:
+            self.stats["turns_failed"] += 1
+
+    async def _receive(self):
+        async for message in self.websocket:
+            if isinstance(message, bytes):
+                self.stats["frames_received"] += 1
+                if not self.first_audio_event.is_set():
+                    self.first_audio_at = time.monotonic()
+                    self.first_audio_event.set()
+                continue
+            try:
+                msg = json.loads(message)
+            except ValueError:
+                continue
+            msg_type = msg.get("type")
+            if msg_type == "hello":
+                self.session_id = msg.get("session_id")
+                self.hello_event.set()
+            elif msg_type == "tts" and msg.get("state") == "stop":
+                self.tts_stop_event.set()
+            elif msg_type == "mcp":
+                await self._reply_mcp(msg.get("payload") or {})
+
+    async def _reply_mcp(self, payload):
+        method = payload.get("method")
+        if method == "initialize":
+            result = {
+                "protocolVersion": "2024-11-05",
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": "load-test-device", "version": "1.0.0"},
+            }
+        elif method == "tools/list":
+            result = {"tools": [MOCK_TOOL]}
+        elif method == "tools/call":
+            result = {"content": [{"type": "text", "text": '{"volume": 50}'}], "isError": False}
+        else:
+            return
+        await self.websocket.send(
+            json.dumps(
+                {
+                    "type": "mcp",
+                    "payload": {"jsonrpc": "2.0", "id": payload.get("id"), "result": result},
+                }
+            )
+        )
+
+
+class ResourceSampler:
+    """周期采样本进程的CPU、内存与线程数（服务端与模拟设备在同一进程内）"""
+
+    def __init__(self, interval=0.5):
+        self.process = psutil.Process()
+        self.interval = interval
+        self.rss_peak = 0
+        self.threads_peak = 0
+        self._task = None
+
+    async def _sample(self):
+        while True:
+            self.rss_peak = max(self.rss_peak, self.process.memory_info().rss)
+            self.threads_peak = max(self.threads_peak, self.process.num_threads())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.process.cpu_percent(None)
+        self._cpu_start = self.process.cpu_times()
+        self._wall_start = time.monotonic()
+        self._task = asyncio.create_task(self._sample())
+
+    def stop(self) -> dict:
+        self._task.cancel()
+        cpu = self.process.cpu_times()
+        wall = time.monotonic() - self._wall_start
+        cpu_seconds = (cpu.user - self._cpu_start.user) + (cpu.system - self._cpu_start.system)
+        rss = self.process.memory_info().rss
+        return {
+            "cpu_seconds": round(cpu_seconds, 2),
+            # 占用单个CPU核心的百分比
+            "cpu_percent": round(cpu_seconds / wall * 100, 1) if wall else 0.0,
+            "rss_mb": round(rss / 1024 / 1024, 1),
+            "rss_peak_mb": round(max(self.rss_peak, rss) / 1024 / 1024, 1),
+            "threads": self.process.num_threads(),
+            "threads_peak": max(self.threads_peak, self.process.num_threads()),
+        }
+
+
+def _server_stages() -> dict:
+    """服务端分阶段耗时（来自耗时追踪器）"""
+    from core.utils.tracing import get_tracer
+
+    stages = {}
+    for stage, provider, snapshot in get_tracer().get_snapshots():
+        quantiles = snapshot["quantiles"]
+        stages[f"{stage}/{provider}"] = {
+            "count": snapshot["count"],
+            "p50_ms": round(quantiles.get(0.5, 0) * 1000, 1),
+            "p99_ms": round(quantiles.get(0.99, 0) * 1000, 1),
+        }
+    return stages
+
+
+async def run_load_test(args) -> dict:
+    os.chdir(PROJECT_DIR)
+    config = build_config(args)
+    prepare_environment(config)
+
+    from core.websocket_server import WebSocketServer
+
+    utterances, silence_frames = load_utterances(args.vad_silence_ms)
+    if not utterances:
+        raise RuntimeError("config/assets 中的测试音频无法解码")
+
+    server = WebSocketServer(config)
+    server_task = asyncio.create_task(server.start())
+    url = f"ws://127.0.0.1:{config['server']['port']}/xiaozhi/v1/"
+    # 等待端口就绪
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", config["server"]["port"])
+            writer.close()
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+
+    stats = {
+        "latencies": [],
+        "frames_sent": 0,
+        "frames_received": 0,
+        "turns_completed": 0,
+        "turns_aborted": 0,
+        "turns_failed": 0,
+        "errors": [],
+    }
+    sampler = ResourceSampler()
+    sampler.start()
+    started = time.monotonic()
+
+    async def start_device(index):
+        # 设备在 ramp_seconds 内均匀上线
+        await asyncio.sleep(args.ramp_seconds * index / max(1, args.devices))
+        device = SimulatedDevice(index, url, utterances, silence_frames, stats, args)
+        await device.run()
+
+    try:
+        await asyncio.gather(*(start_device(i) for i in range(args.devices)))
+    finally:
+        duration = time.monotonic() - started
+        process = sampler.stop()
+        server_task.cancel()
+        try:
+            await server_task
+        except (asyncio.CancelledError, Exception):
+            pass
+
+    latencies = stats["latencies"]
+    return {
+        "devices": args.devices,
+        "turns_per_device": args.turns,
+        "duration_s": round(duration, 2),
+        "turns": {
+            "completed": stats["turns_completed"],
+            "aborted": stats["turns_aborted"],
+            "failed": stats["turns_failed"],
+        },
+        # 设备说完最后一帧到收到第一帧回复音频，包含VAD静默判定时长
+        "turn_latency_ms": {
+            "p50": round(_percentile(latencies, 0.5), 1),
+            "p90": round(_percentile(latencies, 0.9), 1),
+            "p99": round(_percentile(latencies, 0.99), 1),
+            "max": round(max(latencies), 1) if latencies else 0.0,
+            "mean": round(statistics.mean(latencies), 1) if latencies else 0.0,
+        },
+        "frames": {
+            "sent": stats["frames_sent"],
+            "received": stats["frames_received"],
+            "sent_per_s": round(stats["frames_sent"] / duration, 1) if duration else 0.0,
+            "received_per_s": round(stats["frames_received"] / duration, 1) if duration else 0.0,
+        },
+        "process": process,
+        "server_stages": _server_stages(),
+        "mock": {
+            "vad_silence_ms": args.vad_silence_ms,
+            "asr_ms": args.asr_ms,
+            "llm_first_token_ms": args.llm_first_token_ms,
+            "llm_token_ms": args.llm_token_ms,
+            "tts_ms": args.tts_ms,
+            "async_pipeline": args.pipeline,
+        },
+        "errors": stats["errors"][:20],
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--devices", type=int, default=20, help="模拟设备数")
+    parser.add_argument("--turns", type=int, default=3, help="每台设备的对话轮数")
+    parser.add_argument("--ramp-seconds", type=float, default=5, help="设备全部上线所用时间")
+    parser.add_argument("--think-ms", type=float, default=1000, help="两轮对话之间的最大随机间隔")
+    parser.add_argument("--abort-ratio", type=float, default=0.1, help="播放中途打断的轮次比例")
+    parser.add_argument("--timeout", type=float, default=30, help="等待回复的超时（秒）")
+    parser.add_argument("--vad-silence-ms", type=int, default=500)
+    parser.add_argument("--asr-ms", type=float, default=200)
+    parser.add_argument("--llm-first-token-ms", type=float, default=300)
+    parser.add_argument("--llm-token-ms", type=float, default=30)
+    parser.add_argument("--tts-ms", type=float, default=150)
+    parser.add_argument("--tts-ms-per-char", type=float, default=150)
+    parser.add_argument("--pipeline", action="store_true", help="开启异步流水线模式")
+    parser.add_argument("--port", type=int, default=0, help="WebSocket端口，默认随机空闲端口")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--output", help="JSON报告输出文件")
+    parser.add_argument("--max-p99-ms", type=float, default=0, help="p99超过该值或有失败轮次时返回非零退出码，用于回归门禁")
+    return parser
+
+
+def check_gate(report, args) -> bool:
+    if report["turns"]["failed"] or report["errors"]:
+        return False
+    return not args.max_p99_ms or report["turn_latency_ms"]["p99"] <= args.max_p99_ms
+
+
+async def run(args) -> bool:
+    report = await run_load_test(args)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return check_gate(report, args)
+
+
+# 为了performance_tester.py的调用需求
+async def main():
+    await run(build_parser().parse_args([]))
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(run(build_parser().parse_args())) else 1)
@@ -0,0 +1,150 @@
+import time
+import random
+import logging
+from tabulate import tabulate
+
+from core.utils import textUtils
+from core.utils.sentence_segmenter import (
+    SentenceSegmenter,
+    SENTENCE_PUNCTUATIONS,
+    FIRST_SEGMENT_PUNCTUATIONS,
+)
+
+# 设置全局日志级别为 WARNING
+logging.basicConfig(level=logging.WARNING)
+
+description = "流式文本分句性能测试（全文重扫与增量分句对比，统计每个token的CPU耗时）"
+
+SAMPLE_SENTENCES = [
+    "今天天气不错，适合出去走走。",
+    "你可以试试先把问题拆成几个小步骤，然后一步一步解决！",
+    "根据你的描述，我觉得可能是电源适配器的问题",
+    "第一，检查网络连接；第二，重启设备；第三，更新固件。",
+    "好的😊",
+    "这个问题很有意思：宇宙中到底有多少颗星星？",
+    "**注意**，操作之前请备份数据、关闭自动更新",
+]
+
+
+class LegacySegmenter:
+    """原有实现：每个token都拼接全部已输出文本，并对未处理部分逐个标点 rfind"""
+
+    def __init__(self):
+        self.tts_text_buff = []
+        self.processed_chars = 0
+        self.is_first_sentence = True
+
+    def feed(self, text):
+        self.tts_text_buff.append(text)
+        full_text = "".join(self.tts_text_buff)
+        current_text = full_text[self.processed_chars :]
+        last_punct_pos = -1
+        punctuations = (
+            FIRST_SEGMENT_PUNCTUATIONS if self.is_first_sentence else SENTENCE_PUNCTUATIONS
+        )
+        for punct in punctuations:
+            pos = current_text.rfind(punct)
+            if (pos != -1 and last_punct_pos == -1) or (
+                pos != -1 and pos < last_punct_pos
+            ):
+                last_punct_pos = pos
+        if last_punct_pos == -1:
+            return []
+        segment_text_raw = current_text[: last_punct_pos + 1]
+        self.processed_chars += len(segment_text_raw)
+        self.is_first_sentence = False
+        segment = textUtils.get_string_no_punctuation_or_emoji(segment_text_raw)
+        return [segment] if segment else []
+
+    def flush(self):
+        full_text = "".join(self.tts_text_buff)
+        return textUtils.get_string_no_punctuation_or_emoji(full_text[self.processed_chars :])
+
+
+class SegmenterPerformanceTester:
+    def __init__(self, token_count=4000, rounds=5, seed=42):
+        self.token_count = token_count
+        self.rounds = rounds
+        self.tokens = self._make_tokens(seed)
+        self.results = []
+
+    def _make_tokens(self, seed):
+        """模拟LLM流式输出：长回答按1~4个字符切分为token"""
+        rng = random.Random(seed)
+        text = ""
+        while len(text) < self.token_count * 3:
+            text += rng.choice(SAMPLE_SENTENCES)
+        tokens, pos = [], 0
+        while len(tokens) < self.token_count and pos < len(text):
+            size = rng.randint(1, 4)
+            tokens.append(text[pos : pos + size])
+            pos += size
+        return tokens
+
+    def _measure(self, name, factory):
+        cpu_times = []
+        segment_count = 0
+        first_token_index = None
+        for _ in range(self.rounds):
+            segmenter = factory()
+            segments = []
+            start = time.process_time()
+            for index, token in enumerate(self.tokens):
+                produced = segmenter.feed(token)
+                if produced and first_token_index is None:
+                    first_token_index = index + 1
+                segments.extend(produced)
+            tail = segmenter.flush()
+            cpu_times.append(time.process_time() - start)
+            if tail:
+                segments.append(tail)
+            segment_count = len(segments)
+        best = min(cpu_times)
+        self.results.append(
+            [
+                name,
+                f"{best * 1000:.1f}",
+                f"{best / len(self.tokens) * 1e6:.2f}",
+                segment_count,
+                f"{len(self.tokens) / segment_count:.1f}" if segment_count else "-",
+                first_token_index or "-",
+            ]
+        )
+
+    def run(self):
+        print(
+            f"开始测试：{len(self.tokens)} 个token，共 {sum(len(t) for t in self.tokens)} 字，"
+            f"每种方式重复 {self.rounds} 次取最小值..."
+        )
+        self._measure("全文重扫（原实现）", LegacySegmenter)
+        self._measure("增量分句", SentenceSegmenter)
+        self._measure(
+            "增量分句（后续分段合并至20字）", lambda: SentenceSegmenter(min_chars=20)
+        )
+        print(
+            tabulate(
+                self.results,
+                headers=[
+                    "方式",
+                    "总CPU耗时(ms)",
+                    "每token CPU(µs)",
+                    "分段数",
+                    "平均每段token数",
+                    "首段产出于第N个token",
+                ],
+                tablefmt="github",
+            )
+        )
+        print("\n测试说明:")
+        print("- 每token CPU：分句逻辑在单个token上的平均CPU耗时，不含TTS合成")
+        print("- 后续分段合并可减少TTS调用次数，首段仍按最短分句尽早产出")
+
+
+# 为了performance_tester.py的调用需求
+def main():
+    tester = SegmenterPerformanceTester()
+    tester.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import time
+import logging
+import statistics
+import numpy as np
+from tabulate import tabulate
+
+from core.utils.sentence_segmenter import SentenceSegmenter
+from core.utils.tracing import (
+    LatencyHistogram,
+    get_tracer,
+    trace_mark,
+    trace_span,
+    trace_vad_end,
+)
+
+# 设置全局日志级别为 WARNING
+logging.basicConfig(level=logging.WARNING)
+
+description = "分阶段耗时追踪开销测试（模拟一轮对话的服务端处理，对比开启与关闭追踪的耗时）"
+
+FRAME_SAMPLES = 960
+# 模拟一轮回复：LLM流式输出的分片数与下发的音频帧数
+LLM_CHUNKS = 200
+AUDIO_FRAMES = 100
+REPLY_TEXT = "好的，我来帮你查一下明天的天气。明天多云转晴，气温十五到二十二度，适合出门散步！"
+
+
+class _Conn:
+    def __init__(self):
+        self.session_id = "benchmark"
+        self.sentence_id = "sentence"
+        self.turn_trace = None
+
+
+class TracingPerformanceTester:
+    def __init__(self, turns=200, rounds=5):
+        self.turns = turns
+        self.rounds = rounds
+        self.tracer = get_tracer()
+        self.segmenter = SentenceSegmenter()
+        chunk = max(1, len(REPLY_TEXT) // 20)
+        pieces = [REPLY_TEXT[i : i + chunk] for i in range(0, len(REPLY_TEXT), chunk)]
+        self.chunks = (pieces * (LLM_CHUNKS // len(pieces) + 1))[:LLM_CHUNKS]
+        rng = np.random.default_rng(0)
+        self.frames = rng.normal(0, 3000, (AUDIO_FRAMES, FRAME_SAMPLES)).astype(np.float32)
+        self.window = np.hanning(FRAME_SAMPLES)
+
+    def _turn(self, conn, traced: bool):
+        """一轮对话的服务端计算：分句 + 逐帧频谱处理，traced 时在与线上相同的位置打点"""
+        if traced:
+            trace_vad_end(conn)
+            trace_mark(conn, "asr", "asr")
+            with trace_span("memory", "memory"):
+                pass
+        self.segmenter.reset()
+        for chunk in self.chunks:
+            if traced:
+                trace_mark(conn, "llm_first_token", "llm")
+            if self.segmenter.feed(chunk) and traced:
+                trace_mark(conn, "tts_first_segment", "tts")
+        for index, frame in enumerate(self.frames):
+            np.fft.irfft(np.fft.rfft(frame * self.window), FRAME_SAMPLES)
+            if traced and index == 0:
+                trace_mark(conn, "first_audio", "tts")
+
+    def _measure(self, traced: bool) -> float:
+        conn = _Conn()
+        start = time.perf_counter()
+        for _ in range(self.turns):
+            self._turn(conn, traced)
+        return (time.perf_counter() - start) * 1000 / self.turns
+
+    @staticmethod
+    def _per_call_ns(func, count=200000) -> float:
+        start = time.perf_counter()
+        for _ in range(count):
+            func()
+        return (time.perf_counter() - start) * 1e9 / count
+
+    def run(self):
+        print(
+            f"开始测试：每轮 {LLM_CHUNKS} 个LLM分片、{AUDIO_FRAMES} 帧音频，"
+            f"{self.turns} 轮 × {self.rounds} 次..."
+        )
+        baseline, traced = [], []
+        # 交替测量，减少CPU频率波动的影响
+        for _ in range(self.rounds):
+            baseline.append(self._measure(False))
+            traced.append(self._measure(True))
+        base_ms = statistics.median(baseline)
+        traced_ms = statistics.median(traced)
+        overhead = (traced_ms - base_ms) / base_ms * 100
+
+        conn = _Conn()
+        trace_vad_end(conn)
+        trace_mark(conn, "asr", "asr")
+        trace_mark(conn, "llm_first_token", "llm")
+        histogram = LatencyHistogram()
+
+        def full_turn():
+            trace_vad_end(conn)
+            for stage in ("asr", "intent", "llm_first_token", "tts_first_segment", "first_audio"):
+                trace_mark(conn, stage, "provider")
+
+        results = [
+            ["关闭追踪（每轮）", f"{base_ms:.3f} ms", "-"],
+            ["开启追踪（每轮）", f"{traced_ms:.3f} ms", f"{overhead:+.2f}%"],
+            ["已记录阶段的重复打点", f"{self._per_call_ns(lambda: trace_mark(conn, 'llm_first_token', 'llm')):.0f} ns", "-"],
+            ["直方图记录一次", f"{self._per_call_ns(lambda: histogram.record(0.123)):.0f} ns", "-"],
+            ["完整一轮打点（6个阶段）", f"{self._per_call_ns(full_turn, 20000) / 1000:.2f} µs", "-"],
+        ]
+        print(tabulate(results, headers=["场景", "耗时", "开销"], tablefmt="github"))
+        completed = self.tracer.get_snapshots()
+        print(f"\n已记录 {len(completed)} 个 (阶段, 服务商) 直方图，完成 {self.tracer.turns_completed} 轮")
+        print("\n测试说明:")
+        print("- 每轮的服务端计算只包含分句与逐帧频谱处理，不含网络等待，实际线上的相对开销更低")
+        print("- 开销 = (开启追踪耗时 - 关闭追踪耗时) / 关闭追踪耗时，取多次测量的中位数")
+
+
+# 为了performance_tester.py的调用需求
+def main():
+    tester = TracingPerformanceTester()
+    tester.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+
+from tabulate import tabulate
+
+from config.settings import load_config
+from core.utils.audio_decoder import decode_to_pcm16
+
+description = "VOSK增量识别并发压测（多路同时说话，统计中间结果推送与说话结束到最终结果的耗时）"
+
+SAMPLE_RATE = 16000
+FRAME_MS = 60
+FRAME_BYTES = SAMPLE_RATE * 2 * FRAME_MS // 1000
+TEST_ASSETS = ("wakeup_words.wav", "bind_code.wav", "bind_not_found.wav")
+
+
+class _RecordingWebSocket:
+    """记录推送给设备的消息"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, message):
+        self.messages.append((time.perf_counter(), json.loads(message)))
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.session_id = str(uuid.uuid4())
+        self.websocket = _RecordingWebSocket()
+
+
+class VoskStreamTester:
+    def __init__(self, streams: int = 50, config_key: str = "VoskASR"):
+        self.streams = streams
+        self.config_key = config_key
+        self.asr_config = load_config().get("ASR", {}).get(config_key, {})
+        self.utterances = self._load_utterances()
+
+    @staticmethod
+    def _load_utterances():
+        audio_root = os.path.join(os.getcwd(), "config", "assets")
+        utterances = []
+        for name in TEST_ASSETS:
+            path = os.path.join(audio_root, name)
+            if not os.path.exists(path):
+                continue
+            pcm = decode_to_pcm16(path, "wav", SAMPLE_RATE)
+            if pcm:
+                utterances.append((name, pcm))
+        return utterances
+
+    async def _run_stream(self, provider, index: int, expected: dict):
+        name, pcm = self.utterances[index % len(self.utterances)]
+        conn = _FakeConnection()
+        # 错开起始时间，模拟设备陆续开口
+        await asyncio.sleep(index * 0.01)
+        session = provider._start_session(conn)
+        start = time.perf_counter()
+        for offset in range(0, len(pcm), FRAME_BYTES):
+            session.feed(pcm[offset : offset + FRAME_BYTES])
+            # 按实时速率送入音频
+            await asyncio.sleep(FRAME_MS / 1000)
+        speech_end = time.perf_counter()
+        text = await session.finish(pcm)
+        final_ms = (time.perf_counter() - speech_end) * 1000
+        provider._sessions.pop(conn.session_id, None)
+
+        partials = [sent for sent, message in conn.websocket.messages if message["type"] == "stt"]
+        return {
+            "final_ms": final_ms,
+            "partials": len(partials),
+            "first_partial_ms": (partials[0] - start) * 1000 if partials else None,
+            "match": text == expected[name],
+        }
+
+    async def run(self):
+        if not self.asr_config:
+            print(f"未找到 ASR.{self.config_key} 配置，请先在配置文件中设置VOSK模型路径")
+            return
+        if not self.utterances:
+            print("未找到测试音频")
+            return
+        from core.providers.asr.vosk import ASRProvider
+
+        provider = ASRProvider(self.asr_config, delete_audio_file=True)
+        loop = asyncio.get_running_loop()
+        # 整句识别结果作为基准，增量识别的最终结果应与之一致
+        expected = {}
+        for name, pcm in self.utterances:
+            expected[name] = await loop.run_in_executor(
+                provider.executor, provider._decode_once, pcm
+            )
+
+        print(f"开始测试：{self.streams} 路并发，解码线程数 {provider.executor._max_workers}...")
+        results = await asyncio.gather(
+            *(self._run_stream(provider, i, expected) for i in range(self.streams))
+        )
+        provider.executor.shutdown(wait=True)
+
+        final_ms = sorted(r["final_ms"] for r in results)
+        first_partial = sorted(
+            r["first_partial_ms"] for r in results if r["first_partial_ms"] is not None
+        )
+        mismatched = sum(1 for r in results if not r["match"])
+        print(
+            tabulate(
+                [
+                    [
+                        self.streams,
+                        f"{statistics.mean(final_ms):.1f}",
+                        f"{final_ms[len(final_ms) // 2]:.1f}",
+                        f"{final_ms[max(0, int(len(final_ms) * 0.95) - 1)]:.1f}",
+                        f"{statistics.mean(r['partials'] for r in results):.1f}",
+                        f"{first_partial[len(first_partial) // 2]:.1f}" if first_partial else "-",
+                        mismatched,
+                    ]
+                ],
+                headers=[
+                    "并发路数",
+                    "最终结果平均(ms)",
+                    "P50(ms)",
+                    "P95(ms)",
+                    "每路中间结果数",
+                    "首个中间结果P50(ms)",
+                    "与整句识别不一致",
+                ],
+                tablefmt="github",
+            )
+        )
+        print("\n测试说明:")
+        print("- 最终结果耗时：从最后一帧音频送入到拿到最终文本的时间，增量识别下应接近0")
+        print("- 中间结果通过stt消息推送给设备，每路都应收到")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--streams", type=int, default=50, help="并发说话的路数")
+    parser.add_argument("--config-key", default="VoskASR", help="配置文件中ASR的名称")
+    return parser
+
+
+# 为了performance_tester.py的调用需求
+async def main():
+    await VoskStreamTester().run()
+
+
+if __name__ == "__main__":
+    args = build_parser().parse_args()
+    asyncio.run(VoskStreamTester(args.streams, args.config_key).run())
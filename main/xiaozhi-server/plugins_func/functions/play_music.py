@@ -2,9 +2,10 @@ import os
 import re
 import time
 import random
-import difflib
+import asyncio
 import traceback
-from pathlib import Path
+from core.utils.music_index import MusicIndex
+from core.utils.shared_store import get_shared_store
 from core.providers.tts.dto.dto import TTSMessageDTO, SentenceType, ContentType
 from plugins_func.register import register_function, ToolType, ActionResponse, Action
 from typing import TYPE_CHECKING
@@ -15,6 +16,8 @@ if TYPE_CHECKING:
 TAG = __name__
 
 MUSIC_CACHE = {}
+# 首次加载曲库时只由一个连接扫描目录，其余连接等待结果
+_music_init_lock = None
 
 play_music_function_desc = {
     "type": "function",
@@ -62,68 +65,66 @@ def _extract_song_name(text):
     return None
 
 
-def _find_best_match(potential_song, music_files):
+def _find_best_match(potential_song, music_index: MusicIndex):
     """查找最匹配的歌曲"""
-    best_match = None
-    highest_ratio = 0
-
-    for music_file in music_files:
-        song_name = os.path.splitext(music_file)[0]
-        ratio = difflib.SequenceMatcher(None, potential_song, song_name).ratio()
-        if ratio > highest_ratio and ratio > 0.4:
-            highest_ratio = ratio
-            best_match = music_file
-    return best_match
-
-
-def get_music_files(music_dir, music_ext):
-    music_dir = Path(music_dir)
-    music_files = []
-    music_file_names = []
-    for file in music_dir.rglob("*"):
-        # 判断是否是文件
-        if file.is_file():
-            # 获取文件扩展名
-            ext = file.suffix.lower()
-            # 判断扩展名是否在列表中
-            if ext in music_ext:
-                # 添加相对路径
-                music_files.append(str(file.relative_to(music_dir)))
-                music_file_names.append(
-                    os.path.splitext(str(file.relative_to(music_dir)))[0]
-                )
-    return music_files, music_file_names
-
-
-def initialize_music_handler(conn: "ConnectionHandler"):
-    global MUSIC_CACHE
-    if MUSIC_CACHE == {}:
+    return music_index.best_match(potential_song)
+
+
+async def initialize_music_handler(conn: "ConnectionHandler"):
+    global MUSIC_CACHE, _music_init_lock
+    if MUSIC_CACHE:
+        return MUSIC_CACHE
+    if _music_init_lock is None:
+        _music_init_lock = asyncio.Lock()
+    async with _music_init_lock:
+        if MUSIC_CACHE:
+            return MUSIC_CACHE
+        music_cache = {}
         plugins_config = conn.config.get("plugins", {})
         if "play_music" in plugins_config:
-            MUSIC_CACHE["music_config"] = plugins_config["play_music"]
-            MUSIC_CACHE["music_dir"] = os.path.abspath(
-                MUSIC_CACHE["music_config"].get("music_dir", "./music")  # 默认路径修改
+            music_cache["music_config"] = plugins_config["play_music"]
+            music_cache["music_dir"] = os.path.abspath(
+                music_cache["music_config"].get("music_dir", "./music")  # 默认路径修改
             )
-            MUSIC_CACHE["music_ext"] = MUSIC_CACHE["music_config"].get(
+            music_cache["music_ext"] = music_cache["music_config"].get(
                 "music_ext", (".mp3", ".wav", ".p3")
             )
-            MUSIC_CACHE["refresh_time"] = MUSIC_CACHE["music_config"].get(
+            music_cache["refresh_time"] = music_cache["music_config"].get(
                 "refresh_time", 60
             )
+            music_cache["prompt_top_k"] = int(
+                music_cache["music_config"].get("prompt_top_k", 20)
+            )
         else:
-            MUSIC_CACHE["music_dir"] = os.path.abspath("./music")
-            MUSIC_CACHE["music_ext"] = (".mp3", ".wav", ".p3")
-            MUSIC_CACHE["refresh_time"] = 60
-        # 获取音乐文件列表
-        MUSIC_CACHE["music_files"], MUSIC_CACHE["music_file_names"] = get_music_files(
-            MUSIC_CACHE["music_dir"], MUSIC_CACHE["music_ext"]
+            music_cache["music_dir"] = os.path.abspath("./music")
+            music_cache["music_ext"] = (".mp3", ".wav", ".p3")
+            music_cache["refresh_time"] = 60
+            music_cache["prompt_top_k"] = 20
+        # 加载持久化的音乐索引并增量刷新；扫描目录、读取每首曲目的元数据在线程中执行，不阻塞事件循环
+        music_index = await asyncio.to_thread(
+            MusicIndex, music_cache["music_dir"], music_cache["music_ext"]
         )
-        MUSIC_CACHE["scan_time"] = time.time()
+        await asyncio.to_thread(music_index.refresh)
+        music_cache["music_index"] = music_index
+        music_cache["scan_time"] = time.time()
+        MUSIC_CACHE.update(music_cache)
     return MUSIC_CACHE
 
 
+async def get_music_prompt_candidates(conn: "ConnectionHandler", text: str) -> list:
+    """返回与用户输入最相关的前K首歌名，用于意图识别提示词，避免把整个曲库放进提示词"""
+    music_config = await initialize_music_handler(conn)
+    music_index = music_config["music_index"]
+    top_k = music_config["prompt_top_k"]
+    # 召回与打分在线程中执行，曲库较大时不阻塞事件循环
+    results = await asyncio.to_thread(music_index.search, text, top_k)
+    if results:
+        return [os.path.splitext(rel_path)[0] for rel_path, _ in results]
+    return music_index.names[:top_k]
+
+
 async def handle_music_command(conn: "ConnectionHandler", text):
-    initialize_music_handler(conn)
+    await initialize_music_handler(conn)
     global MUSIC_CACHE
 
     """处理音乐播放指令"""
@@ -133,15 +134,24 @@ async def handle_music_command(conn: "ConnectionHandler", text):
     # 尝试匹配具体歌名
     if os.path.exists(MUSIC_CACHE["music_dir"]):
         if time.time() - MUSIC_CACHE["scan_time"] > MUSIC_CACHE["refresh_time"]:
-            # 刷新音乐文件列表
-            MUSIC_CACHE["music_files"], MUSIC_CACHE["music_file_names"] = (
-                get_music_files(MUSIC_CACHE["music_dir"], MUSIC_CACHE["music_ext"])
-            )
             MUSIC_CACHE["scan_time"] = time.time()
+            # 每个刷新周期只由一个进程增量刷新（只重新列举有变化的目录）并写入索引文件，
+            # 多进程部署时其余工作进程直接加载该文件
+            if get_shared_store().add(
+                "music_index",
+                MUSIC_CACHE["music_dir"],
+                os.getpid(),
+                ttl=MUSIC_CACHE["refresh_time"],
+            ):
+                await asyncio.to_thread(MUSIC_CACHE["music_index"].refresh)
+            else:
+                await asyncio.to_thread(MUSIC_CACHE["music_index"].reload_if_changed)
 
         potential_song = _extract_song_name(clean_text)
         if potential_song:
-            best_match = _find_best_match(potential_song, MUSIC_CACHE["music_files"])
+            best_match = await asyncio.to_thread(
+                _find_best_match, potential_song, MUSIC_CACHE["music_index"]
+            )
             if best_match:
                 conn.logger.bind(tag=TAG).info(f"找到最匹配的歌曲: {best_match}")
                 await play_local_music(conn, specific_file=best_match)
@@ -183,10 +193,11 @@ async def play_local_music(conn: "ConnectionHandler", specific_file=None):
             selected_music = specific_file
             music_path = os.path.join(MUSIC_CACHE["music_dir"], specific_file)
         else:
-            if not MUSIC_CACHE["music_files"]:
+            music_files = MUSIC_CACHE["music_index"].files
+            if not music_files:
                 conn.logger.bind(tag=TAG).error("未找到MP3音乐文件")
                 return
-            selected_music = random.choice(MUSIC_CACHE["music_files"])
+            selected_music = random.choice(music_files)
             music_path = os.path.join(MUSIC_CACHE["music_dir"], selected_music)
 
         if not os.path.exists(music_path):
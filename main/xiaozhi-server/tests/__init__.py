@@ -0,0 +1,22 @@
+"""
+服务端单元测试
+
+运行方式（在 main/xiaozhi-server 目录下）：
+    python -m unittest discover -s tests -t .
+
+以 config.yaml 为配置写入配置缓存，setup_logging 等无需 data/.config.yaml
+"""
+
+import os
+
+from config import settings
+from config.config_loader import read_config
+from core.utils.cache.manager import cache_manager, CacheType
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_config = read_config(os.path.join(PROJECT_DIR, "config.yaml"))
+_config["read_config_from_api"] = False
+_config["log"]["log_level"] = "WARNING"
+settings.config_file_valid = True
+cache_manager.set(CacheType.CONFIG, "main_config", _config)
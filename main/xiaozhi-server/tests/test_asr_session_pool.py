@@ -0,0 +1,169 @@
+import time
+import asyncio
+import logging
+import unittest
+
+import websockets
+
+import tests  # noqa: F401  写入测试配置
+from core.providers.asr import session_pool
+from core.providers.asr.session_pool import StreamingSessionPool
+
+# 关闭握手被拒绝时websockets打印的无关异常日志
+logging.getLogger("websockets").setLevel(logging.CRITICAL)
+
+
+class StubVendor:
+    """本地模拟的流式ASR服务端，统计握手次数，可指定前若干次握手失败"""
+
+    def __init__(self, fail_handshakes: int = 0):
+        self.fail_handshakes = fail_handshakes
+        self.handshakes = 0
+        self.server = None
+        self.url = None
+
+    async def _process_request(self, connection, request):
+        self.handshakes += 1
+        if self.handshakes <= self.fail_handshakes:
+            return connection.respond(503, "busy\n")
+        return None
+
+    async def _handler(self, ws):
+        async for _ in ws:
+            pass
+
+    async def start(self):
+        self.server = await websockets.serve(
+            self._handler, "127.0.0.1", 0, process_request=self._process_request
+        )
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/asr"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def connect(self):
+        return await websockets.connect(self.url, ping_interval=None, close_timeout=1)
+
+
+async def wait_until(predicate, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("等待条件超时")
+        await asyncio.sleep(0.02)
+
+
+class StreamingSessionPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.vendor = StubVendor()
+        await self.vendor.start()
+        self.pools = []
+
+    async def asyncTearDown(self):
+        for pool in self.pools:
+            await pool.close()
+        await self.vendor.stop()
+
+    def make_pool(self, **kwargs) -> StreamingSessionPool:
+        pool = StreamingSessionPool("stub", self.vendor.connect, **kwargs)
+        self.pools.append(pool)
+        return pool
+
+    async def test_warm_session_is_reused(self):
+        pool = self.make_pool(size=1)
+        # 首次取用没有预热会话，当场建连并触发后台预热
+        first = await pool.acquire()
+        await wait_until(lambda: pool.get_stats()["idle"] == 1)
+
+        warm = await pool.acquire()
+        self.assertIsNot(warm, first)
+        await pool.release(first)
+        await pool.release(warm, reuse=True)
+        again = await pool.acquire()
+
+        self.assertIs(again, warm)
+        stats = pool.get_stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["recycled"], 1)
+        await pool.release(again)
+
+    async def test_idle_session_expires(self):
+        pool = self.make_pool(size=1, idle_ttl=0.3)
+        await pool.release(await pool.acquire())
+        await wait_until(lambda: pool.get_stats()["idle"] == 1)
+        stale = pool._idle[0][0]
+
+        await asyncio.sleep(0.5)
+        ws = await pool.acquire()
+
+        self.assertIsNot(ws, stale)
+        self.assertGreaterEqual(pool.get_stats()["discarded"], 1)
+        await wait_until(lambda: stale.state is websockets.protocol.State.CLOSED)
+        await pool.release(ws)
+
+    async def test_failed_handshake_is_refilled(self):
+        await self.vendor.stop()
+        self.vendor = StubVendor(fail_handshakes=2)
+        await self.vendor.start()
+        pool = self.make_pool(size=1)
+
+        # 第一次取用时建连失败，异常交给调用方
+        with self.assertRaises(Exception):
+            await pool.acquire()
+        # 后台预热同样失败一次，退避后重试成功补足
+        await wait_until(lambda: pool.get_stats()["idle"] == 1)
+        self.assertEqual(self.vendor.handshakes, 3)
+
+        ws = await pool.acquire()
+        self.assertEqual(pool.get_stats()["hits"], 1)
+        await pool.release(ws)
+
+    async def test_no_rehandshake_without_demand(self):
+        pool = self.make_pool(size=1, idle_ttl=0.2, demand_window=0.5)
+        await pool.release(await pool.acquire())
+        await wait_until(lambda: pool._maintainer.done(), timeout=3.0)
+        handshakes = self.vendor.handshakes
+
+        await asyncio.sleep(0.6)
+        self.assertEqual(self.vendor.handshakes, handshakes)
+        self.assertEqual(pool.get_stats()["idle"], 0)
+
+        # 再次取用后恢复预热
+        await pool.release(await pool.acquire())
+        await wait_until(lambda: pool.get_stats()["idle"] == 1)
+
+
+class SessionPoolRegistryTest(unittest.TestCase):
+    def test_pools_are_dropped_with_their_loop(self):
+        async def acquire_pool():
+            pool = session_pool.get_session_pool(
+                ("stub_registry", "ws://127.0.0.1:1"), None, size=0
+            )
+            self.assertIs(
+                pool,
+                session_pool.get_session_pool(
+                    ("stub_registry", "ws://127.0.0.1:1"), None, size=0
+                ),
+            )
+            return pool
+
+        first = asyncio.run(acquire_pool())
+        second = asyncio.run(acquire_pool())
+
+        # 每个事件循环各自一个池，已关闭事件循环的池不再保留
+        self.assertIsNot(first, second)
+        session_pool.get_session_pool_stats()
+        self.assertFalse(
+            any(
+                pool in (first, second)
+                for loop_pools in session_pool._pools.values()
+                for pool in loop_pools.values()
+            )
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import threading
+import unittest
+
+import tests  # noqa: F401  写入测试配置
+from core.utils.provider_registry import ProviderRegistry
+
+
+class StubProvider:
+    SHAREABLE = True
+
+    def __init__(self):
+        self.cleaned = threading.Event()
+
+    def cleanup(self):
+        self.cleaned.set()
+
+
+class ProviderRegistryRetireTest(unittest.TestCase):
+    def setUp(self):
+        self.registry = ProviderRegistry(idle_ttl=600)
+
+    def test_retired_instance_waits_for_connection_lease(self):
+        server_leases, conn_leases = [], []
+        vad = self.registry.acquire("vad", "stub", {"a": 1}, StubProvider, server_leases)
+        # 连接直接复用服务端的公共实例
+        self.assertTrue(self.registry.lease_instance(vad, conn_leases))
+
+        # 配置更新：服务端归还旧实例，连接仍在使用
+        self.registry.release_all(server_leases, retire=True)
+        self.assertFalse(vad.cleaned.wait(0.2))
+        self.assertEqual(self.registry.get_stats()["vad"]["instances"], 1)
+
+        # 连接关闭后立即释放
+        self.registry.release_all(conn_leases)
+        self.assertTrue(vad.cleaned.wait(2))
+        self.assertEqual(self.registry.get_stats()["vad"]["instances"], 0)
+
+    def test_lease_instance_does_not_revive_retired_instance(self):
+        server_leases, first, second = [], [], []
+        asr = self.registry.acquire("asr", "stub", {"a": 1}, StubProvider, server_leases)
+        self.registry.lease_instance(asr, first)
+        self.registry.release_all(server_leases, retire=True)
+        # 配置更新前建立、稍后才开始使用旧实例的连接
+        self.registry.lease_instance(asr, second)
+        self.registry.release_all(first)
+        self.assertFalse(asr.cleaned.wait(0.2))
+        self.registry.release_all(second)
+        self.assertTrue(asr.cleaned.wait(2))
+
+    def test_lease_instance_ignores_unregistered(self):
+        leases = []
+        self.assertFalse(self.registry.lease_instance(StubProvider(), leases))
+        self.assertFalse(self.registry.lease_instance(None, leases))
+        self.assertEqual(leases, [])
+
+
+if __name__ == "__main__":
+    unittest.main()